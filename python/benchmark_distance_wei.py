@@ -0,0 +1,76 @@
+"""Time ``distance_wei`` against the ``distance_wei.m`` port as networks grow.
+
+Run from the repo root::
+
+    uv run python python/benchmark_distance_wei.py
+    uv run python python/benchmark_distance_wei.py --sizes 64 256 1024 --density 0.2
+
+For each size, builds a random symmetric weighted network at the given edge
+density (weights in (0, 1], as Step 3 leaves them), converts it to lengths the
+way Step 4 does, and reports the best-of-``--repeats`` time of the compiled
+engine and of the reference port, whether their distance matrices are
+bit-identical, and the resulting ``efficiency_wei_local`` time — the call that
+runs ``distance_wei`` once per node neighbourhood. The reference is skipped
+above ``--reference-max`` nodes, where it takes minutes per call.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+from meanap.pipeline import network_metrics as nm  # noqa: E402
+
+
+def _network(n: int, density: float, rng: np.random.Generator) -> np.ndarray:
+    upper = np.triu(rng.random((n, n)) * (rng.random((n, n)) < density), 1)
+    return upper + upper.T
+
+
+def _best_of(fn, repeats: int) -> tuple[float, object]:
+    best, out = np.inf, None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[32, 64, 128, 256, 512, 1024])
+    ap.add_argument("--density", type=float, default=0.3)
+    ap.add_argument("--repeats", type=int, default=3)
+    ap.add_argument("--reference-max", type=int, default=256)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'n':>6} {'engine':>10} {'reference':>11} {'speed-up':>9} {'same':>5} {'Eloc':>10}")
+    all_same = True
+    for n in args.sizes:
+        w = _network(n, args.density, rng)
+        length_mat = nm.weight_conversion_lengths(w)
+        t_engine, d_engine = _best_of(lambda: nm.distance_wei(length_mat), args.repeats)
+        t_eloc, _ = _best_of(
+            lambda: nm.efficiency_wei_local(nm.weight_conversion_normalize(w)), 1)
+        if n <= args.reference_max:
+            t_ref, d_ref = _best_of(lambda: nm._distance_wei_reference(length_mat), 1)
+            same = bool(np.array_equal(d_engine, d_ref))
+            all_same &= same
+            ref_col, speedup, same_col = f"{t_ref:10.3f}s", f"{t_ref / t_engine:8.0f}×", str(same)
+        else:
+            ref_col, speedup, same_col = f"{'—':>11}", f"{'—':>9}", "—"
+        print(f"{n:>6} {t_engine:9.4f}s {ref_col} {speedup} {same_col:>5} {t_eloc:9.3f}s")
+    return 0 if all_same else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
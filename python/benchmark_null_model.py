@@ -0,0 +1,87 @@
+"""Time ``null_model_und_sign`` against its list-based port as networks grow.
+
+Run from the repo root::
+
+    uv run python python/benchmark_null_model.py
+    uv run python python/benchmark_null_model.py --sizes 60 250 --density 0.2
+
+For each size, builds a random symmetric weighted network at the given edge
+density and reports the best-of-``--repeats`` time of the compiled
+implementation and of ``_null_model_und_sign_reference``, and whether the two
+return the identical network from the same seed — they draw the same random
+numbers in the same order, so they must. ``participation_coef_norm`` makes 100
+of these per (recording, lag). The reference is skipped above
+``--reference-max`` nodes; at 1000 it already takes several minutes a call.
+Both include the ``randmio_und_signed`` rewiring they share (compiled in
+both), which is most of the compiled time at small sizes.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+from meanap.pipeline import null_models  # noqa: E402
+
+
+def _network(n: int, density: float, rng: np.random.Generator) -> np.ndarray:
+    upper = np.triu(rng.random((n, n)) * (rng.random((n, n)) < density), 1)
+    return upper + upper.T
+
+
+def _best_of(fn, repeats: int) -> tuple[float, object]:
+    best, out = np.inf, None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[60, 250, 1000])
+    ap.add_argument("--density", type=float, default=0.3)
+    ap.add_argument("--repeats", type=int, default=3)
+    ap.add_argument("--reference-max", type=int, default=1000)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    if not null_models._HAVE_NUMBA:
+        print("numba is not installed — null_model_und_sign *is* the reference here.")
+        return 1
+
+    rng = np.random.default_rng(args.seed)
+    # Compile outside the timings.
+    null_models.null_model_und_sign(_network(8, 0.5, rng), rng=np.random.default_rng(0))
+
+    print(f"{'n':>6} {'edges':>8} {'compiled':>10} {'reference':>11} {'speed-up':>9} {'same':>5}")
+    all_same = True
+    for n in args.sizes:
+        w = _network(n, args.density, rng)
+        edges = np.count_nonzero(np.triu(w))
+        t_new, r_new = _best_of(
+            lambda: null_models.null_model_und_sign(w, rng=np.random.default_rng(args.seed)),
+            args.repeats)
+        if n <= args.reference_max:
+            t_ref, r_ref = _best_of(
+                lambda: null_models._null_model_und_sign_reference(
+                    w, rng=np.random.default_rng(args.seed)), 1)
+            same = bool(np.array_equal(r_new, r_ref))
+            all_same &= same
+            ref_col, speedup, same_col = f"{t_ref:10.3f}s", f"{t_ref / t_new:8.1f}×", str(same)
+        else:
+            ref_col, speedup, same_col = f"{'—':>11}", f"{'—':>9}", "—"
+        print(f"{n:>6} {edges:>8} {t_new:9.4f}s {ref_col} {speedup} {same_col:>5}")
+    return 0 if all_same else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
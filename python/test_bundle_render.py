@@ -729,7 +729,7 @@ def _gallery_cache_checks() -> list[Check]:
                 checks.append(("a restyled view is a separate entry", not cached3, ""))
 
                 # A partial render must not be served.
-                key = cache_key(bundle_identity(ctx.root), "network",
+                key = cache_key(ctx.identity(), "network",
                                 fmt="png", dpi=DEFAULT_THUMBNAIL_DPI)
                 (cache.path_for(key) / ".complete").unlink()
                 checks.append(("an incomplete entry counts as a miss",
@@ -741,9 +741,265 @@ def _gallery_cache_checks() -> list[Check]:
             shutil.copy(bundle_path, twin)
             checks.append(("bundle identity follows content, not filename",
                            bundle_identity(bundle_path) == bundle_identity(twin), ""))
+            checks.append(("the context is keyed on the bundle file, not its extracted copy",
+                           ctx.identity() == bundle_identity(twin), ""))
+            checks.append(("the zip-directory fingerprint follows content too",
+                           bundle_identity(bundle_path, fast=True)
+                           == bundle_identity(twin, fast=True), ""))
             twin.write_bytes(twin.read_bytes() + b"x")
             checks.append(("…and changes when the bytes change",
                            bundle_identity(bundle_path) != bundle_identity(twin), ""))
+
+            # Identity is remembered per file state: an unchanged file is not
+            # re-read, and a rewritten one is.
+            import meanap.pipeline.render_cache as render_cache
+            reads = []
+            real_digest = render_cache._content_digest
+            render_cache._content_digest = lambda p: reads.append(p) or real_digest(p)
+            try:
+                before = bundle_identity(twin)
+                checks.append(("an unchanged bundle is not hashed again", not reads, ""))
+                twin.write_bytes(bundle_path.read_bytes())
+                after = bundle_identity(twin)
+                checks.append(("a rewritten bundle is hashed again",
+                               len(reads) == 1 and after == bundle_identity(bundle_path)
+                               and after != before, ""))
+            finally:
+                render_cache._content_digest = real_digest
+    return checks
+
+
+def _persistent_cache_checks() -> list[Check]:
+    """The per-user render cache: shared, bounded, and never half an entry.
+
+    It outlives a viewer and is shared by every viewer of the same user, so
+    the failure modes are a second process seeing an entry mid-render, and a
+    cache that grows until the disk is full.
+    """
+    import os
+    import time
+
+    from meanap.pipeline.render_cache import RenderCache, default_cache_dir
+
+    checks: list[Check] = []
+
+    def render_bytes(n: int):
+        def render(dest: Path) -> list[Path]:
+            out = dest / "sub" / "fig.png"
+            out.parent.mkdir(parents=True)
+            out.write_bytes(b"x" * n)
+            return [out]
+        return render
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "cache"
+        first = RenderCache.persistent(root, budget_bytes=2500)
+        files, cached = first.get_or_render("a", render_bytes(1000))
+        checks.append(("an entry's files are served from its final place",
+                       files == [root / "a" / "sub" / "fig.png"] and files[0].exists(),
+                       f"{files}"))
+
+        # Another viewer (another instance, as another process would have).
+        second = RenderCache.persistent(root, budget_bytes=2500)
+        _, cached = second.get_or_render("a", render_bytes(1000))
+        checks.append(("a second viewer hits the first one's entry", cached, ""))
+        checks.append(("nothing staged is left beside the entries",
+                       not [p for p in root.iterdir() if p.name.endswith(".part")], ""))
+
+        def fail(dest: Path):
+            (dest / "half.png").write_bytes(b"x")
+            raise RuntimeError("render died")
+        try:
+            second.put("dead", fail)
+        except RuntimeError:
+            pass
+        checks.append(("a failed render leaves no entry and no staging",
+                       second.get("dead") is None
+                       and not [p for p in root.iterdir() if p.name.startswith(".dead.")], ""))
+
+        # Recency: touch "a" so "b" is the least recently used when "c" lands.
+        second.put("b", render_bytes(1000))
+        old = time.time() - 100
+        os.utime(root / "b" / ".complete", (old, old))
+        os.utime(root / "a" / ".complete", (old - 100, old - 100))
+        second.get("a")
+        second.put("c", render_bytes(1000))
+        checks.append(("the budget evicts the least recently used entry",
+                       second.get("b") is None and second.get("a") is not None
+                       and second.get("c") is not None, f"{sorted(p.name for p in root.iterdir())}"))
+
+        stats = second.stats()
+        checks.append(("the index reports size without walking the tree",
+                       stats["entries"] == 2 and stats["bytes"] == 2000, f"{stats}"))
+        checks.append(("…and counts hits and misses",
+                       stats["hits"] >= 3 and stats["misses"] >= 2, f"{stats}"))
+        second.close()
+        third = RenderCache.persistent(root, budget_bytes=2500)
+        checks.append(("the counts survive the viewer closing",
+                       third.stats()["hits"] == stats["hits"], f"{third.stats()}"))
+        (root / "index.json").write_text("{not json")
+        checks.append(("a damaged index is rebuilt from the entries",
+                       third.stats()["bytes"] == 2000, f"{third.stats()}"))
+
+        os.environ["MEANAP_RENDER_CACHE"], previous = str(root), os.environ.get(
+            "MEANAP_RENDER_CACHE")
+        try:
+            checks.append(("the cache directory can be redirected",
+                           default_cache_dir() == root, f"{default_cache_dir()}"))
+        finally:
+            if previous is None:
+                del os.environ["MEANAP_RENDER_CACHE"]
+            else:
+                os.environ["MEANAP_RENDER_CACHE"] = previous
+
+    # Two viewer processes filling one directory at once: neither may drop
+    # the other's entries from the index, or the budget undercounts.
+    import multiprocessing as mp
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "cache"
+        RenderCache.persistent(root)
+        procs = [mp.get_context("spawn").Process(target=_fill_cache, args=(str(root), name, 15))
+                 for name in ("p", "q")]
+        for proc in procs:
+            proc.start()
+        for proc in procs:
+            proc.join()
+        stats = RenderCache.persistent(root).stats()
+        checks.append(("two processes writing at once keep every entry in the index",
+                       all(p.exitcode == 0 for p in procs)
+                       and stats["entries"] == 30 and stats["bytes"] == 30 * 100, f"{stats}"))
+
+    from meanap.pipeline import render_cache
+    from meanap.pipeline.render_cache import cache_key
+
+    before = cache_key("bundle", "family")
+    version, render_cache.RENDER_CACHE_VERSION = (render_cache.RENDER_CACHE_VERSION,
+                                                  render_cache.RENDER_CACHE_VERSION + 1)
+    try:
+        after = cache_key("bundle", "family")
+    finally:
+        render_cache.RENDER_CACHE_VERSION = version
+    checks.append(("a renderer change gives every figure a new key", before != after, ""))
+    return checks
+
+
+def _fill_cache(root: str, prefix: str, n: int) -> None:
+    """Put *n* entries into the cache at *root* — one viewer process's share."""
+    from meanap.pipeline.render_cache import RenderCache
+
+    cache = RenderCache.persistent(root)
+
+    def render(dest: Path) -> list[Path]:
+        out = dest / "fig.png"
+        out.write_bytes(b"x" * 100)
+        return [out]
+    for i in range(n):
+        cache.put(f"{prefix}{i}", render)
+
+
+def _single_flight_checks() -> list[Check]:
+    """Concurrent requests for one cold figure render it once.
+
+    A viewer page asks for every thumbnail at once; each figure must be drawn
+    by one request while the rest wait, and the render cap must hold however
+    many distinct figures are requested together.
+    """
+    import threading
+    import time
+
+    from meanap.pipeline.render_cache import RenderCache
+
+    checks: list[Check] = []
+    lock = threading.Lock()
+    calls: list[str] = []
+    live = [0, 0]  # current, peak
+
+    def slow_render(name: str, delay: float = 0.2):
+        def render(dest: Path) -> list[Path]:
+            with lock:
+                calls.append(name)
+                live[0] += 1
+                live[1] = max(live[1], live[0])
+            time.sleep(delay)
+            out = dest / f"{name}.png"
+            out.write_bytes(name.encode())
+            with lock:
+                live[0] -= 1
+            return [out]
+        return render
+
+    def burst(cache: RenderCache, keys: list[str]) -> list[tuple[list[Path], bool]]:
+        results: list = [None] * len(keys)
+        start = threading.Barrier(len(keys))
+
+        def one(i: int) -> None:
+            start.wait()
+            results[i] = cache.get_or_render(keys[i], slow_render(keys[i]))
+        threads = [threading.Thread(target=one, args=(i,)) for i in range(len(keys))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return results
+
+    cache = RenderCache.in_temp()
+    try:
+        results = burst(cache, ["same"] * 8)
+        checks.append(("eight requests for one cold key render it once",
+                       calls == ["same"], f"{calls}"))
+        checks.append(("…and every request gets the same files",
+                       all(r[0] == results[0][0] for r in results), ""))
+        checks.append(("…with exactly one reported as a fresh render",
+                       sum(not r[1] for r in results) == 1,
+                       f"{[r[1] for r in results]}"))
+        stats = cache.stats()
+        checks.append(("…and counted as one miss and seven hits",
+                       (stats["misses"], stats["hits"]) == (1, 7), f"{stats}"))
+
+        calls.clear()
+        live[:] = [0, 0]
+        burst(cache, ["k1", "k2", "k3"])
+        checks.append(("different keys render side by side",
+                       sorted(calls) == ["k1", "k2", "k3"] and live[1] > 1, f"peak {live[1]}"))
+
+        attempts = [0]
+
+        def flaky(dest: Path) -> list[Path]:
+            attempts[0] += 1
+            time.sleep(0.1)
+            raise RuntimeError("render died")
+        errors: list = []
+        start = threading.Barrier(4)
+
+        def doomed() -> None:
+            start.wait()
+            try:
+                cache.get_or_render("flaky", flaky)
+            except RuntimeError as exc:
+                errors.append(exc)
+        threads = [threading.Thread(target=doomed) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        checks.append(("a failed render fails every request waiting on it",
+                       len(errors) == 4 and attempts[0] == 1, f"{len(errors)} / {attempts[0]}"))
+        files, cached = cache.get_or_render("flaky", slow_render("flaky", 0))
+        checks.append(("…and the next request tries again",
+                       not cached and files[0].exists(), ""))
+    finally:
+        cache.close()
+
+    calls.clear()
+    live[:] = [0, 0]
+    capped = RenderCache.in_temp(max_concurrent_renders=1)
+    try:
+        burst(capped, ["c1", "c2", "c3"])
+        checks.append(("the render cap holds across distinct keys",
+                       len(calls) == 3 and live[1] == 1, f"peak {live[1]}"))
+    finally:
+        capped.close()
     return checks
 
 
@@ -1360,6 +1616,8 @@ def main() -> int:
         ("Section D3f — palettes reaching the figure:", _palette_render_checks),
         ("Section D3d — the shared comparison frames (2B):", _comparison_frames_checks),
         ("Section D4 — thumbnail resolution and caching:", _gallery_cache_checks),
+        ("Section D4b — the persistent render cache:", _persistent_cache_checks),
+        ("Section D4c — concurrent requests for one figure:", _single_flight_checks),
         ("Section D5 — electrophysiology output:", _ephys_render_checks),
         ("Section D6 — manifest honesty:", _manifest_honesty_checks),
         ("Section D7 — mean-projection quantisation:", _background_checks),
@@ -0,0 +1,237 @@
+"""Tests for the vectorised Bakkum burst detection (``burst_detection.py``).
+
+Run from the repo root::
+
+    uv run python python/test_burst_detection.py
+
+Self-contained — synthetic bursty spike trains. Burst detection now resolves
+windows by bisection and segmented reductions rather than per-spike and
+per-burst loops, so every check here is against the loops it replaced, kept
+below as references: the same bursts, the same spike-to-burst assignment,
+the same network-burst contents and the same Step 2 metrics.
+"""
+
+from __future__ import annotations
+
+import math
+import sys
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+from meanap.params import Params  # noqa: E402
+from meanap.pipeline.burst_detection import (  # noqa: E402
+    burst_detect_isin, burst_detect_network,
+)
+from meanap.pipeline.firing_rates import firing_rates_bursts  # noqa: E402
+
+FS, DURATION_S, N_CH = 25_000.0, 120.0, 16
+
+
+def _bursty_trains(seed: int, n_channels: int = N_CH) -> dict[int, np.ndarray]:
+    """Sparse background firing plus shared network bursts, on the sample
+    grid so coincident spikes across channels occur."""
+    rng = np.random.default_rng(seed)
+    burst_starts = np.sort(rng.uniform(0, DURATION_S - 1, 150))
+    trains = {}
+    for ch in range(n_channels):
+        background = rng.uniform(0, DURATION_S, rng.integers(20, 200))
+        in_bursts = [s + rng.uniform(0, rng.uniform(0.02, 0.3), rng.integers(0, 15))
+                     for s in burst_starts if rng.random() < 0.6]
+        times = np.concatenate([background, *in_bursts])
+        trains[ch] = np.unique(np.round(times * FS) / FS)
+    trains[3] = np.array([])
+    return trains
+
+
+def _reference_isin(spike_times, n, isin_th):
+    """The per-spike state machine ``burst_detect_isin`` used to run."""
+    n_spikes = len(spike_times)
+    spike_burst_number = np.full(n_spikes, -1, dtype=int)
+    if n_spikes < n:
+        return {"T_start": [], "T_end": [], "S": []}, spike_burst_number
+    criteria = np.zeros(n_spikes, dtype=bool)
+    window_durations = spike_times[n-1:] - spike_times[:-(n-1)]
+    for i, valid in enumerate(window_durations <= isin_th):
+        if valid:
+            criteria[i:i+n] = True
+    in_burst, num_burst, number, bl = False, -1, -1, 0
+    for i in range(n-1, n_spikes):
+        if not in_burst:
+            if criteria[i]:
+                in_burst = True
+                num_burst += 1
+                number = num_burst
+                bl = 1
+        else:
+            if not criteria[i]:
+                in_burst = False
+                if bl < n:
+                    spike_burst_number[spike_burst_number == number] = -1
+                    num_burst -= 1
+                number = -1
+            elif (spike_times[i] - spike_times[i-(n-1)]) > isin_th and bl >= n:
+                num_burst += 1
+                number = num_burst
+                bl = 1
+            else:
+                bl += 1
+        spike_burst_number[i] = number
+    if in_burst and bl < n:
+        spike_burst_number[spike_burst_number == number] = -1
+    t_start, t_end, s_size = [], [], []
+    for b_num in range(np.max(spike_burst_number) + 1):
+        idx = np.where(spike_burst_number == b_num)[0]
+        if len(idx) > 0:
+            t_start.append(spike_times[idx[0]])
+            t_end.append(spike_times[idx[-1]])
+            s_size.append(len(idx))
+    return ({"T_start": np.array(t_start), "T_end": np.array(t_end),
+             "S": np.array(s_size)}, spike_burst_number)
+
+
+def _reference_network_contents(spike_times_dict, burst_times, fs):
+    """The per-burst mask over every spike ``burst_detect_network`` used."""
+    t_cat = np.concatenate([t for t in spike_times_dict.values() if len(t)])
+    c_cat = np.concatenate([np.full(len(t), ch) for ch, t in spike_times_dict.items() if len(t)])
+    order = np.argsort(t_cat)
+    t_cat, c_cat = t_cat[order], c_cat[order]
+    out = []
+    for t0, t1 in burst_times / fs:
+        mask = (t_cat >= t0) & (t_cat <= t1)
+        b_times, b_chans = t_cat[mask], c_cat[mask]
+        out.append({ch: b_times[b_chans == ch] for ch in np.unique(b_chans)})
+    return out
+
+
+def _close(a, b) -> bool:
+    if isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b):
+        return True
+    return math.isclose(float(a), float(b), rel_tol=1e-9, abs_tol=1e-12)
+
+
+def test_isin() -> bool:
+    print("\n[1] burst_detect_isin — same bursts as the per-spike loop")
+    checks: dict[str, bool] = {}
+    for seed in range(6):
+        train = np.sort(np.concatenate(list(_bursty_trains(seed, 4).values())))
+        for n, th in ((5, 0.02), (10, 0.1), (10, 0.005)):
+            got, got_bn = burst_detect_isin(train, n, th)
+            ref, ref_bn = _reference_isin(train, n, th)
+            checks[f"seed {seed}, N={n}, th={th}"] = (
+                np.array_equal(got_bn, ref_bn)
+                and all(np.array_equal(got[k], ref[k]) for k in ("T_start", "T_end", "S")))
+    got, _ = burst_detect_isin(np.array([1.0, 2.0]), 5, 0.1)
+    checks["fewer spikes than N"] = len(got["T_start"]) == 0
+    for name, ok in checks.items():
+        print(f"    {'✓' if ok else '✗'} {name}")
+    return all(checks.values())
+
+
+def test_network() -> bool:
+    print("\n[2] burst_detect_network — same contents as the per-burst mask")
+    checks: dict[str, bool] = {}
+    for seed in range(4):
+        trains = _bursty_trains(seed)
+        bursts, burst_times, _info = burst_detect_network(trains, FS, min_channels=3)
+        ref = _reference_network_contents(trains, burst_times, FS)
+        same = len(bursts) == len(ref) == len(burst_times) and all(
+            list(bursts.channels_of(i)) == list(ref[i])
+            and all(np.array_equal(bursts.burst(i)[ch], ref[i][ch]) for ch in ref[i])
+            for i in range(len(ref)))
+        checks[f"seed {seed}: {len(ref)} bursts"] = same and len(ref) > 0
+        checks[f"seed {seed}: at least min_channels each"] = bool(
+            np.all(np.diff(bursts.channel_offsets) >= 3))
+    bursts, burst_times, info = burst_detect_network({0: np.array([]), 1: np.array([])}, FS)
+    checks["no spikes"] = len(bursts) == 0 and burst_times.shape == (0, 2) and info == {}
+    bursts, burst_times, _ = burst_detect_network(_bursty_trains(0), FS, min_channels=N_CH + 1)
+    checks["no burst wide enough"] = len(bursts) == 0 and burst_times.shape == (0, 2)
+    for name, ok in checks.items():
+        print(f"    {'✓' if ok else '✗'} {name}")
+    return all(checks.values())
+
+
+def _reference_network_metrics(trains, fs, params):
+    """``firing_rates_bursts``'s network metrics as the per-burst loops had them."""
+    _, b_times, _ = burst_detect_network(
+        trains, fs, min_spikes=params.min_spike_network_burst,
+        min_channels=params.min_channel_network_burst,
+        isin_th_param=params.bakkum_network_burst_isi_n_threshold)
+    contents = _reference_network_contents(trains, b_times, fs)
+    sp_in_bst, isi_w = 0, []
+    for bm in contents:
+        all_b_t = np.unique(np.concatenate(list(bm.values())))
+        sp_in_bst += len(all_b_t)
+        if len(all_b_t) > 1:
+            isi_w.append(np.mean(np.diff(all_b_t)) * 1000.0)
+    all_t = np.unique(np.concatenate(list(trains.values())))
+    in_b = np.zeros(len(all_t), dtype=bool)
+    for t0, t1 in b_times / fs:
+        in_b |= (all_t >= t0) & (all_t <= t1)
+    out_t = all_t[~in_b]
+    return {
+        "meanNumChansInvolvedInNbursts": np.mean([len(bm) for bm in contents]),
+        "meanISIWithinNbursts_ms": np.mean(isi_w) if isi_w else np.nan,
+        "meanISIoutsideNbursts_ms": np.mean(np.diff(out_t)) * 1000.0 if len(out_t) > 1 else np.nan,
+        "fracInNburst": np.round(sp_in_bst / len(all_t), 3),
+    }
+
+
+def test_firing_rates() -> bool:
+    print("\n[3] firing_rates_bursts — same Step 2 metrics")
+    params = Params()
+    params.min_spike_network_burst = 10
+    params.min_channel_network_burst = 3
+    params.bakkum_network_burst_isi_n_threshold = "automatic"
+    params.single_channel_burst_min_spike = 10
+    checks: dict[str, bool] = {}
+    for seed in range(3):
+        trains = _bursty_trains(seed)
+        ephys = firing_rates_bursts(trains, N_CH, FS, DURATION_S, params)
+        ref = _reference_network_metrics(trains, FS, params)
+        checks[f"seed {seed}: network metrics"] = all(
+            _close(ephys[k], v) for k, v in ref.items())
+
+        isi_w = []
+        for ch in ephys["channelBurstingUnits"]:
+            times = trains[ch]
+            th = ephys["channelISIwithinBurst"][ch]
+            _, bn = burst_detect_isin(times, params.single_channel_burst_min_spike,
+                                      _channel_threshold(times, params))
+            isi_w.append(_close(th, np.nanmean(
+                [np.mean(np.diff(times[bn == b])) * 1000.0 for b in range(bn.max() + 1)])))
+        checks[f"seed {seed}: single-channel ISI within bursts"] = bool(isi_w) and all(isi_w)
+    for name, ok in checks.items():
+        print(f"    {'✓' if ok else '✗'} {name}")
+    return all(checks.values())
+
+
+def _channel_threshold(times, params) -> float:
+    from meanap.pipeline.burst_detection import get_isin_threshold
+
+    if len(np.unique(np.diff(times))) > 10:
+        return get_isin_threshold(times, n=params.single_channel_burst_min_spike)
+    return 0.1
+
+
+def main() -> None:
+    print("=" * 70)
+    print("MEA-NAP Python  ▸  Burst Detection Tests")
+    print("=" * 70)
+
+    results = [test_isin(), test_network(), test_firing_rates()]
+
+    print(f"\n{'=' * 70}")
+    if all(results):
+        print("  → All checks passed")
+    else:
+        print("  → Some checks FAILED — see above")
+    print(f"{'=' * 70}")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
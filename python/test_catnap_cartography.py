@@ -162,9 +162,12 @@ def _ordering_checks() -> list[Check]:
     suite2p loading and adjacency keeps this to a second or two.
     """
     checks: list[Check] = []
+    # One worker: the stubs patch this process's module, which a spawned pool
+    # worker would re-import without them.
     params = Params(
         func_con_lag_val=[1000], min_activity_level=0.0,
         min_number_of_nodes_to_cal_net_met=25, random_seed=1,
+        recording_workers=1,
     )
     recordings = [RecordingInfo(filename=f"rec{i}", div=14.0 + 7 * i, group="WT")
                   for i in range(3)]
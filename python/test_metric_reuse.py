@@ -0,0 +1,234 @@
+"""Tests for reusing Step 4 metrics across runs (``metric_reuse.py``).
+
+Run from the repo root::
+
+    uv run python python/test_metric_reuse.py
+
+Self-contained — synthetic networks and a synthetic three-recording run.
+Reuse is only worth having if the answer is the one a fresh run would give, so
+every check compares against one: a block reused under unchanged inputs is
+identical to computing it, a changed matrix or an unseeded run reuses nothing,
+a fingerprint is not trusted beside metrics it wasn't written with, and a
+Step 4 re-run from a prior analysis's bundle with a new cartography boundary
+gives exactly what running it from scratch does — without redoing NMF,
+consensus clustering or the null models.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+from meanap.params import Params  # noqa: E402
+from meanap.pipeline.atomic import atomic_savez  # noqa: E402
+from meanap.pipeline.io import save_spike_times_npz  # noqa: E402
+from meanap.pipeline.metric_reuse import FINGERPRINTS_FILENAME, MetricReuse  # noqa: E402
+from meanap.pipeline.null_ensemble import NullSpec, build_null_ensemble  # noqa: E402
+from meanap.pipeline.output_folders import create_output_folders  # noqa: E402
+from meanap.pipeline.rng import make_rng  # noqa: E402
+from meanap.pipeline.runner import run_pipeline  # noqa: E402
+from meanap.pipeline.step4 import (  # noqa: E402
+    _convert_numpy, _read_fingerprints, _to_arrays, _write_netmet,
+    compute_network_metrics,
+)
+
+# Small enough to run in seconds, with every part of the ensemble present.
+SPEC = NullSpec(n_signed=8, random_iterations=20, lattice_iterations=40)
+N_REC, N_CH, FS, LAG = 3, 12, 2000.0, 25
+RECS = [f"rec{i}" for i in range(N_REC)]
+
+
+def _network(n: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    upper = np.triu(rng.random((n, n)) * (rng.random((n, n)) < 0.4), 1)
+    return upper + upper.T
+
+
+def _stored(metrics: dict) -> dict:
+    """``metrics`` as a later run reads them back from the JSON."""
+    return _to_arrays(json.loads(json.dumps(
+        _convert_numpy({k: v for k, v in metrics.items() if k != "adjMsub"}))))
+
+
+def _same(a: dict, b: dict) -> bool:
+    if a.keys() != b.keys():
+        return False
+    return all(np.array_equal(np.asarray(a[k]), np.asarray(b[k]), equal_nan=True)
+               for k in a if k != "adjMsub")
+
+
+def test_blocks() -> bool:
+    print("\n[1] compute_network_metrics — which blocks are reused")
+    w = _network(20, 1)
+    counts = np.full(20, 50)
+    counts[3] = 0  # one inactive node, so min_activity_level has something to drop
+    nulls = lambda sub, spec: build_null_ensemble(sub, SPEC, 5, "nulls")  # noqa: E731
+
+    def run(adj, params, reuse, min_activity=0.1):
+        return compute_network_metrics(
+            adj, counts, 60.0, min_activity, 3, params=params,
+            rng=make_rng(reuse.seed, *reuse.labels), nulls=nulls, reuse=reuse)
+
+    base, moved = Params(), Params(peri_part_coef=0.4, pro_hub_part_coef=0.2)
+    first = MetricReuse(5, ("rec", LAG))
+    fresh = run(w, base, first)
+
+    def again(adj=w, params=moved, seed=5, min_activity=0.1):
+        reuse = MetricReuse(seed, ("rec", LAG), previous=_stored(fresh),
+                            previous_fingerprints=first.fingerprints)
+        return run(adj, params, reuse, min_activity), reuse
+
+    reused, r_reused = again()
+    scratch = run(w, moved, MetricReuse(5, ("rec", LAG)))
+    _, r_matrix = again(adj=_network(20, 2))
+    _, r_level = again(min_activity=0.5)
+    _, r_dropped = again(min_activity=1.0)
+    _, r_unseeded = again(seed=None)
+
+    checks = {
+        "fingerprints recorded for both blocks":
+            sorted(first.fingerprints) == ["modularity", "small_world"],
+        "new cartography boundary: both blocks reused":
+            sorted(r_reused.reused) == ["modularity", "small_world"],
+        "and the result is what computing them gives": _same(reused, scratch),
+        "changed matrix: nothing reused": r_matrix.reused == [],
+        "activity level that keeps the same nodes: reused": len(r_level.reused) == 2,
+        "activity level that drops a node: recomputed": r_dropped.reused == [],
+        "unseeded: nothing reused or recorded":
+            r_unseeded.reused == [] and r_unseeded.fingerprints == {},
+    }
+    for name, ok in checks.items():
+        print(f"    {'✓' if ok else '✗'} {name}")
+    return all(checks.values())
+
+
+def test_sidecar() -> bool:
+    print("\n[2] netmet_fingerprints.json — only trusted beside its own metrics")
+    results = {rec: {f"{LAG}mslag": {"Q": 0.3 + i, "Ci": np.array([1, 1, 2])}}
+               for i, rec in enumerate(RECS)}
+    fps = {rec: {f"{LAG}mslag": {"modularity": f"fp{i}"}} for i, rec in enumerate(RECS)}
+    with tempfile.TemporaryDirectory() as tmp:
+        net_dir = Path(tmp)
+        _write_netmet(net_dir, results, fps)
+        stored = json.loads((net_dir / "netmet_results.json").read_text())
+        intact = _read_fingerprints(net_dir, stored)
+        stored[RECS[1]][f"{LAG}mslag"]["Q"] += 0.01
+        edited = _read_fingerprints(net_dir, stored)
+        (net_dir / FINGERPRINTS_FILENAME).write_text("{not json")
+        broken = _read_fingerprints(net_dir, stored)
+
+    checks = {
+        "read back as written": intact == fps,
+        "an edited metric drops that recording's fingerprints":
+            sorted(edited) == [RECS[0], RECS[2]],
+        "an unreadable file is no fingerprints": broken == {},
+    }
+    for name, ok in checks.items():
+        print(f"    {'✓' if ok else '✗'} {name}")
+    return all(checks.values())
+
+
+def _seed_inputs(root: Path) -> None:
+    """Spike times and adjacency — the two things Step 4 reads."""
+    for i, rec in enumerate(RECS):
+        rng = np.random.default_rng(i)
+        save_spike_times_npz(
+            root / "1_SpikeDetection" / "1A_SpikeDetectedData" / f"{rec}_spikes.npz",
+            {ch: {"bior1p5": np.sort(rng.uniform(0, 60, 80 + ch))} for ch in range(N_CH)},
+            np.arange(1, N_CH + 1), FS, duration_s=60.0)
+        adj = np.abs(rng.normal(0, 0.3, (N_CH, N_CH)))
+        adj = (adj + adj.T) / 2
+        np.fill_diagonal(adj, 0)
+        atomic_savez(root / "ExperimentMatFiles" / f"{rec}_adjM.npz",
+                     channels=np.arange(1, N_CH + 1),
+                     **{f"adjM{LAG}mslag": adj, f"adjM{LAG}mslag_raw": adj})
+
+
+def _params(tmp: Path, name: str, **kw) -> Params:
+    p = Params(output_data_folder=str(tmp), output_data_folder_name=name,
+               spreadsheet_file_name=str(tmp / "recs.csv"),
+               spreadsheet_range="2:100", raw_data=str(tmp / "no-raw"),
+               start_analysis_step=4, stop_analysis_step=4,
+               func_con_lag_val=[LAG], channel_layout="MCS60",
+               min_number_of_nodes_to_cal_net_met=2, random_seed=5,
+               recording_workers=1, express_mode=True,
+               auto_set_cartography_boundaries=False)
+    for k, v in kw.items():
+        setattr(p, k, v)
+    return p
+
+
+def test_rerun() -> bool:
+    print("\n[3] Step 4 re-run from a prior analysis — new cartography boundary")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        pd.DataFrame([{"Recording Filename": r, "DIV group": 21, "Genotype": "WT"}
+                      for r in RECS]).to_csv(tmp / "recs.csv", index=False)
+        first_root = create_output_folders(tmp, "First", ["WT"])
+        _seed_inputs(first_root)
+        # Express mode leaves only the bundle, which carries no null models:
+        # whatever the re-run reuses, it reuses from the fingerprinted metrics.
+        bundle = run_pipeline(_params(tmp, "First"), log=lambda m: None)
+
+        moved = dict(hub_boundary_wm_d_deg=1.0, peri_part_coef=0.4)
+        logs: list[str] = []
+        rerun = run_pipeline(
+            _params(tmp, "Rerun", express_mode=False, prior_analysis=True,
+                    prior_analysis_path=str(bundle), **moved),
+            log=logs.append)
+        scratch_root = create_output_folders(tmp, "Scratch", ["WT"])
+        _seed_inputs(scratch_root)
+        scratch = run_pipeline(_params(tmp, "Scratch", express_mode=False, **moved),
+                               log=lambda m: None)
+
+        def table(root: Path, level: str) -> pd.DataFrame:
+            df = pd.read_csv(root / "4_NetworkActivity" / f"NetworkActivity_{level}.csv")
+            return df.sort_values(list(df.columns[:2])).reset_index(drop=True)
+
+        reused = [m for m in logs if "reused unchanged metrics" in m]
+        checks = {
+            "every recording reuses NMF, small-worldness and modularity":
+                sum(all(b in m for b in ("nmf", "small_world", "modularity"))
+                    for m in reused) == N_REC,
+            "no null models were built":
+                not list((rerun / "ExperimentMatFiles").glob("*_nulls.npz")),
+            "recording-level result identical to running from scratch":
+                table(rerun, "RecordingLevel").equals(table(scratch, "RecordingLevel")),
+            "node-level result identical to running from scratch":
+                table(rerun, "NodeLevel").equals(table(scratch, "NodeLevel")),
+            "the re-run stores fingerprints for the next one":
+                (rerun / "4_NetworkActivity" / FINGERPRINTS_FILENAME).is_file(),
+        }
+    for name, ok in checks.items():
+        print(f"    {'✓' if ok else '✗'} {name}")
+    return all(checks.values())
+
+
+def main() -> None:
+    print("=" * 70)
+    print("MEA-NAP Python  ▸  Step 4 Metric Reuse Tests")
+    print("=" * 70)
+
+    ok1 = test_blocks()
+    ok2 = test_sidecar()
+    ok3 = test_rerun()
+
+    print(f"\n{'=' * 70}")
+    if ok1 and ok2 and ok3:
+        print("  → All checks passed")
+    else:
+        print("  → Some checks FAILED — see above")
+    print(f"{'=' * 70}")
+    sys.exit(0 if ok1 and ok2 and ok3 else 1)
+
+
+if __name__ == "__main__":
+    main()
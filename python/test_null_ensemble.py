@@ -0,0 +1,168 @@
+"""Tests for the shared Step-4 null-model ensemble (``null_ensemble.py``).
+
+Run from the repo root::
+
+    uv run python python/test_null_ensemble.py
+
+Self-contained — uses synthetic networks, no fixtures. What's checked is what
+makes the cache safe to reuse: an ensemble read back from disk is identical to
+a freshly built one, a different matrix or seed is never served a stale entry,
+signed networks drawn on demand are the ones a kept ensemble holds, a store
+over its size cap still serves the same networks, and an unseeded run stores
+nothing.
+Also that ``compute_network_metrics`` gives the same metrics whether its nulls
+came from the cache or were built in place.
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+from meanap.params import Params  # noqa: E402
+from meanap.pipeline.null_ensemble import (  # noqa: E402
+    NullEnsembleStore,
+    NullSpec,
+    build_null_ensemble,
+)
+from meanap.pipeline.step4 import compute_network_metrics  # noqa: E402
+
+# Small enough to run in seconds, with every part of the ensemble present.
+SPEC = NullSpec(n_signed=8, random_iterations=20, lattice_iterations=40)
+
+
+def _network(n: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    upper = np.triu(rng.random((n, n)) * (rng.random((n, n)) < 0.4), 1)
+    return upper + upper.T
+
+
+def _same(a, b) -> bool:
+    return (all(np.array_equal(x, y) for x, y in zip(a.signed(), b.signed(), strict=True))
+            and np.array_equal(a.random, b.random)
+            and np.array_equal(a.lattice, b.lattice))
+
+
+def test_store_round_trip() -> bool:
+    print("\n[1] NullEnsembleStore — reuse, invalidation, size cap")
+    w, w2 = _network(20, 1), _network(20, 2)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "rec_nulls.npz"
+        first = NullEnsembleStore(path, 7, ("rec",))
+        built = first.get("lag10", w, SPEC)
+        first.save()
+
+        second = NullEnsembleStore(path, 7, ("rec",))
+        cached = second.get("lag10", w, SPEC)
+        reused_same = second.reused == ["lag10"] and _same(built, cached)
+        rebuilt = second.get("lag10", w2, SPEC)
+
+        other_seed = NullEnsembleStore(path, 8, ("rec",))
+        other_seed.get("lag10", w, SPEC)
+
+        lazy = build_null_ensemble(w, SPEC, 7, "rec", "lag10", keep_signed=False)
+
+        capped_path = Path(tmp) / "capped_nulls.npz"
+        capped = NullEnsembleStore(capped_path, 7, ("rec",), max_bytes=0)
+        capped_built = capped.get("lag10", w, SPEC)
+        capped.save()
+        capped = NullEnsembleStore(capped_path, 7, ("rec",), max_bytes=0)
+        capped_cached = capped.get("lag10", w, SPEC)
+
+        # Drawn on demand: each network must come from w, not the one before.
+        unkept = build_null_ensemble(w, NullSpec(n_signed=5, small_world=False), 3, "x",
+                                     keep_signed=False)
+        kept = build_null_ensemble(w, NullSpec(n_signed=5, small_world=False), 3, "x")
+
+        unseeded_path = Path(tmp) / "unseeded_nulls.npz"
+        unseeded = NullEnsembleStore(unseeded_path, None, ("rec",))
+        unseeded.get("lag10", w, SPEC)
+        unseeded.save()
+
+        carried = Path(tmp) / "new_run_nulls.npz"
+        resumed = NullEnsembleStore(carried, 7, ("rec",), source=path)
+        resumed.get("lag10", w, SPEC)
+        resumed.save()
+
+        checks = {
+            "cached ensemble identical to the built one": reused_same,
+            "different matrix rebuilt, not served": (
+                second.reused == ["lag10"] and rebuilt.n == 20
+                and not np.array_equal(rebuilt.signed_upper, built.signed_upper)),
+            "different seed rebuilt, not served": other_seed.reused == [],
+            "signed networks drawn on demand match the kept ones": (
+                lazy.signed_upper is None and _same(built, lazy)),
+            "every network drawn on demand is a null of the input": _same(kept, unkept),
+            "over the cap: signed networks not kept": capped_built.signed_upper is None,
+            "over the cap: reused entry serves the same networks": (
+                capped.reused == ["lag10"] and _same(built, capped_cached)),
+            "signed networks symmetric, empty diagonal": all(
+                np.array_equal(s, s.T) and not np.any(np.diag(s)) for s in built.signed()),
+            "unseeded store writes nothing": not unseeded_path.exists(),
+            "resumed store reads the prior file": resumed.reused == ["lag10"],
+            "resumed store writes into its own folder": carried.is_file(),
+        }
+    for name, ok in checks.items():
+        print(f"    {'✓' if ok else '✗'} {name}")
+    return all(checks.values())
+
+
+def test_metrics_from_cache() -> bool:
+    print("\n[2] compute_network_metrics — cached nulls give the same metrics")
+    w = _network(24, 3)
+    counts = np.full(24, 50)
+    run = partial(compute_network_metrics, w, counts, 60.0, 0.01, 12)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "rec_nulls.npz"
+        spec_nulls = lambda store: (lambda sub, spec: store.get(  # noqa: E731
+            "lag10", sub, NullSpec(n_signed=spec.n_signed, small_world=spec.small_world,
+                                   random_iterations=20, lattice_iterations=40)))
+        store = NullEnsembleStore(path, 5, ("rec",))
+        fresh = run(rng=np.random.default_rng(0), nulls=spec_nulls(store))
+        store.save()
+        store = NullEnsembleStore(path, 5, ("rec",))
+        again = run(rng=np.random.default_rng(0), nulls=spec_nulls(store))
+
+    # No store, no seed: the default path, where the signed networks are drawn
+    # as participation_coef_norm uses them.
+    unstored = run(rng=np.random.default_rng(0), params=Params())
+
+    keys = ("SW", "SWw", "ND", "Eglob")
+    checks = {
+        "ensemble reused": store.reused == ["lag10"],
+        "PC from nulls drawn on demand": np.shape(unstored.get("PC")) == (24,),
+        **{f"{k} identical": np.array_equal(np.asarray(fresh[k]), np.asarray(again[k]),
+                                            equal_nan=True)
+           for k in keys if k in fresh},
+    }
+    for name, ok in checks.items():
+        print(f"    {'✓' if ok else '✗'} {name}")
+    return all(checks.values())
+
+
+def main() -> None:
+    print("=" * 70)
+    print("MEA-NAP Python  ▸  Shared Null-Model Ensemble Tests")
+    print("=" * 70)
+
+    ok1 = test_store_round_trip()
+    ok2 = test_metrics_from_cache()
+
+    print(f"\n{'=' * 70}")
+    if ok1 and ok2:
+        print("  → All checks passed")
+    else:
+        print("  → Some checks FAILED — see above")
+    print(f"{'=' * 70}")
+    sys.exit(0 if ok1 and ok2 else 1)
+
+
+if __name__ == "__main__":
+    main()
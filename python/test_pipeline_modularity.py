@@ -0,0 +1,134 @@
+"""Tests for Louvain and consensus clustering (``louvain.py``, ``modularity.py``).
+
+Run from the repo root::
+
+    uv run python python/test_pipeline_modularity.py
+
+Self-contained — synthetic networks with planted modules, no fixtures. Both
+algorithms are stochastic and not bit-reproducible against MATLAB (see
+``modularity.py``'s docstring), so what's checked is: the compiled
+local-moving sweep makes exactly the moves the NumPy one does, Q is the
+modularity of the partition returned, the one-product co-classification
+matrix equals the per-partition comparison it replaced, consensus clustering
+finds the planted modules, and its worker count doesn't change the result.
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+from meanap.pipeline import louvain  # noqa: E402
+from meanap.pipeline.louvain import community_louvain  # noqa: E402
+from meanap.pipeline.modularity import (  # noqa: E402
+    consensus_coclassify,
+    mod_consensus_cluster_iterate,
+)
+
+
+def _planted(n: int, n_mod: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    labels = np.sort(rng.integers(0, n_mod, n))
+    p = np.where(labels[:, None] == labels[None, :], 0.6, 0.03)
+    upper = np.triu(rng.random((n, n)) * (rng.random((n, n)) < p), 1)
+    return upper + upper.T, labels
+
+
+def _modularity(w: np.ndarray, ci: np.ndarray) -> float:
+    s = w.sum()
+    k = w.sum(axis=0)
+    same = ci[:, None] == ci[None, :]
+    return float(((w - np.outer(k, k) / s) * same).sum() / s)
+
+
+def _same_partition(a: np.ndarray, b: np.ndarray) -> bool:
+    return bool(np.array_equal(a[:, None] == a[None, :], b[:, None] == b[None, :]))
+
+
+def test_louvain() -> bool:
+    print("\n[1] community_louvain — compiled sweep, Q")
+    sweeps_match = True
+    for seed in range(10):
+        w, _ = _planted(40, 4, seed)
+        if seed % 2:
+            w = np.round(w * 2)  # tied gains: both must pick the first
+        s = w.sum()
+        b = (w - np.outer(w.sum(axis=1), w.sum(axis=0)) / s) / s
+        b = (b + b.T) / 2.0
+        rng = np.random.default_rng(seed)
+        mb_a, mb_b = np.arange(40), np.arange(40)
+        hnm_a, hnm_b = b.copy(), b.copy()
+        for _ in range(6):
+            order = rng.permutation(40)
+            moved_a = louvain._move_nodes(order, mb_a, hnm_a, b)
+            moved_b = louvain._move_nodes_numpy(order, mb_b, hnm_b, b)
+            sweeps_match &= (moved_a == moved_b and np.array_equal(mb_a, mb_b)
+                             and np.allclose(hnm_a, hnm_b, rtol=0, atol=1e-15))
+
+    w, labels = _planted(80, 5, 11)
+    ci, q = community_louvain(w, rng=np.random.default_rng(0))
+    checks = {
+        "compiled sweep makes the NumPy sweep's moves": sweeps_match,
+        "Q is the modularity of the partition returned": abs(q - _modularity(w, ci)) < 1e-12,
+        "labels are 1..nMod": set(np.unique(ci)) == set(range(1, ci.max() + 1)),
+        "planted modules found": _same_partition(ci, labels),
+        "empty network: every node alone": np.array_equal(
+            community_louvain(np.zeros((5, 5)))[0], np.arange(1, 6)),
+    }
+    for name, ok in checks.items():
+        print(f"    {'✓' if ok else '✗'} {name}")
+    return all(checks.values())
+
+
+def test_consensus() -> bool:
+    print("\n[2] consensus clustering — co-classification, workers")
+    rng = np.random.default_rng(0)
+    coclassify_exact = True
+    for _ in range(20):
+        n, k = int(rng.integers(1, 50)), int(rng.integers(1, 60))
+        parts = [rng.integers(1, int(rng.integers(2, 8)), n) for _ in range(k)]
+        looped = np.zeros((n, n))
+        for labels in parts:
+            looped += (labels[:, None] == labels[None, :]).astype(float)
+        coclassify_exact &= np.array_equal(looped / k, consensus_coclassify(parts))
+
+    w, labels = _planted(60, 4, 3)
+    ci, q, num_repeats = mod_consensus_cluster_iterate(w, rng=np.random.default_rng(5))
+    ci4, q4, num_repeats4 = mod_consensus_cluster_iterate(
+        w, rng=np.random.default_rng(5), max_workers=4)
+    checks = {
+        "co-classification identical to per-partition loop": coclassify_exact,
+        "planted modules found": _same_partition(ci, labels),
+        "converges": 1 <= num_repeats < 50,
+        "worker count does not change Ci, Q": (
+            np.array_equal(ci, ci4) and q == q4 and num_repeats == num_repeats4),
+    }
+    for name, ok in checks.items():
+        print(f"    {'✓' if ok else '✗'} {name}")
+    return all(checks.values())
+
+
+def main() -> None:
+    print("=" * 70)
+    print("MEA-NAP Python  ▸  Louvain / Consensus Clustering Tests")
+    print("=" * 70)
+
+    ok1 = test_louvain()
+    ok2 = test_consensus()
+
+    print(f"\n{'=' * 70}")
+    if ok1 and ok2:
+        print("  → All checks passed")
+    else:
+        print("  → Some checks FAILED — see above")
+    print(f"{'=' * 70}")
+    sys.exit(0 if ok1 and ok2 else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,7 @@ Run from the repo root::
     uv run python python/test_pipeline_nmf.py
 
 ``cal_nmf`` is not just stochastic but *algorithm*-different from MATLAB's
-``calNMF.m`` (sklearn's coordinate-descent NMF solver standing in for
+``calNMF.m`` (a coordinate-descent NMF solver standing in for
 MATLAB's built-in ``nnmf``, which defaults to Alternating Least Squares —
 see ``nmf.py``'s docstring), so there is no meaningful MATLAB parity check
 to run here. What *is* testable: the mathematical invariants the algorithm
@@ -27,6 +27,7 @@ import numpy as np
 REPO_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(REPO_ROOT / "src"))
 
+from meanap.pipeline import nmf
 from meanap.pipeline.nmf import _bin_spike_times, cal_nmf, randomise_spike_train
 
 
@@ -141,6 +142,49 @@ def test_cal_nmf_include_components() -> bool:
     return all(checks.values())
 
 
+def test_cal_nmf_sweep_reuse() -> bool:
+    print("\n[5] cal_nmf — the variance sweep reuses the search's fits, and can stop early")
+    rng = np.random.default_rng(4)
+    n_channels = 16
+    duration_s = 120.0
+    spike_times_list, spike_counts = _make_synthetic_recording(rng, n_channels, duration_s)
+    spike_counts = np.maximum(spike_counts, 2)  # every electrode active
+
+    fits: list[int] = []
+    original = nmf._nnmf
+
+    def counting(x, k, rng, init=None):
+        fits.append(k)
+        return original(x, k, rng, init=init)
+
+    nmf._nnmf = counting
+    try:
+        full = cal_nmf(spike_times_list, spike_counts, duration_s, downsample_freq=10.0,
+                       fs=25000.0, rng=np.random.default_rng(7))
+        n_full = len(fits)
+        fits.clear()
+        partial = cal_nmf(spike_times_list, spike_counts, duration_s, downsample_freq=10.0,
+                          fs=25000.0, rng=np.random.default_rng(7), full_sweep=False)
+    finally:
+        nmf._nnmf = original
+
+    num = full["num_nnmf_components"]
+    ve_full, ve_partial = full["nnmf_var_explained"], partial["nnmf_var_explained"]
+    fitted = ~np.isnan(ve_partial)
+    first_over = int(np.argmax(ve_full > 0.95))
+    print(f"    {n_full} fits for {num} components + a {n_channels}-rank sweep")
+    checks = {
+        "searched ranks are not refitted by the sweep": n_full == 2 * num + (n_channels - num),
+        "the full sweep covers every rank": not np.any(np.isnan(ve_full)),
+        "a partial sweep stops at the first rank over 95%": int(fitted.sum()) == first_over + 1,
+        "…with the same values up to there": np.array_equal(ve_partial[fitted], ve_full[fitted]),
+        "…and the same num_nnmf_components": partial["num_nnmf_components"] == num,
+    }
+    for name, ok in checks.items():
+        print(f"    {'✓' if ok else '✗'} {name}")
+    return all(checks.values())
+
+
 def main() -> None:
     print("=" * 70)
     print("MEA-NAP Python  ▸  NMF Structural/Sanity Tests")
@@ -150,9 +194,10 @@ def main() -> None:
     ok2 = test_bin_spike_times_preserves_count()
     ok3 = test_cal_nmf_sanity()
     ok4 = test_cal_nmf_include_components()
+    ok5 = test_cal_nmf_sweep_reuse()
 
     print(f"\n{'=' * 70}")
-    if ok1 and ok2 and ok3 and ok4:
+    if ok1 and ok2 and ok3 and ok4 and ok5:
         print("  → All checks passed")
     else:
         print("  → Some checks FAILED — see above")
@@ -13,6 +13,10 @@ invariants the algorithm guarantees by construction (exact degree
 preservation, exact total-weight preservation, approximate strength
 preservation), plus a smoke test that ``participation_coef_norm`` runs
 cleanly on real data and produces bounded, non-NaN output.
+
+Also that the compiled ``null_model_und_sign`` returns the identical network
+to the list-based port it replaced, from the same seed — synthetic networks,
+so that part runs without the real data.
 """
 
 from __future__ import annotations
@@ -29,6 +33,7 @@ sys.path.insert(0, str(REPO_ROOT / "src"))
 
 from meanap.pipeline import network_metrics as nm
 from meanap.pipeline.modularity import mod_consensus_cluster_iterate
+from meanap.pipeline import null_models
 from meanap.pipeline.null_models import null_model_und_sign, randmio_und_signed
 
 EXPERIMENT_MAT_DIR = REPO_ROOT / "OutputData03Mar2026" / "ExperimentMatFiles"
@@ -87,6 +92,40 @@ def test_null_model_und_sign(sub: np.ndarray) -> bool:
     return all(checks.values())
 
 
+def test_null_model_und_sign_seeded_parity() -> bool:
+    print("\n[0] null_model_und_sign — compiled loop vs. the list-based port, same seed")
+    if not null_models._HAVE_NUMBA:
+        print("    (numba not installed — the list-based port is what runs; nothing to compare)")
+        return True
+
+    def network(n, seed, density=0.3, negative=0.0, levels=None):
+        rng = np.random.default_rng(seed)
+        upper = np.triu(rng.random((n, n)) * (rng.random((n, n)) < density), 1)
+        if levels:
+            upper = np.ceil(upper * levels)  # few distinct weights → ties in P
+        if negative:
+            upper *= np.where(rng.random((n, n)) < negative, -1, 1)
+        return upper + upper.T
+
+    cases = {
+        "60 nodes, positive": network(60, 1),
+        "60 nodes, signed": network(60, 2, negative=0.3),
+        "120 nodes, sparse": network(120, 3, density=0.05),
+        "40 nodes, tied weights": network(40, 4, levels=3),
+        "20 nodes, complete": network(20, 5, density=1.1),
+        "5 nodes": network(5, 6, density=0.8),
+    }
+    checks = {}
+    for name, w in cases.items():
+        for seed in (0, 1):
+            fast = null_model_und_sign(w, rng=np.random.default_rng(seed))
+            ref = null_models._null_model_und_sign_reference(w, rng=np.random.default_rng(seed))
+            checks[f"{name}, seed {seed}: identical network"] = np.array_equal(fast, ref)
+    for name, ok in checks.items():
+        print(f"    {'✓' if ok else '✗'} {name}")
+    return all(checks.values())
+
+
 def test_participation_coef_norm(sub: np.ndarray) -> bool:
     print("\n[3] participation_coef_norm — smoke test on real data")
     rng = np.random.default_rng(0)
@@ -115,6 +154,8 @@ def main() -> None:
     print("MEA-NAP Python  ▸  Null Models / Normalized PC Structural Tests")
     print("=" * 70)
 
+    ok0 = test_null_model_und_sign_seeded_parity()
+
     sub = _load_real_adjm()
     print(f"\nUsing real adjacency matrix: {REC_NAME}, lag=10ms, n={sub.shape[0]} nodes")
 
@@ -123,7 +164,7 @@ def main() -> None:
     ok3 = test_participation_coef_norm(sub)
 
     print(f"\n{'=' * 70}")
-    if ok1 and ok2 and ok3:
+    if ok0 and ok1 and ok2 and ok3:
         print("  → All structural checks passed")
     else:
         print("  → Some checks FAILED — see above")
@@ -22,6 +22,10 @@ like ``test_pipeline_cartography.py``'s fixed-Ci approach, has two parts:
    (exact degree preservation, exact total-weight preservation, symmetry) —
    NOT a MATLAB parity check, same rationale as
    ``test_pipeline_null_models.py``.
+
+Also that the compiled swap loops return the identical network to the
+generator-stream ports they replaced, from the same seed — synthetic
+networks, so that part runs without the fixture.
 """
 
 from __future__ import annotations
@@ -37,6 +41,7 @@ REPO_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(REPO_ROOT / "src"))
 
 from meanap.pipeline import network_metrics as nm
+from meanap.pipeline import null_models
 from meanap.pipeline.null_models import latmio_und_v2, randmio_und_v2
 
 FIXTURE_PATH = REPO_ROOT / "python" / "test_fixtures" / "small_worldness_reference.npz"
@@ -46,6 +51,42 @@ def _scalar(x) -> float:
     return float(np.asarray(x).reshape(-1)[0])
 
 
+def test_compiled_rewiring_parity() -> bool:
+    print("\n[0] randmio_und_v2 / latmio_und_v2 — compiled loop vs. the generator port, same seed")
+    if not null_models._HAVE_NUMBA:
+        print("    (numba not installed — the generator port is what runs; nothing to compare)")
+        return True
+
+    def network(n, seed, density=0.3):
+        rng = np.random.default_rng(seed)
+        upper = np.triu(rng.random((n, n)) * (rng.random((n, n)) < density), 1)
+        return upper + upper.T
+
+    star = np.zeros((6, 6))
+    star[0, 1:] = star[1:, 0] = 1.0  # no two edges with four distinct ends
+    cases = {
+        "60 nodes": (network(60, 1), 2000),
+        "120 nodes, sparse": (network(120, 2, density=0.05), 500),
+        "20 nodes, dense": (network(20, 3, density=0.9), 3000),
+        "star": (star, 50),
+    }
+    checks = {}
+    for name, (w, iterations) in cases.items():
+        d = squareform(pdist(w))
+        for seed in (0, 1):
+            fast = randmio_und_v2(w, iterations, rng=np.random.default_rng(seed))
+            ref = null_models._randmio_und_v2_reference(
+                w, iterations, rng=np.random.default_rng(seed))
+            checks[f"randmio, {name}, seed {seed}: identical network"] = np.array_equal(fast, ref)
+            fast = latmio_und_v2(w, iterations, d, rng=np.random.default_rng(seed))
+            ref = null_models._latmio_und_v2_reference(
+                w, iterations, d, rng=np.random.default_rng(seed))
+            checks[f"latmio, {name}, seed {seed}: identical network"] = np.array_equal(fast, ref)
+    for name, ok in checks.items():
+        print(f"    {'✓' if ok else '✗'} {name}")
+    return all(checks.values())
+
+
 def test_formula_parity(fixture) -> bool:
     print("\n[1] small_worldness_rl_wu — exact parity against MATLAB, fixed A/R/L")
     a, r, l = fixture["A"], fixture["R"], fixture["L"]
@@ -125,6 +166,8 @@ def main() -> None:
     print("MEA-NAP Python  ▸  Small-worldness Parity + Structural Tests")
     print("=" * 70)
 
+    ok0 = test_compiled_rewiring_parity()
+
     if not FIXTURE_PATH.exists():
         print(f"\n! Missing fixture: {FIXTURE_PATH}")
         print("  Regenerate with:")
@@ -139,7 +182,7 @@ def main() -> None:
     ok3 = test_end_to_end_smoke(fixture)
 
     print(f"\n{'=' * 70}")
-    if ok1 and ok2 and ok3:
+    if ok0 and ok1 and ok2 and ok3:
         print("  → All checks passed")
     else:
         print("  → Some checks FAILED — see above")
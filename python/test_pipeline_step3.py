@@ -18,10 +18,28 @@ Two things are validated, since MATLAB's own pipeline only ever persists the
    (``meanap.pipeline.probabilistic_threshold.adjm_thr``): thresholding only
    ever removes edges (never adds or strengthens one), and the result is
    symmetric with a zero diagonal.
+3. **Engine parity**: the batched all-pairs STTC engine behind ``get_sttc``
+   matches the per-pair ``sttc_pair`` path exactly, on synthetic trains that
+   include empty, single-spike and *unsorted* (CAT-NAP-style) channels.
+4. **Surrogate-engine parity**: ``adjm_thr``'s packed, vectorised surrogate
+   loop draws bit-identical shifted trains and, with the same seed, keeps the
+   same edges as the reference loop over ``circular_shift_spikes`` +
+   ``get_sttc`` + a full sort. The surrogate tiling terms are updated rather
+   than recomputed, so they agree to rounding only; an edge may differ only
+   where a surrogate ties the real STTC to within that rounding.
+5. **Sequential mode**: ``adjm_thr(sequential=True)`` keeps exactly the edges
+   the full run keeps, leaves the generator exactly where the full run leaves
+   it, and actually skips work.
+6. **Split independence**: Step 3's matrices do not depend on how a
+   recording's surrogate blocks are divided between sub-tasks.
+7. **Multi-lag pass**: the one-pass ``(n_lags, n, n)`` STTC stack equals
+   ``get_sttc`` lag by lag, and the surrogate counts taken at all lags at once
+   equal those taken one lag at a time on the same surrogates.
 """
 
 from __future__ import annotations
 
+import math
 import sys
 import time
 from pathlib import Path
@@ -32,8 +50,10 @@ REPO_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(REPO_ROOT / "src"))
 
 from meanap.pipeline.io import load_spike_times_mat
-from meanap.pipeline.probabilistic_threshold import adjm_thr
-from meanap.pipeline.sttc import get_sttc
+from meanap.pipeline.probabilistic_threshold import (
+    SurrogateTrains, adjm_thr, circular_shift_spikes, threshold_snapshots,
+)
+from meanap.pipeline.sttc import get_sttc, sttc_pair
 
 
 MATLAB_SPIKE_DIR = REPO_ROOT / "OutputData03Mar2026" / "1_SpikeDetection" / "1A_SpikeDetectedData"
@@ -132,6 +152,252 @@ def test_thresholding_sanity() -> bool:
     return all_ok
 
 
+def _synthetic_trains(n: int, duration_s: float, seed: int = 1) -> dict[int, np.ndarray]:
+    """Random trains with the awkward cases mixed in: empty, single-spike,
+    and unsorted channels (``run_P`` is order-dependent on the latter)."""
+    rng = np.random.default_rng(seed)
+    trains: dict[int, np.ndarray] = {}
+    for ch in range(n):
+        k = int(rng.integers(0, 2000))
+        if ch % 13 == 0:
+            k = 0
+        elif ch % 17 == 0:
+            k = 1
+        t = np.sort(rng.uniform(0.0, duration_s, k))
+        if ch % 5 == 0:
+            rng.shuffle(t)
+        trains[ch] = t
+    return trains
+
+
+def test_batched_engine_parity() -> bool:
+    print(f"\n{'=' * 70}")
+    print("[3] Batched STTC engine vs per-pair sttc_pair (exact)")
+    print(f"{'=' * 70}")
+
+    n = 40
+    spike_times_dict = _synthetic_trains(n, DURATION_S)
+
+    all_ok = True
+    for lag_ms in LAGS_MS:
+        dt = lag_ms / 1000.0
+        ref = np.full((n, n), np.nan)
+        for i in range(n):
+            for j in range(i + 1, n):
+                ref[i, j] = ref[j, i] = sttc_pair(
+                    spike_times_dict[i], spike_times_dict[j], dt, 0.0, DURATION_S)
+        ref[ref < 0] = 0.0
+        ref[np.isnan(ref)] = 0.0
+
+        adj_m = get_sttc(spike_times_dict, n, lag_ms, DURATION_S)
+        ok = np.array_equal(adj_m, ref)
+        all_ok &= ok
+        print(f"    {'✓' if ok else '✗'} lag={lag_ms:3d}ms  "
+              f"max|diff|={np.abs(adj_m - ref).max():.3e}")
+
+    return all_ok
+
+
+def _reference_adjm_thr(spike_times_dict, n, lag_ms, tail, rep_num, rng):
+    """The straightforward surrogate loop ``adjm_thr`` is optimised from."""
+    adj_m = get_sttc(spike_times_dict, n, lag_ms, DURATION_S)
+    surrogate = np.empty((n, n, rep_num))
+    for r in range(rep_num):
+        synth = circular_shift_spikes(spike_times_dict, n, FS, DURATION_S, rng)
+        adj_synth = get_sttc(synth, n, lag_ms, DURATION_S)
+        np.fill_diagonal(adj_synth, 0.0)
+        surrogate[:, :, r] = adj_synth
+    cutoff = min(max(math.ceil((1 - tail) * rep_num) - 1, 0), rep_num - 1)
+    threshold = np.sort(surrogate, axis=2)[:, :, cutoff]
+    adj_m_ci = adj_m.copy()
+    adj_m_ci[threshold > adj_m] = 0.0
+    return adj_m, adj_m_ci, threshold, surrogate
+
+
+def test_surrogate_engine_parity() -> bool:
+    print(f"\n{'=' * 70}")
+    print("[4] Vectorised surrogate engine vs reference surrogate loop")
+    print(f"{'=' * 70}")
+
+    n, rep_num, tail = 30, 40, 0.05
+    spike_times_dict = _synthetic_trains(n, DURATION_S, seed=2)
+
+    trains = SurrogateTrains(spike_times_dict, n, FS, DURATION_S)
+    rng_a, rng_b = np.random.default_rng(3), np.random.default_rng(3)
+    same_shift = True
+    for _ in range(10):
+        times, _n_wrapped = trains.draw(rng_a)
+        ref = circular_shift_spikes(spike_times_dict, n, FS, DURATION_S, rng_b)
+        same_shift &= all(
+            np.array_equal(times[trains.offsets[ch]:trains.offsets[ch + 1]], ref[ch])
+            for ch in range(n))
+
+    checks = {"shifted trains bit-identical to circular_shift_spikes": same_shift}
+    for lag_ms in (10, 50):
+        _adj_m, adj_m_ci, rep_val, dist1 = adjm_thr(
+            spike_times_dict, n, lag_ms, tail, FS, DURATION_S, rep_num,
+            rng=np.random.default_rng(7), collect_check_snapshots=True)
+        _adj_m, adj_m_ci_topk = adjm_thr(
+            spike_times_dict, n, lag_ms, tail, FS, DURATION_S, rep_num,
+            rng=np.random.default_rng(7))
+        ref_adj, ref_ci, ref_threshold, ref_surrogate = _reference_adjm_thr(
+            spike_times_dict, n, lag_ms, tail, rep_num, np.random.default_rng(7))
+        _ref_val, ref_dist1 = threshold_snapshots(ref_surrogate, tail, rep_num)
+        tie = np.isclose(ref_threshold, ref_adj, rtol=0, atol=1e-12)
+        checks[f"lag={lag_ms}ms: same edges kept, bar rounding ties (snapshot path)"] = (
+            np.all((adj_m_ci == ref_ci) | tie))
+        checks[f"lag={lag_ms}ms: same edges kept, bar rounding ties (running top-k path)"] = (
+            np.all((adj_m_ci_topk == ref_ci) | tie))
+        checks[f"lag={lag_ms}ms: top-k and snapshot paths agree exactly"] = np.array_equal(
+            adj_m_ci, adj_m_ci_topk)
+        checks[f"lag={lag_ms}ms: snapshots match to 1e-12"] = all(
+            np.allclose(a, b, rtol=0, atol=1e-12) for a, b in zip(dist1, ref_dist1))
+
+    all_ok = True
+    for name, ok in checks.items():
+        all_ok &= ok
+        print(f"    {'✓' if ok else '✗'} {name}")
+    return all_ok
+
+
+def test_sequential_matches_full_run() -> bool:
+    print(f"\n{'=' * 70}")
+    print("[5] Sequential (early-stopping) thresholding vs the full run")
+    print(f"{'=' * 70}")
+
+    n, rep_num, tail = 30, 100, 0.05
+    spike_times_dict = _synthetic_trains(n, DURATION_S, seed=4)
+
+    checks = {}
+    for lag_ms in (10, 50):
+        rng_full, rng_seq = np.random.default_rng(11), np.random.default_rng(11)
+        _adj, full_ci = adjm_thr(spike_times_dict, n, lag_ms, tail, FS, DURATION_S,
+                                 rep_num, rng=rng_full)
+        stats: dict = {}
+        _adj, seq_ci = adjm_thr(spike_times_dict, n, lag_ms, tail, FS, DURATION_S,
+                                rep_num, rng=rng_seq, sequential=True, stats=stats)
+        skipped = 1 - stats["pair_evaluations"] / stats["pair_evaluations_full"]
+        print(f"  lag={lag_ms}ms: {skipped:.0%} of surrogate STTC evaluations skipped")
+        checks[f"lag={lag_ms}ms: identical thresholded matrix"] = np.array_equal(seq_ci, full_ci)
+        checks[f"lag={lag_ms}ms: generator left in the same state"] = (
+            rng_full.integers(0, 2**62) == rng_seq.integers(0, 2**62))
+        checks[f"lag={lag_ms}ms: some work skipped"] = skipped > 0
+
+    all_ok = True
+    for name, ok in checks.items():
+        all_ok &= ok
+        print(f"    {'✓' if ok else '✗'} {name}")
+    return all_ok
+
+
+def test_split_independence() -> bool:
+    print(f"\n{'=' * 70}")
+    print("[6] Step 3 sub-task splitting does not change the result")
+    print(f"{'=' * 70}")
+
+    from meanap.params import Params
+    from meanap.pipeline.probabilistic_threshold import (
+        apply_threshold, removal_count, surrogate_blocks,
+    )
+    from meanap.pipeline.step3 import _split_units, _step3_units
+    from meanap.pipeline.sttc import get_sttc_stack, pack_spike_times
+
+    n = 20
+    params = Params(func_con_lag_val=[10, 25], prob_thresh_rep_num=60, random_seed=3)
+    times, offsets = pack_spike_times(_synthetic_trains(n, DURATION_S, seed=5), n)
+    n_blocks = len(surrogate_blocks(params.prob_thresh_rep_num))
+    k = removal_count(params.prob_thresh_tail, params.prob_thresh_rep_num)
+    adj_m = get_sttc_stack(times, offsets, list(params.func_con_lag_val), DURATION_S)
+
+    def _run(splits: int) -> dict[int, np.ndarray]:
+        parts = [_step3_units(params, "rec", times, offsets, adj_m, FS, DURATION_S, blocks)
+                 for blocks in _split_units(n_blocks, splits, False)]
+        exceed = np.sum([part.exceed for part in parts], axis=0)
+        return {lag_ms: apply_threshold(adj_m[i], exceed[i], k)
+                for i, lag_ms in enumerate(params.func_con_lag_val)}
+
+    whole, split = _run(1), _run(n_blocks)
+    checks = {
+        f"1 task vs {n_blocks} tasks: identical matrices":
+            all(np.array_equal(whole[lag], split[lag]) for lag in whole),
+        "sequential mode keeps the blocks together":
+            _split_units(n_blocks, 8, True) == [list(range(n_blocks))],
+        "stability-check snapshots merged from split parts": _split_snapshots_match(),
+    }
+    all_ok = True
+    for name, ok in checks.items():
+        all_ok &= ok
+        print(f"    {'✓' if ok else '✗'} {name}")
+    return all_ok
+
+
+def _split_snapshots_match() -> bool:
+    """Each sub-task ships only its top few surrogates per edge and checkpoint;
+    merged, they must give the thresholds a sort of the whole stack does."""
+    from meanap.pipeline.probabilistic_threshold import (
+        merge_snapshot_tops, snapshot_checkpoints, snapshot_tops,
+    )
+
+    rep_num = 60
+    stack = np.random.default_rng(2).random((2, 6, 6, rep_num))
+    ok = True
+    for tail in (0.05, 0.3):
+        checkpoints = snapshot_checkpoints(tail, rep_num)
+        parts = [snapshot_tops(stack[..., a:b], a, checkpoints)
+                 for a, b in ((0, 25), (25, 50), (50, rep_num))]
+        merged = merge_snapshot_tops(parts, checkpoints)
+        ref = [np.sort(stack[..., :i], axis=-1)[..., i - k] for i, k in checkpoints]
+        ok &= all(np.array_equal(m, r) for m, r in zip(merged, ref, strict=True))
+    return ok
+
+
+def test_multi_lag_pass() -> bool:
+    print(f"\n{'=' * 70}")
+    print("[7] Multi-lag STTC pass vs one pass per lag")
+    print(f"{'=' * 70}")
+
+    from meanap.pipeline.probabilistic_threshold import count_exceedances, removal_count
+    from meanap.pipeline.sttc import get_sttc_stack, pack_spike_times
+
+    n, rep_num, tail = 30, 50, 0.05
+    lags = [5, 10, 25, 50]
+    dts = np.array(lags) / 1000.0
+    spike_times_dict = _synthetic_trains(n, DURATION_S, seed=6)
+    times, offsets = pack_spike_times(spike_times_dict, n)
+    iu = np.triu_indices(n, k=1)
+    k = removal_count(tail, rep_num)
+
+    t0 = time.perf_counter()
+    stack = get_sttc_stack(times, offsets, lags, DURATION_S)
+    t_stack = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    per_lag = [get_sttc(spike_times_dict, n, lag_ms, DURATION_S) for lag_ms in lags]
+    t_per_lag = time.perf_counter() - t0
+    print(f"  raw STTC: {t_stack * 1e3:.1f} ms in one pass, {t_per_lag * 1e3:.1f} ms lag by lag")
+
+    trains = SurrogateTrains(spike_times_dict, n, FS, DURATION_S)
+    real = stack[:, iu[0], iu[1]]
+    together = count_exceedances(trains, real, iu, dts, [(rep_num, np.random.default_rng(8))])
+    separate = np.array([
+        count_exceedances(trains, real[i], iu, [dt], [(rep_num, np.random.default_rng(8))])[0]
+        for i, dt in enumerate(dts)])
+    sequential = count_exceedances(trains, real, iu, dts, [(rep_num, np.random.default_rng(8))],
+                                   stop_at=k)
+
+    checks = {
+        "raw stack identical to get_sttc at every lag":
+            all(np.array_equal(stack[i], per_lag[i]) for i in range(len(lags))),
+        "exceedance counts identical to one lag at a time": np.array_equal(together, separate),
+        "sequential verdicts identical across lags":
+            np.array_equal((sequential >= k) & (real > 0), (together >= k) & (real > 0)),
+    }
+    all_ok = True
+    for name, ok in checks.items():
+        all_ok &= ok
+        print(f"    {'✓' if ok else '✗'} {name}")
+    return all_ok
+
+
 def main() -> None:
     print("=" * 70)
     print("MEA-NAP Python  ▸  Step 3: Functional Connectivity (STTC) Parity Test")
@@ -139,9 +405,14 @@ def main() -> None:
 
     ok1 = test_deterministic_sttc()
     ok2 = test_thresholding_sanity()
+    ok3 = test_batched_engine_parity()
+    ok4 = test_surrogate_engine_parity()
+    ok5 = test_sequential_matches_full_run()
+    ok6 = test_split_independence()
+    ok7 = test_multi_lag_pass()
 
     print(f"\n{'=' * 70}")
-    if ok1 and ok2:
+    if ok1 and ok2 and ok3 and ok4 and ok5 and ok6 and ok7:
         print("  → All checks passed")
     else:
         print("  → Some checks FAILED — see above")
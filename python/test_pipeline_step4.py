@@ -45,6 +45,39 @@ def _scalar(x) -> float:
     return float(np.asarray(x).reshape(-1)[0])
 
 
+def _compiled_engine_checks() -> list[tuple[str, bool]]:
+    """``distance_wei``/``betweenness_wei``'s compiled engines against the
+    line-for-line ports.
+
+    Needs no MATLAB output, so it runs even where the fixtures above are
+    missing. Quarter-step weights and rounded lengths force exact ties between
+    paths, which is where a different Dijkstra could disagree in the last bit.
+    """
+    rng = np.random.default_rng(0)
+    checks = []
+    for trial in range(60):
+        n = int(rng.integers(2, 40))
+        w = rng.random((n, n)) * (rng.random((n, n)) < rng.random())
+        if trial % 3 == 0:
+            w = np.round(w * 4) / 4
+        if trial % 2 == 0:
+            w = np.triu(w, 1)
+            w = w + w.T
+        length_mat = nm.weight_conversion_lengths(w)
+        if trial % 5 == 0:
+            length_mat = np.round(length_mat * 2)
+        checks.append((f"distance_wei engine, trial {trial} (n={n})",
+                       np.array_equal(nm.distance_wei(length_mat),
+                                      nm._distance_wei_reference(length_mat))))
+        # Step 4's own BC lengths are a complete graph; the sparse lengths
+        # exercise unreached nodes and tied path counts.
+        for label, g in (("1/(W+0.01)", 1.0 / (w + 0.01)), ("1/W", length_mat)):
+            checks.append((f"betweenness_wei engine, {label}, trial {trial} (n={n})",
+                           np.array_equal(nm.betweenness_wei(g),
+                                          nm._betweenness_wei_reference(g))))
+    return checks
+
+
 def main() -> None:
     print("=" * 70)
     print("MEA-NAP Python  ▸  Step 4: Network Metrics Parity Test")
@@ -54,6 +87,15 @@ def main() -> None:
     total_matches = 0
     mismatches: list[str] = []
 
+    engine = _compiled_engine_checks()
+    print(f"\n  compiled engines vs. the .m ports: "
+          f"{sum(ok for _, ok in engine)}/{len(engine)} bit-identical")
+    for name, ok in engine:
+        total_checks += 1
+        total_matches += ok
+        if not ok:
+            mismatches.append(name)
+
     for rec_name in RECORDINGS:
         fixture_path = FIXTURE_DIR / f"{rec_name}_step4_reference.npz"
         mat_path = EXPERIMENT_MAT_DIR / f"{rec_name}_OutputData03Mar2026.mat"
@@ -0,0 +1,229 @@
+"""Tests for reading raw recordings a few channels at a time (``io.open_raw_recording``).
+
+Run from the repo root::
+
+    uv run python python/test_raw_recording.py
+
+Self-contained — writes a small synthetic recording in every layout Step 1
+reads: v7.3 ``.mat`` stored contiguously and chunked/gzipped, v7 ``.mat``, a
+Multi Channel Systems ``.h5`` and a two-well Axion ``.raw``. Opening a
+recording instead of loading it is only worth having if nothing downstream can
+tell, so each layout's channels are checked bit for bit against the
+whole-array reader, in whatever order and grouping they're asked for, and
+spike detection and the check-figure summary are checked to give identical
+results from an opened recording and from the loaded array.
+"""
+
+from __future__ import annotations
+
+import struct
+import sys
+import tempfile
+from pathlib import Path
+
+import h5py
+import numpy as np
+import scipy.io as sio
+
+REPO_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+from meanap.params import Params  # noqa: E402
+from meanap.pipeline import io  # noqa: E402
+from meanap.pipeline.axion_raw import load_axion_well, read_axion_metadata  # noqa: E402
+from meanap.pipeline.io import (  # noqa: E402
+    RawSource, load_mcs_h5, load_raw_recording, open_raw_recording,
+)
+from meanap.pipeline.plotting import compute_spike_check_data  # noqa: E402
+from meanap.pipeline.spike_detection import (  # noqa: E402
+    SpikeDetectionParams, detect_spikes_recording,
+)
+
+FS = 10_000.0
+N_SAMPLES, N_CH = 20_000, 8
+CHANNELS = np.array([12, 13, 21, 22, 23, 31, 32, 33])
+
+
+def _signal(seed: int = 0) -> np.ndarray:
+    """(n_samples, n_channels) float64 µV: noise, with spikes on most channels."""
+    rng = np.random.default_rng(seed)
+    dat = rng.normal(0, 5, (N_SAMPLES, N_CH))
+    for ch in range(N_CH - 1):
+        for t in rng.integers(100, N_SAMPLES - 100, 40):
+            dat[t:t + 10, ch] -= np.hanning(10) * 80
+    return dat
+
+
+def _write_mat73(path: Path, dat: np.ndarray, **dset_kw) -> None:
+    with h5py.File(path, "w") as f:
+        f.create_dataset("dat", data=dat.T, **dset_kw)      # MATLAB's transpose
+        f.create_dataset("channels", data=CHANNELS[None, :].astype(float))
+        f.create_dataset("fs", data=np.array([[FS]]))
+
+
+def _write_mcs(path: Path, counts: np.ndarray) -> None:
+    """A minimal MCS export: one analog stream, each gzipped chunk spanning
+    every channel — the layout where per-channel reads would decompress it all."""
+    info = np.zeros(N_CH, dtype=[("Label", "S16"), ("Tick", "<i8"),
+                                 ("ConversionFactor", "<i8"), ("ADZero", "<i4"),
+                                 ("Exponent", "<i4")])
+    info["Label"] = [f"E-00{i} {c}".encode() for i, c in enumerate(CHANNELS)]
+    info["Tick"] = int(1e6 / FS)
+    info["ConversionFactor"] = np.arange(N_CH) + 57
+    info["ADZero"] = np.arange(N_CH) - 3
+    info["Exponent"] = -12
+    with h5py.File(path, "w") as f:
+        stream = f.create_group("Data/Recording_0/AnalogStream/Stream_0")
+        stream.create_dataset("ChannelData", data=counts, chunks=(N_CH, 2000),
+                              compression="gzip")
+        stream.create_dataset("InfoChannel", data=info)
+
+
+def _write_axion(path: Path, counts: np.ndarray) -> None:
+    """A two-well (A1, A2) Axion plate, four electrodes each, with the data
+    columns stored out of plate order as AxIS is free to."""
+    plate = [(1, 1, col, row) for row in (1, 2) for col in (1, 2)] + \
+            [(2, 1, col, row) for row in (1, 2) for col in (1, 2)]
+    column_order = [5, 0, 7, 2, 1, 6, 3, 4]     # data column -> plate channel
+    channel_array = struct.pack("<II", 25165825, len(plate)) + b"".join(
+        struct.pack("<6BH", wc, wr, ec, er, 0, i, 0)
+        for i, (wc, wr, ec, er) in enumerate(plate))
+
+    entries_start = 1024
+    header_len = 4 + 4 + 8 + 4 + 4 + 4 + 4 * 14 + 4 + 4 + 8 + 8 + 4
+    block_len = header_len + 2 * len(column_order) + 4
+    data_start = entries_start + len(channel_array) + block_len
+    block = struct.pack("<HHHHddIIIII", 1, 0, 2, 0, FS, 1e-7, len(column_order),
+                        0, 0, 0, 0)
+    block += b"\0" * (4 * 14) + struct.pack("<ii", 0, 0)
+    block += struct.pack("<qqI", data_start, counts.nbytes, 0)
+    block += struct.pack(f"<{len(column_order)}H", *column_order) + struct.pack("<I", 0)
+
+    slots = np.zeros(123, dtype="<u8")
+    slots[0] = (0x02 << 56) | len(channel_array)
+    slots[1] = (0x07 << 56) | len(block)
+    header = b"AxionBio" + struct.pack("<HHHqIq", 0, 1, 0, 0, 600, entries_start)
+    header += slots.tobytes()
+    path.write_bytes(header.ljust(entries_start, b"\0") + channel_array + block
+                     + counts.astype("<i2").tobytes())
+
+
+def _check_layout(name: str, path, reference, checks: dict, kind: type) -> None:
+    dat_ref, ch_ref, fs_ref = reference
+    n = dat_ref.shape[1]
+    scattered = [n - 1, 0, n // 2]
+    with open_raw_recording(path) as rec:
+        batches = rec.batches(3)
+        checks[f"{name}: opened as {kind.__name__}"] = isinstance(rec, kind)
+        checks[f"{name}: every channel identical to the whole-array read"] = (
+            rec.read_all().dtype == np.float32 and np.array_equal(rec.read_all(), dat_ref)
+            and np.array_equal(rec.channels, ch_ref) and rec.fs == fs_ref
+            and rec.shape == dat_ref.shape)
+        checks[f"{name}: any channels, in any order"] = np.array_equal(
+            rec.read(scattered), dat_ref[:, scattered])
+        checks[f"{name}: batches cover each channel once, in order"] = np.array_equal(
+            np.concatenate(batches), np.arange(rec.n_channels))
+    checks[f"{name}: load_raw_recording unchanged"] = all(
+        np.array_equal(a, b) for a, b in zip(load_raw_recording(path), reference))
+
+
+def test_layouts() -> bool:
+    print("\n[1] open_raw_recording — every layout, against the whole-array readers")
+    dat = _signal()
+    counts = np.round(dat.T * 20).astype(np.int16)          # (n_channels, n_samples)
+    checks: dict[str, bool] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+
+        plain, packed, v7 = tmp / "plain.mat", tmp / "packed.mat", tmp / "v7.mat"
+        _write_mat73(plain, dat)
+        _write_mat73(packed, dat, chunks=(2, 4096), compression="gzip")
+        sio.savemat(v7, {"dat": dat, "channels": CHANNELS[None, :], "fs": FS})
+        truth = (dat.astype(np.float32), CHANNELS, FS)
+        _check_layout("v7.3 contiguous", plain, truth, checks, io._ChannelMajorMap)
+        _check_layout("v7.3 chunked", packed, truth, checks, io._HDF5Recording)
+        _check_layout("v7", v7, truth, checks, io._ArrayRecording)
+
+        mcs = tmp / "mcs.h5"
+        _write_mcs(mcs, counts)
+        _check_layout("MCS", mcs, load_mcs_h5(mcs), checks, io._HDF5Recording)
+        with open_raw_recording(mcs) as rec:
+            checks["MCS: a batch is a whole chunk of channels"] = (
+                [len(b) for b in rec.batches(3)] == [N_CH])
+        with open_raw_recording(packed) as rec:
+            checks["v7.3 chunked: batches snap to chunk rows"] = (
+                [len(b) for b in rec.batches(3)] == [4, 4])
+
+        axion = tmp / "plate.raw"
+        _write_axion(axion, counts.T)
+        meta = read_axion_metadata(axion)
+        for well in ("A1", "A2"):
+            _check_layout(f"Axion {well}", RawSource(axion, well),
+                          load_axion_well(axion, well, metadata=meta),
+                          checks, io._AxionWellMap)
+
+    for name, ok in checks.items():
+        print(f"    {'✓' if ok else '✗'} {name}")
+    return all(checks.values())
+
+
+def _same_result(a, b) -> bool:
+    return (a.spike_times.keys() == b.spike_times.keys() and all(
+        np.array_equal(a.spike_times[ch][m], b.spike_times[ch][m])
+        and np.array_equal(a.spike_waveforms[ch][m], b.spike_waveforms[ch][m])
+        for ch in a.spike_times for m in a.spike_times[ch]))
+
+
+def test_detection() -> bool:
+    print("\n[2] Step 1 on an opened recording — identical to the loaded array")
+    params = Params(random_seed=3)
+    detect = SpikeDetectionParams(fs=FS, thresholds=[4.0], wname_list=["bior1.5"],
+                                  cost_list=[-0.12], grd=[2])
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "rec.mat"
+        _write_mat73(path, _signal(1), chunks=(1, 4096), compression="gzip")
+        dat, channels, fs = load_raw_recording(path)
+        loaded = detect_spikes_recording(dat, channels, fs, detect, max_workers=1)
+        with open_raw_recording(path) as rec:
+            opened = detect_spikes_recording(rec, rec.channels, rec.fs, detect, max_workers=1)
+            threaded = detect_spikes_recording(rec, rec.channels, rec.fs, detect, max_workers=3)
+            checks_opened = compute_spike_check_data(rec, opened, params, "rec")
+        checks_loaded = compute_spike_check_data(dat, loaded, params, "rec")
+
+    fields = ("trace_channels", "trace_windows", "trace_starts", "trace_views",
+              "trace_stds", "freq_curves")
+    checks = {
+        "spikes detected": sum(len(v["bior1p5"]) for v in loaded.spike_times.values()) > 0,
+        "grounded channel skipped": 2 not in opened.spike_times,
+        "spike times and waveforms identical": _same_result(loaded, opened),
+        "thread count does not change them": _same_result(loaded, threaded),
+        "check-figure summary identical": all(
+            np.array_equal(getattr(checks_loaded, f), getattr(checks_opened, f))
+            for f in fields) and all(
+            np.array_equal(checks_loaded.waveforms[m], checks_opened.waveforms[m])
+            for m in checks_loaded.waveforms),
+    }
+    for name, ok in checks.items():
+        print(f"    {'✓' if ok else '✗'} {name}")
+    return all(checks.values())
+
+
+def main() -> None:
+    print("=" * 70)
+    print("MEA-NAP Python  ▸  Raw Recording Access Tests")
+    print("=" * 70)
+
+    ok1 = test_layouts()
+    ok2 = test_detection()
+
+    print(f"\n{'=' * 70}")
+    if ok1 and ok2:
+        print("  → All checks passed")
+    else:
+        print("  → Some checks FAILED — see above")
+    print(f"{'=' * 70}")
+    sys.exit(0 if ok1 and ok2 else 1)
+
+
+if __name__ == "__main__":
+    main()
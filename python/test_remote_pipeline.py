@@ -11,7 +11,10 @@ the cache budget, and asserts the budget was never exceeded — and that the run
 still produced the same results a fully-local run does.
 
 The remote is a fake store backed by a directory, so this needs no network but
-exercises the real fetch/pin/evict path (``copies = True``).
+exercises the real fetch/pin/evict path (``copies = True``). The same fake
+drives CAT-NAP's process pool, where recordings are handed to workers out of
+the stream and come back in any order: every pin must still be released,
+cancelled or not, and the results must still be in spreadsheet order.
 """
 
 from __future__ import annotations
@@ -20,6 +23,7 @@ import sys
 import tempfile
 import threading
 import time
+from collections import Counter
 from pathlib import Path
 
 import numpy as np
@@ -85,6 +89,26 @@ def _make_dataset(root: Path, names: list[str]) -> None:
         (d / "Fneu.npy").write_bytes(b"x" * 1_000_000)
 
 
+class CountingSource(RecordingSource):
+    """A source that counts the pins its stream takes and the unpins given back."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.pinned: Counter = Counter()
+        self.unpins = 0
+
+    def stream(self, recordings, depth=1, kind="catnap"):
+        for rec, data in super().stream(recordings, depth=depth, kind=kind):
+            if not isinstance(data, BaseException):
+                self.pinned[rec.filename] += 1
+            yield rec, data
+
+    def unpin(self, recording: str) -> None:
+        self.pinned[recording] -= 1
+        self.unpins += 1
+        super().unpin(recording)
+
+
 def _params(tmp: Path, out_name: str, **kw) -> Params:
     p = Params(
         suite2p_mode=True, twop_activity="F", func_con_lag_val=[33],
@@ -406,6 +430,77 @@ def _ephys_run_checks() -> list[Check]:
     return checks
 
 
+def _pool_run_checks() -> list[Check]:
+    """CAT-NAP's compute pool: pins released, cancelled or not, results in order."""
+    import pandas as pd
+
+    from meanap.catnap import pipeline as cp
+    from meanap.pipeline import parallel
+    from meanap.pipeline.cancellation import PipelineCancelled
+    from meanap.pipeline.output_folders import create_output_folders
+
+    checks: list[Check] = []
+    names = [f"rec{i}" for i in range(5)]
+    recordings = [RecordingInfo(filename=n, div=21.0, group="WT") for n in names]
+
+    # Two workers whatever this machine's cores and RAM, so the pool path runs.
+    # Only the parent sizes the pool, so patching it here is enough.
+    sizing = (cp.catnap_recording_workers, parallel.suggest_process_count)
+    cp.catnap_recording_workers = lambda params, n: min(params.recording_workers, n)
+    parallel.suggest_process_count = lambda n, *a, max_workers=None, **kw: min(max_workers, n)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            _make_dataset(tmp / "remote", names)
+
+            def source_for(name: str) -> CountingSource:
+                return CountingSource(
+                    store=CopyingStore(tmp / "remote"),
+                    cache=FileCache(root=tmp / f"cache-{name}", budget_bytes=200_000_000),
+                    log=lambda m: None)
+
+            def run(name: str, source: CountingSource, workers: int, should_cancel=None):
+                out = create_output_folders(tmp, name, ["WT"])
+                cp.run_catnap_pipeline(
+                    _params(tmp, name, recording_workers=workers), recordings,
+                    out, lambda m: None, source=source, should_cancel=should_cancel)
+                return pd.read_csv(out / "4_NetworkActivity"
+                                   / "NetworkActivity_RecordingLevel.csv")
+
+            pooled = source_for("Pool")
+            pooled_csv = run("Pool", pooled, 2)
+            held = {k: v for k, v in pooled.pinned.items() if v}
+            checks.append(("pool run: every recording was pinned",
+                           set(pooled.pinned) == set(names), f"{sorted(pooled.pinned)}"))
+            checks.append(("pool run: every pin released", not held, f"{held}"))
+            checks.append(("pool run: results in spreadsheet order",
+                           list(pooled_csv["FileName"]) == names,
+                           f"{list(pooled_csv['FileName'])}"))
+
+            serial_csv = run("Serial", source_for("Serial"), 1)
+            checks.append(("pool and one-worker runs agree exactly",
+                           pooled_csv.equals(serial_csv), "CSVs differ"))
+
+            # Cancel as soon as the first recording is back: the other worker's
+            # recording is still running, and the stream has handed over more.
+            cancelled = source_for("Cancelled")
+            raised = False
+            try:
+                run("Cancelled", cancelled, 2, should_cancel=lambda: cancelled.unpins >= 1)
+            except PipelineCancelled:
+                raised = True
+            held = {k: v for k, v in cancelled.pinned.items() if v}
+            checks.append(("cancelled run: stopped early",
+                           raised and len(cancelled.pinned) < len(names),
+                           f"raised={raised}, pinned {sorted(cancelled.pinned)}"))
+            checks.append(("cancelled run: more than one recording was in flight",
+                           len(cancelled.pinned) > 1, f"{sorted(cancelled.pinned)}"))
+            checks.append(("cancelled run: every pin released", not held, f"{held}"))
+    finally:
+        cp.catnap_recording_workers, parallel.suggest_process_count = sizing
+    return checks
+
+
 def _name_map_checks() -> list[Check]:
     """Folders renamed away from the spreadsheet resolve without editing either."""
     checks: list[Check] = []
@@ -445,6 +540,7 @@ def main() -> int:
         ("D — electrophysiology: files, plates and refcounts:", _ephys_source_checks),
         ("E — a remote electrophysiology run:", _ephys_run_checks),
         ("F — renamed folders resolve via the name map:", _name_map_checks),
+        ("G — CAT-NAP's compute pool: pins, cancel, order:", _pool_run_checks),
     ]:
         p, n = _report(title, build())
         total_pass += p
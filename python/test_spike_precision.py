@@ -0,0 +1,196 @@
+"""Tests for Step 1's float32 detection engine (``SpikeDetectionParams.precision``).
+
+Run from the repo root::
+
+    uv run python python/test_spike_precision.py
+
+Self-contained — synthetic recordings. Two things are checked. The float64
+engine, which now computes the wavelet transform one scale at a time instead of
+holding every scale's coefficients, must still be the literal port: it is
+compared against the whole-array algorithm it replaced. And the float32 engine
+must stay within its documented tolerance of the float64 one: thresholds to
+1e-6 relative and waveforms to 1e-3 µV, which on these recordings leaves every
+spike time identical — only a spike whose detection statistic lies within that
+of its threshold could be judged differently.
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+from pathlib import Path
+
+import h5py
+import numpy as np
+
+REPO_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+from meanap.pipeline import spike_detection as sd  # noqa: E402
+from meanap.pipeline.io import as_raw_recording, open_raw_recording  # noqa: E402
+from meanap.pipeline.spike_detection import (  # noqa: E402
+    SpikeDetectionParams, _cwt_bior15, _cwt_bior15_scale, _determine_scales,
+    _parse_spike_index, bandpass_filter, detect_spikes_recording, detect_spikes_wavelet,
+)
+
+FS = 12_500.0
+N_SAMPLES, N_CH = 12_500 * 20, 4
+
+
+def _signal(seed: int = 0) -> np.ndarray:
+    """(n_samples, n_channels) float32 µV: noise, and spikes of every size
+    from buried in it to well clear."""
+    rng = np.random.default_rng(seed)
+    dat = rng.normal(0, 5, (N_SAMPLES, N_CH))
+    for ch in range(N_CH):
+        for t in rng.integers(50, N_SAMPLES - 50, 600):
+            dat[t:t + 10, ch] -= np.hanning(10) * rng.uniform(15, 120)
+    return dat.astype(np.float32)
+
+
+def _wavelet_whole_array(signal, fs_hz, wid_ms, ns, option, L, wname):
+    """detect_spikes_wavelet as it was: every scale's coefficients at once,
+    then MATLAB's ``ct`` array."""
+    signal = signal - signal.mean()
+    Nt = len(signal)
+    W = _determine_scales(wname, wid_ms, fs_hz, ns)
+    c = _cwt_bior15(signal, W.astype(float))
+    L_scaled = L * 36.7368
+    Io = np.zeros(Nt, dtype=bool)
+    ct = np.zeros((ns, Nt), dtype=float)
+    for i in range(ns):
+        stride = max(1, int(round(W[i])))
+        Sigmaj = np.median(np.abs(c[i, ::stride] - c[i, :].mean())) / 0.6745
+        if Sigmaj == 0:
+            continue
+        Thj = Sigmaj * np.sqrt(2 * np.log(Nt))
+        index = np.where(np.abs(c[i, :]) > Thj)[0]
+        if len(index) == 0:
+            if option == "c":
+                continue
+            Mj, PS = Thj, 1.0 / Nt
+        else:
+            Mj, PS = np.mean(np.abs(c[i, index])), len(index) / Nt
+        DTh = Mj / 2 + Sigmaj**2 / Mj * (L_scaled + np.log((1.0 - PS) / PS))
+        DTh = abs(DTh) * (DTh >= 0)
+        ind = np.where(np.abs(c[i, :]) > DTh)[0]
+        ct[i, ind] = c[i, ind]
+        ct[i, ct[i, :] < 0] = 0
+        Io = Io | (ct[i, :] != 0)
+    return _parse_spike_index(Io.astype(int), fs_hz, wid_ms)
+
+
+def test_float64() -> bool:
+    print("\n[1] float64 engine — still the literal port")
+    dat = _signal(1)
+    checks: dict[str, bool] = {}
+    filtered = bandpass_filter(dat[:, 0], FS, 600.0, 8000.0)
+    scales = _determine_scales("bior1.5", (0.4, 0.8), FS, 5).astype(float)
+    whole = _cwt_bior15(filtered, scales)
+    checks["a scale at a time is the whole CWT's row"] = all(
+        np.array_equal(_cwt_bior15_scale(filtered, a), whole[i])
+        for i, a in enumerate(scales))
+    for option in ("l", "c"):
+        for L in (-0.12, 0.2):
+            args = (FS, (0.4, 0.8), 5, option, L, "bior1.5")
+            checks[f"detection identical to the whole-array version ({option!r}, L={L})"] = (
+                np.array_equal(detect_spikes_wavelet(filtered, *args),
+                               _wavelet_whole_array(filtered, *args)))
+    quiet = np.zeros(5000)
+    checks["a flat trace detects nothing"] = len(detect_spikes_wavelet(quiet, FS)) == 0
+    for name, ok in checks.items():
+        print(f"    {'✓' if ok else '✗'} {name}")
+    return all(checks.values())
+
+
+def _compare(a, b) -> tuple[bool, float, float]:
+    """(spike times identical, worst relative threshold gap, worst waveform gap)."""
+    same, thr, wave = True, 0.0, 0.0
+    for ch in a.spike_times:
+        for m in a.spike_times[ch]:
+            same &= np.array_equal(a.spike_times[ch][m], b.spike_times[ch][m])
+            if same and len(a.spike_waveforms[ch][m]):
+                wave = max(wave, float(np.abs(a.spike_waveforms[ch][m]
+                                              - b.spike_waveforms[ch][m]).max()))
+            if np.isfinite(a.thresholds[ch][m]):
+                thr = max(thr, abs(a.thresholds[ch][m] - b.thresholds[ch][m])
+                          / abs(a.thresholds[ch][m]))
+    return same, thr, wave
+
+
+def test_float32() -> bool:
+    print("\n[2] float32 engine — within tolerance of float64")
+    checks: dict[str, bool] = {}
+    for high in (6150.0, 8000.0):
+        dat = _signal(2)
+        channels = np.arange(N_CH)
+        params = dict(fs=FS, thresholds=[4.0, 5.0], wname_list=["bior1.5"],
+                      cost_list=[-0.12], filter_high_pass=high, remove_artifacts=True)
+        double = detect_spikes_recording(dat, channels, FS, SpikeDetectionParams(**params),
+                                         max_workers=1)
+        single = detect_spikes_recording(
+            dat, channels, FS, SpikeDetectionParams(precision="float32", **params),
+            max_workers=2)
+        same, thr, wave = _compare(double, single)
+        n = sum(len(v) for r in double.spike_times.values() for v in r.values())
+        checks[f"{high:g} Hz: all {n} spike times identical"] = same
+        checks[f"{high:g} Hz: thresholds within 1e-6 ({thr:.1e})"] = thr < 1e-6
+        checks[f"{high:g} Hz: waveforms within 1e-3 µV ({wave:.1e})"] = wave < 1e-3
+
+    filtered = bandpass_filter(_signal(3)[:, 0], FS, 600.0, 6150.0)
+    sig = filtered - filtered.mean()
+    rows = [(_cwt_bior15_scale(sig, a), _cwt_bior15_scale(sig.astype(np.float32), a))
+            for a in (2.0, 5.0, 9.0)]
+    checks["CWT rows stay float32, within 1e-5 of the row's range"] = all(
+        r32.dtype == np.float32 and np.abs(r32 - r64).max() < 1e-5 * np.abs(r64).max()
+        for r64, r32 in rows)
+    for name, ok in checks.items():
+        print(f"    {'✓' if ok else '✗'} {name}")
+    return all(checks.values())
+
+
+def test_buffers() -> bool:
+    print("\n[3] channel-major reads and per-thread scratch")
+    dat = _signal(4)[:50_000]
+    checks: dict[str, bool] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "rec.mat"
+        with h5py.File(path, "w") as f:
+            f.create_dataset("dat", data=dat.T, chunks=(2, 4096), compression="gzip")
+            f.create_dataset("channels", data=np.arange(1, N_CH + 1)[None, :].astype(float))
+            f.create_dataset("fs", data=np.array([[FS]]))
+        for name, rec in (("file", open_raw_recording(path)),
+                          ("array", as_raw_recording(dat, np.arange(N_CH), FS))):
+            with rec:
+                cols = rec.read([3, 0, 2], 100, 40_000, order="F")
+                checks[f"{name}: order='F' is channel-major, same values"] = (
+                    cols.flags.f_contiguous and np.array_equal(cols, dat[100:40_000, [3, 0, 2]]))
+    detect_spikes_recording(dat, np.arange(N_CH), FS,
+                            SpikeDetectionParams(fs=FS, precision="float32"), max_workers=1)
+    checks["scratch buffers released after detection"] = not getattr(
+        sd._SCRATCH, "buffers", None)
+    for name, ok in checks.items():
+        print(f"    {'✓' if ok else '✗'} {name}")
+    return all(checks.values())
+
+
+def main() -> None:
+    print("=" * 70)
+    print("MEA-NAP Python  ▸  Spike Detection Precision Tests")
+    print("=" * 70)
+
+    ok1 = test_float64()
+    ok2 = test_float32()
+    ok3 = test_buffers()
+
+    print(f"\n{'=' * 70}")
+    if ok1 and ok2 and ok3:
+        print("  → All checks passed")
+    else:
+        print("  → Some checks FAILED — see above")
+    print(f"{'=' * 70}")
+    sys.exit(0 if ok1 and ok2 and ok3 else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Tests for the columnar spike-time file (``io.save_spike_times_npz``).
+
+Run from the repo root::
+
+    uv run python python/test_spike_store.py
+
+Self-contained — synthetic spike times. The layout changed under every step
+that reads spike times, so each check is about nothing changing for them: a
+method read alone, mapped or not, is exactly what was saved — in the order it
+was saved, since STTC's ``run_P`` depends on it — a file in the old
+one-array-per-channel layout reads the same, and a bundle packed from an old
+folder carries the new layout with the same spike times.
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import zipfile
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+from meanap.pipeline.bundle import write_bundle  # noqa: E402
+from meanap.pipeline.io import (  # noqa: E402
+    SpikeTrains, is_columnar_spike_file, load_spike_times_npz, load_spike_trains,
+    rewrite_spike_times_npz, save_spike_times_npz,
+)
+from meanap.pipeline.resume import SPIKE_SUBDIR  # noqa: E402
+from meanap.pipeline.sttc import pack_spike_times  # noqa: E402
+
+N_CH, FS, DURATION_S = 12, 12_500.0, 60.0
+CHANNELS = np.arange(11, 11 + N_CH)
+METHODS = ("thr4", "thr4p5", "bior1p5")
+
+
+def _spike_times(seed: int = 0) -> dict[int, dict[str, np.ndarray]]:
+    """Step 1's shape: every channel, every method — some empty, one out of
+    order, as CAT-NAP peak times can be."""
+    rng = np.random.default_rng(seed)
+    out = {}
+    for ch in range(N_CH):
+        out[ch] = {m: np.sort(rng.uniform(0, DURATION_S, rng.integers(0, 400)))
+                   for m in METHODS}
+    out[3]["thr4"] = np.array([])
+    out[5]["bior1p5"] = np.array([2.0, 1.0, 3.0])
+    return out
+
+
+def _save_legacy(path: Path, spike_times, compressed: bool = False) -> None:
+    """A spike file as Step 1 wrote it before the columnar layout."""
+    arrays = {"channels": CHANNELS, "fs": np.array([FS]),
+              "duration_s": np.array([DURATION_S])}
+    for ch, methods in spike_times.items():
+        for method, times in methods.items():
+            arrays[f"spike_times_{ch}_{method}"] = times
+    (np.savez_compressed if compressed else np.savez)(path, **arrays)
+
+
+def _same(spike_times, loaded) -> bool:
+    return loaded.keys() == spike_times.keys() and all(
+        loaded[ch].keys() == spike_times[ch].keys()
+        and all(np.array_equal(loaded[ch][m], spike_times[ch][m]) for m in spike_times[ch])
+        for ch in spike_times)
+
+
+def _same_trains(trains: SpikeTrains, spike_times, method: str) -> bool:
+    return trains.n_channels == N_CH and all(
+        np.array_equal(trains.channel(ch), spike_times[ch][method]) for ch in range(N_CH))
+
+
+def test_columnar() -> bool:
+    print("\n[1] columnar layout — what was saved, a method at a time")
+    spike_times = _spike_times()
+    checks: dict[str, bool] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "rec_spikes.npz"
+        save_spike_times_npz(path, spike_times, CHANNELS, FS, duration_s=DURATION_S)
+        with np.load(path) as data:
+            checks["two arrays per method, not one per channel"] = (
+                len(data.files) == 3 + 2 * len(METHODS) and is_columnar_spike_file(path))
+        checks["every method reads back, in the order saved"] = _same(
+            spike_times, load_spike_times_npz(path))
+        for method in METHODS:
+            read = load_spike_trains(path, method)
+            mapped = load_spike_trains(path, method, mmap_mode="r")
+            checks[f"{method}: read alone, then mapped"] = (
+                _same_trains(read, spike_times, method)
+                and _same_trains(mapped, spike_times, method)
+                and isinstance(mapped.times, np.memmap)
+                and read.times.dtype == np.float64)
+        trains = load_spike_trains(path, "thr4")
+        checks["the buffer is the one STTC packs"] = all(
+            np.array_equal(a, b) for a, b in zip(
+                (trains.times, trains.offsets),
+                pack_spike_times({ch: spike_times[ch]["thr4"] for ch in range(N_CH)}, N_CH)))
+        missing = load_spike_trains(path, "thr9")
+        checks["a method the file lacks is every channel empty"] = (
+            missing.n_channels == N_CH and len(missing.times) == 0)
+
+        sparse = {0: {"thr4": np.array([0.5])}, 7: {"thr4": np.array([1.5, 2.5])}}
+        save_spike_times_npz(path, sparse, CHANNELS, FS)
+        trains = load_spike_trains(path, "thr4", mmap_mode="r")
+        checks["channels without an entry are empty"] = (
+            trains.n_channels == N_CH and list(trains.offsets) == [0] + [1] * 7 + [3] * 5)
+        save_spike_times_npz(path, {}, CHANNELS, FS)
+        checks["no spike times at all"] = load_spike_times_npz(path) == {}
+    for name, ok in checks.items():
+        print(f"    {'✓' if ok else '✗'} {name}")
+    return all(checks.values())
+
+
+def test_legacy() -> bool:
+    print("\n[2] one-array-per-channel files — still read, and rewritable")
+    spike_times = _spike_times(1)
+    checks: dict[str, bool] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for compressed in (False, True):
+            path = tmp / f"legacy{int(compressed)}_spikes.npz"
+            _save_legacy(path, spike_times, compressed)
+            label = "compressed" if compressed else "stored"
+            checks[f"{label}: every method reads back"] = (
+                not is_columnar_spike_file(path)
+                and _same(spike_times, load_spike_times_npz(path)))
+            checks[f"{label}: a method at a time, mapped or not"] = all(
+                _same_trains(load_spike_trains(path, m, mmap_mode=mode), spike_times, m)
+                for m in METHODS for mode in (None, "r"))
+        columnar = tmp / "columnar_spikes.npz"
+        rewrite_spike_times_npz(tmp / "legacy0_spikes.npz", columnar)
+        with np.load(columnar) as data:
+            kept = (list(data["channels"]) == list(CHANNELS) and data["fs"][0] == FS
+                    and data["duration_s"][0] == DURATION_S)
+        checks["rewritten columnar, same spike times and metadata"] = (
+            is_columnar_spike_file(columnar) and kept
+            and _same(spike_times, load_spike_times_npz(columnar)))
+
+        root = tmp / "Run"
+        (root / SPIKE_SUBDIR).mkdir(parents=True)
+        _save_legacy(root / SPIKE_SUBDIR / "rec_spikes.npz", spike_times)
+        bundle = write_bundle(root, {"mode": "ephys"})
+        with zipfile.ZipFile(bundle) as zf:
+            zf.extract((SPIKE_SUBDIR / "rec_spikes.npz").as_posix(), tmp / "out")
+        packed = tmp / "out" / SPIKE_SUBDIR / "rec_spikes.npz"
+        checks["a bundle of an old folder carries the columnar layout"] = (
+            is_columnar_spike_file(packed) and _same(spike_times, load_spike_times_npz(packed))
+            and not is_columnar_spike_file(root / SPIKE_SUBDIR / "rec_spikes.npz"))
+    for name, ok in checks.items():
+        print(f"    {'✓' if ok else '✗'} {name}")
+    return all(checks.values())
+
+
+def main() -> None:
+    print("=" * 70)
+    print("MEA-NAP Python  ▸  Spike Store Tests")
+    print("=" * 70)
+
+    ok1 = test_columnar()
+    ok2 = test_legacy()
+
+    print(f"\n{'=' * 70}")
+    if ok1 and ok2:
+        print("  → All checks passed")
+    else:
+        print("  → Some checks FAILED — see above")
+    print(f"{'=' * 70}")
+    sys.exit(0 if ok1 and ok2 else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""Tests for Step 1's staged reads and background writer.
+
+Run from the repo root::
+
+    uv run python python/test_step1_pipeline.py
+
+Self-contained — synthetic v7.3 recordings. Overlapping the stages is only
+worth having if it changes nothing but the wall time, so a staged run is
+compared against one with every stage forced inline: the same spike times and
+check summaries, batch for batch and recording for recording. Beyond that:
+a recording's outputs are written while the next one is detected, a failed
+write stops the run rather than vanishing on its thread, a cancelled run still
+finishes the write it started, and with no free RAM every stage runs in step.
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+import h5py
+import numpy as np
+
+REPO_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+from meanap.params import Params  # noqa: E402
+from meanap.pipeline import parallel  # noqa: E402
+from meanap.pipeline import runner  # noqa: E402
+from meanap.pipeline import spike_detection as sd  # noqa: E402
+from meanap.pipeline.cancellation import PipelineCancelled  # noqa: E402
+from meanap.pipeline.io import as_raw_recording, load_spike_times_npz  # noqa: E402
+from meanap.pipeline.output_folders import create_output_folders  # noqa: E402
+from meanap.pipeline.parallel import suggest_stage_depth  # noqa: E402
+from meanap.pipeline.spreadsheet import RecordingInfo  # noqa: E402
+
+FS = 12_500.0
+N_SAMPLES, N_CH, N_REC = 12_500 * 2, 4, 3
+RECS = [RecordingInfo(filename=f"rec{i}", div=21, group="WT") for i in range(N_REC)]
+
+
+def _signal(seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    dat = rng.normal(0, 5, (N_SAMPLES, N_CH))
+    for ch in range(N_CH):
+        for t in rng.integers(1000, N_SAMPLES - 1000, 60):
+            dat[t:t + 10, ch] -= np.hanning(10) * rng.uniform(40, 120)
+    return dat.astype(np.float32)
+
+
+def _write_raw(raw: Path) -> None:
+    raw.mkdir()
+    for i, rec in enumerate(RECS):
+        with h5py.File(raw / f"{rec.filename}.mat", "w") as f:
+            f.create_dataset("dat", data=_signal(i).T, chunks=(2, 4096), compression="gzip")
+            f.create_dataset("channels", data=np.arange(1, N_CH + 1)[None, :].astype(float))
+            f.create_dataset("fs", data=np.array([[FS]]))
+
+
+def _params(tmp: Path, name: str) -> Params:
+    return Params(output_data_folder=str(tmp), output_data_folder_name=name,
+                  raw_data=str(tmp / "raw"), start_analysis_step=1,
+                  stop_analysis_step=1, thresholds=[4.0, 5.0],
+                  wname_list=["bior1.5"], cost_list=[-0.12], random_seed=5,
+                  express_mode=True)
+
+
+def _run(tmp: Path, name: str, should_cancel=None) -> Path:
+    root = create_output_folders(tmp, name, ["WT"])
+    runner._run_step1_spike_detection(_params(tmp, name), RECS, root,
+                                      log=lambda m: None, should_cancel=should_cancel)
+    return root / "1_SpikeDetection" / "1A_SpikeDetectedData"
+
+
+class _Patched:
+    """Swap module attributes for the length of a ``with`` block."""
+
+    def __init__(self, *swaps):
+        self.swaps = swaps
+
+    def __enter__(self):
+        self.saved = [(mod, name, getattr(mod, name)) for mod, name, _ in self.swaps]
+        for mod, name, value in self.swaps:
+            setattr(mod, name, value)
+
+    def __exit__(self, *exc):
+        for mod, name, value in self.saved:
+            setattr(mod, name, value)
+
+
+def test_depth() -> bool:
+    print("\n[1] suggest_stage_depth and _read_ahead")
+    checks: dict[str, bool] = {}
+    with _Patched((parallel, "available_ram_gb", lambda: 3.0)):
+        checks["bounded by free RAM beside the reserve"] = (
+            suggest_stage_depth(0.4, max_depth=2) == 2
+            and suggest_stage_depth(0.7, max_depth=2) == 1
+            and suggest_stage_depth(1.5, max_depth=2) == 0)
+        checks["a weightless item takes the full depth"] = suggest_stage_depth(0.0) == 2
+
+    dat = _signal(7)
+    recording = as_raw_recording(dat, np.arange(N_CH), FS)
+    batches = [[0, 1], [2], [3]]
+    for ram, label in ((64.0, "read ahead"), (0.0, "no free RAM, read in step")):
+        with _Patched((parallel, "available_ram_gb", lambda ram=ram: ram)):
+            got = list(sd._read_ahead(recording, batches))
+        checks[f"{label}: every batch, in order, the same samples"] = (
+            [w for w, _ in got] == batches
+            and all(np.array_equal(t, dat[:, w]) and t.flags.f_contiguous for w, t in got))
+    for name, ok in checks.items():
+        print(f"    {'✓' if ok else '✗'} {name}")
+    return all(checks.values())
+
+
+def _same_outputs(a: Path, b: Path) -> bool:
+    for rec in RECS:
+        x = load_spike_times_npz(a / f"{rec.filename}_spikes.npz")
+        y = load_spike_times_npz(b / f"{rec.filename}_spikes.npz")
+        if x.keys() != y.keys() or not x or not all(
+                np.array_equal(x[ch][m], y[ch][m]) for ch in x for m in x[ch]):
+            return False
+        checks = [np.load(d / f"{rec.filename}_step1checks.npz") for d in (a, b)]
+        if checks[0].files != checks[1].files or not all(
+                np.array_equal(checks[0][k], checks[1][k]) for k in checks[0].files):
+            return False
+    return True
+
+
+def test_staged() -> bool:
+    print("\n[2] Step 1 staged against Step 1 inline")
+    checks: dict[str, bool] = {}
+    inline = lambda *a, **k: 0  # noqa: E731
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        _write_raw(tmp / "raw")
+        with _Patched((parallel, "available_ram_gb", lambda: 64.0)):
+            staged = _run(tmp, "Staged")
+        with _Patched((runner, "suggest_stage_depth", inline),
+                      (sd, "suggest_stage_depth", inline)):
+            stepped = _run(tmp, "Inline")
+        checks["same spike times and check summaries"] = _same_outputs(staged, stepped)
+
+        # The writer for rec0 only returns once rec1's detection has begun —
+        # which it can only do if the main thread moved on without it.
+        detecting = threading.Event()
+        overlapped: list[bool] = []
+        write, detect = runner._write_step1_outputs, runner.detect_spikes_recording
+
+        def slow_write(params, rec, *args):
+            if rec.filename == "rec0":
+                overlapped.append(detecting.wait(timeout=30))
+            write(params, rec, *args)
+
+        def watched_detect(recording, *args, **kw):
+            if watched_detect.calls:
+                detecting.set()
+            watched_detect.calls += 1
+            return detect(recording, *args, **kw)
+
+        watched_detect.calls = 0
+        with _Patched((parallel, "available_ram_gb", lambda: 64.0),
+                      (runner, "_write_step1_outputs", slow_write),
+                      (runner, "detect_spikes_recording", watched_detect)):
+            _run(tmp, "Overlap")
+        checks["rec0 written while rec1 is detected"] = overlapped == [True]
+
+        def failing_write(params, rec, *args):
+            raise OSError(f"disk full writing {rec.filename}")
+
+        try:
+            with _Patched((runner, "_write_step1_outputs", failing_write)):
+                _run(tmp, "Failing")
+            checks["a failed write stops the run"] = False
+        except OSError as e:
+            checks["a failed write stops the run"] = "rec0" in str(e)
+
+        asked: list[int] = []
+
+        def cancel_after_first() -> bool:
+            asked.append(1)
+            return len(asked) > 1
+
+        try:
+            cancelled = _run(tmp, "Cancelled", should_cancel=cancel_after_first)
+            checks["a cancelled run still finishes the write it started"] = False
+        except PipelineCancelled:
+            cancelled = tmp / "Cancelled" / "1_SpikeDetection" / "1A_SpikeDetectedData"
+            checks["a cancelled run still finishes the write it started"] = (
+                (cancelled / "rec0_spikes.npz").exists()
+                and (cancelled / "rec0_step1checks.npz").exists()
+                and not (cancelled / "rec1_spikes.npz").exists())
+    for name, ok in checks.items():
+        print(f"    {'✓' if ok else '✗'} {name}")
+    return all(checks.values())
+
+
+def main() -> None:
+    print("=" * 70)
+    print("MEA-NAP Python  ▸  Step 1 Pipeline Tests")
+    print("=" * 70)
+
+    ok1 = test_depth()
+    ok2 = test_staged()
+
+    print(f"\n{'=' * 70}")
+    if ok1 and ok2:
+        print("  → All checks passed")
+    else:
+        print("  → Some checks FAILED — see above")
+    print(f"{'=' * 70}")
+    sys.exit(0 if ok1 and ok2 else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Test that Step 2 gives the same results over a process pool as serially.
+
+Run from the repo root::
+
+    uv run python python/test_step2_pool.py
+
+Self-contained — synthetic bursty spike files. Step 2 computes each recording
+in a worker process and folds the results together in the parent in
+completion order, which the pool does not fix. These checks run the same batch
+with two workers and with one, and confirm that ``ephys_results.json`` lists
+the recordings in spreadsheet order with identical contents, and that the
+batch-wide maxima the plots are scaled to are the same.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+sys.path.insert(0, str(REPO_ROOT / "python"))
+
+from meanap.params import Params  # noqa: E402
+from meanap.pipeline import parallel, step2  # noqa: E402
+from meanap.pipeline.io import save_spike_times_npz  # noqa: E402
+from meanap.pipeline.resume import SPIKE_SUBDIR  # noqa: E402
+from meanap.pipeline.spreadsheet import RecordingInfo  # noqa: E402
+from test_burst_detection import DURATION_S, FS, N_CH, _bursty_trains  # noqa: E402
+
+METHOD = "bior1p5"
+# Not alphabetical, so spreadsheet order can't pass for a sorted one.
+NAMES = ["rec_c", "rec_a", "rec_d", "rec_b"]
+
+
+def _write_batch(output_root: Path) -> list[RecordingInfo]:
+    spike_dir = output_root / SPIKE_SUBDIR
+    for seed, name in enumerate(NAMES):
+        trains = _bursty_trains(seed)
+        save_spike_times_npz(
+            spike_dir / f"{name}_spikes.npz",
+            {ch: {METHOD: times} for ch, times in trains.items()},
+            np.arange(1, N_CH + 1), FS, duration_s=DURATION_S,
+        )
+    return [RecordingInfo(filename=name, div=14.0, group="WT") for name in NAMES]
+
+
+def _run(output_root: Path, recordings: list[RecordingInfo], workers: int):
+    """Run Step 2, returning the JSON text and the batch maxima it reduced."""
+    params = Params(spikes_method=METHOD, express_mode=True, recording_workers=workers)
+    seen: list[dict] = []
+    batch_max = step2._batch_max
+
+    def _recording_batch_max(contexts):
+        seen.append(batch_max(contexts))
+        return seen[-1]
+
+    step2._batch_max = _recording_batch_max
+    try:
+        step2._run_step2_neuronal_activity(params, recordings, output_root, lambda m: None)
+    finally:
+        step2._batch_max = batch_max
+    text = (output_root / "2_NeuronalActivity" / "ephys_results.json").read_text()
+    return text, seen[0]
+
+
+def test_pool_matches_serial() -> bool:
+    print("\n[1] two workers vs one — same results, spreadsheet order")
+    # Two workers whatever this machine's cores and RAM, so the pool path runs.
+    # Only the parent sizes the pool, so patching it here is enough.
+    sizing = parallel.suggest_process_count
+    parallel.suggest_process_count = lambda n, *a, max_workers=None, **kw: min(max_workers, n)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            pooled_text, pooled_max = _run(tmp / "pool", _write_batch(tmp / "pool"), 2)
+            serial_text, serial_max = _run(tmp / "serial", _write_batch(tmp / "serial"), 1)
+    finally:
+        parallel.suggest_process_count = sizing
+
+    pooled = json.loads(pooled_text)
+    checks = {
+        "every recording computed": set(pooled) == set(NAMES),
+        "ephys_results.json in spreadsheet order": list(pooled) == NAMES,
+        "ephys_results.json identical to the one-worker run": pooled_text == serial_text,
+        "batch maxima identical": pooled_max == serial_max,
+        "batch maxima found": all(v is not None for v in pooled_max.values()),
+    }
+    for name, ok in checks.items():
+        print(f"    {'✓' if ok else '✗'} {name}")
+    return all(checks.values())
+
+
+def main() -> None:
+    print("=" * 70)
+    print("MEA-NAP Python  ▸  Step 2 Process-Pool Tests")
+    print("=" * 70)
+
+    results = [test_pool_matches_serial()]
+
+    print(f"\n{'=' * 70}")
+    if all(results):
+        print("  → All checks passed")
+    else:
+        print("  → Some checks FAILED — see above")
+    print(f"{'=' * 70}")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
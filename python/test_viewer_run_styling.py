@@ -23,6 +23,10 @@ import tempfile
 from pathlib import Path
 
 os.environ.setdefault("MPLBACKEND", "Agg")
+# The viewer's render cache is per user and outlives the process. Point it at a
+# scratch directory, so a run neither starts warm nor leaves entries behind.
+os.environ.setdefault("MEANAP_RENDER_CACHE",
+                      tempfile.mkdtemp(prefix="meanap-test-render-cache-"))
 REPO_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(REPO_ROOT / "src"))
 sys.path.insert(0, str(REPO_ROOT / "python"))
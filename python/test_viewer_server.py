@@ -18,6 +18,7 @@ from __future__ import annotations
 
 import hashlib
 import json
+import os
 import sys
 import tempfile
 import urllib.error
@@ -32,6 +33,11 @@ from test_bundle_render import (  # noqa: E402
     BUNDLE_SUFFIX, LAG, _digest, _run,
 )
 
+# The viewer's render cache is per user and outlives the process. Point it at a
+# scratch directory, so a run neither starts warm nor leaves entries behind.
+os.environ.setdefault("MEANAP_RENDER_CACHE",
+                      tempfile.mkdtemp(prefix="meanap-test-render-cache-"))
+
 Check = tuple[str, bool, str]
 
 
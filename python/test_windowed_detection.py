@@ -0,0 +1,205 @@
+"""Tests for spike detection in time windows (``windowed_detection.py``).
+
+Run from the repo root::
+
+    uv run python python/test_windowed_detection.py
+
+Self-contained — synthetic recordings. Windowed detection is only worth having
+if it finds the spikes whole-channel detection does, so everything is checked
+against the whole-channel answer: the streamed medians against ``np.median``,
+a filtered window against filtering the whole trace (including with a band edge
+clipped to Nyquist, where the filter never forgets), and Step 1's spike times
+and waveforms, for the threshold and wavelet detectors with and without
+artifact removal, at window lengths from a few spikes' width to most of the
+recording — with spikes on the first and last samples and runs of detections
+across window edges.
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+from pathlib import Path
+
+import h5py
+import numpy as np
+
+REPO_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+from meanap.pipeline.io import as_raw_recording, open_raw_recording  # noqa: E402
+from meanap.pipeline.spike_detection import (  # noqa: E402
+    SpikeDetectionParams, _butter_bandpass, bandpass_filter,
+    detect_spikes_recording,
+)
+from meanap.pipeline.windowed_detection import _ExactFilter, _ExactMedian  # noqa: E402
+
+FS = 12_500.0
+N_SAMPLES, N_CH = 50_000, 5
+
+
+def _signal(seed: int = 0) -> np.ndarray:
+    """(n_samples, n_channels) µV: noise, spikes, a few artifacts, and spikes
+    right at both ends of the recording."""
+    rng = np.random.default_rng(seed)
+    dat = rng.normal(0, 5, (N_SAMPLES, N_CH))
+    for ch in range(N_CH - 1):
+        for t in rng.integers(50, N_SAMPLES - 50, 80):
+            dat[t:t + 10, ch] -= np.hanning(10) * rng.uniform(40, 120)
+        for t in rng.integers(50, N_SAMPLES - 50, 3):
+            dat[t:t + 6, ch] -= np.hanning(6) * 2000          # artifact
+    dat[2:11, 0] -= np.hanning(9) * 90
+    dat[N_SAMPLES - 11:N_SAMPLES - 2, 1] -= np.hanning(9) * 90
+    return dat.astype(np.float32)
+
+
+def _median(x: np.ndarray, parts: int) -> tuple[float, int]:
+    median, passes = _ExactMedian(), 0
+    while not median.done:
+        for part in np.array_split(x, parts):
+            median.feed(part)
+        median.end_pass()
+        passes += 1
+    return median.value, passes
+
+
+def test_median() -> bool:
+    print("\n[1] _ExactMedian — identical to np.median")
+    rng = np.random.default_rng(1)
+    cases = {
+        "odd count": rng.normal(0, 5, 100_001),
+        "even count": rng.normal(0, 5, 100_000),
+        "heavy tails": rng.standard_cauchy(200_000),
+        "few distinct values": rng.integers(0, 4, 200_000).astype(float),
+        "one value": np.full(1001, 2.5),
+        "two values": np.array([1.0, 3.0]),
+    }
+    checks: dict[str, bool] = {}
+    for name, x in cases.items():
+        value, passes = _median(x, 7)
+        checks[f"{name} (in {passes} passes)"] = value == np.median(x)
+    checks["however the values are split"] = all(
+        _median(cases["even count"], parts)[0] == np.median(cases["even count"])
+        for parts in (1, 3, 1000))
+    for name, ok in checks.items():
+        print(f"    {'✓' if ok else '✗'} {name}")
+    return all(checks.values())
+
+
+def _filtered(trace: np.ndarray, high: float, window: int,
+              spans: list[tuple[int, int]]) -> list[np.ndarray]:
+    b, a = _butter_bandpass(FS, 600.0, high)
+    n = len(trace)
+    filt = _ExactFilter(b, a, n, window, trace[:22], trace[-22:])
+    starts = range(0, n, window)
+    for start in starts:
+        filt.forward(trace[start:start + window], start)
+    for start in reversed(starts):
+        filt.backward(trace[start:start + window], start)
+    out = []
+    for lo, hi in spans:
+        first, last = filt.span(lo, hi)
+        out.append(filt.filter(trace[first:last], first, lo, hi))
+    return out
+
+
+def test_filter() -> bool:
+    print("\n[2] _ExactFilter — a window is the whole-trace filter's, bit for bit")
+    trace = _signal()[:, 0].astype(float)
+    spans = [(0, 1000), (12_345, 23_456), (N_SAMPLES - 777, N_SAMPLES), (0, N_SAMPLES)]
+    checks: dict[str, bool] = {}
+    for high, label in ((6150.0, "6150 Hz"), (8000.0, "8000 Hz, clipped to Nyquist")):
+        whole = bandpass_filter(trace, FS, 600.0, high)
+        for window in (1000, 4999):
+            got = _filtered(trace, high, window, spans)
+            checks[f"{label}, {window}-sample windows"] = all(
+                np.array_equal(g, whole[lo:hi]) for g, (lo, hi) in zip(got, spans))
+    for name, ok in checks.items():
+        print(f"    {'✓' if ok else '✗'} {name}")
+    return all(checks.values())
+
+
+def _same_result(a, b) -> bool:
+    return (a.spike_times.keys() == b.spike_times.keys() and all(
+        np.array_equal(a.spike_times[ch][m], b.spike_times[ch][m])
+        and np.array_equal(a.spike_waveforms[ch][m], b.spike_waveforms[ch][m])
+        for ch in a.spike_times for m in a.spike_times[ch]))
+
+
+def _same_thresholds(a, b) -> bool:
+    return all(np.allclose(a.thresholds[ch][m], b.thresholds[ch][m],
+                           rtol=1e-12, atol=0, equal_nan=True)
+               for ch in a.thresholds for m in a.thresholds[ch])
+
+
+def test_detection() -> bool:
+    print("\n[3] detect_spikes_recording(chunk_s=…) — the whole-channel result")
+    dat = _signal(2)
+    channels = np.arange(N_CH)
+    checks: dict[str, bool] = {}
+    for remove_artifacts in (False, True):
+        detect = SpikeDetectionParams(
+            fs=FS, thresholds=[4.0, 4.5], wname_list=["bior1.5"], cost_list=[-0.12],
+            filter_high_pass=8000.0, remove_artifacts=remove_artifacts, grd=[4])
+        whole = detect_spikes_recording(dat, channels, FS, detect, max_workers=1)
+        label = "artifacts removed" if remove_artifacts else "artifacts kept"
+        edges = whole.spike_times[0]["thr4"][0] < 2e-3 and \
+            whole.spike_times[1]["thr4"][-1] > (N_SAMPLES - 20) / FS
+        checks[f"{label}: spikes on every method, and at both ends"] = edges and all(
+            len(whole.spike_times[ch][m]) for ch in range(N_CH - 1)
+            for m in whole.spike_times[ch])
+        for chunk_s, threads in ((0.02, 1), (0.37, 2), (3.0, 3)):
+            detect.chunk_s = chunk_s
+            windowed = detect_spikes_recording(dat, channels, FS, detect,
+                                               max_workers=threads)
+            checks[f"{label}: {chunk_s} s windows, {threads} thread(s) — "
+                   f"same spikes and waveforms"] = (
+                _same_result(whole, windowed) and _same_thresholds(whole, windowed))
+        detect.chunk_s = 0.0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "rec.mat"
+        with h5py.File(path, "w") as f:
+            f.create_dataset("dat", data=dat.T, chunks=(2, 4096), compression="gzip")
+            f.create_dataset("channels", data=channels[None, :].astype(float))
+            f.create_dataset("fs", data=np.array([[FS]]))
+        detect = SpikeDetectionParams(fs=FS, thresholds=[4.0], wname_list=["bior1.5"],
+                                      cost_list=[-0.12], chunk_s=0.5)
+        with open_raw_recording(path) as rec:
+            opened = detect_spikes_recording(rec, rec.channels, rec.fs, detect, max_workers=2)
+        detect.chunk_s = 0.0
+        loaded = detect_spikes_recording(as_raw_recording(dat, channels, FS),
+                                         channels, FS, detect, max_workers=1)
+    checks["from an opened, chunked file"] = _same_result(loaded, opened)
+
+    detect = SpikeDetectionParams(fs=FS, thresholds=[4.0], chunk_s=10.0)
+    short = detect_spikes_recording(dat, channels, FS, detect, max_workers=1)
+    detect.chunk_s = 0.0
+    checks["a window longer than the recording is whole channels"] = _same_result(
+        short, detect_spikes_recording(dat, channels, FS, detect, max_workers=1))
+
+    for name, ok in checks.items():
+        print(f"    {'✓' if ok else '✗'} {name}")
+    return all(checks.values())
+
+
+def main() -> None:
+    print("=" * 70)
+    print("MEA-NAP Python  ▸  Windowed Spike Detection Tests")
+    print("=" * 70)
+
+    ok1 = test_median()
+    ok2 = test_filter()
+    ok3 = test_detection()
+
+    print(f"\n{'=' * 70}")
+    if ok1 and ok2 and ok3:
+        print("  → All checks passed")
+    else:
+        print("  → Some checks FAILED — see above")
+    print(f"{'=' * 70}")
+    sys.exit(0 if ok1 and ok2 and ok3 else 1)
+
+
+if __name__ == "__main__":
+    main()
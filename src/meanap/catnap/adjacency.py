@@ -99,6 +99,7 @@ def suite2p_to_adjm(
     remove_nodes_with_no_peaks: bool = False,
     prob_thresh_tail: float = 0.05,
     prob_thresh_rep_num: int = 200,
+    prob_thresh_sequential: bool = False,
     rng: np.random.Generator | None = None,
 ) -> Suite2pAdjmResult:
     """Port of ``suite2pToAdjm.m``.
@@ -232,6 +233,7 @@ def suite2p_to_adjm(
                 _adj_raw, adj_ci = adjm_thr(
                     spike_times_dict, n_units, lag, prob_thresh_tail, fs,
                     duration_s, prob_thresh_rep_num, rng=rng,
+                    sequential=prob_thresh_sequential,
                 )
             else:
                 adj_ci = np.zeros((n_units, n_units))
@@ -47,6 +47,7 @@ from meanap.catnap.store import (
     quantize_background, save_background, save_recording_state, sorted_adjm_items,
 )
 from meanap.pipeline.cancellation import CancelCheck, check_cancel
+from meanap.pipeline.parallel import map_recordings, suggest_process_count
 from meanap.pipeline.resume import (
     ADJM_SUBDIR, CATNAP_SUFFIX, InputLocator, already_done,
     build_input_locator,
@@ -153,7 +154,7 @@ def run_catnap_pipeline(
     Three phases, mirroring ``step4._run_step4_network_metrics``:
 
     1. **compute** every recording's adjacency, activity stats and network
-       metrics;
+       metrics, several recordings at once (:func:`catnap_recording_workers`);
     2. **reduce** across the batch — pool participation coefficient and
        within-module z-score to place the node-cartography boundaries where
        the data actually clusters (``autoSetCartographyBoundaries``);
@@ -214,11 +215,22 @@ def run_catnap_pipeline(
     subnetwork_tables: dict[str, list] = {"summary": [], "node": [], "mix": []}
 
     progress.begin("catnap.compute", items=len(recordings))
+    workers = catnap_recording_workers(params, len(recordings))
+    # Every recording a worker holds stays pinned in a remote source's cache
+    # until it finishes, so the pool is no larger than the budget can hold on
+    # top of what the stream is fetching ahead.
+    limit = None if resuming else source.resident_limit(recordings, params.prefetch_depth)
+    if limit is not None and limit < workers:
+        log(f"  computing {limit} recording(s) at a time — the cache budget "
+            f"holds no more alongside prefetch depth {params.prefetch_depth}")
+        workers = limit
 
     # ── Phase 1: compute (or reload) ──────────────────────────────────────────
     # Recordings arrive with the next one already being fetched (remote sources
-    # only), and each is released once its results are on disk — so a batch's
-    # peak local storage is one or two recordings, not the whole dataset.
+    # only) and are computed in a process pool, each handed over only when a
+    # worker frees up — so a batch's peak local storage is one recording per
+    # worker plus the prefetch depth, not the whole dataset. Each is released
+    # once its worker has finished and its results are on disk.
     #
     # A resumed run reads adjacency from the prior analysis and never opens the
     # raw data, so it must not fetch it either: the whole point of resuming is
@@ -229,34 +241,43 @@ def run_catnap_pipeline(
         if resuming else
         source.stream(recordings, depth=params.prefetch_depth)
     )
-    for rec, fetched in stream:
-        check_cancel(should_cancel)
-        if isinstance(fetched, BaseException):
-            log(f"  [{rec.filename}] SKIP: {fetched}")
-            continue
-        plane0 = fetched
-
-        # Continuing an interrupted run: this recording's adjacency and
-        # activity stats are already in *this* folder, so load them rather than
-        # redoing the STTC and the circular-shift thresholding, which is the
-        # expensive half of the CAT-NAP path.
-        continued = already_done(
-            params, output_root,
-            state_dir / f"{rec.filename}{CATNAP_SUFFIX}", log)
-        if continued:
-            log(f"  [{rec.filename}] already computed — loading")
-
-        loaded = (
-            _load_recording(locator, rec, plane0, log) if (resuming or continued)
-            else _compute_recording(params, rec, plane0, log,
-                                    make_rng(params.random_seed, "catnap",
-                                             rec.filename))
-        )
+    by_name = {rec.filename: rec for rec in recordings}
+    # Handed to the pool and not yet back: what a cancel leaves pinned.
+    drawn: set[str] = set()
+
+    def _tasks():
+        for rec, fetched in stream:
+            if isinstance(fetched, BaseException):
+                log(f"  [{rec.filename}] SKIP: {fetched}")
+                continue
+            # Continuing an interrupted run: this recording's adjacency and
+            # activity stats are already in *this* folder, so load them rather
+            # than redoing the STTC and the circular-shift thresholding, which
+            # is the expensive half of the CAT-NAP path.
+            continued = already_done(
+                params, output_root,
+                state_dir / f"{rec.filename}{CATNAP_SUFFIX}", log)
+            if continued:
+                log(f"  [{rec.filename}] already computed — loading")
+            drawn.add(rec.filename)
+            yield params, rec, fetched, locator, resuming or continued
+
+    def _release(filename: str) -> None:
+        if not resuming:
+            source.unpin(filename)
+            source.release(filename)
+
+    def _emit_computed(result) -> None:
+        """Runs in the parent, in completion order: the only place the shared
+        dicts are touched and the source's pins are released."""
+        filename, loaded, rec_results, logs = result
+        drawn.discard(filename)
+        for line in logs:
+            log(line)
+        rec = by_name[filename]
         if loaded is None:
-            if not resuming:
-                source.unpin(rec.filename)
-                source.release(rec.filename)
-            continue
+            _release(filename)
+            return
         state, stats = loaded
 
         # Always re-read: cheap, and it means a resumed run picks up an edited
@@ -269,44 +290,52 @@ def run_catnap_pipeline(
         if markers is not None or state.markers is None:
             state.markers = markers
 
-        all_stats[rec.filename] = stats
-        all_channels[rec.filename] = state.channels
-        states[rec.filename] = state
+        all_stats[filename] = stats
+        all_channels[filename] = state.channels
+        states[filename] = state
 
         try:
             save_recording_state(
-                state_dir / f"{rec.filename}{CATNAP_SUFFIX}", state, stats)
+                state_dir / f"{filename}{CATNAP_SUFFIX}", state, stats)
         except Exception as e:
-            log(f"  [{rec.filename}] warning: could not save step-2 data for "
+            log(f"  [{filename}] warning: could not save step-2 data for "
                 f"re-runs: {e}")
 
         # Everything derived from this recording is now on disk, so its raw
         # files are no longer needed — unless the trace figures still want them
         # in phase 3, in which case re-fetching one recording beats holding the
         # whole batch.
-        if not resuming:
-            source.unpin(rec.filename)
-            source.release(rec.filename)
-
-        # Same label as the ephys path: this is the same work on the same
-        # recording, and one generator serves every lag (as in step4.py).
-        metric_rng = make_rng(params.random_seed, "step4", rec.filename)
-        rec_results: dict = {}
-        for lag_ms, adj in sorted_adjm_items(state.adjMs):
-            log(f"  [{rec.filename}] network metrics (lag={lag_ms}ms)…")
-            metrics = compute_network_metrics(
-                adj, state.spike_counts, state.duration_s,
-                params.min_activity_level, min_nodes,
-                exclude_edges_below_threshold=params.exclude_edges_below_threshold,
-                params=params, rng=metric_rng,
-            )
-            # effRank / NMF describe the recording, not the lag, so every lag
-            # carries the same value — as ExtractNetMet.m does by computing
-            # them under `if e == 1` and saving them on the first lag field.
-            metrics.update(state.lag_independent)
-            rec_results[f"{lag_ms}mslag"] = metrics
-        all_results[rec.filename] = rec_results
-        progress.item_done(rec.filename)
+        _release(filename)
+
+        all_results[filename] = rec_results
+        progress.item_done(filename)
+
+    tasks = _tasks()
+    try:
+        map_recordings(
+            _catnap_compute_one, tasks, n_tasks=len(recordings),
+            mem_per_task_gb=_CATNAP_MEM_PER_TASK_GB,
+            max_workers=workers,
+            on_result=_emit_computed,
+            cancel_check=(lambda: bool(should_cancel())) if should_cancel else None,
+            collect=False,
+        )
+    finally:
+        tasks.close()
+        stream.close()
+        # Drawn from the stream but dropped by a cancel (or an error) before a
+        # worker ran it: pinned on the way out, so released here.
+        for filename in sorted(drawn):
+            _release(filename)
+    check_cancel(should_cancel)
+
+    # Completion order depends on the pool; the batch reduce and every output
+    # below see the recordings in spreadsheet order however phase 1 ran.
+    def _in_order(d: dict) -> dict:
+        return {rec.filename: d[rec.filename] for rec in recordings if rec.filename in d}
+
+    all_results, all_stats = _in_order(all_results), _in_order(all_stats)
+    all_channels, states = _in_order(all_channels), _in_order(states)
 
     # ── Phase 2: reduce — data-driven node-cartography boundaries ─────────────
     # Pool PC/Z over the whole batch and re-place the six role boundaries, then
@@ -370,6 +399,69 @@ def run_catnap_pipeline(
     log("  CAT-NAP pipeline complete.")
 
 
+# Peak per-worker RAM for CAT-NAP phase 1: one recording's suite2p matrices
+# (F, spks and the denoised trace — hundreds of MB each for a long, dense field
+# of view), the copies denoising makes, and the surrogate STTC working set.
+# Sized for the large end of 2P recordings.
+_CATNAP_MEM_PER_TASK_GB = 3.0
+
+
+def catnap_recording_workers(params: Params, n_recordings: int) -> int:
+    """How many recordings CAT-NAP phase 1 computes at once.
+
+    Bounded by cores and free RAM like every other recording pool, and by
+    ``params.recording_workers``. A remote source's cache budget can lower it
+    further (:meth:`~meanap.remote.source.RecordingSource.resident_limit`).
+    """
+    return suggest_process_count(
+        n_recordings, _CATNAP_MEM_PER_TASK_GB, max_workers=params.recording_workers)
+
+
+def _catnap_compute_one(
+    task: tuple[Params, RecordingInfo, Path, InputLocator, bool],
+) -> tuple[str, tuple[RecordingState, dict] | None, dict | None, list[str]]:
+    """Phase-1 worker: one recording's adjacency, activity stats and per-lag
+    network metrics. Module-level/picklable for ``spawn``.
+
+    The adjacency is computed from the suite2p folder, or — when ``load`` is
+    set (resuming, or continuing an interrupted run) — read back from the
+    previous run. Returns the state and stats (``None`` if skipped), the
+    metrics keyed by lag, and the log lines it produced. Every generator is
+    derived from the recording's name, so the results do not depend on which
+    worker ran it or in what order.
+    """
+    params, rec, plane0, locator, load = task
+    logs: list[str] = []
+    log = logs.append
+
+    loaded = (
+        _load_recording(locator, rec, plane0, log) if load
+        else _compute_recording(params, rec, plane0, log,
+                                make_rng(params.random_seed, "catnap", rec.filename))
+    )
+    if loaded is None:
+        return rec.filename, None, None, logs
+    state, _stats = loaded
+
+    rec_results: dict = {}
+    for lag_ms, adj in sorted_adjm_items(state.adjMs):
+        log(f"  [{rec.filename}] network metrics (lag={lag_ms}ms)…")
+        # Same labels as the ephys path: this is the same work on the same
+        # recording, and each lag gets its own generator (as in step4.py).
+        metrics = compute_network_metrics(
+            adj, state.spike_counts, state.duration_s,
+            params.min_activity_level, params.min_number_of_nodes_to_cal_net_met,
+            exclude_edges_below_threshold=params.exclude_edges_below_threshold,
+            params=params, rng=make_rng(params.random_seed, "step4", rec.filename, lag_ms),
+        )
+        # effRank / NMF describe the recording, not the lag, so every lag
+        # carries the same value — as ExtractNetMet.m does by computing
+        # them under `if e == 1` and saving them on the first lag field.
+        metrics.update(state.lag_independent)
+        rec_results[f"{lag_ms}mslag"] = metrics
+    return rec.filename, loaded, rec_results, logs
+
+
 def _compute_recording(
     params: Params, rec: RecordingInfo, plane0: Path, log, rng,
 ) -> tuple[RecordingState, dict] | None:
@@ -419,6 +511,7 @@ def _compute_recording(
         remove_nodes_with_no_peaks=params.remove_nodes_with_no_peaks,
         prob_thresh_tail=params.prob_thresh_tail,
         prob_thresh_rep_num=params.prob_thresh_rep_num,
+        prob_thresh_sequential=params.prob_thresh_sequential,
         rng=rng,
     )
     _log_bin_rounding(res, log, rec.filename)
@@ -65,6 +65,12 @@ class ConnectivityPanel(QWidget):
         self.prob_thresh_tail.setSingleStep(0.005)
         self.prob_thresh_tail.setValue(0.05)
 
+        self.prob_thresh_sequential = QCheckBox()
+        set_tooltip(self.prob_thresh_sequential,
+                    "Stop computing an edge's surrogates as soon as its verdict "
+                    "is certain. Gives exactly the same thresholded matrix, "
+                    "usually much sooner. Not applied while random checks are "
+                    "plotted, since those need every surrogate.")
         self.prob_thresh_plot_checks = QCheckBox()
         self.prob_thresh_plot_checks_n = QSpinBox()
         self.prob_thresh_plot_checks_n.setRange(1, 100)
@@ -77,6 +83,7 @@ class ConnectivityPanel(QWidget):
         self.threshold_advanced = AdvancedSection()
         adv = self.threshold_advanced.form()
         adv.addRow("Tail percentile", self.prob_thresh_tail)
+        adv.addRow("Stop early on settled edges", self.prob_thresh_sequential)
         adv.addRow("Plot random checks", self.prob_thresh_plot_checks)
         adv.addRow("Number of checks to plot", self.prob_thresh_plot_checks_n)
         form2.addRow(self.threshold_advanced)
@@ -169,6 +176,7 @@ class ConnectivityPanel(QWidget):
             self.weighted_btn.setChecked(True)
         self.prob_thresh_rep_num.setValue(params.prob_thresh_rep_num)
         self.prob_thresh_tail.setValue(params.prob_thresh_tail)
+        self.prob_thresh_sequential.setChecked(params.prob_thresh_sequential)
         self.prob_thresh_plot_checks.setChecked(params.prob_thresh_plot_checks)
         self.prob_thresh_plot_checks_n.setValue(params.prob_thresh_plot_checks_n)
 
@@ -177,5 +185,6 @@ class ConnectivityPanel(QWidget):
         params.adj_m_type = "binary" if self.binary_btn.isChecked() else "weighted"
         params.prob_thresh_rep_num = self.prob_thresh_rep_num.value()
         params.prob_thresh_tail = self.prob_thresh_tail.value()
+        params.prob_thresh_sequential = self.prob_thresh_sequential.isChecked()
         params.prob_thresh_plot_checks = self.prob_thresh_plot_checks.isChecked()
         params.prob_thresh_plot_checks_n = self.prob_thresh_plot_checks_n.value()
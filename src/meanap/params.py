@@ -62,6 +62,16 @@ class Params:
     min_activity_level: float = 0.0
     remove_inactive_nodes: bool = False
     remove_artifacts: bool = False
+    # Detect spikes in windows of this many seconds instead of over whole
+    # channels, so Step 1's memory no longer grows with recording length — for
+    # recordings too long to filter a channel of at once. Same spikes, about
+    # ten reads of the file instead of one. 0 = whole channels.
+    spike_detection_chunk_s: float = 0.0
+    # "float32" runs the wavelet transform, thresholds and alignment in single
+    # precision after a float64 filter: about half Step 1's working memory and
+    # faster. Thresholds agree with the float64 port to ~1e-7, so only a spike
+    # that close to one can come out differently (python/test_spike_precision.py).
+    spike_detection_precision: Literal["float64", "float32"] = "float64"
 
     # ── Functional connectivity ──────────────────────────────────────────────
     func_con_lag_val: list[int] = field(default_factory=lambda: [10, 15, 25])
@@ -74,6 +84,13 @@ class Params:
     prob_thresh_tail: float = 0.05
     prob_thresh_plot_checks: bool = False
     prob_thresh_plot_checks_n: int = 5
+    # Stop computing an edge's surrogates once its verdict is certain — enough
+    # of them have beaten it, or too few repetitions remain to. The thresholded
+    # matrix is identical to the full run's; sparse cultures, where most edges
+    # are settled in a few dozen repetitions, finish several times faster.
+    # Ignored when the stability check is plotted, which needs every surrogate.
+    # See pipeline/probabilistic_threshold.py.
+    prob_thresh_sequential: bool = False
 
     # ── Burst detection ──────────────────────────────────────────────────────
     network_burst_detection_method: str = "Bakkum"
@@ -192,7 +209,7 @@ class Params:
 
     # ── Parallelism ──────────────────────────────────────────────────────────
     # None = auto-size against available cores/RAM (see pipeline/parallel.py).
-    # Step 1 threads over channels on one shared ~3.8 GB array (RAM-safe);
+    # Step 1 threads over channels, reading a batch of them at a time (RAM-safe);
     # steps 3/4 run recordings in separate processes (CPU-bound, low RAM).
     spike_detection_channel_workers: int | None = None
     recording_workers: int | None = None
@@ -87,6 +87,10 @@ _RECONSTRUCTABLE_DIRS = (
     "1_SpikeDetection/1B_SpikeDetectionChecks",
 )
 
+#: Files that only save a re-run time — step 4's null-model cache is several
+#: times the size of everything else a recording carries. Never packed.
+_CACHE_SUFFIXES = ("_nulls.npz",)
+
 #: Figure families a viewer can rebuild from a bundle. Must correspond to what
 #: :mod:`meanap.pipeline.render` actually implements — ``test_bundle_render.py``
 #: asserts that, because a manifest that overclaims is worse than one that says
@@ -137,6 +141,9 @@ class RunBundle:
     #: Params keys the bundle carried that this version doesn't know — a
     #: version-skew signal worth surfacing rather than silently dropping.
     unknown_param_keys: list[str] = field(default_factory=list)
+    #: The ``.meanap`` file this was extracted from — what identifies it for
+    #: caching, since ``root`` is a fresh temporary directory every time.
+    source: Path | None = None
     _tempdir: str | None = None
 
     # ── description ──────────────────────────────────────────────────────────
@@ -257,7 +264,7 @@ def _keep_as_images(root: Path) -> tuple[str, ...]:
 def _is_reconstructable_member(rel: Path, keep: tuple[str, ...] = ()) -> bool:
     posix = rel.as_posix()
     dirs = tuple(d for d in _RECONSTRUCTABLE_DIRS if d not in keep)
-    return any(posix.startswith(d) for d in dirs)
+    return any(posix.startswith(d) for d in dirs) or posix.endswith(_CACHE_SUFFIXES)
 
 
 def _adjust_manifest(manifest: dict, keep: tuple[str, ...]) -> dict:
@@ -308,6 +315,9 @@ def write_bundle(
     Those are packed as images after all, and the manifest is amended to match,
     because dropping them would simply lose them.
 
+    Step-1 spike files written before the columnar layout are packed in it
+    (see :func:`meanap.pipeline.io.save_spike_times_npz`).
+
     Returns the path written.
     """
     root = Path(output_root)
@@ -338,11 +348,30 @@ def write_bundle(
                                 json.dumps(redact(json.load(fh)), indent=2,
                                            sort_keys=True))
                 continue
+            if _is_legacy_spike_file(rel, path):
+                # Carried in the columnar layout whatever wrote the folder, so
+                # everything that opens a bundle reads one method at a time.
+                from meanap.pipeline.io import rewrite_spike_times_npz
+
+                with tempfile.TemporaryDirectory() as tmp:
+                    columnar = Path(tmp) / path.name
+                    rewrite_spike_times_npz(path, columnar)
+                    zf.write(columnar, rel.as_posix())
+                continue
             zf.write(path, rel.as_posix())
 
     return dest
 
 
+def _is_legacy_spike_file(rel: Path, path: Path) -> bool:
+    """A step-1 spike file still in the one-array-per-channel layout."""
+    from meanap.pipeline.io import is_columnar_spike_file
+    from meanap.pipeline.resume import SPIKE_SUBDIR
+
+    return (rel.parent == SPIKE_SUBDIR and rel.name.endswith("_spikes.npz")
+            and not is_columnar_spike_file(path))
+
+
 def open_bundle(path: Path | str) -> RunBundle:
     """Extract a bundle to a temporary directory and read its manifest.
 
@@ -388,7 +417,7 @@ def open_bundle(path: Path | str) -> RunBundle:
             params, unknown = load_params(root / PARAMS_FILENAME)
 
         return RunBundle(root=root, manifest=manifest, params=params,
-                         unknown_param_keys=unknown, _tempdir=tmp)
+                         unknown_param_keys=unknown, source=src, _tempdir=tmp)
     except Exception:
         shutil.rmtree(tmp, ignore_errors=True)
         raise
@@ -1,3 +1,5 @@
+from dataclasses import dataclass
+
 import numpy as np
 from scipy.signal import find_peaks, savgol_filter
 
@@ -60,6 +62,62 @@ def get_isin_threshold(spike_times: np.ndarray, n: int = 10) -> float:
         return min(isin_th, 0.1)
 
 
+def _burst_segments(spike_times: np.ndarray, n: int, isin_th: float) -> tuple[np.ndarray, np.ndarray]:
+    """``(starts, ends)`` of each burst as half-open spike index ranges.
+
+    A spike is a burst candidate if it belongs to ANY N-spike window with
+    duration <= isin_th (Bakkum's criterion); from spike N-1 on, each run of
+    candidates is cut into bursts wherever a window is longer than isin_th and
+    the current burst already has N spikes, and a run's last burst is dropped
+    if it has fewer than N. The loop is over bursts, not spikes: a burst's cut
+    is the first long window at least N spikes in, found by bisection.
+    """
+    n_spikes = len(spike_times)
+    window_durations = spike_times[n-1:] - spike_times[:-(n-1)]
+    valid = np.flatnonzero(window_durations <= isin_th)
+
+    # criteria[i:i+n] = True for every valid window i, as one running sum
+    cover = np.zeros(n_spikes + n, dtype=np.int64)
+    cover[valid] += 1
+    cover[valid + n] -= 1
+    criteria = np.cumsum(cover[:n_spikes]) > 0
+    criteria[:n-1] = False
+
+    edges = np.diff(criteria.astype(np.int8), prepend=0, append=0)
+    run_starts = np.flatnonzero(edges == 1)
+    run_ends = np.flatnonzero(edges == -1)
+
+    # Spike i closes the window starting at spike i-(n-1)
+    long_idx = np.flatnonzero(window_durations > isin_th) + (n - 1)
+
+    starts: list[int] = []
+    ends: list[int] = []
+    for r0, r1 in zip(run_starts, run_ends):
+        seg = r0
+        while True:
+            k = np.searchsorted(long_idx, seg + n)
+            if k < len(long_idx) and long_idx[k] < r1:
+                starts.append(seg)
+                ends.append(long_idx[k])
+                seg = long_idx[k]
+            else:
+                if r1 - seg >= n:
+                    starts.append(seg)
+                    ends.append(r1)
+                break
+    return np.array(starts, dtype=np.int64), np.array(ends, dtype=np.int64)
+
+
+def _ranges(starts: np.ndarray, ends: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Every index in the half-open ranges ``[starts[i], ends[i])``, end to end,
+    and the range each came from."""
+    lengths = ends - starts
+    which = np.repeat(np.arange(len(starts)), lengths)
+    first = np.cumsum(lengths) - lengths
+    idx = np.arange(lengths.sum()) - np.repeat(first - starts, lengths)
+    return idx, which
+
+
 def burst_detect_isin(spike_times: np.ndarray, n: int, isin_th: float) -> tuple[dict, np.ndarray]:
     """Detect bursts using Bakkum's ISI_N method.
     
@@ -72,88 +130,68 @@ def burst_detect_isin(spike_times: np.ndarray, n: int, isin_th: float) -> tuple[
     
     if n_spikes < n:
         return {"T_start": [], "T_end": [], "S": []}, spike_burst_number
-        
-    # Compute min dT for each spike
-    # dT(j, i) = Spike.T(i + j) - Spike.T(i - (N-1) + j)
-    # where j is in 0..N-1
-    # We only care if min(dT) <= isin_th
-    # So a spike i has criteria=1 if it belongs to ANY N-spike window with duration <= isin_th
-    
-    criteria = np.zeros(n_spikes, dtype=bool)
-    
-    window_durations = spike_times[n-1:] - spike_times[:-(n-1)]
-    valid_windows = window_durations <= isin_th
-    
-    for i, valid in enumerate(valid_windows):
-        if valid:
-            criteria[i:i+n] = True
-            
-    in_burst = False
-    num_burst = -1
-    number = -1
-    bl = 0
-    
-    for i in range(n-1, n_spikes):
-        if not in_burst:
-            if criteria[i]:
-                in_burst = True
-                num_burst += 1
-                number = num_burst
-                bl = 1
-        else:
-            if not criteria[i]:
-                in_burst = False
-                if bl < n:
-                    # Erase if not big enough
-                    spike_burst_number[spike_burst_number == number] = -1
-                    num_burst -= 1
-                number = -1
-            elif (spike_times[i] - spike_times[i-(n-1)]) > isin_th and bl >= n:
-                # Split consecutive bursts
-                num_burst += 1
-                number = num_burst
-                bl = 1
-            else:
-                bl += 1
-                
-        spike_burst_number[i] = number
-        
-    # Handle last burst
-    if in_burst and bl < n:
-        spike_burst_number[spike_burst_number == number] = -1
-        
-    # Build Burst dict
-    max_burst_num = np.max(spike_burst_number)
-    
-    t_start = []
-    t_end = []
-    s_size = []
-    
-    if max_burst_num >= 0:
-        for b_num in range(max_burst_num + 1):
-            idx = np.where(spike_burst_number == b_num)[0]
-            if len(idx) > 0:
-                t_start.append(spike_times[idx[0]])
-                t_end.append(spike_times[idx[-1]])
-                s_size.append(len(idx))
-                
+
+    starts, ends = _burst_segments(spike_times, n, isin_th)
+    idx, which = _ranges(starts, ends)
+    spike_burst_number[idx] = which
+
     burst_info = {
-        "T_start": np.array(t_start),
-        "T_end": np.array(t_end),
-        "S": np.array(s_size),
+        "T_start": spike_times[starts],
+        "T_end": spike_times[ends - 1],
+        "S": ends - starts,
     }
     
     return burst_info, spike_burst_number
 
 
+@dataclass(frozen=True)
+class NetworkBursts:
+    """Every network burst's contents, as flat arrays with per-burst offsets.
+
+    Burst ``i``'s spikes (all channels, time order) are
+    ``spike_times[spike_offsets[i]:spike_offsets[i + 1]]``, recorded on
+    ``spike_channels`` over the same range; the distinct channels taking part
+    are ``channels[channel_offsets[i]:channel_offsets[i + 1]]``, ascending.
+    """
+
+    spike_times: np.ndarray
+    spike_channels: np.ndarray
+    spike_offsets: np.ndarray
+    channels: np.ndarray
+    channel_offsets: np.ndarray
+
+    @classmethod
+    def empty(cls) -> "NetworkBursts":
+        none = np.zeros(1, dtype=np.int64)
+        return cls(np.empty(0), np.empty(0, dtype=np.int64), none,
+                   np.empty(0, dtype=np.int64), none)
+
+    def __len__(self) -> int:
+        return len(self.spike_offsets) - 1
+
+    def channels_of(self, i: int) -> np.ndarray:
+        return self.channels[self.channel_offsets[i]:self.channel_offsets[i + 1]]
+
+    def burst(self, i: int) -> dict[int, np.ndarray]:
+        """Burst ``i`` as ``{channel: spike times}``."""
+        lo, hi = self.spike_offsets[i], self.spike_offsets[i + 1]
+        times, chans = self.spike_times[lo:hi], self.spike_channels[lo:hi]
+        return {ch: times[chans == ch] for ch in self.channels_of(i)}
+
+
 def burst_detect_network(
     spike_times_dict: dict[int, np.ndarray], 
     fs: float,
     min_spikes: int = 10,
     min_channels: int = 3,
     isin_th_param: str | float = "automatic"
-) -> tuple[list[dict], np.ndarray, list[np.ndarray], dict]:
-    """Network burst detection combining all active channels."""
+) -> tuple[NetworkBursts, np.ndarray, dict]:
+    """Network burst detection combining all active channels.
+
+    Returns the bursts' contents, their ``(start, end)`` in frames, and the
+    detection info. Each burst window is resolved against the sorted spikes by
+    bisection, so the cost grows with the spike count, not spikes x bursts.
+    """
     
     # Combine spikes
     all_spikes = []
@@ -165,7 +203,7 @@ def burst_detect_network(
             all_chans.append(np.full(len(times), ch))
             
     if not all_spikes:
-        return [], np.zeros((0, 2)), [], {}
+        return NetworkBursts.empty(), np.zeros((0, 2)), {}
         
     t_cat = np.concatenate(all_spikes)
     c_cat = np.concatenate(all_chans)
@@ -177,8 +215,7 @@ def burst_detect_network(
     
     # Merge coincident spikes (MATLAB trainCombine > 1 = 1)
     # We just keep unique times
-    t_unique, unique_idx = np.unique(t_cat, return_index=True)
-    # For channels, it keeps the first one (MATLAB lost channel info when summing anyway for network burst times)
+    t_unique = np.unique(t_cat)
     
     if str(isin_th_param).lower() == "automatic":
         min_unique_itis = 10
@@ -189,46 +226,37 @@ def burst_detect_network(
     else:
         isin_th = float(isin_th_param)
         
-    burst_info, spike_bn = burst_detect_isin(t_unique, min_spikes, isin_th)
-    
-    n_bursts = len(burst_info["T_start"])
-    burst_matrix_list = []
-    burst_times = np.zeros((n_bursts, 2))
-    burst_channels_list = []
-    
-    for i in range(n_bursts):
-        # Time window
-        t0 = burst_info["T_start"][i]
-        t1 = burst_info["T_end"][i]
-        
-        burst_times[i, 0] = t0 * fs
-        burst_times[i, 1] = t1 * fs
-        
-        # Original spikes in this window
-        mask = (t_cat >= t0) & (t_cat <= t1)
-        b_times = t_cat[mask]
-        b_chans = c_cat[mask]
-        
-        unique_chans = np.unique(b_chans)
-        burst_channels_list.append(unique_chans)
-        
-        b_dict = {ch: b_times[b_chans == ch] for ch in unique_chans}
-        burst_matrix_list.append(b_dict)
-        
+    burst_info, _ = burst_detect_isin(t_unique, min_spikes, isin_th)
+    t0 = np.asarray(burst_info["T_start"], dtype=float)
+    t1 = np.asarray(burst_info["T_end"], dtype=float)
+
+    # Original spikes in each window: bursts are disjoint and in time order,
+    # so each is one contiguous slice of the sorted spikes.
+    lo = np.searchsorted(t_cat, t0, side="left")
+    hi = np.searchsorted(t_cat, t1, side="right")
+    idx, which = _ranges(lo, hi)
+
+    # Distinct (burst, channel) pairs, burst-major then channel-ascending
+    n_codes = int(c_cat.max()) + 1
+    pairs = np.unique(which * n_codes + c_cat[idx])
+    n_chans = np.bincount(pairs // n_codes, minlength=len(t0))
+
     # Filter by min_channels
-    valid = np.array([len(chans) >= min_channels for chans in burst_channels_list])
-    
-    if len(valid) > 0 and valid.sum() > 0:
-        burst_matrix_list = [b for b, v in zip(burst_matrix_list, valid) if v]
-        burst_times = burst_times[valid]
-        burst_channels_list = [c for c, v in zip(burst_channels_list, valid) if v]
-    else:
-        burst_matrix_list = []
-        burst_times = np.zeros((0, 2))
-        burst_channels_list = []
+    keep = n_chans >= min_channels
+    if not keep.any():
+        return NetworkBursts.empty(), np.zeros((0, 2)), {"isin_th": isin_th}
+
+    lo, hi = lo[keep], hi[keep]
+    idx, _ = _ranges(lo, hi)
+    pairs = pairs[keep[pairs // n_codes]]
+    spike_offsets = np.concatenate(([0], np.cumsum(hi - lo)))
+    channel_offsets = np.concatenate(([0], np.cumsum(n_chans[keep])))
+    bursts = NetworkBursts(
+        t_cat[idx], c_cat[idx], spike_offsets, pairs % n_codes, channel_offsets)
+    burst_times = np.column_stack((t0[keep] * fs, t1[keep] * fs))
         
     info = {"isin_th": isin_th}
-    return burst_matrix_list, burst_times, burst_channels_list, info
+    return bursts, burst_times, info
 
 
 def single_channel_burst_detection(
@@ -303,17 +331,12 @@ def single_channel_burst_detection(
                 in_burst_fr = b_info["S"] / b_durs
                 in_burst_fr[b_durs == 0] = np.nan
             
-            # ISI within
-            isi_w = []
-            for i in range(n_b):
-                idx = np.where(s_bn == i)[0]
-                if len(idx) > 1:
-                    isi_w.append(np.mean(np.diff(times[idx])) * 1000.0)
-                else:
-                    isi_w.append(np.nan)
+            # ISI within: a burst is a contiguous run of spikes, so its mean
+            # ISI is its duration over its intervals
+            with np.errstate(divide='ignore', invalid='ignore'):
+                isi_w = np.where(b_info["S"] > 1, b_durs_ms / (b_info["S"] - 1), np.nan)
                     
-            isi_o = []
-            idx_o = np.where(s_bn == -1)[0]
+            idx_o = np.flatnonzero(s_bn == -1)
             if len(idx_o) > 1:
                 isi_o = np.diff(times[idx_o]) * 1000.0
             else:
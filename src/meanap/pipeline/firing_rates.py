@@ -42,7 +42,7 @@ def firing_rates_bursts(
     num_active_elec = len(active_fr)
     
     # ── 2. Network burst detection ──
-    b_mat, b_times, b_chans, b_info = burst_detect_network(
+    bursts, b_times, b_info = burst_detect_network(
         spike_times_dict,
         fs,
         min_spikes=params.min_spike_network_burst,
@@ -63,42 +63,37 @@ def firing_rates_bursts(
     if n_bursts > 0:
         nb_lengths = (b_times[:, 1] - b_times[:, 0]) / fs
         mean_nbst_length_s = np.mean(nb_lengths)
-        chans_involved = [len(c) for c in b_chans]
+        chans_involved = np.diff(bursts.channel_offsets)
         mean_num_chans_involved = np.mean(chans_involved)
         
-        # Spikes in burst
-        sp_in_bst = 0
-        mean_isi_w = []
-        for i, bm in enumerate(b_mat):
-            # bm is dict {ch: times}
-            # flattened unique times in burst
-            all_b_t = []
-            for t in bm.values():
-                all_b_t.extend(t)
-            all_b_t = np.sort(np.unique(all_b_t))
-            sp_in_bst += len(all_b_t)
-            
-            if len(all_b_t) > 1:
-                isi_w = np.mean(np.diff(all_b_t)) * 1000.0
-                mean_isi_w.append(isi_w)
-                
-        if mean_isi_w:
-            mean_isi_within_ms = np.mean(mean_isi_w)
+        # Spikes in burst: distinct times in each burst, from its sorted run
+        # of spikes — a time is new where it differs from the one before it
+        # in the same burst.
+        t = bursts.spike_times
+        offsets = bursts.spike_offsets
+        is_new = np.ones(len(t), dtype=bool)
+        is_new[1:] = t[1:] != t[:-1]
+        is_new[offsets[:-1]] = True
+        n_unique = np.add.reduceat(is_new.astype(np.int64), offsets[:-1])
+        sp_in_bst = int(n_unique.sum())
+
+        # Mean ISI over a burst's distinct times is its span over its intervals
+        multi = n_unique > 1
+        if multi.any():
+            spans = t[offsets[1:] - 1] - t[offsets[:-1]]
+            mean_isi_within_ms = np.mean(spans[multi] / (n_unique[multi] - 1)) * 1000.0
             
         # ISI outside
-        all_t = []
-        for t in spike_times_dict.values():
-            all_t.extend(t)
-        all_t = np.sort(np.unique(all_t))
+        all_t = np.unique(np.concatenate([np.asarray(times, dtype=float)
+                                          for times in spike_times_dict.values()]))
         
         if len(all_t) > 1:
             total_spikes = len(all_t)
-            # Find times outside bursts
-            # This is complex, just approximate or compute exactly?
-            # exact:
-            in_b_mask = np.zeros(len(all_t), dtype=bool)
-            for (t0, t1) in b_times / fs:
-                in_b_mask |= (all_t >= t0) & (all_t <= t1)
+            # Times outside every burst window: the last window starting at or
+            # before each time has to have ended before it.
+            t0, t1 = (b_times / fs).T
+            k = np.searchsorted(t0, all_t, side="right") - 1
+            in_b_mask = (k >= 0) & (all_t <= t1[np.maximum(k, 0)])
             out_t = all_t[~in_b_mask]
             if len(out_t) > 1:
                 mean_isi_outside_ms = np.mean(np.diff(out_t)) * 1000.0
@@ -9,10 +9,16 @@ anything to MATLAB before running the pipeline:
   converters write for recordings under 2 GB; ``h5py`` cannot read these
 * ``.h5`` straight off a Multi Channel Systems recorder — converted on read by
   :func:`load_mcs_h5`, reproducing ``convertMCSh5toMat.m`` exactly
+
+:func:`load_raw_recording` returns a whole recording as one array;
+:func:`open_raw_recording` returns a :class:`RawRecording` that reads it a few
+channels at a time, for Step 1, where holding every channel at once is what
+bounded how many recordings a machine could take.
 """
 
 from __future__ import annotations
 
+from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
@@ -24,7 +30,6 @@ import scipy.io as sio
 from meanap.pipeline.atomic import atomic_savez
 from meanap.pipeline.axion_raw import (
     is_axion_raw,
-    load_axion_well,
     read_axion_metadata,
     split_well_suffix,
 )
@@ -115,6 +120,241 @@ def load_raw_recording(path: str | Path) -> tuple[np.ndarray, np.ndarray, float]
     channels : (n_channels,) int array — channel IDs
     fs : float — sampling frequency in Hz
     """
+    with open_raw_recording(path) as recording:
+        return recording.read_all(), recording.channels, recording.fs
+
+
+def _load_raw_mat_v7(path: Path) -> tuple[np.ndarray, np.ndarray, float]:
+    """Load a pre-v7.3 ``.mat`` recording via scipy.
+
+    Unlike the v7.3 branch, scipy already returns ``dat`` as
+    (n_samples, n_channels) — MATLAB's own orientation — so no transpose.
+    """
+    try:
+        mat = sio.loadmat(path, variable_names=("dat", "channels", "fs"))
+    except Exception as exc:  # scipy raises bare ValueError/NotImplementedError
+        raise ValueError(f"{path.name}: could not be read as a raw recording ({exc})") from exc
+    missing = [k for k in ("dat", "channels", "fs") if k not in mat]
+    if missing:
+        raise ValueError(f"{path.name}: .mat is missing variable(s) {', '.join(missing)}")
+    dat = np.asarray(mat["dat"], dtype=np.float32)
+    channels = np.asarray(mat["channels"]).flatten().astype(int)
+    fs = float(np.asarray(mat["fs"]).flatten()[0])
+    return dat, channels, fs
+
+
+# ── Lazy raw recording access ────────────────────────────────────────────────
+
+#: Bytes of source samples converted per block when a read has to walk a
+#: recording in time — the same ~256 MB the whole-file readers use.
+_BLOCK_BYTES = 256 << 20
+
+
+class RawRecording(ABC):
+    """A raw recording, opened to be read a few channels at a time.
+
+    :meth:`read` returns the requested channels exactly as
+    :func:`load_raw_recording` would have — float32, in the source's units,
+    bit for bit — and nothing else of the recording is held in memory. Each
+    format is read the way it is laid out on disk:
+
+    * an Axion ``.raw``, or a v7.3 ``dat`` stored contiguously, through
+      ``np.memmap``, converting only the columns asked for;
+    * a chunked (usually compressed) v7.3 ``dat`` or MCS ``ChannelData``
+      through h5py, in time blocks, so each chunk is decompressed once per read;
+    * a v7 ``.mat`` from memory, since scipy cannot read part of a variable.
+
+    :meth:`batches` groups the channels into reads sized for a given number of
+    threads, so spike detection holds about one channel per thread. Where a
+    chunk spans several channels a batch covers whole chunks — reading them
+    one channel at a time would decompress the same chunks once per channel —
+    which for an MCS file (every channel in each chunk) means all of them at
+    once, as before.
+
+    Use as a context manager, or call :meth:`close`, so an open file or map is
+    released before the recording is deleted. Get one from
+    :func:`open_raw_recording` or :func:`as_raw_recording`; each layout is a
+    subclass supplying :meth:`_read_into`.
+    """
+
+    def __init__(self, channels: np.ndarray, fs: float, n_samples: int):
+        self.channels = np.asarray(channels).astype(int)
+        self.fs = float(fs)
+        self.n_samples = int(n_samples)
+
+    @property
+    def n_channels(self) -> int:
+        return len(self.channels)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """``(n_samples, n_channels)``, the shape :func:`load_raw_recording` returns."""
+        return self.n_samples, self.n_channels
+
+    def read(self, indices, start: int = 0, stop: int | None = None,
+             order: str = "C") -> np.ndarray:
+        """Channels ``indices`` (0-based), samples ``start:stop``, as a
+        (stop - start, len(indices)) float32 array — or, for an array handed to
+        :func:`as_raw_recording`, in its dtype. ``order="F"`` lays it out
+        channel-major, each channel's samples contiguous."""
+        idx = np.atleast_1d(np.asarray(indices, dtype=np.intp))
+        start, stop, _ = slice(start, stop).indices(self.n_samples)
+        out = np.empty((max(0, stop - start), len(idx)), dtype=np.float32, order=order)
+        if len(idx) and stop > start:
+            self._read_into(idx, start, stop, out)
+        return out
+
+    def read_all(self) -> np.ndarray:
+        return self.read(np.arange(self.n_channels))
+
+    def batches(self, n_threads: int = 1) -> list[np.ndarray]:
+        """Consecutive channel indices, split into reads for ``n_threads`` workers."""
+        size = max(1, self._batch_size(max(1, n_threads)))
+        return [np.arange(start, min(start + size, self.n_channels))
+                for start in range(0, self.n_channels, size)]
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "RawRecording":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _batch_size(self, n_threads: int) -> int:
+        return n_threads
+
+    @abstractmethod
+    def _read_into(self, idx: np.ndarray, start: int, stop: int, out: np.ndarray) -> None:
+        """Fill ``out`` with channels ``idx``, samples ``start:stop``."""
+
+
+class _ArrayRecording(RawRecording):
+    """A recording already in memory — a v7 ``.mat``, or an array a caller passed."""
+
+    def __init__(self, dat: np.ndarray, channels: np.ndarray, fs: float):
+        super().__init__(channels, fs, dat.shape[0])
+        self._dat = dat
+
+    def read(self, indices, start: int = 0, stop: int | None = None,
+             order: str = "C") -> np.ndarray:
+        # In the array's own dtype: a caller's float64 stays float64.
+        idx = np.atleast_1d(np.asarray(indices, dtype=np.intp))
+        if order == "F":
+            return self._dat[start:stop].T[idx].T
+        return self._dat[start:stop, idx]
+
+    def _read_into(self, idx: np.ndarray, start: int, stop: int, out: np.ndarray) -> None:
+        out[:] = self._dat[start:stop, idx]
+
+
+class _ChannelMajorMap(RawRecording):
+    """A contiguous v7.3 ``dat``: MATLAB's (n_samples, n_channels) is stored
+    transposed, so each channel is one contiguous run of the file."""
+
+    def __init__(self, path: Path, dset: "h5py.Dataset", offset: int,
+                 channels: np.ndarray, fs: float):
+        n_rows, n_samples = dset.shape
+        super().__init__(channels, fs, n_samples)
+        self._map = np.memmap(path, dtype=dset.dtype, mode="r", offset=offset,
+                              shape=(n_rows, n_samples))
+
+    def _read_into(self, idx: np.ndarray, start: int, stop: int, out: np.ndarray) -> None:
+        for j, i in enumerate(idx):
+            out[:, j] = self._map[i, start:stop]
+
+    def close(self) -> None:
+        self._map = None
+
+
+class _AxionWellMap(RawRecording):
+    """One well of an Axion plate: int16 samples interleaved across every
+    channel of the plate, scaled to volts as
+    :func:`~meanap.pipeline.axion_raw.load_axion_well` does."""
+
+    def __init__(self, meta, well: str):
+        cols = meta.columns_for_well(well)
+        if not cols:
+            raise ValueError(
+                f"{meta.path.name}: well {well!r} not found "
+                f"(available: {', '.join(meta.wells())})"
+            )
+        super().__init__([meta.channels[c].meanap_channel for c in cols],
+                         meta.sampling_frequency, meta.n_samples)
+        self._cols = np.asarray(cols, dtype=np.intp)
+        self._scale = meta.voltage_scale
+        self._map = np.memmap(meta.path, dtype="<i2", mode="r", offset=meta.data_start,
+                              shape=(meta.n_samples, meta.n_data_columns))
+
+    def _read_into(self, idx: np.ndarray, start: int, stop: int, out: np.ndarray) -> None:
+        # A time row spans the whole plate, so every read touches every page of
+        # the samples it covers whatever it asks for: blocks keep the int16 →
+        # float64 intermediate small.
+        cols = self._cols[idx]
+        block = max(1, _BLOCK_BYTES // (self._map.shape[1] * 2))
+        for lo in range(start, stop, block):
+            hi = min(lo + block, stop)
+            out[lo - start:hi - start] = (
+                self._map[lo:hi, cols].astype(np.float64) * self._scale)
+
+    def close(self) -> None:
+        self._map = None
+
+
+class _HDF5Recording(RawRecording):
+    """A chunked (n_channels, n_samples) HDF5 dataset — v7.3 ``dat``, or MCS
+    ``ChannelData`` with its ADC → µV conversion."""
+
+    def __init__(self, f: "h5py.File", dset: "h5py.Dataset", channels: np.ndarray,
+                 fs: float, adzero: np.ndarray | None = None,
+                 scale: np.ndarray | None = None):
+        super().__init__(channels, fs, dset.shape[1])
+        self._file = f
+        self._dset = dset
+        self._adzero = adzero
+        self._scale = scale
+
+    def _read_into(self, idx: np.ndarray, start: int, stop: int, out: np.ndarray) -> None:
+        row_lo, row_hi = int(idx.min()), int(idx.max()) + 1
+        rows = idx - row_lo
+        block = _hdf5_block_size(self._dset, row_hi - row_lo)
+        for lo in range(start, stop, block):
+            hi = min(lo + block, stop)
+            raw = self._dset[row_lo:row_hi, lo:hi]
+            if self._scale is None:
+                out[lo - start:hi - start] = raw[rows].T
+            else:
+                raw = raw[rows].astype(np.float64)
+                out[lo - start:hi - start] = (
+                    (raw - self._adzero[idx, None]) * self._scale[idx, None]).T
+
+    def _batch_size(self, n_threads: int) -> int:
+        chunk = self._dset.chunks
+        if chunk is None or chunk[0] <= 0:
+            return n_threads
+        per_chunk = chunk[0]
+        return -(-n_threads // per_chunk) * per_chunk
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def _hdf5_block_size(dset: "h5py.Dataset", n_rows: int) -> int:
+    """Samples per time block: ~:data:`_BLOCK_BYTES` of float64, snapped to chunk edges."""
+    block = max(1, _BLOCK_BYTES // (max(1, n_rows) * 8))
+    chunk = dset.chunks
+    if chunk is not None and chunk[1] > 0:
+        block = max(chunk[1], (block // chunk[1]) * chunk[1])
+    return block
+
+
+def open_raw_recording(path: str | Path) -> RawRecording:
+    """Open a raw MEA recording for reading channel by channel.
+
+    Same formats, dispatch and values as :func:`load_raw_recording`, which is
+    this followed by :meth:`RawRecording.read_all`.
+    """
     well = path.well if isinstance(path, RawSource) else None
     path = Path(path)
 
@@ -126,46 +366,50 @@ def load_raw_recording(path: str | Path) -> tuple[np.ndarray, np.ndarray, float]
                 f"name the recording '<file>_<well>' in your spreadsheet to pick one "
                 f"(available: {', '.join(meta.wells())})."
             )
-        return load_axion_well(path, well, metadata=meta)
+        return _AxionWellMap(meta, well)
 
     try:
         f = h5py.File(path, "r")
     except OSError:
         # Not HDF5 at all — a v7 .mat, which scipy handles.
-        return _load_raw_mat_v7(path)
+        return _ArrayRecording(*_load_raw_mat_v7(path))
 
-    with f:
+    try:
         stream_name = _find_mcs_stream_name(f)
         if stream_name is not None:
-            return _load_mcs_h5_open(f, stream_name)
+            return _open_mcs_stream(f, stream_name)
         if "dat" not in f:
             raise ValueError(
                 f"{path.name}: HDF5 file is neither a MEA-NAP .mat (no 'dat' variable) "
                 f"nor a Multi Channel Systems recording (no AnalogStream)."
             )
-        dat = f["dat"][()].T.astype(np.float32)   # (n_channels, n_samples) → (n_samples, n_channels)
+        dset = f["dat"]                  # (n_channels, n_samples): MATLAB's transpose
         channels = f["channels"][()].flatten().astype(int)
         fs = float(f["fs"][()].flatten()[0])
-    return dat, channels, fs
-
-
-def _load_raw_mat_v7(path: Path) -> tuple[np.ndarray, np.ndarray, float]:
-    """Load a pre-v7.3 ``.mat`` recording via scipy.
-
-    Unlike the v7.3 branch, scipy already returns ``dat`` as
-    (n_samples, n_channels) — MATLAB's own orientation — so no transpose.
-    """
-    try:
-        mat = sio.loadmat(path, variable_names=("dat", "channels", "fs"))
-    except Exception as exc:  # scipy raises bare ValueError/NotImplementedError
-        raise ValueError(f"{path.name}: could not be read as a raw recording ({exc})") from exc
-    missing = [k for k in ("dat", "channels", "fs") if k not in mat]
-    if missing:
-        raise ValueError(f"{path.name}: .mat is missing variable(s) {', '.join(missing)}")
-    dat = np.asarray(mat["dat"], dtype=np.float32)
-    channels = np.asarray(mat["channels"]).flatten().astype(int)
-    fs = float(np.asarray(mat["fs"]).flatten()[0])
-    return dat, channels, fs
+        offset = dset.id.get_offset() if dset.chunks is None else None
+        if offset is None:
+            return _HDF5Recording(f, dset, channels, fs)
+    except BaseException:
+        f.close()
+        raise
+    recording = _ChannelMajorMap(path, dset, offset, channels, fs)
+    f.close()
+    return recording
+
+
+def as_raw_recording(
+    dat: "np.ndarray | RawRecording", channels: np.ndarray | None = None,
+    fs: float | None = None,
+) -> RawRecording:
+    """``dat`` as a :class:`RawRecording`: itself if it already is one, else
+    an in-memory (n_samples, n_channels) array wrapped with its ``channels``
+    (default ``0..n-1``) and ``fs``."""
+    if isinstance(dat, RawRecording):
+        return dat
+    dat = np.asarray(dat)
+    if channels is None:
+        channels = np.arange(dat.shape[1])
+    return _ArrayRecording(dat, channels, float("nan") if fs is None else fs)
 
 
 # ── Multi Channel Systems HDF5 ────────────────────────────────────────────────
@@ -219,6 +463,25 @@ def load_mcs_h5(path: str | Path) -> tuple[np.ndarray, np.ndarray, float]:
         return _load_mcs_h5_open(f, stream_name)
 
 
+def _mcs_conversion(info: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Per-channel ``(ADZero, scale)``: µV = (counts - ADZero) * scale."""
+    conv = info["ConversionFactor"].astype(np.float64)
+    adzero = info["ADZero"].astype(np.float64)
+    # MEA-NAP works in µV; MCS stores units of 10^Exponent V, so scaling by
+    # 10^(exponent - (exponent + 6)) == 1e-6 lands on µV whatever the exponent.
+    exponent = info["Exponent"].astype(np.float64)
+    return adzero, conv * 10.0 ** (exponent - (exponent + 6))
+
+
+def _open_mcs_stream(f: "h5py.File", stream_name: str) -> RawRecording:
+    stream = f[stream_name]
+    info = stream["InfoChannel"][()]
+    channels = np.array([_mcs_label_to_channel(lbl) for lbl in info["Label"]], dtype=int)
+    adzero, scale = _mcs_conversion(info)
+    return _HDF5Recording(f, stream["ChannelData"], channels, _mcs_sampling_rate(info),
+                          adzero=adzero, scale=scale)
+
+
 def _load_mcs_h5_open(f: "h5py.File", stream_name: str) -> tuple[np.ndarray, np.ndarray, float]:
     stream = f[stream_name]
     info = stream["InfoChannel"][()]
@@ -226,13 +489,7 @@ def _load_mcs_h5_open(f: "h5py.File", stream_name: str) -> tuple[np.ndarray, np.
 
     channels = np.array([_mcs_label_to_channel(lbl) for lbl in info["Label"]], dtype=int)
     fs = _mcs_sampling_rate(info)
-
-    conv = info["ConversionFactor"].astype(np.float64)
-    adzero = info["ADZero"].astype(np.float64)
-    # MEA-NAP works in µV; MCS stores units of 10^Exponent V, so scaling by
-    # 10^(exponent - (exponent + 6)) == 1e-6 lands on µV whatever the exponent.
-    exponent = info["Exponent"].astype(np.float64)
-    scale = conv * 10.0 ** (exponent - (exponent + 6))
+    adzero, scale = _mcs_conversion(info)
 
     n_channels, n_samples = channel_data.shape
     dat = np.empty((n_samples, n_channels), dtype=np.float32)
@@ -241,7 +498,7 @@ def _load_mcs_h5_open(f: "h5py.File", stream_name: str) -> tuple[np.ndarray, np.
     # the size of the result. Blocks span *all* channels because MCS chunks do
     # (60 x ~2000 samples, gzipped) — reading channel by channel would
     # decompress the whole file once per channel.
-    block = _mcs_block_size(channel_data)
+    block = _hdf5_block_size(channel_data, n_channels)
     for start in range(0, n_samples, block):
         stop = min(start + block, n_samples)
         raw = channel_data[:, start:stop].astype(np.float64)   # (n_channels, block)
@@ -250,16 +507,6 @@ def _load_mcs_h5_open(f: "h5py.File", stream_name: str) -> tuple[np.ndarray, np.
     return dat, channels, fs
 
 
-def _mcs_block_size(channel_data: "h5py.Dataset", target_bytes: int = 256 << 20) -> int:
-    """Samples per conversion block: ~256 MB of float64, snapped to chunk edges."""
-    n_channels = channel_data.shape[0]
-    block = max(1, target_bytes // (n_channels * 8))
-    chunk = channel_data.chunks
-    if chunk is not None and chunk[1] > 0:
-        block = max(chunk[1], (block // chunk[1]) * chunk[1])
-    return block
-
-
 def _mcs_label_to_channel(label: Any) -> int:
     """Electrode number from an MCS channel label, e.g. ``b'E-00223 47'`` → 47.
 
@@ -289,6 +536,13 @@ def _mcs_sampling_rate(info: np.ndarray) -> float:
 
 # ── Spike detection output files ──────────────────────────────────────────────
 
+# Member-name prefixes in a spike .npz: the columnar layout's two arrays per
+# method, and the per-channel layout it replaced.
+_TIMES = "times_"
+_OFFSETS = "channel_offsets_"
+_LEGACY = "spike_times_"
+
+
 def load_spike_times_mat(path: str | Path) -> dict[int, dict[str, np.ndarray]]:
     """Read spike times from a MEA-NAP ``_spikes.mat`` (HDF5/v7.3) file.
 
@@ -328,6 +582,43 @@ def _read_maybe_empty(dset: "h5py.Dataset") -> np.ndarray:
     return dset[()].flatten()
 
 
+@dataclass(frozen=True)
+class SpikeTrains:
+    """One detection method's spike times for every channel, in one buffer.
+
+    Channel ``ch``'s train is ``times[offsets[ch]:offsets[ch + 1]]``, in the
+    order it was detected. This is how the spike file stores each method, so
+    a loaded method is two arrays rather than a dict of hundreds — and exactly
+    the packed buffer Step 3's STTC kernels take (see
+    :func:`meanap.pipeline.sttc.pack_spike_times`).
+    """
+
+    times: np.ndarray
+    offsets: np.ndarray
+
+    @classmethod
+    def from_dict(cls, trains: dict[int, np.ndarray], n_channels: int) -> "SpikeTrains":
+        """Pack ``{channel_index: times}``; channels not in ``trains`` are empty."""
+        flat = [np.asarray(trains.get(ch, ()), dtype=np.float64).ravel()
+                for ch in range(n_channels)]
+        offsets = np.zeros(n_channels + 1, dtype=np.int64)
+        np.cumsum([len(t) for t in flat], out=offsets[1:])
+        times = np.concatenate(flat) if offsets[-1] else np.empty(0, dtype=np.float64)
+        return cls(times, offsets)
+
+    @property
+    def n_channels(self) -> int:
+        return len(self.offsets) - 1
+
+    def channel(self, ch: int) -> np.ndarray:
+        """Channel ``ch``'s spike times — a view, not a copy."""
+        return self.times[self.offsets[ch]:self.offsets[ch + 1]]
+
+    def as_dict(self) -> dict[int, np.ndarray]:
+        """``{channel_index: times}`` for every channel, as views."""
+        return {ch: self.channel(ch) for ch in range(self.n_channels)}
+
+
 def save_spike_times_npz(
     path: str | Path,
     spike_times: dict[int, dict[str, np.ndarray]],
@@ -343,13 +634,20 @@ def save_spike_times_npz(
     ``channels`` — channel IDs
     ``fs`` — sampling frequency
     ``duration_s`` — recording duration in seconds (omitted if not supplied)
-    ``spike_times_{ch}_{method}`` — spike times in seconds for each channel/method
+    ``times_{method}`` — every channel's spike times in seconds, end to end
+    ``channel_offsets_{method}`` — where each channel's run starts and ends
+    in ``times_{method}`` (see :class:`SpikeTrains`)
 
     Also saves a text file ``{stem}_params.txt`` alongside if ``params`` given.
 
     ``duration_s`` is stored so Steps 2-4 don't have to re-open the raw
     recording just to recover it — which is what makes resuming from a previous
     run work when the raw data isn't mounted (see ``read_duration_npz``).
+
+    Files written before the columnar layout hold one array per channel and
+    method, ``spike_times_{ch}_{method}``; every reader here accepts both.
+    The arrays are stored uncompressed, so :func:`load_spike_trains` can map
+    them rather than read them.
     """
     path = Path(path)
     path.parent.mkdir(parents=True, exist_ok=True)
@@ -360,9 +658,14 @@ def save_spike_times_npz(
     }
     if duration_s is not None:
         arrays["duration_s"] = np.array([float(duration_s)])
-    for ch_idx, methods in spike_times.items():
-        for method, times in methods.items():
-            arrays[f"spike_times_{ch_idx}_{method}"] = times
+    n_channels = max([len(channels), *(ch + 1 for ch in spike_times)])
+    methods = dict.fromkeys(m for per_channel in spike_times.values() for m in per_channel)
+    for method in methods:
+        trains = SpikeTrains.from_dict(
+            {ch: per_channel[method] for ch, per_channel in spike_times.items()
+             if method in per_channel}, n_channels)
+        arrays[f"{_TIMES}{method}"] = trains.times
+        arrays[f"{_OFFSETS}{method}"] = trains.offsets
 
     atomic_savez(path, **arrays)
 
@@ -431,21 +734,115 @@ def resolve_duration_s(
         return None, "unavailable"
 
 
+def _legacy_key(key: str) -> tuple[int, str] | None:
+    """``(channel_index, method)`` of a ``spike_times_{ch}_{method}`` member."""
+    if not key.startswith(_LEGACY):
+        return None
+    parts = key[len(_LEGACY):].split("_", 1)
+    if len(parts) != 2 or not parts[0].isdigit():
+        return None
+    return int(parts[0]), parts[1]
+
+
+def is_columnar_spike_file(path: str | Path) -> bool:
+    """Whether a spike file is in the columnar layout (reads only the zip
+    directory)."""
+    with np.load(path) as data:
+        return any(k.startswith(_OFFSETS) for k in data.files)
+
+
+def _mapped_member(path: Path, key: str, mode: str) -> np.ndarray | None:
+    """Member ``key`` of an uncompressed ``.npz`` as a memory map, or None
+    when it is compressed or in a format this cannot map."""
+    import zipfile
+
+    with zipfile.ZipFile(path) as zf:
+        info = zf.getinfo(f"{key}.npy")
+    if info.compress_type != zipfile.ZIP_STORED:
+        return None
+    read_header = {(1, 0): np.lib.format.read_array_header_1_0,
+                   (2, 0): np.lib.format.read_array_header_2_0}
+    with open(path, "rb") as fh:
+        # The local header's name and extra fields can differ in length from
+        # the central directory's, so the data offset is read from it.
+        fh.seek(info.header_offset)
+        local = fh.read(30)
+        if local[:4] != b"PK\x03\x04":
+            return None
+        name_len, extra_len = (int.from_bytes(local[26:28], "little"),
+                               int.from_bytes(local[28:30], "little"))
+        fh.seek(info.header_offset + 30 + name_len + extra_len)
+        version = np.lib.format.read_magic(fh)
+        if version not in read_header:
+            return None
+        shape, fortran_order, dtype = read_header[version](fh)
+        offset = fh.tell()
+    if dtype.hasobject:
+        return None
+    if not all(shape):
+        return np.empty(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode=mode, offset=offset, shape=shape,
+                     order="F" if fortran_order else "C")
+
+
+def load_spike_trains(
+    path: str | Path, method: str, mmap_mode: str | None = None,
+) -> SpikeTrains:
+    """One method's spike times from a spike file, packed.
+
+    Reads only that method's two arrays; a method the file doesn't hold comes
+    back with every channel empty, as a missing channel always has. With
+    ``mmap_mode`` (as for :func:`numpy.load`) the arrays are mapped from the
+    file rather than read. Files in the per-channel layout are read and packed.
+    """
+    path = Path(path)
+    with np.load(path) as data:
+        if f"{_OFFSETS}{method}" not in data.files:
+            n_channels = len(data["channels"])
+            legacy = {}
+            for key in data.files:
+                parsed = _legacy_key(key)
+                if parsed and parsed[1] == method:
+                    legacy[parsed[0]] = data[key]
+            return SpikeTrains.from_dict(legacy, n_channels)
+        if mmap_mode is None:
+            return SpikeTrains(data[f"{_TIMES}{method}"], data[f"{_OFFSETS}{method}"])
+    times = _mapped_member(path, f"{_TIMES}{method}", mmap_mode)
+    offsets = _mapped_member(path, f"{_OFFSETS}{method}", mmap_mode)
+    if times is None or offsets is None:
+        return load_spike_trains(path, method)
+    return SpikeTrains(times, np.asarray(offsets))
+
+
+def rewrite_spike_times_npz(src: str | Path, dest: str | Path) -> None:
+    """Write the spike file ``src`` to ``dest`` in the columnar layout,
+    whichever layout ``src`` is in."""
+    with np.load(src) as data:
+        channels = data["channels"]
+        fs = float(np.asarray(data["fs"]).flatten()[0])
+        duration_s = (float(np.asarray(data["duration_s"]).flatten()[0])
+                      if "duration_s" in data.files else None)
+    save_spike_times_npz(dest, load_spike_times_npz(src), channels, fs,
+                         duration_s=duration_s)
+
+
 def load_spike_times_npz(path: str | Path) -> dict[int, dict[str, np.ndarray]]:
-    """Load spike times saved by ``save_spike_times_npz``."""
-    data = np.load(path)
-    result: dict[int, dict[str, np.ndarray]] = {}
-    prefix = "spike_times_"
-    for key in data.files:
-        if not key.startswith(prefix):
-            continue
-        rest = key[len(prefix):]
-        parts = rest.split("_", 1)
-        if len(parts) != 2:
-            continue
-        ch_idx = int(parts[0])
-        method = parts[1]
-        if ch_idx not in result:
-            result[ch_idx] = {}
-        result[ch_idx][method] = data[key]
-    return result
+    """Load spike times saved by ``save_spike_times_npz``, every method.
+
+    ``{channel_index: {method: times}}``. Accepts both layouts; Steps 2-4 need
+    one method, and read just that with :func:`load_spike_trains`.
+    """
+    with np.load(path) as data:
+        columnar = [k[len(_OFFSETS):] for k in data.files if k.startswith(_OFFSETS)]
+        result: dict[int, dict[str, np.ndarray]] = {}
+        if not columnar:
+            for key in data.files:
+                parsed = _legacy_key(key)
+                if parsed:
+                    result.setdefault(parsed[0], {})[parsed[1]] = data[key]
+            return result
+        for method in columnar:
+            trains = SpikeTrains(data[f"{_TIMES}{method}"], data[f"{_OFFSETS}{method}"])
+            for ch, times in trains.as_dict().items():
+                result.setdefault(ch, {})[method] = times
+        return result
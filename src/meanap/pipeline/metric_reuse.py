@@ -0,0 +1,104 @@
+"""Reusing Step 4 metrics an earlier run computed from the same inputs.
+
+Most of Step 4's time goes on a few stochastic blocks: consensus clustering and
+the normalized participation coefficient, and small-worldness, per (recording,
+lag), and NMF once per recording. None of them reads the cartography
+boundaries, hub thresholds or plotting options, and the active subnetwork they
+are computed on often survives a change of ``min_activity_level`` untouched —
+so re-running Step 4 to explore those used to redo all of it for nothing.
+
+Each block is recorded with a *fingerprint*: a digest of what it was computed
+from — its input arrays, the parameters it reads, and the ``(seed, labels…)``
+its generator was derived from (:mod:`meanap.pipeline.rng`). Step 4 keeps them
+in ``4_NetworkActivity/netmet_fingerprints.json``, beside the
+``netmet_results.json`` they describe, each (recording, lag) tagged with a
+digest of its stored metrics so a fingerprint is only ever trusted next to the
+values it was written with. A later Step 4 reading from that folder takes a
+block's values from it when the fingerprint is unchanged, and computes the
+block otherwise. What is derived from those blocks (``nMod``, ``Z``, node
+cartography, hubs, the summary statistics) and the deterministic metrics are
+always recomputed: they are cheap, and they are what a parameter change
+usually targets.
+
+Because every block draws from its own generator, a reused block is identical
+to the one a fresh run would compute. Nothing is reused without
+``Params.random_seed`` — an unseeded run is meant to differ from the last one,
+as with the null-model cache (:mod:`meanap.pipeline.null_ensemble`).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+
+import numpy as np
+
+__all__ = ["FINGERPRINTS_FILENAME", "MetricReuse", "fingerprint", "metrics_digest"]
+
+FINGERPRINTS_FILENAME = "netmet_fingerprints.json"
+
+#: Bumped whenever a block's computation changes, so fingerprints written by an
+#: older version no longer match.
+FINGERPRINT_VERSION = 1
+
+
+def fingerprint(*parts) -> str:
+    """Digest of ``parts``: arrays by dtype, shape and bytes, sequences item by
+    item, anything else by ``repr``."""
+    h = hashlib.blake2b(digest_size=16)
+
+    def feed(part) -> None:
+        if isinstance(part, np.ndarray):
+            h.update(repr(("array", part.shape, str(part.dtype))).encode())
+            h.update(np.ascontiguousarray(part).tobytes())
+        elif isinstance(part, (list, tuple)):
+            h.update(repr(("seq", len(part))).encode())
+            for item in part:
+                feed(item)
+        else:
+            h.update(repr(part).encode())
+
+    for part in parts:
+        feed(part)
+    return h.hexdigest()
+
+
+def metrics_digest(metrics: dict) -> str:
+    """Digest of one (recording, lag)'s metrics in their stored JSON form."""
+    text = json.dumps(metrics, sort_keys=True)
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+@dataclass
+class MetricReuse:
+    """The fingerprints of one unit of Step 4 work, and what an earlier run left for it.
+
+    ``labels`` are those the unit's generator is derived from; ``previous`` and
+    ``previous_fingerprints`` are the earlier run's metrics and fingerprints for
+    the same unit, empty when there was none.
+    """
+
+    seed: int | None
+    labels: tuple = ()
+    previous: dict = field(default_factory=dict)
+    previous_fingerprints: dict = field(default_factory=dict)
+    #: This run's fingerprint of each block, reused or computed, for storing.
+    fingerprints: dict = field(default_factory=dict)
+    #: Blocks served from the earlier run, for the caller's log.
+    reused: list[str] = field(default_factory=list)
+
+    def take(self, block: str, keys: tuple[str, ...], *inputs) -> dict | None:
+        """``block``'s ``keys`` as the earlier run computed them, or ``None`` to
+        compute them here. ``inputs`` are everything the block reads besides its
+        generator."""
+        if self.seed is None:
+            return None
+        key = fingerprint(FINGERPRINT_VERSION, block, self.seed, self.labels, *inputs)
+        self.fingerprints[block] = key
+        if self.previous_fingerprints.get(block) != key:
+            return None
+        if not all(k in self.previous for k in keys):
+            return None
+        self.reused.append(block)
+        return {k: self.previous[k] for k in keys}
@@ -12,24 +12,38 @@ partition itself can differ between MATLAB and Python runs — same situation
 as Step 3's probabilistic thresholding. What's expected to match is
 *quality*: modularity Q should land in a similar range, and consensus
 clustering should still converge to a stable, block-diagonal partition.
+
+Each Louvain repeat draws from its own generator, spawned from ``rng`` — so
+the repeats are independent of one another and can run on a thread pool
+(``max_workers``) without the result depending on the worker count.
 """
 
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 
 from meanap.pipeline.louvain import community_louvain
 
 
 def consensus_coclassify(partitions: list[np.ndarray]) -> np.ndarray:
-    """Co-classification matrix: fraction of partitions where i, j share a module."""
+    """Co-classification matrix: fraction of partitions where i, j share a module.
+
+    One matrix product: each (partition, module) pair is a column of a 0/1
+    membership matrix ``h``, so ``h @ h.T`` counts, for every node pair, the
+    partitions that put them together. Counts are small integers, so the sum
+    is exact.
+    """
     stack = np.stack(partitions, axis=1)  # (n_nodes, n_partitions)
-    n = stack.shape[0]
-    d = np.zeros((n, n))
-    for k in range(stack.shape[1]):
-        labels = stack[:, k]
-        d += (labels[:, None] == labels[None, :]).astype(float)
-    return d / stack.shape[1]
+    n, n_parts = stack.shape
+    _, codes = np.unique(stack, return_inverse=True)
+    codes = codes.reshape(n, n_parts)
+    n_codes = int(codes.max()) + 1
+    _, cols = np.unique(codes + n_codes * np.arange(n_parts), return_inverse=True)
+    h = np.zeros((n, int(cols.max()) + 1))
+    h[np.repeat(np.arange(n), n_parts), cols.ravel()] = 1.0
+    return (h @ h.T) / n_parts
 
 
 def consensuscheck(d: np.ndarray) -> bool:
@@ -39,12 +53,27 @@ def consensuscheck(d: np.ndarray) -> bool:
     return bool(np.count_nonzero((d == 0) | (d == 1)) == d.size)
 
 
+def _louvain_repeats(
+    adj_m: np.ndarray, rep_num: int, rng: np.random.Generator, max_workers: int,
+) -> tuple[list[np.ndarray], list[float]]:
+    """``rep_num`` independent Louvain runs on ``adj_m``, one spawned generator each."""
+    run = lambda g: community_louvain(adj_m, rng=g)  # noqa: E731
+    gens = rng.spawn(rep_num)
+    if max_workers > 1 and rep_num > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as ex:
+            results = list(ex.map(run, gens))
+    else:
+        results = [run(g) for g in gens]
+    return [ci for ci, _ in results], [q for _, q in results]
+
+
 def mod_consensus_cluster_iterate(
     adj_m: np.ndarray,
     threshold: float = 0.4,
     rep_num: int = 50,
     rng: np.random.Generator | None = None,
     max_outer_iterations: int = 50,
+    max_workers: int = 1,
 ) -> tuple[np.ndarray, float, int]:
     """Returns (Ci, Q, num_repeats): consensus community affiliation + modularity.
 
@@ -52,6 +81,10 @@ def mod_consensus_cluster_iterate(
     loops unconditionally until block-diagonal) — consensus clustering on
     real data converges in a handful of iterations; this just prevents a
     pathological input from hanging forever.
+
+    ``max_workers > 1`` runs each round's ``rep_num`` Louvain repeats on a
+    thread pool; the compiled local-moving sweep releases the GIL. The result
+    is the same for any worker count.
     """
     if rng is None:
         rng = np.random.default_rng()
@@ -60,7 +93,7 @@ def mod_consensus_cluster_iterate(
     if n < 2:
         return np.ones(max(n, 1), dtype=int), 0.0, 0
 
-    m = [community_louvain(adj_m, rng=rng)[0] for _ in range(rep_num)]
+    m, _ = _louvain_repeats(adj_m, rep_num, rng, max_workers)
     d = consensus_coclassify(m)
     d[d < threshold] = 0.0
 
@@ -70,12 +103,7 @@ def mod_consensus_cluster_iterate(
     q_list = [0.0] * rep_num
 
     while not block_diag and num_repeats < max_outer_iterations:
-        b = []
-        q_list = []
-        for _ in range(rep_num):
-            ci, q = community_louvain(d, rng=rng)
-            b.append(ci)
-            q_list.append(q)
+        b, q_list = _louvain_repeats(d, rep_num, rng, max_workers)
 
         d = consensus_coclassify(b)
         d[d < threshold] = 0.0
@@ -34,7 +34,7 @@ same relationship as ``PC``/``PC_raw``.
 in ``nmf.py`` rather than here, since they operate on spike times/matrices
 rather than an adjacency matrix — **read that module's docstring**, this one
 is not just RNG-stream-different from MATLAB but algorithm-different
-(``sklearn``'s NMF solvers vs. MATLAB's built-in ``nnmf``), so even
+(coordinate-descent NMF vs. MATLAB's built-in ALS ``nnmf``), so even
 ``num_nnmf_components`` itself can legitimately differ, not just the
 underlying factor matrices.
 
@@ -51,12 +51,28 @@ commented out in ``ExtractNetMet.m``.
 
 from __future__ import annotations
 
+from typing import Iterable
+
 import numpy as np
 from scipy.linalg import schur
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
 from scipy.sparse.linalg import svds
 
 from meanap.pipeline.null_models import null_model_und_sign
 
+# Brandes' betweenness is a per-source loop over neighbours and predecessors
+# that doesn't vectorize; compile it with numba when available (same optional
+# pattern as ``null_models.py``) and keep the vectorized-per-source port of
+# ``betweenness_wei.m`` as the fallback.
+try:
+    from numba import njit, prange
+
+    _HAVE_NUMBA = True
+except Exception:  # pragma: no cover - numba optional / version-gated
+    _HAVE_NUMBA = False
+    prange = range
+
 
 # ── Weight conversion (weight_conversion.m) ────────────────────────────────
 
@@ -136,7 +152,35 @@ def clustering_coef_wu(w: np.ndarray) -> np.ndarray:
 # ── Distances (distance_wei.m) + characteristic path length (charpath.m) ──
 
 def distance_wei(length_mat: np.ndarray) -> np.ndarray:
-    """Dijkstra shortest-path distance matrix from a connection-length matrix."""
+    """Dijkstra shortest-path distance matrix from a connection-length matrix.
+
+    ``length_mat[u, v]`` is the length of the edge ``u → v``; zero means no
+    edge. Runs SciPy's compiled Dijkstra over a CSR copy of the matrix, built
+    once, instead of ``distance_wei.m``'s per-source loop, which was O(n³)
+    Python work at 2P network sizes.
+
+    The result is bit-identical to that loop, ties included: with
+    non-negative lengths, each settled distance is the minimum of
+    ``d[v] + L[v, w]`` over the same already-settled ``v`` in either
+    implementation, and a minimum does not depend on the order its candidates
+    are visited in.
+    """
+    length_mat = np.asarray(length_mat, dtype=float)
+    if length_mat.size == 0:
+        return np.zeros(length_mat.shape)
+    if np.isnan(length_mat).any() or (length_mat < 0).any():
+        return _distance_wei_reference(length_mat)
+    return dijkstra(csr_matrix(length_mat), directed=True)
+
+
+def _distance_wei_reference(length_mat: np.ndarray) -> np.ndarray:
+    """Line-for-line port of ``distance_wei.m`` — one Dijkstra per source,
+    settling every node tied at the current minimum together.
+
+    Kept as the fallback for lengths the compiled engine refuses (negative or
+    NaN entries, which only a hand-built matrix has) and as the reference the
+    engine is checked against.
+    """
     n = length_mat.shape[0]
     d = np.full((n, n), np.inf)
     np.fill_diagonal(d, 0.0)
@@ -188,19 +232,25 @@ def charpath(d: np.ndarray) -> tuple[float, float]:
 # ── Efficiency (efficiency_wei.m) ──────────────────────────────────────────
 
 def _distance_inv_wei(w: np.ndarray) -> np.ndarray:
-    d = distance_wei(w)
+    return _inverse_distances(distance_wei(w))
+
+
+def _inverse_distances(d: np.ndarray) -> np.ndarray:
     with np.errstate(divide="ignore"):
         d_inv = 1.0 / d
     np.fill_diagonal(d_inv, 0.0)
     return d_inv
 
 
-def efficiency_wei_global(w: np.ndarray) -> float:
+def efficiency_wei_global(w: np.ndarray, *, dist: np.ndarray | None = None) -> float:
+    """Global efficiency. ``dist``, if given, is ``distance_wei`` of
+    ``weight_conversion_lengths(w)`` already computed by the caller."""
     n = w.shape[0]
     if n < 2:
         return 0.0
-    length_mat = weight_conversion_lengths(w)
-    di = _distance_inv_wei(length_mat)
+    if dist is None:
+        dist = distance_wei(weight_conversion_lengths(w))
+    di = _inverse_distances(dist)
     return float(di.sum() / (n**2 - n))
 
 
@@ -232,8 +282,145 @@ def efficiency_wei_local(w: np.ndarray) -> np.ndarray:
 
 # ── Betweenness centrality (betweenness_wei.m) ─────────────────────────────
 
+#: Sources per parallel block in ``betweenness_wei``.
+_BRANDES_BLOCK = 256
+
+
+def _brandes_source_impl(
+    u: int, indptr: np.ndarray, indices: np.ndarray, data: np.ndarray,
+    t_indptr: np.ndarray, t_indices: np.ndarray, t_data: np.ndarray,
+    dependency: np.ndarray,
+) -> None:
+    """Brandes' dependencies of every node on source ``u``, into ``dependency``.
+
+    Follows :func:`_betweenness_wei_reference` operation for operation, so the
+    floats come out identical: nodes tied at the current minimum distance are
+    settled together in index order, path counts are summed in that order,
+    and dependencies are accumulated in reverse settling order over each
+    node's predecessors in index order. Predecessors aren't stored — ``v``
+    precedes ``w`` exactly when it settled earlier (``d[v] < d[w]``) and
+    ``d[v] + L[v, w] == d[w]``, which is re-tested from the transposed graph
+    (``t_*``) on the way back.
+    """
+    n = indptr.shape[0] - 1
+    d = np.full(n, np.inf)
+    num_paths = np.zeros(n)
+    settled = np.zeros(n, dtype=np.bool_)
+    order = np.empty(n, dtype=np.int64)
+    active = np.empty(n, dtype=np.int64)
+    d[u] = 0.0
+    num_paths[u] = 1.0
+    active[0] = u
+    n_active = 1
+    n_order = 0
+    while True:
+        for a in range(n_active):
+            settled[active[a]] = True
+        for a in range(n_active):
+            v = active[a]
+            order[n_order] = v
+            n_order += 1
+            for k in range(indptr[v], indptr[v + 1]):
+                w = indices[k]
+                if settled[w]:
+                    continue
+                d_uw = d[v] + data[k]
+                if d_uw < d[w]:
+                    d[w] = d_uw
+                    num_paths[w] = num_paths[v]
+                elif d_uw == d[w]:
+                    num_paths[w] += num_paths[v]
+
+        min_d = np.inf
+        any_left = False
+        for w in range(n):
+            if not settled[w]:
+                any_left = True
+                if d[w] < min_d:
+                    min_d = d[w]
+        if not any_left:
+            break
+        if min_d == np.inf:
+            # Unreached nodes carry no dependency; the reference appends them
+            # to the order, where they contribute nothing.
+            break
+        n_active = 0
+        for w in range(n):
+            if not settled[w] and d[w] == min_d:
+                active[n_active] = w
+                n_active += 1
+
+    dependency[:] = 0.0
+    for i in range(n_order - 1, 0, -1):
+        w = order[i]
+        if num_paths[w] == 0:
+            continue
+        for k in range(t_indptr[w], t_indptr[w + 1]):
+            v = t_indices[k]
+            if d[v] < d[w] and d[v] + t_data[k] == d[w]:
+                dependency[v] += (1 + dependency[w]) * num_paths[v] / num_paths[w]
+
+
+def _betweenness_sources_impl(
+    indptr: np.ndarray, indices: np.ndarray, data: np.ndarray,
+    t_indptr: np.ndarray, t_indices: np.ndarray, t_data: np.ndarray,
+) -> np.ndarray:
+    """Betweenness from every source, sources in parallel.
+
+    Each source's dependencies go to their own row and are summed into the
+    total in source order afterwards, as the reference does, so the parallel
+    result doesn't depend on which thread finished first. Sources run in
+    blocks of ``_BRANDES_BLOCK`` to bound that buffer on large networks.
+    """
+    n = indptr.shape[0] - 1
+    bc = np.zeros(n)
+    dependencies = np.zeros((min(n, _BRANDES_BLOCK), n))
+    for start in range(0, n, _BRANDES_BLOCK):
+        stop = min(n, start + _BRANDES_BLOCK)
+        for i in prange(stop - start):
+            _brandes_source(start + i, indptr, indices, data,
+                            t_indptr, t_indices, t_data, dependencies[i])
+        for i in range(stop - start):
+            for w in range(n):
+                if w != start + i:
+                    bc[w] += dependencies[i, w]
+    return bc
+
+
+if _HAVE_NUMBA:
+    _brandes_source = njit(cache=True)(_brandes_source_impl)
+    _betweenness_sources = njit(cache=True, parallel=True)(_betweenness_sources_impl)
+else:
+    _brandes_source = _brandes_source_impl
+    _betweenness_sources = _betweenness_sources_impl
+
+
 def betweenness_wei(g: np.ndarray) -> np.ndarray:
-    """Node betweenness centrality (Brandes' algorithm) from a length matrix."""
+    """Node betweenness centrality (Brandes' algorithm) from a length matrix.
+
+    ``g[v, w]`` is the length of the edge ``v → w``; zero means no edge. With
+    numba, runs a compiled Brandes over the graph's CSR adjacency lists —
+    built once for all sources, not copied per source — with sources spread
+    over threads; the result is bit-identical to the port of
+    ``betweenness_wei.m`` (:func:`_betweenness_wei_reference`), which is used
+    without numba, and for negative or non-finite lengths.
+    """
+    g = np.asarray(g, dtype=float)
+    if not _HAVE_NUMBA or not np.isfinite(g).all() or (g < 0).any():
+        return _betweenness_wei_reference(g)
+    graph = csr_matrix(g)
+    graph.sort_indices()
+    transposed = graph.T.tocsr()
+    transposed.sort_indices()
+    return _betweenness_sources(
+        graph.indptr.astype(np.int64), graph.indices.astype(np.int64), graph.data,
+        transposed.indptr.astype(np.int64), transposed.indices.astype(np.int64),
+        transposed.data,
+    )
+
+
+def _betweenness_wei_reference(g: np.ndarray) -> np.ndarray:
+    """Port of ``betweenness_wei.m``, vectorized per source node."""
     n = g.shape[0]
     bc = np.zeros(n)
 
@@ -317,6 +504,7 @@ def participation_coef(w: np.ndarray, ci: np.ndarray) -> np.ndarray:
 
 def participation_coef_norm(
     w: np.ndarray, ci: np.ndarray, n_iter: int = 100, rng: np.random.Generator | None = None,
+    nulls: Iterable[np.ndarray] | None = None,
 ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
     """Normalized participation coefficient — **this is what MEA-NAP actually
     saves as ``NetMet.PC``**, and what colors
@@ -331,6 +519,9 @@ def participation_coef_norm(
     **Not bit-reproducible against MATLAB** (the randomizations are
     stochastic) — see ``null_models.py``'s docstring. ``n_iter=100`` at
     ~59-64 nodes takes roughly 15-35s; budget for that per (recording, lag).
+    ``nulls``, if given, are those randomizations already made (Step 4 passes
+    a cached ``null_ensemble.NullEnsemble``'s), used in place of ``n_iter``
+    new ones.
 
     Returns (PC_norm, PC_residual, PC, between_mod_k) — matching MATLAB's
     output order exactly (MEA-NAP's caller only keeps the first).
@@ -349,16 +540,18 @@ def participation_coef_norm(
         within_mod_k[mask] = w[np.ix_(mask, mask)].sum(axis=1)
     between_mod_k = ko - within_mod_k
 
-    kc2_rnd = np.zeros((n, n_iter))
-    for it in range(n_iter):
-        w_rnd = null_model_und_sign(w, bin_swaps=5, rng=rng)
+    if nulls is None:
+        nulls = (null_model_und_sign(w, bin_swaps=5, rng=rng) for _ in range(n_iter))
+    columns = []
+    for w_rnd in nulls:
         gc_rnd = (w_rnd != 0) @ np.diag(ci)
         kc2_rnd_loop = np.zeros(n)
         with np.errstate(divide="ignore", invalid="ignore"):
             for i in range(1, ci.max() + 1):
                 term = (w * (gc == i)).sum(axis=1) / ko - (w_rnd * (gc_rnd == i)).sum(axis=1) / ko
                 kc2_rnd_loop += term**2
-        kc2_rnd[:, it] = np.sqrt(0.5 * kc2_rnd_loop)
+        columns.append(np.sqrt(0.5 * kc2_rnd_loop))
+    kc2_rnd = np.column_stack(columns) if columns else np.zeros((n, 0))
 
     with np.errstate(invalid="ignore"):
         pc_norm = 1.0 - np.median(kc2_rnd, axis=1)
@@ -642,7 +835,7 @@ def hub_classification(
 # ── Small-worldness (small_worldness_RL_wu.m) ──────────────────────────────
 
 def small_worldness_rl_wu(
-    a: np.ndarray, r: np.ndarray, l: np.ndarray,
+    a: np.ndarray, r: np.ndarray, l: np.ndarray, *, dist: np.ndarray | None = None,
 ) -> tuple[float, float, float, float]:
     """Small-worldness sigma/omega, port of ``small_worldness_RL_wu.m``.
 
@@ -663,12 +856,17 @@ def small_worldness_rl_wu(
       (``C/Cl``) — what MEA-NAP actually saves as ``NetMet.CC``.
     - ``pl``: path length normalized against the random model (``PL/PLr``)
       — what MEA-NAP actually saves as ``NetMet.PL``.
+
+    ``dist``, if given, is ``distance_wei(weight_conversion_lengths(a))``
+    already computed by the caller — Step 4 has it for ``PL_raw``.
     """
     c = np.float64(np.mean(clustering_coef_wu(a)))
     cl = np.float64(np.mean(clustering_coef_wu(l)))
     cr = np.float64(np.mean(clustering_coef_wu(r)))
 
-    pl, _ = charpath(distance_wei(weight_conversion_lengths(a)))
+    if dist is None:
+        dist = distance_wei(weight_conversion_lengths(a))
+    pl, _ = charpath(dist)
     plr, _ = charpath(distance_wei(weight_conversion_lengths(r)))
     pl, plr = np.float64(pl), np.float64(plr)
 
@@ -753,24 +951,8 @@ def modal_controllability(adj_m: np.ndarray) -> np.ndarray:
 
 # ── Effective Rank ─────────────────────────────────────────────────────────
 
-def effective_rank_from_activity(
-    activity: np.ndarray,
-    fs: float,
-    eff_fs: float,
-    method: str = "covariance",
-) -> float:
-    """Effective rank of an already-built activity matrix, shape ``(samples, units)``.
-
-    The second half of ``calEffRank.m``: resample to ``eff_fs`` with a polyphase
-    FIR filter, then take the Shannon entropy of the covariance (or correlation)
-    eigenvalues.
-
-    Split out from :func:`effective_rank` because calcium imaging reaches this
-    point with a *continuous* matrix rather than event times —
-    ``ExtractNetMet.m`` resamples whatever ``activityMatrix`` it was handed, and
-    in ``suite2pMode`` that can be ``denoisedF`` or ``spks``.
-    """
-    import scipy.signal as signal
+def _resample_factors(fs: float, eff_fs: float) -> tuple[int, int]:
+    """``(up, down)`` for resampling ``fs`` to ``eff_fs``, in lowest terms."""
     from fractions import Fraction
 
     # MATLAB clamps rather than upsampling (ExtractNetMet.m: "if
@@ -782,10 +964,11 @@ def effective_rank_from_activity(
 
     frac = (Fraction(eff_fs).limit_denominator(1000000)
             / Fraction(float(fs)).limit_denominator(1000000))
-    p, q = frac.numerator, frac.denominator
+    return frac.numerator, frac.denominator
 
-    resampled = signal.resample_poly(activity, up=p, down=q, axis=0)
 
+def _rank_of(resampled: np.ndarray, method: str) -> float:
+    """Shannon-entropy effective rank of a resampled ``(samples, units)`` matrix."""
     if method.lower() in ("covariance", "ordinary"):
         cov_m = np.cov(resampled, rowvar=False)
     elif method.lower() == "correlation":
@@ -810,6 +993,80 @@ def effective_rank_from_activity(
     return float(np.exp(s_en))
 
 
+def effective_rank_from_activity(
+    activity: np.ndarray,
+    fs: float,
+    eff_fs: float,
+    method: str = "covariance",
+) -> float:
+    """Effective rank of an already-built activity matrix, shape ``(samples, units)``.
+
+    The second half of ``calEffRank.m``: resample to ``eff_fs`` with a polyphase
+    FIR filter, then take the Shannon entropy of the covariance (or correlation)
+    eigenvalues.
+
+    Split out from :func:`effective_rank` because calcium imaging reaches this
+    point with a *continuous* matrix rather than event times —
+    ``ExtractNetMet.m`` resamples whatever ``activityMatrix`` it was handed, and
+    in ``suite2pMode`` that can be ``denoisedF`` or ``spks``.
+    """
+    import scipy.signal as signal
+
+    p, q = _resample_factors(fs, eff_fs)
+    resampled = signal.resample_poly(activity, up=p, down=q, axis=0)
+    return _rank_of(resampled, method)
+
+
+#: Spikes placed per batch by :func:`_resample_spikes` — bounds its
+#: ``(spikes, taps)`` index arrays to a few tens of MB.
+_RESAMPLE_SPIKE_BATCH = 1 << 16
+
+
+def _resample_spikes(
+    samples: np.ndarray, units: np.ndarray, n_samples: int, n_units: int, up: int, down: int,
+) -> np.ndarray:
+    """``resample_poly`` of a binary spike matrix, built from the spikes alone.
+
+    The matrix is all zeros except a 1 at each ``(samples[i], units[i])``
+    (summed where spikes share a sample), so each output sample is just the
+    sum of the polyphase filter taps that land on those spikes. This places
+    each spike's ``~len(h) / down`` taps directly — the same filter, padding
+    and output alignment as :func:`scipy.signal.resample_poly` with its
+    defaults, equal to it up to summation order — without the full-rate
+    ``(n_samples, n_units)`` matrix, which for a 10-minute 64-channel
+    recording at 12.5 kHz is 3.8 GB.
+    """
+    from scipy.signal import firwin
+
+    n_out = -(-n_samples * up // down)
+    if up == down:
+        out = np.zeros((n_samples, n_units))
+        np.add.at(out, (samples, units), 1.0)
+        return out
+
+    # Filter design and alignment as in scipy.signal.resample_poly.
+    max_rate = max(up, down)
+    half_len = 10 * max_rate
+    h = firwin(2 * half_len + 1, 1.0 / max_rate, window=("kaiser", 5.0)) * up
+    n_pre_pad = down - half_len % down
+    n_pre_remove = (half_len + n_pre_pad) // down
+    h = np.concatenate([np.zeros(n_pre_pad), h])
+
+    # Output k takes tap (k + n_pre_remove) * down - sample * up, where valid.
+    taps_per_spike = -(-len(h) // down) + 1
+    offsets = np.arange(taps_per_spike)
+    flat = np.zeros(n_out * n_units)
+    for start in range(0, len(samples), _RESAMPLE_SPIKE_BATCH):
+        s = samples[start:start + _RESAMPLE_SPIKE_BATCH, None] * up
+        u = units[start:start + _RESAMPLE_SPIKE_BATCH, None]
+        k = -(-s // down) - n_pre_remove + offsets
+        tap = (k + n_pre_remove) * down - s
+        valid = (tap < len(h)) & (k >= 0) & (k < n_out)
+        flat += np.bincount((k * n_units + u)[valid], weights=h[tap[valid]],
+                            minlength=flat.size)
+    return flat.reshape(n_out, n_units)
+
+
 def effective_rank(
     spike_times: list[np.ndarray],
     fs: float,
@@ -819,30 +1076,26 @@ def effective_rank(
 ) -> float:
     """Computes Effective Rank of the network activity.
 
-    Port of ``calEffRank.m`` (Roy and Vetterli, 2007). Constructs the dense
-    binary spike matrix at ``fs``, then defers to
-    :func:`effective_rank_from_activity`.
+    Port of ``calEffRank.m`` (Roy and Vetterli, 2007): the binary spike matrix
+    at ``fs``, resampled to ``eff_fs`` as :func:`effective_rank_from_activity`
+    does — but built from the spike times straight at ``eff_fs`` (see
+    :func:`_resample_spikes`), never at the full rate.
 
     ``spike_times`` is every unit, not the active subset:
     ``ExtractNetMet.m`` passes the whole ``activityMatrix`` here, having
     subset only ``adjM`` by ``inclusionIndex``.
     """
-    from scipy.sparse import csc_matrix
-
     n_samples = int(np.ceil(duration_s * fs))
     n_channels = len(spike_times)
 
-    indices_x: list = []
-    indices_y: list = []
-    for i, st in enumerate(spike_times):
-        samples = np.round(np.asarray(st) * fs).astype(int)
-        samples = samples[(samples >= 0) & (samples < n_samples)]
-        indices_x.extend(samples)
-        indices_y.extend([i] * len(samples))
-
-    activity = csc_matrix(
-        (np.ones(len(indices_x)), (indices_x, indices_y)),
-        shape=(n_samples, n_channels),
-    ).toarray()
-
-    return effective_rank_from_activity(activity, fs, eff_fs, method)
+    samples_per_unit = []
+    for st in spike_times:
+        samples = np.round(np.asarray(st) * fs).astype(np.int64)
+        samples_per_unit.append(samples[(samples >= 0) & (samples < n_samples)])
+    samples = (np.concatenate(samples_per_unit) if samples_per_unit
+               else np.zeros(0, dtype=np.int64))
+    units = np.repeat(np.arange(n_channels), [len(x) for x in samples_per_unit])
+
+    p, q = _resample_factors(fs, eff_fs)
+    resampled = _resample_spikes(samples, units, n_samples, n_channels, p, q)
+    return _rank_of(resampled, method)
@@ -5,15 +5,22 @@
 **Not bit-reproducible against MATLAB, and not even algorithm-identical** —
 unlike the rest of this port, this isn't just "same algorithm, independent
 RNG stream". MATLAB's built-in ``nnmf`` defaults to Alternating Least
-Squares; this module uses ``sklearn.decomposition.NMF`` (coordinate
-descent), the closest available equivalent in the Python scientific stack.
-Different NMF solvers can converge to different local optima and even pick
-a different ``num_nnmf_components`` for the same input, since that value
-depends on where each solver's reconstruction residual happens to cross the
-shuffled-data reference residual. The *control flow* (search for the number
-of components by comparing residuals against a phase-randomized reference,
-then sweep every possible rank up to the active-electrode count) is a
-faithful port; the underlying factorization is not.
+Squares; this module uses coordinate descent (HALS — the same column updates
+as ``sklearn.decomposition.NMF``'s ``"cd"`` solver, which it used until the
+sweeps below were warm-started). Different NMF solvers can converge to
+different local optima and even pick a different ``num_nnmf_components`` for
+the same input, since that value depends on where each solver's
+reconstruction residual happens to cross the shuffled-data reference
+residual. The *control flow* (search for the number of components by
+comparing residuals against a phase-randomized reference, then sweep every
+possible rank up to the active-electrode count) is a faithful port; the
+underlying factorization is not.
+
+Both of those are sweeps over rank, and each rank-``k+1`` fit starts from the
+rank-``k`` factors plus one new random component rather than from scratch
+(:class:`_RankSweep`), stopping once the residual stops improving. Where
+every electrode is active the two sweeps factorize the same matrix, so the
+second picks up where the first stopped instead of refitting those ranks.
 
 Also diverges from ``calNMF.m`` in one deliberate way for tractability: MATLAB
 builds the phase-randomized ("wrap") spike matrix at the *native* sampling
@@ -29,11 +36,7 @@ intermediate array.
 
 from __future__ import annotations
 
-import warnings
-
 import numpy as np
-from sklearn.decomposition import NMF
-from sklearn.exceptions import ConvergenceWarning
 
 
 def randomise_spike_train(
@@ -68,15 +71,47 @@ def _bin_spike_times(spike_times_list: list[np.ndarray], duration_s: float, n_bi
     return out
 
 
-def _nnmf(x: np.ndarray, k: int, rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray, float]:
+#: Iteration cap and stopping tolerance for one fit. The cap matches the
+#: ``max_iter=100`` the sklearn fits used; the tolerance is on the relative
+#: drop in squared residual per sweep of updates.
+_NMF_MAX_ITER = 100
+_NMF_TOL = 1e-4
+
+
+def _hals(x: np.ndarray, w: np.ndarray, h: np.ndarray) -> None:
+    """Refine ``w``/``h`` in place by HALS coordinate descent on ``‖x − wh‖²``."""
+    xx = float(np.sum(x * x))
+    previous: float | None = None
+    for _ in range(_NMF_MAX_ITER):
+        hht = h @ h.T
+        xht = x @ h.T
+        for j in range(w.shape[1]):
+            if hht[j, j] > 0:
+                w[:, j] = np.maximum(0.0, w[:, j] + (xht[:, j] - w @ hht[:, j]) / hht[j, j])
+        wtw = w.T @ w
+        wtx = w.T @ x
+        for j in range(h.shape[0]):
+            if wtw[j, j] > 0:
+                h[j] = np.maximum(0.0, h[j] + (wtx[j] - wtw[j] @ h) / wtw[j, j])
+        # ‖x − wh‖² without forming wh: only the trend is needed here.
+        err = xx - 2.0 * float(np.sum(wtx * h)) + float(np.sum((h @ h.T) * wtw))
+        if previous is not None and previous - err <= _NMF_TOL * previous:
+            break
+        previous = err
+
+
+def _nnmf(
+    x: np.ndarray, k: int, rng: np.random.Generator,
+    init: tuple[np.ndarray, np.ndarray] | None = None,
+) -> tuple[np.ndarray, np.ndarray, float]:
     """Rank-``k`` NNMF of ``x``, matching MATLAB's ``[W,H,D] = nnmf(A,k)``
     output convention: ``D`` is the root-mean-square residual
-    ``norm(A - W*H, 'fro') / sqrt(m*n)``, not sklearn's raw Frobenius error.
+    ``norm(A - W*H, 'fro') / sqrt(m*n)``, not the raw Frobenius error.
 
-    Uses ``init="random"``. (``init="nndsvda"`` was benchmarked and is ~8%
-    *slower* here despite converging in fewer iterations: cal_nmf runs ~N fits
-    on the same matrix for the per-rank sweep, and NNDSVD pays an SVD-based
-    init cost on every fit that outweighs the convergence gain. NMF here is
+    Starts from ``init`` — a rank ``k - 1`` fit — plus one new component, or
+    from scratch without it; new components are drawn as sklearn's
+    ``init="random"`` draws them. (``init="nndsvda"`` was benchmarked and is
+    ~8% *slower* here despite converging in fewer iterations: NMF here is
     fit-count-bound, not init-bound.)
 
     Falls back to a large residual (rather than raising) on numerical
@@ -87,18 +122,20 @@ def _nnmf(x: np.ndarray, k: int, rng: np.random.Generator) -> tuple[np.ndarray,
     """
     m, n = x.shape
     k = max(1, min(k, m, n))
-    seed = int(rng.integers(0, 2**31 - 1))
+    draw = np.random.default_rng(int(rng.integers(0, 2**31 - 1)))
     try:
-        model = NMF(n_components=k, init="random", solver="cd", max_iter=100, random_state=seed)
-        with warnings.catch_warnings():
-            # Not reaching full convergence within a bounded iteration count
-            # is expected/tolerated here, same as MATLAB's own ALS default
-            # — this metric is inherently approximate, not exactly
-            # reproducible even between two MATLAB runs on the same data.
-            warnings.simplefilter("ignore", category=ConvergenceWarning)
-            w = model.fit_transform(x)
-        h = model.components_
-        d = model.reconstruction_err_ / np.sqrt(m * n)
+        k_new = k if init is None else k - init[0].shape[1]
+        scale = np.sqrt(x.mean() / k)
+        w = scale * np.abs(draw.standard_normal((m, k_new)))
+        h = scale * np.abs(draw.standard_normal((k_new, n)))
+        if init is not None:
+            w = np.hstack([init[0], w])
+            h = np.vstack([init[1], h])
+        with np.errstate(over="raise", invalid="raise"):
+            _hals(x, w, h)
+        d = np.linalg.norm(x - w @ h) / np.sqrt(m * n)
+        if not np.isfinite(d):
+            raise FloatingPointError("non-finite residual")
     except Exception:
         w = np.zeros((m, k))
         h = np.zeros((k, n))
@@ -106,6 +143,46 @@ def _nnmf(x: np.ndarray, k: int, rng: np.random.Generator) -> tuple[np.ndarray,
     return w, h, float(d)
 
 
+class _RankSweep:
+    """Fits of one matrix at rank 1, 2, 3, …, each warm-started from the last.
+
+    Keeps only the latest factors (every rank's would be O(m·k²) for the full
+    sweep) plus each rank's residual and, if ``track_variance``, its variance
+    explained — and the factors at the first rank past ``var_threshold``.
+    """
+
+    def __init__(self, x: np.ndarray, rng: np.random.Generator, *,
+                 track_variance: bool = False, var_threshold: float = 0.95):
+        self.x = x
+        self.rng = rng
+        self.rank = 0
+        self.w: np.ndarray | None = None
+        self.h: np.ndarray | None = None
+        self.residuals: list[float] = []
+        self.var_explained: list[float] | None = [] if track_variance else None
+        self.var_threshold = var_threshold
+        self.threshold_fit: tuple[np.ndarray, np.ndarray] | None = None
+        centred = x - x.mean()
+        self._ss_tot = float(np.sum(centred * centred))
+
+    def next(self) -> tuple[np.ndarray, np.ndarray, float]:
+        """Fit the next rank up and return its ``(W, H, D)``."""
+        usable = self.w is not None and self.residuals and np.isfinite(self.residuals[-1])
+        init = (self.w, self.h) if usable and self.rank + 1 <= min(self.x.shape) else None
+        self.w, self.h, d = _nnmf(self.x, self.rank + 1, self.rng, init=init)
+        self.rank += 1
+        self.residuals.append(d)
+        if self.var_explained is not None:
+            # A failed fit counts as reconstructing nothing, as its zero
+            # factors would.
+            ss_res = d * d * self.x.size if np.isfinite(d) else float(np.sum(self.x ** 2))
+            var = (1.0 - ss_res / self._ss_tot) if self._ss_tot > 0 else 0.0
+            self.var_explained.append(var)
+            if var > self.var_threshold and self.threshold_fit is None:
+                self.threshold_fit = (self.w, self.h)
+        return self.w, self.h, d
+
+
 def cal_nmf(
     spike_times_list: list[np.ndarray],
     spike_counts: np.ndarray,
@@ -115,6 +192,7 @@ def cal_nmf(
     min_spike_count: int = 1,
     include_nmf_components: bool = False,
     rng: np.random.Generator | None = None,
+    full_sweep: bool = True,
 ) -> dict:
     """Non-negative matrix factorization dimensionality metrics for one
     recording (lag-independent — call once per recording, not once per lag,
@@ -127,6 +205,11 @@ def cal_nmf(
     matching MATLAB's ``Params.includeNMFcomponents``), ``nmfFactors``,
     ``nmfWeights``, ``downSampleSpikeMatrix``, ``nmfFactorsVarThreshold``,
     ``nmfWeightsVarThreshold``.
+
+    With ``full_sweep=False`` the per-rank variance sweep stops at the first
+    rank explaining 95% of the variance, for callers that need only that rank
+    and its factors; ``nnmf_residuals``/``nnmf_var_explained`` are NaN beyond
+    it.
     """
     if rng is None:
         rng = np.random.default_rng()
@@ -139,6 +222,16 @@ def cal_nmf(
     rand_spike_matrix = _bin_spike_times(randomised, duration_s, n_bins)
 
     n_channels = down_sample_spike_matrix.shape[1]
+    active_electrodes = spike_counts > min_spike_count
+    network_size = int(np.sum(active_electrodes))
+    var_explained_threshold = 0.95
+
+    # With every electrode active, the variance sweep below factorizes the
+    # very matrix this search does, so it continues this sweep.
+    shared = network_size == n_channels
+    real_sweep = _RankSweep(down_sample_spike_matrix, rng, track_variance=shared,
+                            var_threshold=var_explained_threshold)
+    rand_sweep = _RankSweep(rand_spike_matrix, rng)
 
     # ── Search for num_nnmf_components: keep adding components while the
     # real matrix's own reconstruction residual beats a phase-randomized
@@ -151,15 +244,12 @@ def cal_nmf(
     k = 1
     rand_residual_per_component: list[float] = []
     while residual < rand_residual and k <= n_channels:
-        nmf_factors, nmf_weights, residual = _nnmf(down_sample_spike_matrix, k, rng)
-        _, _, rand_residual = _nnmf(rand_spike_matrix, k, rng)
+        nmf_factors, nmf_weights, residual = real_sweep.next()
+        _, _, rand_residual = rand_sweep.next()
         rand_residual_per_component.append(rand_residual)
         k += 1
     num_nnmf_components = k - 1
 
-    active_electrodes = spike_counts > min_spike_count
-    network_size = int(np.sum(active_electrodes))
-
     result: dict = {
         "num_nnmf_components": num_nnmf_components,
         "nComponentsRelNS": (num_nnmf_components / network_size) if network_size else float("nan"),
@@ -168,33 +258,25 @@ def cal_nmf(
 
     # ── Per-rank sweep over active electrodes only, for the "how many
     # components until we explain 95% of variance" curve. ──
-    down_sample_active = down_sample_spike_matrix[:, active_electrodes]
-    nnmf_residuals = np.zeros(network_size)
-    nnmf_var_explained = np.zeros(network_size)
-    var_explained_threshold = 0.95
-    threshold_reached = False
+    sweep = real_sweep if shared else _RankSweep(
+        down_sample_spike_matrix[:, active_electrodes], rng, track_variance=True,
+        var_threshold=var_explained_threshold)
+    while sweep.rank < network_size and (full_sweep or sweep.threshold_fit is None):
+        sweep.next()
+
+    # Ranks a partial sweep never fitted are NaN, not zero.
+    nnmf_residuals = np.full(network_size, np.nan)
+    nnmf_var_explained = np.full(network_size, np.nan)
+    swept = min(sweep.rank, network_size)
+    nnmf_residuals[:swept] = sweep.residuals[:swept]
+    nnmf_var_explained[:swept] = sweep.var_explained[:swept]
+
     nmf_factors_var_threshold: np.ndarray | None = None
     nmf_weights_var_threshold: np.ndarray | None = None
-
-    for kk in range(1, network_size + 1):
-        w, h, res = _nnmf(down_sample_active, kk, rng)
-        nnmf_residuals[kk - 1] = res
-
-        predicted = w @ h
-        ss_res = np.sum((predicted - down_sample_active) ** 2)
-        grand_mean = down_sample_active.mean()
-        ss_tot = np.sum((down_sample_active - grand_mean) ** 2)
-        var_explained = (1.0 - ss_res / ss_tot) if ss_tot > 0 else 0.0
-        nnmf_var_explained[kk - 1] = var_explained
-
-        if var_explained > var_explained_threshold and not threshold_reached:
-            threshold_reached = True
-            nmf_factors_var_threshold = w
-            nmf_weights_var_threshold = h
-
-    if network_size > 0 and not threshold_reached:
-        nmf_factors_var_threshold = w
-        nmf_weights_var_threshold = h
+    if sweep.threshold_fit is not None:
+        nmf_factors_var_threshold, nmf_weights_var_threshold = sweep.threshold_fit
+    elif network_size > 0:
+        nmf_factors_var_threshold, nmf_weights_var_threshold = sweep.w, sweep.h
 
     result["nnmf_residuals"] = nnmf_residuals
     result["nnmf_var_explained"] = nnmf_var_explained
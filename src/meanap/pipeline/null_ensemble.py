@@ -0,0 +1,218 @@
+"""The randomised networks Step 4 normalises against, generated once per matrix.
+
+Two metrics need null models of the same active-node adjacency matrix: the
+small-worldness block (one ``latmio_und_v2`` lattice and one ``randmio_und_v2``
+random network) and ``participation_coef_norm`` (100 ``null_model_und_sign``
+randomisations). Together they are most of Step 4's time per (recording, lag),
+and none of it depends on anything decided later — cartography boundaries, hub
+thresholds, plotting — so re-running Step 4 to change one of those used to redo
+every randomisation for nothing.
+
+A :class:`NullEnsemble` is that set of networks, built by
+:func:`build_null_ensemble`. Every network draws from its own generator, derived
+from ``(seed, labels…, kind, index)`` as :mod:`meanap.pipeline.rng` derives
+everything else, so the ensemble does not depend on the order its members were
+built in — which is what makes a cached ensemble identical to a freshly built
+one, and what lets the ``null_model_und_sign`` networks be drawn one at a time
+as they are used rather than held together when nothing will keep them.
+
+:class:`NullEnsembleStore` keeps a recording's ensembles in
+``ExperimentMatFiles/<rec>_nulls.npz``, beside its ``_adjM.npz``, one entry per
+lag. An entry is reused only if it was built from the same matrix, the same
+:class:`NullSpec` and the same seed; anything else rebuilds it. Nothing is
+stored without ``Params.random_seed`` — an unseeded run is meant to differ from
+the last one. The store is capped by size (``CACHE_MAX_BYTES``): an ensemble
+whose signed networks would take it past the cap keeps only its lattice and
+random network, and its signed networks are redrawn — identically — on reuse.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import astuple, dataclass, field
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+from scipy.spatial.distance import pdist, squareform
+
+from meanap.pipeline.atomic import atomic_savez
+from meanap.pipeline.null_models import latmio_und_v2, null_model_und_sign, randmio_und_v2
+from meanap.pipeline.rng import make_rng
+
+__all__ = ["NullSpec", "NullEnsemble", "NullEnsembleStore", "build_null_ensemble"]
+
+#: Bumped whenever the way an ensemble is generated changes, so entries written
+#: by an older version are rebuilt rather than reused.
+ENSEMBLE_VERSION = 1
+
+#: Most a :class:`NullEnsembleStore` holds, in bytes. The signed networks are
+#: the bulk of an entry — 100 upper triangles, ~400 MB at 1000 active nodes —
+#: so this keeps one recording's store inside Step 4's per-worker budget.
+CACHE_MAX_BYTES = 256 * 2**20
+
+
+@dataclass(frozen=True)
+class NullSpec:
+    """What to generate. The defaults are ``ExtractNetMet.m``'s call sites."""
+
+    #: ``null_model_und_sign`` networks, for ``participation_coef_norm``.
+    n_signed: int = 100
+    bin_swaps: int = 5
+    #: Whether to build the small-worldness pair at all — Step 4 skips that
+    #: block for networks at the minimum node count.
+    small_world: bool = True
+    random_iterations: int = 5000
+    lattice_iterations: int = 10000
+
+
+@dataclass
+class NullEnsemble:
+    """The null networks of one matrix.
+
+    ``null_model_und_sign`` returns a symmetric matrix with an empty diagonal,
+    so its networks are kept as their upper triangles — half the memory, and
+    half the cache file — and expanded one at a time by :meth:`signed`. When
+    they are not kept (``signed_upper`` is None) :meth:`signed` draws each in
+    turn from ``draw`` — ``(w, spec, seed, labels)`` — instead.
+    """
+
+    n: int
+    signed_upper: np.ndarray | None  # (n_signed, n·(n−1)/2)
+    random: np.ndarray | None = None
+    lattice: np.ndarray | None = None
+    draw: tuple | None = field(default=None, repr=False)
+
+    def signed(self) -> Iterator[np.ndarray]:
+        """Each ``null_model_und_sign`` network, as a full matrix."""
+        iu = np.triu_indices(self.n, 1)
+        if self.signed_upper is not None:
+            uppers = iter(self.signed_upper)
+        else:
+            w, spec, seed, labels = self.draw
+            uppers = (_signed_one(w, spec, seed, labels, i) for i in range(spec.n_signed))
+        for upper in uppers:
+            full = np.zeros((self.n, self.n))
+            full[iu] = upper
+            yield full + full.T
+
+
+def _signed_one(w: np.ndarray, spec: NullSpec, seed: int | None, labels: tuple, i: int):
+    rnd = null_model_und_sign(w, bin_swaps=spec.bin_swaps,
+                              rng=make_rng(seed, *labels, "signed", i))
+    return rnd[np.triu_indices(w.shape[0], 1)]
+
+
+def _signed_nbytes(n: int, spec: NullSpec) -> int:
+    return spec.n_signed * (n * (n - 1) // 2) * np.dtype(np.float64).itemsize
+
+
+def build_null_ensemble(
+    w: np.ndarray, spec: NullSpec, seed: int | None, *labels: str | int,
+    keep_signed: bool = True,
+) -> NullEnsemble:
+    """Generate the null networks of ``w`` described by ``spec``.
+
+    ``seed``/``labels`` name the ensemble as :func:`~meanap.pipeline.rng.make_rng`
+    names any other unit of work; each network then gets its own stream under
+    them. With ``keep_signed=False`` the ``null_model_und_sign`` networks are
+    not built here but drawn one at a time by :meth:`NullEnsemble.signed` —
+    the same networks, without holding all of them at once.
+    """
+    n = w.shape[0]
+    signed_upper = None
+    if keep_signed:
+        signed_upper = np.empty((spec.n_signed, n * (n - 1) // 2))
+        for i in range(spec.n_signed):
+            signed_upper[i] = _signed_one(w, spec, seed, labels, i)
+
+    random = lattice = None
+    if spec.small_world:
+        lattice = latmio_und_v2(w, spec.lattice_iterations, squareform(pdist(w)),
+                                rng=make_rng(seed, *labels, "lattice"))
+        random = randmio_und_v2(w, spec.random_iterations,
+                                rng=make_rng(seed, *labels, "random"))
+    return NullEnsemble(n=n, signed_upper=signed_upper, random=random, lattice=lattice,
+                        draw=(w, spec, seed, labels))
+
+
+def _ensemble_key(w: np.ndarray, spec: NullSpec, seed: int, labels: tuple) -> str:
+    """What an ensemble was built from, as a digest stored beside it."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((ENSEMBLE_VERSION, w.shape, str(w.dtype), astuple(spec), seed,
+                   labels)).encode())
+    h.update(np.ascontiguousarray(w).tobytes())
+    return h.hexdigest()
+
+
+@dataclass
+class NullEnsembleStore:
+    """One recording's ensembles, cached in an ``.npz``.
+
+    Read from ``source`` (default ``path``) — a prior analysis's copy, when
+    resuming from one — and written to ``path``. ``path`` of ``None``, or no
+    ``seed``, gives a store that builds every ensemble and keeps none — the
+    same results, minus the reuse. ``max_bytes`` caps what it holds; see
+    ``CACHE_MAX_BYTES``.
+    """
+
+    path: Path | None
+    seed: int | None
+    labels: tuple = ()
+    source: Path | None = None
+    max_bytes: int = CACHE_MAX_BYTES
+    _entries: dict = field(default_factory=dict, repr=False)
+    _dirty: bool = field(default=False, repr=False)
+    #: Names served from the file rather than built, for the caller's log.
+    reused: list[str] = field(default_factory=list, repr=False)
+
+    def __post_init__(self) -> None:
+        source = self.source if self.source is not None else self.path
+        if self.path is None or self.seed is None or source is None or not Path(source).is_file():
+            return
+        try:
+            with np.load(source, allow_pickle=False) as data:
+                self._entries = {k: data[k] for k in data.files}
+        except Exception:                                   # noqa: BLE001
+            # A damaged cache is only lost time; it is rewritten on save.
+            self._entries = {}
+        # Carried forward into this run's folder, so the next run from it
+        # finds them there.
+        self._dirty = bool(self._entries) and Path(source) != Path(self.path)
+
+    def get(self, name: str, w: np.ndarray, spec: NullSpec = NullSpec()) -> NullEnsemble:
+        """The ensemble called ``name`` (e.g. ``"lag10"``) for matrix ``w``."""
+        labels = (*self.labels, name)
+        if self.path is None or self.seed is None:
+            return build_null_ensemble(w, spec, self.seed, *labels, keep_signed=False)
+
+        key = _ensemble_key(w, spec, self.seed, labels)
+        stored = self._entries.get(f"{name}/key")
+        if stored is not None and str(stored) == key:
+            self.reused.append(name)
+            return NullEnsemble(
+                n=w.shape[0], signed_upper=self._entries.get(f"{name}/signed"),
+                random=self._entries.get(f"{name}/random"),
+                lattice=self._entries.get(f"{name}/lattice"),
+                draw=(w, spec, self.seed, labels))
+
+        for part in ("key", "signed", "random", "lattice"):
+            self._entries.pop(f"{name}/{part}", None)
+        held = sum(arr.nbytes for arr in self._entries.values())
+        keep_signed = held + _signed_nbytes(w.shape[0], spec) <= self.max_bytes
+        ensemble = build_null_ensemble(w, spec, self.seed, *labels, keep_signed=keep_signed)
+        self._entries[f"{name}/key"] = np.array(key)
+        if keep_signed:
+            self._entries[f"{name}/signed"] = ensemble.signed_upper
+        if ensemble.random is not None:
+            self._entries[f"{name}/random"] = ensemble.random
+            self._entries[f"{name}/lattice"] = ensemble.lattice
+        self._dirty = True
+        return ensemble
+
+    def save(self) -> None:
+        """Write the file, if anything new was built. Atomic."""
+        if self.path is None or self.seed is None or not self._dirty:
+            return
+        atomic_savez(self.path, **self._entries)
+        self._dirty = False
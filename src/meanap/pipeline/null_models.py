@@ -156,6 +156,258 @@ def randmio_und_signed(
     return r
 
 
+#: ``null_model_und_sign``'s radix sort: 11-bit digits, six passes for a
+#: 64-bit key.
+_RADIX_BITS = 11
+_RADIX_BUCKETS = 1 << _RADIX_BITS
+_KEY_PASSES = 6
+
+if _HAVE_NUMBA:
+
+    @njit(cache=True)
+    def _ranked_before(ka, a, kb, b):  # pragma: no cover - jitted
+        """``numpy.argsort(key, kind="stable")``'s order as a comparison of
+        edge ``a`` (key ``ka``) and edge ``b`` (key ``kb``): ascending, NaN
+        last, ties broken by index."""
+        if ka < kb:
+            return True
+        if kb < ka:
+            return False
+        a_nan = ka != ka
+        b_nan = kb != kb
+        if a_nan != b_nan:
+            return b_nan
+        return a < b
+
+    @njit(cache=True)
+    def _sort_edges(keys, ids, tmp_keys, tmp_ids, bits, tmp_bits, count):  # pragma: no cover - jitted
+        """Sort the pairs ``(keys, ids)`` in place into ``_ranked_before``
+        order. An LSD radix sort on the key's bit pattern, made
+        unsigned-comparable, with runs of equal keys then put in index order —
+        comparison sorts of these keys mispredict half their branches.
+        ``bits``/``tmp_*`` are scratch of the same length, ``count`` of shape
+        ``(_KEY_PASSES, _RADIX_BUCKETS)``."""
+        n = ids.shape[0]
+        sign = np.uint64(1) << np.uint64(63)
+        mask = np.uint64(_RADIX_BUCKETS - 1)
+        raw = keys.view(np.uint64)
+        count[:, :] = 0
+        for i in range(n):
+            x = keys[i]
+            if x != x:
+                b = ~np.uint64(0)  # NaN last
+            elif x == 0.0:
+                b = sign  # -0.0 ties with 0.0, as it compares
+            elif raw[i] & sign:
+                b = ~raw[i]
+            else:
+                b = raw[i] | sign
+            bits[i] = b
+            for pass_ in range(_KEY_PASSES):
+                count[pass_, np.int64((b >> np.uint64(_RADIX_BITS * pass_)) & mask)] += 1
+
+        src_k, src_i, src_b = keys, ids, bits
+        dst_k, dst_i, dst_b = tmp_keys, tmp_ids, tmp_bits
+        in_tmp = False
+        for pass_ in range(_KEY_PASSES):
+            shift = np.uint64(_RADIX_BITS * pass_)
+            offsets = count[pass_]
+            if offsets.max() == n:
+                continue  # every key shares this digit
+            total = 0
+            for d in range(_RADIX_BUCKETS):
+                c = offsets[d]
+                offsets[d] = total
+                total += c
+            for i in range(n):
+                d = np.int64((src_b[i] >> shift) & mask)
+                j = offsets[d]
+                offsets[d] = j + 1
+                dst_k[j] = src_k[i]
+                dst_i[j] = src_i[i]
+                dst_b[j] = src_b[i]
+            src_k, src_i, src_b, dst_k, dst_i, dst_b = dst_k, dst_i, dst_b, src_k, src_i, src_b
+            in_tmp = not in_tmp
+
+        i = 0
+        while i < n:
+            j = i + 1
+            while j < n and src_b[j] == src_b[i]:
+                j += 1
+            if j - i > 1:
+                perm = np.argsort(src_i[i:j])
+                src_i[i:j] = src_i[i:j][perm]
+                src_k[i:j] = src_k[i:j][perm]
+            i = j
+        if in_tmp:
+            keys[:] = src_k
+            ids[:] = src_i
+
+    @njit(cache=True)
+    def _assign_weights_core(w0, sign, s, wv, ii, jj, key, order, picks,
+                             wei_period):  # pragma: no cover - jitted
+        """The weight-assignment loop of ``null_model_und_sign`` for one sign,
+        in place on ``w0``/``s`` (and on ``wv``/``key``/``order``, used as
+        scratch). ``key`` is each edge's starting P and ``order`` its stable
+        argsort.
+
+        The reference only ever reads P at the edges, ``P(lij)`` — that is
+        ``p[j, i]`` for edge ``(i, j)``, read row-major — so P is carried as
+        that one value per edge, scaled by the same factors in the same order
+        (row ``j``'s, then column ``i``'s) as the full matrix would be.
+
+        Edges keep their starting index for good. The reference re-sorts the
+        remaining edges by P every batch; here ``order`` *is* that sorted
+        order, maintained: after each batch only the edges touching a node
+        whose P moved are re-ranked and merged back, and removing an edge
+        never reorders the others, so index ties break as the reference's
+        stable sort breaks them. ``picks`` are the loop's ``rng.choice``
+        draws, concatenated in order — see ``_choice_draws``.
+        """
+        n = s.shape[0]
+        m = wv.shape[0]
+        k = ii.shape[0]
+        # Node → incident edges, to find what a batch moved without a scan.
+        inc_ptr = np.zeros(n + 1, dtype=np.int64)
+        for e in range(k):
+            inc_ptr[ii[e] + 1] += 1
+            inc_ptr[jj[e] + 1] += 1
+        for u in range(n):
+            inc_ptr[u + 1] += inc_ptr[u]
+        inc = np.empty(2 * k, dtype=np.int64)
+        fill = inc_ptr[:n].copy()
+        for e in range(k):
+            inc[fill[ii[e]]] = e
+            fill[ii[e]] += 1
+            inc[fill[jj[e]]] = e
+            fill[jj[e]] += 1
+
+        # 0: in ``order`` as it stands; 1: placed this batch; 2: re-keyed
+        # this batch. One array so the merge makes one lookup per edge.
+        state = np.zeros(k, dtype=np.uint8)
+        gone_w = np.zeros(m, dtype=np.bool_)
+        changed = np.empty(k, dtype=np.int64)
+        changed_key = np.empty(k)
+        tmp_ids = np.empty(k, dtype=np.int64)
+        tmp_keys = np.empty(k)
+        bits = np.empty(k, dtype=np.uint64)
+        tmp_bits = np.empty(k, dtype=np.uint64)
+        count = np.empty((_KEY_PASSES, _RADIX_BUCKETS), dtype=np.int64)
+        spare = np.empty(k, dtype=np.int64)
+        chosen = np.empty(wei_period, dtype=np.int64)
+        acc = np.zeros(n)
+        seen = np.zeros(n, dtype=np.bool_)
+        scaled = np.zeros(n, dtype=np.bool_)
+        touched = np.empty(2 * wei_period, dtype=np.int64)
+        f = np.empty(n)
+        alive = k
+        pos = 0
+        while m > 0:
+            batch = min(m, wei_period)
+            ranks = picks[pos:pos + batch]
+            pos += batch
+
+            n_touched = 0
+            for t in range(batch):
+                e = order[ranks[t]]
+                chosen[t] = e
+                wa = wv[ranks[t]]
+                a = ii[e]
+                b = jj[e]
+                w0[a, b] = sign * wa
+                acc[a] += wa
+                acc[b] += wa
+                for u in (a, b):
+                    if not seen[u]:
+                        seen[u] = True
+                        touched[n_touched] = u
+                        n_touched += 1
+
+            for t in range(n_touched):
+                u = touched[t]
+                if acc[u] != 0:
+                    f[u] = 1.0 - (acc[u] / s[u] if s[u] != 0 else 1.0)
+                    scaled[u] = True
+                    s[u] -= acc[u]
+                acc[u] = 0.0
+
+            for t in range(batch):
+                state[chosen[t]] = 1
+                gone_w[ranks[t]] = True
+
+            # Re-key the surviving edges at the scaled nodes and re-rank them.
+            n_changed = 0
+            for t in range(n_touched):
+                u = touched[t]
+                if not scaled[u]:
+                    continue
+                for q in range(inc_ptr[u], inc_ptr[u + 1]):
+                    e = inc[q]
+                    if state[e] == 0:
+                        state[e] = 2
+                        a = ii[e]
+                        b = jj[e]
+                        ke = key[e]
+                        if scaled[b]:
+                            ke *= f[b]
+                        if scaled[a]:
+                            ke *= f[a]
+                        key[e] = ke
+                        changed[n_changed] = e
+                        changed_key[n_changed] = ke
+                        n_changed += 1
+            for t in range(n_touched):
+                seen[touched[t]] = False
+                scaled[touched[t]] = False
+            _sort_edges(changed_key[:n_changed], changed[:n_changed],
+                        tmp_keys[:n_changed], tmp_ids[:n_changed],
+                        bits[:n_changed], tmp_bits[:n_changed], count)
+
+            # Merge them back into the rest, which keep their relative order,
+            # into the spare buffer — then the two swap roles.
+            out = 0
+            c = 0
+            for q in range(alive):
+                e = order[q]
+                if state[e]:
+                    if state[e] == 2:
+                        state[e] = 0
+                    continue
+                ke = key[e]
+                while c < n_changed and _ranked_before(changed_key[c], changed[c], ke, e):
+                    spare[out] = changed[c]
+                    out += 1
+                    c += 1
+                spare[out] = e
+                out += 1
+            while c < n_changed:
+                spare[out] = changed[c]
+                out += 1
+                c += 1
+            alive = out
+            order, spare = spare, order
+
+            mm = 0
+            for e in range(m):
+                if not gone_w[e]:
+                    wv[mm] = wv[e]
+                    mm += 1
+                gone_w[e] = False
+            m = mm
+
+
+def _choice_draws(rng: np.random.Generator, m: int, wei_period: int) -> np.ndarray:
+    """Every ``rng.choice`` the weight-assignment loop makes for ``m`` weights,
+    made up front. The batch sizes depend only on ``m``, so drawing them here
+    consumes the generator exactly as drawing them inside the loop would."""
+    draws = []
+    while m > 0:
+        batch = min(m, wei_period)
+        draws.append(rng.choice(m, size=batch, replace=False))
+        m -= batch
+    return np.concatenate(draws) if draws else np.empty(0, dtype=np.int64)
+
+
 def null_model_und_sign(
     w: np.ndarray,
     bin_swaps: int = 5,
@@ -169,7 +421,66 @@ def null_model_und_sign(
     re-sort) branch — the default in modern MATLAB (``nargin('randperm')~=1``
     always true in any MATLAB version this codebase targets), so the
     ``wei_freq==1`` exact-resort branch isn't ported.
+
+    With numba, the weight-assignment loop runs compiled over index arrays —
+    each batch re-ranks only the edges whose P changed, rather than re-sorting
+    them all — and draws the same random numbers in the same order as
+    :func:`_null_model_und_sign_reference`, so a seeded call returns the
+    identical network. That loop was O(m²) list rebuilding per call, run 100
+    times per (recording, lag) by ``participation_coef_norm``.
     """
+    if not _HAVE_NUMBA:
+        return _null_model_und_sign_reference(w, bin_swaps, wei_freq, rng)
+    if rng is None:
+        rng = np.random.default_rng()
+
+    n = w.shape[0]
+    w = w.astype(float).copy()
+    np.fill_diagonal(w, 0.0)
+    ap = w > 0
+    an = w < 0
+
+    if np.count_nonzero(ap) < n * (n - 1):
+        w_r = randmio_und_signed(w, bin_swaps, rng=rng)
+        ap_r = w_r > 0
+        an_r = w_r < 0
+    else:
+        ap_r = ap
+        an_r = an
+
+    w0 = np.zeros((n, n))
+    wei_period = round(1 / wei_freq)
+
+    for sign, a_mask, a_mask_r in ((1, ap, ap_r), (-1, an, an_r)):
+        if sign == 1:
+            s = (w * a_mask).sum(axis=1)
+            wv = np.sort(w[np.triu(a_mask)])
+        else:
+            s = (-w * a_mask).sum(axis=1)
+            wv = np.sort(-w[np.triu(a_mask)])
+        iu, ju = np.nonzero(np.triu(a_mask_r))
+        if len(iu) < len(wv):
+            # Can't happen — the rewiring keeps each sign's edge count — but
+            # the compiled loop doesn't bounds-check, so say so rather than
+            # read past the end.
+            raise IndexError("fewer rewired edges than weights to place")
+        picks = _choice_draws(rng, len(wv), wei_period).astype(np.int64)
+        key = s[ju] * s[iu]  # np.outer(s, s)[ju, iu] — the reference's P(lij)
+        order = np.argsort(key, kind="stable")
+        _assign_weights_core(w0, float(sign), s, wv, iu.astype(np.int64),
+                             ju.astype(np.int64), key, order, picks, wei_period)
+
+    return w0 + w0.T
+
+
+def _null_model_und_sign_reference(
+    w: np.ndarray,
+    bin_swaps: int = 5,
+    wei_freq: float = 0.1,
+    rng: np.random.Generator | None = None,
+) -> np.ndarray:
+    """The list-based port :func:`null_model_und_sign` compiles — used as is
+    without numba, and what the compiled loop is tested against."""
     if rng is None:
         rng = np.random.default_rng()
 
@@ -260,9 +571,21 @@ def null_model_und_sign(
 # has no valid quad at all. See the deviation note in its docstring.
 _QUAD_SEARCH_BUDGET = 2_000_000
 
+#: Random draws per refill, for the edge pairs and for the coin flips.
+_DRAW_BATCH = 8192
+
+
+def _quad_search_budget(k: int) -> int:
+    # A graph with any valid quad at all has at least ~2/k² of its draws
+    # succeed, so scaling the budget with k² keeps the false-give-up
+    # probability negligible while staying instant for the tiny graphs where
+    # giving up is the correct answer.
+    return min(_QUAD_SEARCH_BUDGET, max(10_000, 200 * k * k))
+
 
 def _valid_quad_stream(
-    rng: np.random.Generator, k: int, i_arr: list[int], j_arr: list[int], batch_size: int = 8192,
+    rng: np.random.Generator, k: int, i_arr: list[int], j_arr: list[int],
+    batch_size: int = _DRAW_BATCH,
 ) -> Iterator[tuple[int, int, int, int, int, int] | None]:
     """Yields ``(e1, e2, a, b, c, d)``: two distinct edge indices into
     ``i_arr``/``j_arr`` whose four endpoint nodes are all distinct.
@@ -282,11 +605,7 @@ def _valid_quad_stream(
     far beyond what any graph that *does* admit a swap would need, so this only
     changes behaviour in cases where MATLAB would hang.
     """
-    # A graph with any valid quad at all has at least ~2/k² of its draws
-    # succeed, so scaling the budget with k² keeps the false-give-up
-    # probability negligible while staying instant for the tiny graphs where
-    # giving up is the correct answer.
-    budget = min(_QUAD_SEARCH_BUDGET, max(10_000, 200 * k * k))
+    budget = _quad_search_budget(k)
     rejected = 0
     while True:
         e1_batch = rng.integers(0, k, size=batch_size)
@@ -305,12 +624,133 @@ def _valid_quad_stream(
                 rejected = 0
 
 
-def _coin_flip_stream(rng: np.random.Generator, batch_size: int = 8192) -> Iterator[bool]:
+def _coin_flip_stream(rng: np.random.Generator, batch_size: int = _DRAW_BATCH) -> Iterator[bool]:
     while True:
         for v in rng.random(batch_size).tolist():
             yield v > 0.5
 
 
+# What _rewire_core needs from its caller before it can go on.
+_REWIRE_DONE = 0
+_REWIRE_NEED_PAIRS = 1
+_REWIRE_NEED_FLIPS = 2
+_REWIRE_NO_QUAD = 3
+
+if _HAVE_NUMBA:
+
+    @njit(cache=True)
+    def _rewire_core(r, dist, lattice, ii, jj, e1s, e2s, flips, state,
+                     iterations, max_attempts, budget):  # pragma: no cover - jitted
+        """The swap loop of ``randmio_und_v2``/``latmio_und_v2`` (``lattice``
+        adds the distance test), in place on ``r`` and the edge list
+        ``ii``/``jj``. Consumes the drawn edge pairs ``e1s``/``e2s`` and coin
+        flips ``flips`` exactly as the generator streams do, and returns when
+        it runs out of either so the caller can draw the next batch — from the
+        same generator, in the same order. ``state`` carries the loop position
+        across those returns: iteration, attempt, read positions, rejected-draw
+        count, and a found-but-not-yet-flipped pair."""
+        it, attempt, qpos, fpos = state[0], state[1], state[2], state[3]
+        rejected, pending, e1, e2 = state[4], state[5], state[6], state[7]
+        status = _REWIRE_DONE
+        while it < iterations:
+            if pending == 0:
+                found = False
+                while qpos < e1s.shape[0]:
+                    x = e1s[qpos]
+                    y = e2s[qpos]
+                    qpos += 1
+                    if x != y:
+                        a = ii[x]
+                        b = jj[x]
+                        c = ii[y]
+                        dd = jj[y]
+                        if a != c and a != dd and b != c and b != dd:
+                            rejected = 0
+                            e1 = x
+                            e2 = y
+                            found = True
+                            break
+                    rejected += 1
+                    if rejected >= budget:
+                        status = _REWIRE_NO_QUAD
+                        break
+                if status == _REWIRE_NO_QUAD:
+                    break
+                if not found:
+                    status = _REWIRE_NEED_PAIRS
+                    break
+                pending = 1
+            if fpos >= flips.shape[0]:
+                status = _REWIRE_NEED_FLIPS
+                break
+            flip = flips[fpos] > 0.5
+            fpos += 1
+            pending = 0
+
+            a = ii[e1]
+            b = jj[e1]
+            c = ii[e2]
+            dd = jj[e2]
+            if flip:
+                ii[e2] = dd
+                jj[e2] = c
+                c, dd = dd, c
+            accepted = False
+            if r[a, dd] == 0.0 and r[c, b] == 0.0:
+                if not lattice or (dist[a, b] * r[a, b] + dist[c, dd] * r[c, dd]
+                                   >= dist[a, dd] * r[a, b] + dist[c, b] * r[c, dd]):
+                    r[a, dd] = r[a, b]
+                    r[a, b] = 0.0
+                    r[dd, a] = r[b, a]
+                    r[b, a] = 0.0
+                    r[c, b] = r[c, dd]
+                    r[c, dd] = 0.0
+                    r[b, c] = r[dd, c]
+                    r[dd, c] = 0.0
+                    jj[e1] = dd
+                    jj[e2] = b
+                    accepted = True
+            if accepted or attempt >= max_attempts:
+                it += 1
+                attempt = 0
+            else:
+                attempt += 1
+
+        state[0], state[1], state[2], state[3] = it, attempt, qpos, fpos
+        state[4], state[5], state[6], state[7] = rejected, pending, e1, e2
+        return status
+
+
+def _rewire_v2(
+    r: np.ndarray, dist: np.ndarray | None, iterations: int, max_attempts: int,
+    rng: np.random.Generator,
+) -> None:
+    """Run the compiled swap loop on ``r`` in place, drawing from ``rng`` in
+    the batches and order ``_valid_quad_stream``/``_coin_flip_stream`` would.
+    ``dist`` given means ``latmio_und_v2``'s lattice rule."""
+    ii, jj = np.nonzero(np.tril(r))
+    ii, jj = ii.astype(np.int64), jj.astype(np.int64)
+    k = len(ii)
+    lattice = dist is not None
+    dist = np.ascontiguousarray(dist, dtype=float) if lattice else np.zeros((1, 1))
+    e1s = e2s = np.zeros(0, dtype=np.int64)
+    flips = np.zeros(0)
+    state = np.zeros(8, dtype=np.int64)
+    budget = _quad_search_budget(k)
+    while True:
+        status = _rewire_core(r, dist, lattice, ii, jj, e1s, e2s, flips, state,
+                              iterations, max_attempts, budget)
+        if status == _REWIRE_NEED_PAIRS:
+            e1s = rng.integers(0, k, size=_DRAW_BATCH)
+            e2s = rng.integers(0, k, size=_DRAW_BATCH)
+            state[2] = 0
+        elif status == _REWIRE_NEED_FLIPS:
+            flips = rng.random(_DRAW_BATCH)
+            state[3] = 0
+        else:
+            return  # done, or no swappable edge pair exists
+
+
 def randmio_und_v2(
     w: np.ndarray, iterations: int, rng: np.random.Generator | None = None,
 ) -> np.ndarray:
@@ -320,7 +760,32 @@ def randmio_und_v2(
     .small_worldness_rl_wu`` normalizes clustering coefficient and path
     length against. ``iterations`` is a rewiring-attempts-per-edge
     multiplier, matching MATLAB's ``ITER`` input.
+
+    The swap loop is compiled when numba is available and draws the same
+    random numbers as :func:`_randmio_und_v2_reference`, so a seeded call
+    returns the identical network either way.
     """
+    if not _HAVE_NUMBA:
+        return _randmio_und_v2_reference(w, iterations, rng)
+    if rng is None:
+        rng = np.random.default_rng()
+
+    r = w.astype(float).copy()
+    n = r.shape[0]
+    k = np.count_nonzero(np.tril(r))
+    if k < 2:
+        return r
+
+    max_attempts = round(n * k / (n * (n - 1)))
+    _rewire_v2(r, None, iterations, max_attempts, rng)
+    return r
+
+
+def _randmio_und_v2_reference(
+    w: np.ndarray, iterations: int, rng: np.random.Generator | None = None,
+) -> np.ndarray:
+    """The generator-stream port :func:`randmio_und_v2` compiles — used as is
+    without numba, and what the compiled loop is tested against."""
     if rng is None:
         rng = np.random.default_rng()
 
@@ -368,7 +833,33 @@ def latmio_und_v2(
     *connectivity profile*, not spatial electrode distance; see
     ``ExtractNetMet.m``'s call site). Returns the latticized network in the
     original node ordering.
+
+    Compiled like :func:`randmio_und_v2`, with the same guarantee against
+    :func:`_latmio_und_v2_reference`.
     """
+    if not _HAVE_NUMBA:
+        return _latmio_und_v2_reference(w, iterations, d, rng)
+    if rng is None:
+        rng = np.random.default_rng()
+
+    n = w.shape[0]
+    ind_rp = rng.permutation(n)
+    r = w[np.ix_(ind_rp, ind_rp)].astype(float).copy()
+
+    k = np.count_nonzero(np.tril(r))
+    if k >= 2:
+        max_attempts = round(n * k / (n * (n - 1) / 2))
+        _rewire_v2(r, d, iterations, max_attempts, rng)
+
+    ind_rp_reverse = np.argsort(ind_rp)
+    return r[np.ix_(ind_rp_reverse, ind_rp_reverse)]
+
+
+def _latmio_und_v2_reference(
+    w: np.ndarray, iterations: int, d: np.ndarray, rng: np.random.Generator | None = None,
+) -> np.ndarray:
+    """The generator-stream port :func:`latmio_und_v2` compiles — used as is
+    without numba, and what the compiled loop is tested against."""
     if rng is None:
         rng = np.random.default_rng()
 
@@ -3,23 +3,35 @@
 The pipeline has two very different parallelism profiles, and a single
 "number of workers" knob would be wrong for both:
 
-* **Step 1 (spike detection) is RAM-bound.** Each recording's raw ``dat``
-  array is ~3.8 GB in memory (64 ch x 7.5M samples x float64). Running
-  recordings in separate *processes* would duplicate that per worker, so on
-  a 16 GB machine you could fit only ~2 before swapping. But the per-channel
-  work (``scipy.signal.filtfilt`` + ``numpy.fft``) releases the GIL, so
-  Step 1 parallelizes cleanly across *threads over channels* on one shared
-  copy of ``dat`` — no extra RAM, cores saturated. Use
-  :func:`suggest_thread_count` there.
-
-* **Steps 3/4 are CPU-bound and low-RAM.** They work on spike times and
-  64x64 matrices (tens of MB), and their hot loop (``randmio_und_signed``)
-  is pure Python, so the GIL blocks threads — they need *processes over
-  recordings*. RAM per worker is small, so worker count is CPU-limited. Use
+* **Step 1 (spike detection) is RAM-bound.** A recording's raw ``dat`` is
+  ~3.8 GB as float64 (64 ch x 7.5M samples), and each channel's filtering
+  makes several float64 copies of it. Running recordings in separate
+  *processes* would multiply that per worker. But the per-channel work
+  (``scipy.signal.filtfilt`` + ``numpy.fft``) releases the GIL, so Step 1
+  parallelizes cleanly across *threads over channels* of one opened
+  recording (:func:`meanap.pipeline.io.open_raw_recording`), read a batch of
+  about one channel per thread at a time — RAM grows with the thread count,
+  not the recording. Use :func:`suggest_thread_count` there. Reading the
+  next batch, and writing the previous recording's outputs, overlap the
+  detection as far as :func:`suggest_stage_depth` finds RAM for.
+
+* **Steps 2-4 are CPU-bound and low-RAM.** They work on spike times and
+  64x64 matrices (tens of MB). Their kernels are vectorised or compiled
+  (Step 4's null-model randomisations, the STTC), but the loops around them
+  and the matplotlib plotting are Python and hold the GIL, so threads don't
+  help — they need *processes over recordings*. RAM per worker is small, so
+  worker count is CPU-limited. Use
   :func:`suggest_process_count` there, and :func:`worker_env` to stop each
   worker's BLAS from spawning its own thread pool (which would oversubscribe
   cores N-fold).
 
+A batch of a few big recordings would leave most of a pool idle if recordings
+were the only unit of work, so work that splits further inside a recording
+(Step 3's lags and surrogate-repetition blocks) is sized as two levels at once
+by :func:`plan_two_level`, and the recording's shared input goes to every
+sub-task through :func:`share_array` / :func:`attach_array` rather than being
+pickled into each.
+
 Everything degrades safely: if ``psutil`` is unavailable the RAM query falls
 back to a conservative assumption, and every ``suggest_*`` returns at least 1.
 Passing ``max_workers=1`` anywhere gives a fully serial path for debugging.
@@ -27,10 +39,17 @@ Passing ``max_workers=1`` anywhere gives a fully serial path for debugging.
 
 from __future__ import annotations
 
+import math
 import multiprocessing as mp
 import os
+import sys
 from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
-from typing import Callable, Optional, TypeVar
+from contextlib import contextmanager
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Callable, Iterable, Iterator, Optional, TypeVar
+
+import numpy as np
 
 try:
     import psutil
@@ -79,8 +98,8 @@ def suggest_process_count(
         spawn more workers than tasks.
     mem_per_task_gb : peak resident memory one worker needs. This is the
         knob that keeps a 16 GB machine alive — for Step 1 recording-level
-        work pass ~5.0 (3.8 GB load + filter copies); for Steps 3/4 pass
-        ~0.3.
+        work pass ~5.0 (a whole recording loaded + filter copies); for Steps
+        3/4 pass ~0.3.
     reserve_gb : RAM to leave for the OS / GUI / parent process.
     cpu_headroom : cores to leave free (keeps the UI responsive; 1 is a good
         default for a desktop app).
@@ -120,6 +139,98 @@ def suggest_thread_count(
     return max(1, n)
 
 
+def suggest_stage_depth(
+    item_gb: float,
+    *,
+    reserve_gb: float = 2.0,
+    max_depth: int = 2,
+) -> int:
+    """How many items a pipeline stage may hold ahead of the stage consuming
+    them (Step 1's read-ahead and background writer), bounded by free RAM.
+
+    ``item_gb`` is one item's size. Returns 0 — run the stage inline — when
+    not even one extra item fits beside ``reserve_gb``.
+    """
+    if item_gb <= 0:
+        return max_depth
+    usable = max(0.0, available_ram_gb() - reserve_gb)
+    return max(0, min(max_depth, int(usable // item_gb)))
+
+
+def plan_two_level(
+    n_items: int,
+    max_splits: int,
+    mem_per_task_gb: float,
+    *,
+    max_workers: Optional[int] = None,
+    oversubscribe: int = 2,
+) -> tuple[int, int]:
+    """Size a pool and how finely to split each item across it, together.
+
+    ``n_items`` independent items (recordings) can each be cut into up to
+    ``max_splits`` sub-tasks. With at least as many items as workers there is
+    nothing to gain from splitting, and each split costs some repeated setup,
+    so items stay whole. With fewer, each is cut into enough pieces that the
+    pool gets about ``oversubscribe`` tasks per worker — a little slack so one
+    slow piece doesn't leave the rest of the pool idle at the end.
+
+    Returns ``(workers, splits_per_item)``, both at least 1. How an item is
+    split must never change its result; that is the caller's contract (Step 3
+    keys every RNG stream on the work, not on the split).
+    """
+    max_splits = max(1, max_splits)
+    workers = suggest_process_count(
+        max(1, n_items) * max_splits, mem_per_task_gb, max_workers=max_workers,
+    )
+    if n_items >= workers:
+        return workers, 1
+    splits = min(max_splits, math.ceil(oversubscribe * workers / max(1, n_items)))
+    return workers, max(1, splits)
+
+
+@dataclass(frozen=True)
+class SharedArrayRef:
+    """Picklable handle to an array published with :func:`share_array`."""
+
+    name: str
+    shape: tuple[int, ...]
+    dtype: str
+
+
+def share_array(arr: np.ndarray) -> tuple[shared_memory.SharedMemory, SharedArrayRef]:
+    """Copy ``arr`` into a new shared-memory block for pool workers to read.
+
+    The caller owns the block: keep the returned ``SharedMemory`` alive until
+    every worker that reads it has finished, then ``close()`` and
+    ``unlink()`` it.
+    """
+    arr = np.ascontiguousarray(arr)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, arr.nbytes))
+    np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+    return shm, SharedArrayRef(shm.name, arr.shape, arr.dtype.str)
+
+
+def attach_array(ref: SharedArrayRef) -> tuple[shared_memory.SharedMemory, np.ndarray]:
+    """Map a :func:`share_array` block into this process, read-only, no copy.
+
+    ``close()`` the returned ``SharedMemory`` once the array is no longer
+    used; never ``unlink()`` it — the publisher does that.
+    """
+    if sys.version_info >= (3, 13):
+        shm = shared_memory.SharedMemory(name=ref.name, track=False)
+    else:  # pragma: no cover - exercised on 3.11/3.12
+        shm = shared_memory.SharedMemory(name=ref.name)
+        # Attaching registers the block with this process's resource tracker,
+        # which would unlink it (and warn) when the worker exits — while the
+        # publisher and other workers are still using it.
+        from multiprocessing import resource_tracker
+
+        resource_tracker.unregister(shm._name, "shared_memory")  # noqa: SLF001
+    arr = np.ndarray(ref.shape, dtype=np.dtype(ref.dtype), buffer=shm.buf)
+    arr.flags.writeable = False
+    return shm, arr
+
+
 # BLAS/OpenMP libraries default to one thread *per physical core*. Inside a
 # process pool that multiplies: N worker processes x C BLAS threads each =
 # N*C threads fighting over C cores. Pin each worker to a single BLAS thread.
@@ -129,6 +240,9 @@ _BLAS_ENV_VARS = (
     "MKL_NUM_THREADS",
     "NUMEXPR_NUM_THREADS",
     "VECLIB_MAXIMUM_THREADS",  # Apple Accelerate / M-series
+    # numba's ``parallel=True`` kernels (the batched STTC engine) have their own
+    # thread pool, sized from this at import time — same oversubscription.
+    "NUMBA_NUM_THREADS",
 )
 
 
@@ -153,15 +267,39 @@ def pin_blas_threads(threads: str = "1") -> None:
     os.environ.update(worker_env(threads))
 
 
+@contextmanager
+def limit_numba_threads(threads: int) -> Iterator[None]:
+    """Run numba's ``parallel=True`` kernels on at most ``threads`` threads for
+    the block, in this process.
+
+    For parent-side work that runs while a pool is busy: the parent was not
+    started through :func:`pin_blas_threads`, so its numba pool is sized to
+    every core the workers are already using. No-op without numba.
+    """
+    try:
+        import numba
+    except ImportError:  # pragma: no cover - numba is normally installed
+        yield
+        return
+    previous = numba.get_num_threads()
+    numba.set_num_threads(max(1, min(threads, previous)))
+    try:
+        yield
+    finally:
+        numba.set_num_threads(previous)
+
+
 def map_recordings(
     worker_fn: Callable[[T], R],
-    tasks: list[T],
+    tasks: Iterable[T],
     *,
     mem_per_task_gb: float,
     max_workers: Optional[int] = None,
+    n_tasks: Optional[int] = None,
     on_result: Optional[Callable[[R], None]] = None,
     cancel_check: Optional[Callable[[], bool]] = None,
     blas_threads: Optional[str] = None,
+    collect: bool = True,
 ) -> list[R]:
     """Run ``worker_fn`` over ``tasks`` in a RAM/CPU-aware process pool.
 
@@ -179,14 +317,27 @@ def map_recordings(
     streaming log lines back in completion order). ``cancel_check`` (evaluated
     in the parent between completions) stops new tasks from being dispatched
     and drops any not-yet-started ones; in-flight tasks run to completion
-    (bounded, cooperative stop). A plain callable works for both the serial
-    and process paths since nothing is passed into workers.
+    (bounded, cooperative stop) and their results still go to ``on_result``,
+    so whatever the caller holds for them is released the usual way. A plain
+    callable works for both the serial and process paths since nothing is
+    passed into workers.
+
+    With ``collect=False`` results are handed to ``on_result`` and not kept,
+    and the list returned is empty — for callers that fold each result away as
+    it arrives, so memory does not grow with the batch.
+
+    ``tasks`` may be a lazy iterable (pass its length, or an upper bound when
+    the generator may skip some, as ``n_tasks``): it is
+    drawn from only as a worker frees up, so a generator that fetches each
+    task's input holds at most the pool's worth of inputs at once.
 
     Falls back to a fully serial loop when the pool would be size 1 — same
     code path for single-recording runs and for debugging.
     """
+    if n_tasks is None:
+        n_tasks = len(tasks)
     n = suggest_process_count(
-        len(tasks), mem_per_task_gb, max_workers=max_workers,
+        n_tasks, mem_per_task_gb, max_workers=max_workers,
     )
 
     # Adaptive BLAS threads: when workers < cores (few recordings, many cores),
@@ -199,14 +350,15 @@ def map_recordings(
 
     results: list[R] = []
 
-    if n <= 1 or len(tasks) <= 1:
+    if n <= 1 or n_tasks <= 1:
         for t in tasks:
             if cancel_check is not None and cancel_check():
                 break
             r = worker_fn(t)
             if on_result is not None:
                 on_result(r)
-            results.append(r)
+            if collect:
+                results.append(r)
         return results
 
     # spawn: the only start method available on all of macOS/Windows/Linux,
@@ -231,10 +383,16 @@ def map_recordings(
                 r = fut.result()
                 if on_result is not None:
                     on_result(r)
-                results.append(r)
+                if collect:
+                    results.append(r)
             if cancel_check is not None and cancel_check():
-                for fut in pending:
-                    fut.cancel()
+                running = {fut for fut in pending if not fut.cancel()}
+                for fut in wait(running).done:
+                    r = fut.result()
+                    if on_result is not None:
+                        on_result(r)
+                    if collect:
+                        results.append(r)
                 break
             for _ in range(len(done)):
                 try:
@@ -27,6 +27,7 @@ import numpy as np
 
 from meanap.params import Params
 from meanap.pipeline.figure_output import savefig
+from meanap.pipeline.io import RawRecording, as_raw_recording
 from meanap.pipeline.rng import make_rng
 from meanap.pipeline.spike_detection import SpikeDetectionResult, bandpass_filter
 from meanap.pipeline.atomic import atomic_savez
@@ -107,7 +108,7 @@ class SpikeCheckData:
 # ── Compute ───────────────────────────────────────────────────────────────────
 
 def compute_spike_check_data(
-    dat: np.ndarray,
+    dat: np.ndarray | RawRecording,
     result: SpikeDetectionResult,
     params: Params,
     rec_name: str,
@@ -117,12 +118,14 @@ def compute_spike_check_data(
     The random choices — which channels appear as example traces, which spike
     each window centres on — are made here and then *stored*, so a rebuilt
     figure shows the same panels as the one the run wrote rather than a fresh
-    draw from the same seed.
+    draw from the same seed. They don't depend on the traces, so every choice
+    is made first and the channels they name are read from ``dat`` in one go.
     """
     rng = make_rng(params.random_seed, "step1-plots", rec_name)
 
     fs = result.fs
-    n_samples, n_channels = dat.shape
+    recording = as_raw_recording(dat, result.channels, fs)
+    n_samples, n_channels = recording.shape
     scale_factor = _scale_factor(params)
     active_channels = list(result.spike_times.keys())
     # A recording where detection found nothing on any channel has no methods
@@ -134,10 +137,20 @@ def compute_spike_check_data(
 
     freq_curves = _frequency_curves(result, methods, params, n_samples, n_channels)
 
+    picks: list[tuple[int, int]] = []
+    for _ in range(N_TRACE_PANELS if active_channels else 0):
+        ch = int(rng.choice(active_channels))
+        times_s = result.spike_times[ch].get(methods[0], np.array([]))
+        centre = (int(round(rng.choice(times_s) * fs)) if len(times_s)
+                  else n_samples // 2)
+        picks.append((ch, centre))
+    picked = sorted({ch for ch, _ in picks})
+    traces = recording.read(picked) if picked else None
+
     # Filtering is the expensive part, so each channel is filtered once and
     # reused for both its window and (if it is the last one) its waveforms.
     def filtered(ch: int) -> np.ndarray:
-        return bandpass_filter(dat[:, ch].astype(float), fs,
+        return bandpass_filter(traces[:, picked.index(ch)].astype(float), fs,
                                params.filter_low_pass,
                                params.filter_high_pass) * scale_factor
 
@@ -152,15 +165,11 @@ def compute_spike_check_data(
     last_channel = active_channels[0] if active_channels else 0
     last_trace = None
 
-    for _ in range(N_TRACE_PANELS if active_channels else 0):
-        ch = int(rng.choice(active_channels))
+    for ch, centre in picks:
         last_channel = ch
         trace = filtered(ch)
         last_trace = trace
 
-        times_s = result.spike_times[ch].get(methods[0], np.array([]))
-        centre = (int(round(rng.choice(times_s) * fs)) if len(times_s)
-                  else n_samples // 2)
         start_f = max(0, centre - window_frames)
         end_f = min(n_samples, centre + window_frames)
         # One sample of overhang each side — see SpikeCheckData.trace_views.
@@ -13,6 +13,22 @@ matrix (:func:`meanap.pipeline.sttc.get_sttc`) has exact parity coverage —
 see ``python/test_pipeline_step3.py``. This module is validated structurally
 (shuffled spike counts are conserved, thresholding only ever removes edges,
 etc.), not against a specific MATLAB run's random outcome.
+
+The surrogate loop runs on :class:`SurrogateTrains`, a packed (CSR-style) copy
+of the trains that shifts every channel of a repetition in one vectorised pass
+and updates each channel's STTC tiling term from the real train's instead of
+recomputing it. It draws the same offsets from the generator, in the same
+order, as :func:`circular_shift_spikes` — kept as the readable reference — so a
+seeded run still selects the same surrogates. The updated tiling terms agree
+with recomputed ones to rounding (~1e-15), so the only edges that can differ
+from the reference loop are exact ties between a surrogate and the real STTC.
+Unless the stability-check snapshots are wanted, no ``(n, n, rep_num)`` stack
+is kept at all: the threshold removes an edge exactly when enough surrogates
+beat it, so a per-edge exceedance count is all it needs (see
+:func:`removal_count`) — and counts add up across independently drawn blocks
+of repetitions, which is how Step 3 spreads one recording over a process pool.
+Step 3 also tests all its lags against the same surrogates, evaluated in one
+pass per repetition, where ``adjm_thr`` tests one lag per call.
 """
 
 from __future__ import annotations
@@ -21,7 +37,9 @@ import math
 
 import numpy as np
 
-from meanap.pipeline.sttc import get_sttc
+from meanap.pipeline.sttc import (
+    get_sttc, pack_spike_times, sttc_pairs_stack, sttc_stack, tiling_fractions,
+)
 
 
 def circular_shift_spikes(
@@ -52,30 +70,339 @@ def circular_shift_spikes(
     return shifted
 
 
-def threshold_snapshots(
-    surrogate: np.ndarray, tail: float, rep_num: int
-) -> tuple[np.ndarray, list[np.ndarray]]:
-    """Threshold matrices at increasing repetition counts (MATLAB ``dist1``).
+class SurrogateTrains:
+    """Spike trains prepared for repeated circular-shift surrogates.
 
-    Port of the incremental ``dist1`` construction in ``adjM_thr_checkreps.m``:
-    ``a = 0:10:rep_num; a(1)=1`` gives the checkpoint repetition counts, and at
-    each ``i`` the threshold matrix is the ``ceil((1-tail)*i)``-th smallest
-    surrogate value per edge. Used only to draw the probabilistic-thresholding
-    stability check figure.
+    Each channel is sorted once and kept in one flat frame buffer. Because the
+    shifted train of :func:`circular_shift_spikes` is sorted again, a shift is
+    then just a rotation: the spikes pushed past the end wrap to the front, in
+    order. That makes a whole repetition one vectorised add-wrap-scatter over
+    the buffer, and it means the shifted train has the real train's gaps
+    except one (where it was cut) plus one new one (across the recording's
+    end) — so its tiling term is the real one with two gaps swapped, not a new
+    pass over every spike.
+    """
+
+    def __init__(
+        self,
+        spike_times_dict: dict[int, np.ndarray],
+        n_channels: int,
+        fs: float,
+        duration_s: float,
+    ):
+        self._setup(*pack_spike_times(spike_times_dict, n_channels), fs, duration_s)
+
+    @classmethod
+    def from_packed(cls, times: np.ndarray, offsets: np.ndarray, fs: float,
+                    duration_s: float) -> "SurrogateTrains":
+        """Build from an already packed ``(times, offsets)`` buffer (see
+        :func:`~meanap.pipeline.sttc.pack_spike_times`); not modified."""
+        self = cls.__new__(cls)
+        self._setup(np.asarray(times, dtype=np.float64), np.asarray(offsets, dtype=np.int64),
+                    fs, duration_s)
+        return self
+
+    def _setup(self, times: np.ndarray, offsets: np.ndarray, fs: float, duration_s: float):
+        n_channels = len(offsets) - 1
+        self.n_channels = n_channels
+        self.fs = fs
+        self.duration_s = duration_s
+        self.num_frames = round(duration_s * fs)
+        self.offsets = offsets
+        self.counts = np.diff(self.offsets)
+        self.channel_of = np.repeat(np.arange(n_channels), self.counts)
+        self.local_idx = np.arange(len(times)) - self.offsets[self.channel_of]
+        self._same_channel = self.channel_of[1:] == self.channel_of[:-1]
+        # Sort within channels (CAT-NAP peak trains can arrive unsorted); the
+        # surrogate is re-sorted anyway, so only the multiset matters.
+        order = np.lexsort((times, self.channel_of))
+        self.times = times[order]
+        self.frames = self.times * fs
+        self.active = np.flatnonzero(self.counts)
+        self._gap_terms: dict[float, tuple[np.ndarray, np.ndarray]] = {}
+
+    def draw(self, rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray | None]:
+        """One repetition: every channel shifted by its own random offset.
+
+        Returns ``(times, n_wrapped)`` — packed shifted trains (same
+        ``offsets``), and per-channel how many spikes wrapped round, which
+        :meth:`tiling` needs. ``n_wrapped`` is ``None`` on the rare repetition
+        where a spike lay past ``num_frames`` (rounding at the very end of the
+        recording) and broke the rotation, in which case the trains were
+        sorted explicitly instead.
+        """
+        k = np.zeros(self.n_channels, dtype=np.int64)
+        # One draw per non-empty channel, in channel order — the same stream
+        # circular_shift_spikes consumes one call at a time.
+        k[self.active] = rng.integers(1, self.num_frames, size=len(self.active), endpoint=True)
+        spk_vec = self.frames + k[self.channel_of]
+        overhang = spk_vec > self.num_frames
+        spk_vec[overhang] -= self.num_frames
+        n_wrapped = np.bincount(self.channel_of[overhang], minlength=self.n_channels)
+
+        dest = self.offsets[self.channel_of] + (
+            (self.local_idx + n_wrapped[self.channel_of]) % np.maximum(self.counts, 1)[self.channel_of]
+        )
+        shifted = np.empty_like(spk_vec)
+        shifted[dest] = spk_vec
+        if np.any(np.diff(shifted)[self._same_channel] < 0):
+            shifted = spk_vec[np.lexsort((spk_vec, self.channel_of))]
+            return shifted / self.fs, None
+        return shifted / self.fs, n_wrapped
+
+    def _gaps(self, dt: float) -> tuple[np.ndarray, np.ndarray]:
+        """Per-gap overlap ``2dt - gap`` (0 when the gap is >= ``2dt``), indexed by
+        the gap's left spike, and its per-channel sum. Cached per ``dt``."""
+        if dt not in self._gap_terms:
+            gap_terms = np.zeros(len(self.times))
+            if len(self.times) > 1:
+                diffs = np.diff(self.times)
+                same = self.channel_of[1:] == self.channel_of[:-1]
+                overlap = same & (diffs < 2 * dt)
+                gap_terms[:-1][overlap] = 2 * dt - diffs[overlap]
+            total = np.bincount(self.channel_of, weights=gap_terms, minlength=self.n_channels)
+            self._gap_terms[dt] = (gap_terms, total)
+        return self._gap_terms[dt]
+
+    def tiling(self, times: np.ndarray, n_wrapped: np.ndarray | None, dt: float) -> np.ndarray:
+        """Tiling fractions of a :meth:`draw` result, from the real trains'."""
+        if n_wrapped is None:
+            return tiling_fractions(times, self.offsets, dt, 0.0, self.duration_s)
+
+        gap_terms, total = self._gaps(dt)
+        n = self.counts
+        out = np.zeros(self.n_channels)
+        multi = np.flatnonzero(n > 1)
+        if len(multi):
+            start = self.offsets[multi]
+            last = start + n[multi] - 1
+            overlap = total[multi].copy()
+            cut = (n_wrapped[multi] > 0) & (n_wrapped[multi] < n[multi])
+            if np.any(cut):
+                c_start, c_last = start[cut], last[cut]
+                # The gap the shift cut leaves the train, the one across the
+                # recording's end joins it.
+                overlap[cut] -= gap_terms[c_last - n_wrapped[multi][cut]]
+                joined = (self.num_frames - (self.frames[c_last] - self.frames[c_start])) / self.fs
+                overlap[cut] += np.where(joined < 2 * dt, 2 * dt - joined, 0.0)
+            time_a = 2 * n[multi] * dt - overlap
+            first, final = times[start], times[last]
+            # _run_t's n>1 edge corrections: two independent ifs.
+            time_a = np.where(first < dt, time_a + first - dt, time_a)
+            time_a = np.where(self.duration_s - final < dt,
+                              time_a - final - dt + self.duration_s, time_a)
+            out[multi] = time_a / self.duration_s
+        single = np.flatnonzero(n == 1)
+        if len(single):
+            t = times[self.offsets[single]]
+            time_a = np.full(len(single), 2 * dt)
+            # _run_t's n==1 branch: if/elseif.
+            time_a = np.where(t < dt, time_a + t - dt,
+                              np.where(t + dt > self.duration_s,
+                                       time_a - t - dt + self.duration_s, time_a))
+            out[single] = time_a / self.duration_s
+        return out
+
+    def sttc(self, times: np.ndarray, tiling: np.ndarray, dts: np.ndarray) -> np.ndarray:
+        """Surrogate STTC at each lag in ``dts`` (``tiling`` holds one row of
+        :meth:`tiling` per lag) as an ``(n_lags, n, n)`` stack, cleaned as
+        :func:`get_sttc` cleans it, with a zero diagonal."""
+        adj = sttc_stack(times, self.offsets, dts, 0.0, self.duration_s, tiling=tiling)
+        adj[adj < 0] = 0.0
+        adj[np.isnan(adj)] = 0.0
+        return adj
+
+    def sttc_pairs(self, times: np.ndarray, tiling: np.ndarray, dts: np.ndarray,
+                   rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        """:meth:`sttc` at ``[:, rows, cols]`` only, cleaned the same way."""
+        vals = sttc_pairs_stack(times, self.offsets, dts, 0.0, self.duration_s, rows, cols,
+                                tiling=tiling)
+        vals[vals < 0] = 0.0
+        vals[np.isnan(vals)] = 0.0
+        return vals
+
+
+def snapshot_checkpoints(tail: float, rep_num: int) -> list[tuple[int, int]]:
+    """``(i, k)`` for each stability-check checkpoint: after ``i`` repetitions
+    the threshold is the ``k``-th largest surrogate value per edge.
+
+    ``a = 0:10:rep_num; a(1)=1`` from ``adjM_thr_checkreps.m``, with MATLAB's
+    ``ceil((1-tail)*i)``-th smallest counted from the top instead — the same
+    value, and a small ``k``, which is what lets :func:`snapshot_tops` reduce a
+    block's surrogates before they leave its worker.
     """
     a = list(range(0, rep_num + 1, 10))
     if a:
         a[0] = 1
     else:
         a = [1]
-    a = [i for i in a if 1 <= i <= rep_num]
-    dist1: list[np.ndarray] = []
-    for i in a:
-        sub_sorted = np.sort(surrogate[:, :, :i], axis=2)
+    checkpoints = []
+    for i in (i for i in a if 1 <= i <= rep_num):
         cp = math.ceil((1 - tail) * i) - 1
         cp = min(max(cp, 0), i - 1)
-        dist1.append(sub_sorted[:, :, cp])
-    return np.array(a), dist1
+        checkpoints.append((i, i - cp))
+    return checkpoints
+
+
+def threshold_snapshots(
+    surrogate: np.ndarray, tail: float, rep_num: int
+) -> tuple[np.ndarray, list[np.ndarray]]:
+    """Threshold matrices at increasing repetition counts (MATLAB ``dist1``).
+
+    Port of the incremental ``dist1`` construction in ``adjM_thr_checkreps.m``:
+    at each checkpoint ``i`` (:func:`snapshot_checkpoints`) the threshold
+    matrix is the ``ceil((1-tail)*i)``-th smallest surrogate value per edge.
+    Used only to draw the probabilistic-thresholding stability check figure.
+    """
+    checkpoints = snapshot_checkpoints(tail, rep_num)
+    tops = snapshot_tops(surrogate, 0, checkpoints)
+    return np.array([i for i, _ in checkpoints]), merge_snapshot_tops([tops], checkpoints)
+
+
+def snapshot_tops(
+    surrogate: np.ndarray, start: int, checkpoints: list[tuple[int, int]],
+) -> list[np.ndarray | None]:
+    """What one run of surrogates contributes to each checkpoint.
+
+    ``surrogate`` holds repetitions ``start, start+1, …`` on its last axis. For
+    each checkpoint ``(i, k)`` this is the run's ``k`` largest values per edge
+    among repetitions below ``i`` (unordered), or None if the run starts past
+    ``i``. The ``k``-th largest of a union is the ``k``-th largest of its
+    parts' top ``k`` — so :func:`merge_snapshot_tops` gets the exact
+    thresholds from these, and a run ships ``k`` values per edge rather than
+    all of its repetitions.
+    """
+    tops: list[np.ndarray | None] = []
+    for i, k in checkpoints:
+        take = min(i - start, surrogate.shape[-1])
+        if take <= 0:
+            tops.append(None)
+            continue
+        kk = min(k, take)
+        head = surrogate[..., :take]
+        tops.append(np.partition(head, take - kk, axis=-1)[..., take - kk:])
+    return tops
+
+
+def merge_snapshot_tops(
+    parts: list[list[np.ndarray | None]], checkpoints: list[tuple[int, int]],
+) -> list[np.ndarray]:
+    """The threshold matrix at each checkpoint, from every run's
+    :func:`snapshot_tops`."""
+    dist1: list[np.ndarray] = []
+    for c, (_i, k) in enumerate(checkpoints):
+        values = np.concatenate([tops[c] for tops in parts if tops[c] is not None], axis=-1)
+        n = values.shape[-1]
+        dist1.append(np.partition(values, n - k, axis=-1)[..., n - k])
+    return dist1
+
+
+#: Surrogate repetitions per RNG block. Step 3 gives every block its own
+#: generator (``make_rng(seed, "step3", rec, lag, block)``) so blocks can run in
+#: any worker, in any order; fixing the block size — rather than deriving it
+#: from the worker count — is what keeps the result independent of the machine.
+SURROGATE_BLOCK_REPS = 25
+
+
+def surrogate_blocks(rep_num: int) -> list[int]:
+    """Repetition counts of the RNG blocks ``rep_num`` surrogates split into."""
+    full, rest = divmod(rep_num, SURROGATE_BLOCK_REPS)
+    return [SURROGATE_BLOCK_REPS] * full + ([rest] if rest else [])
+
+
+def removal_count(tail: float, rep_num: int) -> int:
+    """How many of ``rep_num`` surrogates must beat an edge to remove it.
+
+    The threshold is the ``ceil((1-tail)*rep_num)``-th smallest surrogate
+    (MATLAB's ``cutoff_point``), i.e. the ``k``-th largest for this ``k`` — and
+    it exceeds the real STTC exactly when at least ``k`` surrogates do. So the
+    thresholded matrix needs only per-edge exceedance counts, which add up
+    across repetition blocks.
+    """
+    cutoff_point = math.ceil((1 - tail) * rep_num) - 1  # MATLAB is 1-indexed
+    cutoff_point = min(max(cutoff_point, 0), rep_num - 1)
+    return rep_num - cutoff_point
+
+
+def count_exceedances(
+    trains: SurrogateTrains,
+    real: np.ndarray,
+    iu: tuple[np.ndarray, np.ndarray],
+    dts,
+    blocks: list[tuple[int, np.random.Generator]],
+    *,
+    stop_at: int | None = None,
+    surrogate: np.ndarray | None = None,
+    stats: dict | None = None,
+) -> np.ndarray:
+    """Per lag and upper-triangle edge, how many surrogates exceed its real STTC.
+
+    ``real`` is ``(n_lags, n_edges)``, one row per lag in ``dts``; every
+    surrogate is evaluated at all of them in one pass over its trains (see
+    :func:`~meanap.pipeline.sttc.sttc_stack`), so each lag is tested against
+    the same surrogates. ``blocks`` is a list of ``(repetitions, generator)``,
+    drawn in order. ``surrogate``, if given (``(n_lags, n, n, repetitions)``),
+    is filled with every repetition's matrices (the stability check's input).
+
+    With ``stop_at=k`` an edge is settled as soon as its outcome is certain:
+    removed once ``k`` surrogates have beaten it, kept once too few
+    repetitions remain for it to get there. Either way the full count would
+    reach the same verdict (``>= k`` or not), so the edge leaves the STTC work
+    set once it is settled at every lag. An edge whose real STTC is 0 is 0
+    after thresholding regardless and is never computed. Every repetition is
+    still *drawn*, so each generator ends where the full run's does.
+    """
+    dts = np.atleast_1d(np.asarray(dts, dtype=np.float64))
+    real = np.asarray(real).reshape(len(dts), -1)
+    exceed = np.zeros(real.shape, dtype=np.int64)
+    live = real > 0 if stop_at is not None else np.ones(real.shape, dtype=bool)
+    remaining = sum(n for n, _ in blocks)
+    evaluated = 0
+    r = 0
+    for n_reps, rng in blocks:
+        for _ in range(n_reps):
+            times, n_wrapped = trains.draw(rng)
+            remaining -= 1
+            idx = np.flatnonzero(live.any(axis=0))
+            if len(idx):
+                tiling = np.array([trains.tiling(times, n_wrapped, dt) for dt in dts])
+                if surrogate is not None:
+                    adj_synth = trains.sttc(times, tiling, dts)
+                    diag = np.arange(trains.n_channels)
+                    adj_synth[:, diag, diag] = 0.0
+                    surrogate[..., r] = adj_synth
+                    vals = adj_synth[:, iu[0][idx], iu[1][idx]]
+                elif stop_at is None:
+                    vals = trains.sttc(times, tiling, dts)[:, iu[0], iu[1]]
+                else:
+                    vals = trains.sttc_pairs(times, tiling, dts, iu[0][idx], iu[1][idx])
+                evaluated += len(idx)
+                if stop_at is None:
+                    exceed += vals > real
+                else:
+                    # A pair is computed while any lag still needs it; only the
+                    # lags still live count it.
+                    was_live = live[:, idx]
+                    counts = exceed[:, idx] + ((vals > real[:, idx]) & was_live)
+                    exceed[:, idx] = counts
+                    live[:, idx] = was_live & (counts < stop_at) & (counts + remaining >= stop_at)
+            r += 1
+    if stats is not None:
+        stats["pair_evaluations"] = stats.get("pair_evaluations", 0) + evaluated
+        stats["pair_evaluations_full"] = (stats.get("pair_evaluations_full", 0)
+                                          + r * real.shape[1])
+    return exceed
+
+
+def apply_threshold(adj_m: np.ndarray, exceed: np.ndarray, k: int) -> np.ndarray:
+    """``adj_m`` with every upper-triangle edge (and its mirror) zeroed whose
+    exceedance count reached ``k`` (see :func:`removal_count`)."""
+    iu = np.triu_indices(adj_m.shape[0], k=1)
+    removed = exceed >= k
+    adj_m_ci = adj_m.copy()
+    adj_m_ci[iu[0][removed], iu[1][removed]] = 0.0
+    adj_m_ci[iu[1][removed], iu[0][removed]] = 0.0
+    return adj_m_ci
 
 
 def adjm_thr(
@@ -88,6 +415,8 @@ def adjm_thr(
     rep_num: int,
     rng: np.random.Generator | None = None,
     collect_check_snapshots: bool = False,
+    sequential: bool = False,
+    stats: dict | None = None,
 ):
     """Compute the raw and probabilistically-thresholded STTC adjacency matrices.
 
@@ -101,30 +430,42 @@ def adjm_thr(
     If ``collect_check_snapshots`` is set, also returns ``(rep_val, dist1)`` from
     :func:`threshold_snapshots` for the stability check plot (port of
     ``adjM_thr_checkreps.m``).
+
+    ``sequential`` stops computing each edge's surrogates once its outcome is
+    decided (see :func:`count_exceedances`); ``adj_m_ci`` is identical to the
+    full run's. The stability check needs every surrogate of every edge, so
+    with ``collect_check_snapshots`` the full run is done regardless. When
+    ``stats`` is given it receives ``pair_evaluations`` (surrogate STTC values
+    actually computed) and ``pair_evaluations_full`` (what the full run needs).
+
+    All surrogates are drawn from the one ``rng``; Step 3 instead composes
+    :func:`count_exceedances` over per-block generators so it can spread the
+    blocks over a process pool, with every lag evaluated on each block's
+    surrogates in one pass.
     """
     if rng is None:
         rng = np.random.default_rng()
 
     adj_m = get_sttc(spike_times_dict, n_channels, lag_ms, duration_s)
 
-    surrogate = np.empty((n_channels, n_channels, rep_num))
-    for r in range(rep_num):
-        synth = circular_shift_spikes(spike_times_dict, n_channels, fs, duration_s, rng)
-        adj_synth = get_sttc(synth, n_channels, lag_ms, duration_s)
-        np.fill_diagonal(adj_synth, 0.0)
-        surrogate[:, :, r] = adj_synth
-
-    cutoff_point = math.ceil((1 - tail) * rep_num) - 1  # MATLAB is 1-indexed
-    cutoff_point = min(max(cutoff_point, 0), rep_num - 1)
+    dt = lag_ms / 1000.0
+    trains = SurrogateTrains(spike_times_dict, n_channels, fs, duration_s)
+    k = removal_count(tail, rep_num)
 
-    surrogate_sorted = np.sort(surrogate, axis=2)
-    threshold = surrogate_sorted[:, :, cutoff_point]
-
-    adj_m_ci = adj_m.copy()
-    adj_m_ci[threshold > adj_m] = 0.0
+    iu = np.triu_indices(n_channels, k=1)
+    # The stability check needs every repetition's matrix; the threshold alone
+    # needs only how many surrogates beat each edge.
+    surrogate = (np.empty((1, n_channels, n_channels, rep_num))
+                 if collect_check_snapshots else None)
+    exceed = count_exceedances(
+        trains, adj_m[iu][None], iu, [dt], [(rep_num, rng)],
+        stop_at=k if sequential and surrogate is None else None,
+        surrogate=surrogate, stats=stats,
+    )[0]
+    adj_m_ci = apply_threshold(adj_m, exceed, k)
 
     if collect_check_snapshots:
-        rep_val, dist1 = threshold_snapshots(surrogate, tail, rep_num)
+        rep_val, dist1 = threshold_snapshots(surrogate[0], tail, rep_num)
         return adj_m, adj_m_ci, rep_val, dist1
 
     return adj_m, adj_m_ci
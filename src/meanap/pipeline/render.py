@@ -185,6 +185,23 @@ class RenderContext:
     batch_bounds: dict[str, tuple[float, float] | None]
     root: Path
     mode: str = "catnap"
+    #: :func:`~meanap.pipeline.render_cache.bundle_identity` of what this was
+    #: loaded from, fixed at load time — see :meth:`identity`.
+    bundle_id: str = ""
+
+    def identity(self) -> str:
+        """The bundle identity every cache key for this context is built on.
+
+        Taken when the context is loaded, from the ``.meanap`` file rather than
+        its extracted copy, so it names the data actually held here even if the
+        file is replaced while the viewer is open — and so cached figures
+        outlive the temporary directory.
+        """
+        if not self.bundle_id:
+            from meanap.pipeline.render_cache import bundle_identity
+
+            self.bundle_id = bundle_identity(self.root)
+        return self.bundle_id
 
     def lags(self, recording: str) -> list[int]:
         return sorted(int(k.replace("mslag", ""))
@@ -203,16 +220,23 @@ def _to_arrays(obj):
     return obj
 
 
-def load_context(bundle: RunBundle | Path | str) -> RenderContext:
+def load_context(bundle: RunBundle | Path | str, *, fast_identity: bool = False) -> RenderContext:
     """Assemble a :class:`RenderContext` from an opened bundle or a folder.
 
     Accepts a plain output folder too, so the renderer works against a run that
     was never bundled — useful for regenerating one figure as SVG after a
     normal run.
+
+    ``fast_identity`` identifies a bundle by its zip directory rather than a
+    hash of every byte (see :func:`~meanap.pipeline.render_cache.bundle_identity`).
     """
+    from meanap.pipeline.render_cache import bundle_identity
+
     if isinstance(bundle, RunBundle):
         root, params, mode = bundle.root, bundle.params, bundle.mode
         rec_rows = bundle.recordings
+        bundle_id = bundle_identity(bundle.source if bundle.source is not None else root,
+                                    fast=fast_identity)
     else:
         from meanap.params import PARAMS_FILENAME, load_params
         root = Path(bundle)
@@ -220,6 +244,7 @@ def load_context(bundle: RunBundle | Path | str) -> RenderContext:
                   if (root / PARAMS_FILENAME).exists() else Params())
         mode = "catnap" if params.suite2p_mode else "ephys"
         rec_rows = _recordings_from_csv(root)
+        bundle_id = bundle_identity(root)
 
     recordings = {
         r["filename"]: RecordingInfo(
@@ -257,7 +282,8 @@ def load_context(bundle: RunBundle | Path | str) -> RenderContext:
                     for m in ("ND", "NS", "BC", "PC", "Eloc")}
 
     return RenderContext(params=params, recordings=recordings, results=results,
-                         batch_bounds=batch_bounds, root=root, mode=mode)
+                         batch_bounds=batch_bounds, root=root, mode=mode,
+                         bundle_id=bundle_id)
 
 
 def _state_file(root: Path, recording: str) -> Path | None:
@@ -1083,9 +1109,9 @@ def cached_lag_series_figure(
     overrides: dict | None = None,
 ) -> tuple[Path, bool]:
     """One across-lag figure, rendered once per address and cached."""
-    from meanap.pipeline.render_cache import bundle_identity, cache_key
+    from meanap.pipeline.render_cache import cache_key
 
-    cache_id = cache_key(bundle_identity(ctx.root), f"lag:{series}:{key}",
+    cache_id = cache_key(ctx.identity(), f"lag:{series}:{key}",
                          fmt=fmt, dpi=dpi, overrides=overrides)
     files, was_cached = cache.get_or_render(
         cache_id,
@@ -1112,9 +1138,9 @@ def cached_comparison_figure(
 
     Returns ``(path, was_cached)``, like :func:`cached_figure`.
     """
-    from meanap.pipeline.render_cache import bundle_identity, cache_key
+    from meanap.pipeline.render_cache import cache_key
 
-    key = cache_key(bundle_identity(ctx.root),
+    key = cache_key(ctx.identity(),
                     f"cmp:{family}:{level}:{split}:{lag}:{metric}",
                     fmt=fmt, dpi=dpi, overrides=overrides)
     files, was_cached = cache.get_or_render(
@@ -1144,11 +1170,11 @@ def cached_figure(
     matters less than it does for a family, but flicking back and forth between
     two plots is the commonest thing a reader does, and it should be instant.
     """
-    from meanap.pipeline.render_cache import bundle_identity, cache_key
+    from meanap.pipeline.render_cache import cache_key
 
     # The variant is part of the key, or switching the scaling toggle would
     # serve back whichever version was rendered first.
-    key = cache_key(bundle_identity(ctx.root),
+    key = cache_key(ctx.identity(),
                     f"fig:{recording}:{lag}:{figure}:{variant}",
                     fmt=fmt, dpi=dpi, overrides=overrides)
     files, was_cached = cache.get_or_render(
@@ -1181,11 +1207,11 @@ def gallery(
     :func:`render_group_family` when you want the authored resolution.
     """
     from meanap.pipeline.figure_output import DEFAULT_THUMBNAIL_DPI
-    from meanap.pipeline.render_cache import bundle_identity, cache_key
+    from meanap.pipeline.render_cache import cache_key
 
     if dpi is None:
         dpi = DEFAULT_THUMBNAIL_DPI
-    key = cache_key(bundle_identity(ctx.root), family,
+    key = cache_key(ctx.identity(), family,
                     fmt=fmt, dpi=dpi, overrides=overrides)
     return cache.get_or_render(
         key,
@@ -1620,7 +1646,7 @@ def render_activity_figure(
     calls — with the spike times and metrics reassembled from the bundle.
     """
     from meanap.pipeline.figure_output import figure_dpi
-    from meanap.pipeline.io import load_spike_times_npz
+    from meanap.pipeline.io import load_spike_trains
     from meanap.pipeline.plotting_step2 import plot_neuronal_activity_checks
     from meanap.pipeline.spreadsheet import ground_spike_times_dict, parse_ground_electrodes
 
@@ -1647,11 +1673,7 @@ def render_activity_figure(
 
     # Same spike-time selection step 2 makes, including grounding — a grounded
     # electrode must stay empty in the raster.
-    full = load_spike_times_npz(spike_path)
-    spike_times_dict = {
-        ch: full.get(ch, {}).get(params.spikes_method, np.array([]))
-        for ch in range(n_channels)
-    }
+    spike_times_dict = load_spike_trains(spike_path, params.spikes_method).as_dict()
     ground = parse_ground_electrodes(rec.ground)
     if ground:
         spike_times_dict = ground_spike_times_dict(spike_times_dict, channels, ground)
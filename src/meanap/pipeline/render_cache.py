@@ -14,19 +14,47 @@ Entries are keyed by everything that can change a pixel — the bundle's
 identity, the family, the image format, the resolution, and any styling
 overrides — so a restyled view is a different entry rather than a stale hit.
 The key deliberately does *not* include a timestamp: the same bundle rendered
-the same way must hit, or the cache is pointless.
+the same way must hit, or the cache is pointless. It does include the package
+version and :data:`RENDER_CACHE_VERSION`, since the cache outlives the code
+that filled it: an upgrade that changes how a figure is drawn must not keep
+serving the old drawing.
+
+The bundle's identity is a hash of its bytes, which for a bundle of a few
+hundred megabytes is the most expensive part of a cache *hit*. It is worked out
+once per file state: :func:`bundle_identity` remembers each digest against the
+file's size, modification time and inode, and only re-reads the file when one
+of those moves.
+
+A viewer keeps its entries in a per-user directory (:meth:`RenderCache.persistent`),
+bounded by a byte budget with least-recently-used eviction, so a restart — or a
+colleague on the same machine opening the same bundle — starts warm.
 """
 
 from __future__ import annotations
 
 import hashlib
 import json
+import os
 import shutil
+import sys
 import tempfile
-from dataclasses import dataclass
+import threading
+import time
+import zipfile
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Iterator
+
+from meanap import __version__
+from meanap.pipeline.atomic import atomic_write_json
 
-__all__ = ["RenderCache", "cache_key"]
+__all__ = ["RenderCache", "cache_key", "default_cache_dir", "DEFAULT_BUDGET_BYTES"]
+
+#: Bumped whenever rendering changes in a way the package version would not
+#: show (a development install keeps one version across many changes), so
+#: entries drawn by the old code are never served.
+RENDER_CACHE_VERSION = 1
 
 
 def cache_key(
@@ -40,6 +68,7 @@ def cache_key(
     """A stable digest of everything that affects the rendered output."""
     payload = json.dumps(
         {
+            "renderer": [__version__, RENDER_CACHE_VERSION],
             "bundle": bundle_id,
             "family": family,
             "fmt": fmt,
@@ -52,13 +81,54 @@ def cache_key(
     return hashlib.sha256(payload.encode()).hexdigest()[:20]
 
 
-def bundle_identity(path: Path | str) -> str:
+#: ``(resolved path, fast) -> (stat signature, identity)`` for files already
+#: hashed. Shared by every thread of a viewer, hence the lock.
+_IDENTITY_MEMO: dict[tuple[str, bool], tuple[tuple[int, int, int], str]] = {}
+_IDENTITY_LOCK = threading.Lock()
+
+
+def _stat_signature(st: os.stat_result) -> tuple[int, int, int]:
+    """What rewriting a file in place — or replacing it — changes."""
+    return st.st_size, st.st_mtime_ns, st.st_ino
+
+
+def _content_digest(p: Path) -> str:
+    digest = hashlib.sha256()
+    with open(p, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:20]
+
+
+def _zip_fingerprint(p: Path) -> str | None:
+    """A digest of a zip's central directory — every member's name, CRC-32 and
+    size — or ``None`` if *p* is not a zip. Reads a few kilobytes at the end of
+    the file rather than all of it."""
+    try:
+        with zipfile.ZipFile(p) as zf:
+            members = sorted(zf.infolist(), key=lambda info: info.filename)
+    except (zipfile.BadZipFile, OSError):
+        return None
+    digest = hashlib.sha256(b"zip-central-directory\n")
+    for info in members:
+        digest.update(f"{info.filename}\0{info.CRC:08x}\0{info.file_size}\n".encode())
+    return digest.hexdigest()[:20]
+
+
+def bundle_identity(path: Path | str, *, fast: bool = False) -> str:
     """Identify a bundle by content, not by name.
 
     Two people can hold the same analysis under different filenames, and one
     person can overwrite a bundle in place while keeping its name. Hashing the
-    bytes gets both cases right; for bundles of a megabyte or so it costs
-    milliseconds.
+    bytes gets both cases right. The hash is remembered against the file's
+    size, mtime and inode, so asking again about an unchanged file costs one
+    ``stat`` — which is what every cached figure request does.
+
+    ``fast`` identifies a bundle by its zip central directory instead (member
+    names, CRCs and sizes), which needs no pass over the data at all. The CRCs
+    are of the members' contents, so it still follows content rather than
+    name; it is a different digest from the full hash, so the two never share
+    cache entries.
     """
     p = Path(path)
     if not p.is_file():
@@ -68,32 +138,186 @@ def bundle_identity(path: Path | str) -> str:
         stamp = metrics.stat().st_mtime_ns if metrics.exists() else 0
         return hashlib.sha256(f"{p.resolve()}:{stamp}".encode()).hexdigest()[:20]
 
-    digest = hashlib.sha256()
-    with open(p, "rb") as fh:
-        for chunk in iter(lambda: fh.read(1 << 20), b""):
-            digest.update(chunk)
-    return digest.hexdigest()[:20]
+    memo_key = (str(p.resolve()), fast)
+    signature = _stat_signature(p.stat())
+    with _IDENTITY_LOCK:
+        known = _IDENTITY_MEMO.get(memo_key)
+    if known is not None and known[0] == signature:
+        return known[1]
+
+    identity = (_zip_fingerprint(p) if fast else None) or _content_digest(p)
+    with _IDENTITY_LOCK:
+        _IDENTITY_MEMO[memo_key] = (signature, identity)
+    return identity
+
+
+#: Default byte budget of the persistent cache. A 109-figure family at
+#: thumbnail resolution is a few megabytes, so this holds hundreds of them.
+DEFAULT_BUDGET_BYTES = 2 * 1000**3
+
+#: Overrides where :meth:`RenderCache.persistent` keeps its entries.
+CACHE_DIR_ENV = "MEANAP_RENDER_CACHE"
+
+INDEX_NAME = "index.json"
+#: Held while ``index.json`` is read, changed and written back, by every
+#: process sharing the directory.
+INDEX_LOCK_NAME = "index.lock"
+COMPLETE_MARKER = ".complete"
+#: Suffix of an entry being rendered, and of one being evicted. Neither is ever
+#: served; both are renamed rather than written or deleted in place, so another
+#: viewer sharing the directory sees an entry whole or not at all.
+PARTIAL_SUFFIX = ".part"
+EVICTED_SUFFIX = ".evicted"
+#: A ``.part`` this old belongs to a viewer that died mid-render, not to one
+#: still rendering, and is swept when a cache is opened.
+_STALE_PART_SECONDS = 3600
+
+
+def default_cache_dir() -> Path:
+    """The per-user render cache: ``$MEANAP_RENDER_CACHE`` if set, else the
+    platform's cache directory."""
+    configured = os.environ.get(CACHE_DIR_ENV)
+    if configured:
+        return Path(configured)
+    if sys.platform == "win32":
+        base = Path(os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local")
+        return base / "MEA-NAP" / "render-cache"
+    if sys.platform == "darwin":
+        return Path.home() / "Library" / "Caches" / "MEA-NAP" / "render-cache"
+    base = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    return base / "meanap" / "render-cache"
+
+
+class _Flight:
+    """One render in progress, and how its waiters get the result."""
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self._files: list[Path] | None = None
+        self._error: BaseException | None = None
+
+    def done(self, files: list[Path]) -> None:
+        self._files = files
+        self._event.set()
+
+    def fail(self, error: BaseException) -> None:
+        self._error = error
+        self._event.set()
+
+    def wait(self) -> list[Path]:
+        self._event.wait()
+        if self._error is not None:
+            raise self._error
+        return list(self._files)
+
+
+@contextmanager
+def _file_lock(path: Path) -> Iterator[None]:
+    """Hold an exclusive lock on *path* against other processes for the block."""
+    with open(path, "a+b") as fh:
+        if sys.platform == "win32":
+            import msvcrt
+
+            while True:
+                try:
+                    # LK_LOCK retries for ten seconds, then raises; keep waiting.
+                    fh.seek(0)
+                    msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+            try:
+                yield
+            finally:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+def _entry_bytes(entry: Path) -> int:
+    return sum(f.stat().st_size for f in entry.rglob("*") if f.is_file())
 
 
 @dataclass
 class RenderCache:
     """A directory of rendered figure sets, addressed by :func:`cache_key`.
 
-    Not thread-safe against concurrent *writes* of the same key: two requests
-    racing on a cold entry would both render. That is wasteful but harmless —
-    the render is deterministic, so whichever finishes last writes the same
-    bytes. Serialising it would mean holding a lock across a six-second render,
-    which is worse.
+    A cache made by :meth:`in_temp` lives and dies with one viewer. One made by
+    :meth:`persistent` outlives it and is shared by every viewer of the same
+    user, so a bundle rendered once is rendered once — not once per restart or
+    per person opening it.
+
+    Safe to share between threads and between processes. An entry is rendered
+    into a ``.part`` directory beside it and renamed into place with its
+    ``.complete`` marker already inside, so nothing reads half an entry.
+
+    Within a process, renders are single-flight: a viewer page fires dozens of
+    thumbnail requests at once, and without this a cold family would be
+    rendered once per request, in parallel, pinning every core. The first
+    :meth:`get_or_render` of a cold key renders it; later calls for the same
+    key wait for that result, while other keys render alongside. Across
+    processes two renders of one key can still race; the first to land wins
+    and the other's copy is discarded. ``max_concurrent_renders`` additionally
+    caps how many renders of *different* keys run at once, so a burst of cold
+    requests queues rather than starving the server of CPU.
+
+    With a ``budget_bytes``, the least recently used entries are evicted once
+    the total passes it. Recency is the marker's mtime, touched on every hit,
+    as :class:`~meanap.remote.cache.FileCache` does for its files. An
+    ``index.json`` keeps each entry's size and the hit/miss counts, so
+    :meth:`stats` does not walk the tree. Every read-modify-write of it holds
+    ``index.lock`` as well as the thread lock, so two viewer processes do not
+    overwrite each other's entries — which would make the budget undercount
+    and hide one process's entries from the other's eviction. It is still
+    rebuilt from the markers whenever eviction runs, and if it goes missing.
     """
 
     root: Path
+    budget_bytes: int | None = None
+    max_concurrent_renders: int | None = None
     _owned_tempdir: str | None = None
+    _lock: threading.RLock = field(default_factory=threading.RLock, repr=False)
+    #: Key → the render in progress for it, which later requests wait on.
+    _inflight: dict[str, "_Flight"] = field(default_factory=dict, repr=False)
+    _render_slots: threading.BoundedSemaphore | None = field(default=None, repr=False)
+    #: Hits and misses not yet written to the index — counted in memory so a
+    #: cache hit stays a ``stat``, and flushed whenever the index is written.
+    _pending: dict = field(default_factory=lambda: {"hits": 0, "misses": 0}, repr=False)
+
+    def __post_init__(self) -> None:
+        self.root = Path(self.root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        if self.max_concurrent_renders is not None:
+            self._render_slots = threading.BoundedSemaphore(max(1, self.max_concurrent_renders))
+        now = time.time()
+        for leftover in self.root.iterdir():
+            if leftover.name.endswith(EVICTED_SUFFIX) or (
+                    leftover.name.endswith(PARTIAL_SUFFIX)
+                    and now - leftover.stat().st_mtime > _STALE_PART_SECONDS):
+                shutil.rmtree(leftover, ignore_errors=True)
 
     @classmethod
-    def in_temp(cls) -> "RenderCache":
+    def in_temp(cls, *, max_concurrent_renders: int | None = None) -> "RenderCache":
         """A cache in a temporary directory, cleaned up by :meth:`close`."""
         tmp = tempfile.mkdtemp(prefix="meanap-render-cache-")
-        return cls(root=Path(tmp), _owned_tempdir=tmp)
+        return cls(root=Path(tmp), max_concurrent_renders=max_concurrent_renders,
+                   _owned_tempdir=tmp)
+
+    @classmethod
+    def persistent(
+        cls, root: Path | str | None = None, budget_bytes: int = DEFAULT_BUDGET_BYTES,
+        *, max_concurrent_renders: int | None = None,
+    ) -> "RenderCache":
+        """The shared, size-bounded cache in :func:`default_cache_dir` (or *root*)."""
+        return cls(root=Path(root) if root is not None else default_cache_dir(),
+                   budget_bytes=budget_bytes, max_concurrent_renders=max_concurrent_renders)
 
     def path_for(self, key: str) -> Path:
         return self.root / key
@@ -104,33 +328,193 @@ class RenderCache:
         A directory without its ``.complete`` marker counts as a miss: it means
         a previous render died partway, and half a gallery is worse than none.
         """
+        files = self._lookup(key)
+        self._count(files is not None)
+        return files
+
+    def _lookup(self, key: str) -> list[Path] | None:
+        """:meth:`get` without counting a hit or a miss."""
         entry = self.path_for(key)
-        if not (entry / ".complete").exists():
+        marker = entry / COMPLETE_MARKER
+        try:
+            os.utime(marker, None)  # mark as most recently used
+        except OSError:
             return None
         return sorted(p for p in entry.rglob("*")
-                      if p.is_file() and p.name != ".complete")
+                      if p.is_file() and p.name != COMPLETE_MARKER)
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            self._pending["hits" if hit else "misses"] += 1
 
     def put(self, key: str, render) -> list[Path]:
         """Render into the entry for *key* and mark it complete.
 
         ``render`` is called with the destination directory and should return
-        the files it wrote. A failed render leaves no marker, so the next
+        the files it wrote. A failed render leaves nothing behind, so the next
         request retries rather than serving a partial set.
         """
         entry = self.path_for(key)
-        if entry.exists():
-            shutil.rmtree(entry, ignore_errors=True)
-        entry.mkdir(parents=True, exist_ok=True)
-        written = list(render(entry))
-        (entry / ".complete").write_text(str(len(written)))
-        return written
+        staging = Path(tempfile.mkdtemp(dir=self.root, prefix=f".{key}.",
+                                        suffix=PARTIAL_SUFFIX))
+        try:
+            written = [Path(f) for f in render(staging)]
+            size = _entry_bytes(staging)
+            (staging / COMPLETE_MARKER).write_text(
+                json.dumps({"files": len(written), "bytes": size}))
+            if entry.exists() and not (entry / COMPLETE_MARKER).exists():
+                # A render that died before this cache made entries atomic.
+                self._discard(entry)
+            try:
+                os.rename(staging, entry)
+            except OSError:
+                if not (entry / COMPLETE_MARKER).exists():
+                    raise
+                # Another viewer landed the same entry first; it is the same
+                # render, so serve theirs.
+                shutil.rmtree(staging, ignore_errors=True)
+                size = 0
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        files = [entry / f.relative_to(staging) for f in written]
+        if size:
+            self._record(key, size)
+        return files
 
     def get_or_render(self, key: str, render) -> tuple[list[Path], bool]:
-        """Return ``(files, was_cached)``."""
-        hit = self.get(key)
+        """Return ``(files, was_cached)``.
+
+        ``was_cached`` is False only for the call that actually rendered; a
+        call that waited on another's render of the same key gets its files as
+        a hit. If that render fails, every waiter gets its exception, and the
+        next request tries again. Each call that returns counts once in
+        :meth:`stats` — as a hit exactly when ``was_cached`` is True.
+        """
+        hit = self._lookup(key)
         if hit is not None:
+            self._count(True)
             return hit, True
-        return self.put(key, render), False
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+        if not leader:
+            files = flight.wait()
+            self._count(True)
+            return files, True
+
+        try:
+            # Another thread may have landed it between the miss and the claim.
+            files = self._lookup(key)
+            was_cached = files is not None
+            if files is None:
+                files = self._render(key, render)
+        except BaseException as exc:
+            flight.fail(exc)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        flight.done(files)
+        self._count(was_cached)
+        return files, was_cached
+
+    def _render(self, key: str, render) -> list[Path]:
+        if self._render_slots is None:
+            return self.put(key, render)
+        with self._render_slots:
+            return self.put(key, render)
+
+    # ── accounting ───────────────────────────────────────────────────────────
+
+    def _read_index(self) -> dict:
+        try:
+            with open(self.root / INDEX_NAME) as fh:
+                index = json.load(fh)
+            if isinstance(index.get("entries"), dict):
+                return index
+        except (OSError, ValueError, AttributeError):
+            pass
+        return self._scan()
+
+    def _scan(self) -> dict:
+        """The index rebuilt from the entries' markers (hit counts start over)."""
+        entries = {}
+        for marker in self.root.glob(f"*/{COMPLETE_MARKER}"):
+            try:
+                entries[marker.parent.name] = int(json.loads(marker.read_text())["bytes"])
+            except (OSError, ValueError, KeyError, TypeError):
+                entries[marker.parent.name] = _entry_bytes(marker.parent)
+        return {"entries": entries, "hits": 0, "misses": 0}
+
+    def _write_index(self, index: dict) -> None:
+        index["hits"] = index.get("hits", 0) + self._pending["hits"]
+        index["misses"] = index.get("misses", 0) + self._pending["misses"]
+        self._pending = {"hits": 0, "misses": 0}
+        atomic_write_json(self.root / INDEX_NAME, index)
+
+    @contextmanager
+    def _index_locked(self) -> Iterator[None]:
+        """Exclusive use of ``index.json``, across threads and processes."""
+        with self._lock, _file_lock(self.root / INDEX_LOCK_NAME):
+            yield
+
+    def _record(self, key: str, size: int) -> None:
+        with self._index_locked():
+            index = self._read_index()
+            index["entries"][key] = size
+            over = (self.budget_bytes is not None
+                    and sum(index["entries"].values()) > self.budget_bytes)
+            if over:
+                index = self._evict_locked(keep=key, index=index)
+            self._write_index(index)
+
+    def _discard(self, entry: Path) -> None:
+        """Remove an entry by renaming it out of the way first, so nothing
+        sharing the directory can find it half deleted."""
+        trash = entry.with_name(f"{entry.name}.{os.getpid()}.{threading.get_ident()}"
+                                f"{EVICTED_SUFFIX}")
+        try:
+            os.rename(entry, trash)
+        except OSError:
+            return
+        shutil.rmtree(trash, ignore_errors=True)
+
+    def _evict_locked(self, keep: str, index: dict) -> dict:
+        scanned = self._scan()
+        scanned["hits"], scanned["misses"] = index.get("hits", 0), index.get("misses", 0)
+        entries = scanned["entries"]
+
+        def last_used(key: str) -> float:
+            try:
+                return (self.path_for(key) / COMPLETE_MARKER).stat().st_mtime
+            except OSError:
+                return 0.0
+
+        for key in sorted(entries, key=last_used):
+            if sum(entries.values()) <= self.budget_bytes:
+                break
+            if key == keep:
+                continue
+            self._discard(self.path_for(key))
+            del entries[key]
+        return scanned
+
+    def stats(self) -> dict:
+        """``{"entries", "bytes", "budget_bytes", "hits", "misses"}``, from the
+        index rather than the tree."""
+        with self._lock:
+            index = self._read_index()
+            return {
+                "entries": len(index["entries"]),
+                "bytes": sum(index["entries"].values()),
+                "budget_bytes": self.budget_bytes,
+                "hits": index.get("hits", 0) + self._pending["hits"],
+                "misses": index.get("misses", 0) + self._pending["misses"],
+            }
 
     def clear(self) -> None:
         if self.root.exists():
@@ -141,6 +525,9 @@ class RenderCache:
         if self._owned_tempdir is not None:
             shutil.rmtree(self._owned_tempdir, ignore_errors=True)
             self._owned_tempdir = None
+        elif any(self._pending.values()) and self.root.exists():
+            with self._index_locked():
+                self._write_index(self._read_index())
 
     def __enter__(self) -> "RenderCache":
         return self
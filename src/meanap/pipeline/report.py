@@ -414,6 +414,7 @@ _DATA_FILE_DESCRIPTIONS: list[tuple[re.Pattern, str]] = [
     (re.compile(r".*_adjM\.npz$"), "STTC adjacency matrices for this recording — one raw + one significance-thresholded array per lag value."),
     (re.compile(r"^ephys_results\.json$"), "All step 2 (firing rate + burst) metrics for every recording, in one JSON file."),
     (re.compile(r"^netmet_results\.json$"), "All step 4 (network) metrics for every recording and lag, in one JSON file."),
+    (re.compile(r"^netmet_fingerprints\.json$"), "What each recording's stochastic step 4 metrics (NMF, small-worldness, modularity) were computed from, so a later run with a seed can reuse those that haven't changed."),
     (re.compile(r"^NetworkActivity_RecordingLevel\.csv$"), "One row per recording per lag: every whole-network metric (density, efficiency, small-worldness, modularity, cartography role proportions, ...). The main table for statistics across groups."),
     (re.compile(r"^NetworkActivity_NodeLevel\.csv$"), "One row per active node per recording per lag: node degree, strength, participation coefficient, betweenness, local efficiency and the rest. ``Channel`` is the real electrode ID (or suite2p ROI id for CAT-NAP)."),
     (re.compile(r"^TwoPhotonActivity_RecordingLevel\.csv$"), "CAT-NAP. One row per recording: calcium event-rate summaries, active-cell count, and mean event amplitude / duration / area."),
@@ -16,6 +16,11 @@ Step 3 → Step 4              ``ExperimentMatFiles/<rec>_adjM.npz``
 CAT-NAP step 2 → step 4      ``ExperimentMatFiles/<rec>_catnap.npz``
 ===========================  ================================================
 
+Step 4 also reads back its own null-model cache,
+``ExperimentMatFiles/<rec>_nulls.npz`` (see :mod:`meanap.pipeline.null_ensemble`),
+so re-running it from a prior analysis doesn't redo the randomisations. That one
+is an optimisation, not an input: a run without it just builds them again.
+
 The CAT-NAP (``suite2pMode``) path has no step 1 or 3 — adjacency is built in
 step 2, as it is in MATLAB — so step 4 is its only resumable boundary. Its file
 is deliberately named differently from the ephys ``_adjM.npz``: the two hold
@@ -54,6 +59,7 @@ __all__ = [
     "ADJM_SUBDIR",
     "CATNAP_SUFFIX",
     "ADJM_SUFFIX",
+    "NULLS_SUFFIX",
 ]
 
 SPIKE_SUBDIR = Path("1_SpikeDetection") / "1A_SpikeDetectedData"
@@ -63,6 +69,7 @@ ADJM_SUBDIR = Path("ExperimentMatFiles")
 #: stays the single place describing the output layout.
 ADJM_SUFFIX = "_adjM.npz"       # electrophysiology, step 3
 CATNAP_SUFFIX = "_catnap.npz"   # CAT-NAP, step 2
+NULLS_SUFFIX = "_nulls.npz"     # step 4's null-model cache
 
 
 @dataclass(frozen=True)
@@ -111,6 +118,13 @@ class InputLocator:
         candidates += [root / ADJM_SUBDIR / name for root in self.prior_roots]
         return _first_existing(candidates)
 
+    def nulls_file(self, recording_name: str) -> Path | None:
+        """Path to a recording's cached Step-4 null models, or ``None`` if absent."""
+        name = f"{recording_name}{NULLS_SUFFIX}"
+        candidates = [self.output_root / ADJM_SUBDIR / name]
+        candidates += [root / ADJM_SUBDIR / name for root in self.prior_roots]
+        return _first_existing(candidates)
+
     # ── reporting ────────────────────────────────────────────────────────────
 
     @property
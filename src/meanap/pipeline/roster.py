@@ -44,6 +44,7 @@ _DATA_FILES = (
     (Path("ExperimentMatFiles"), "{rec}_catnap.npz"),
     (Path("ExperimentMatFiles"), "{rec}_background.npz"),
     (Path("ExperimentMatFiles"), "{rec}_edgecheck.npz"),
+    (Path("ExperimentMatFiles"), "{rec}_nulls.npz"),
     (Path("1_SpikeDetection") / "1A_SpikeDetectedData", "{rec}_spikes.npz"),
     (Path("1_SpikeDetection") / "1A_SpikeDetectedData", "{rec}_step1checks.npz"),
 )
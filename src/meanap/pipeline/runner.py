@@ -6,6 +6,8 @@ import datetime
 import json
 import shutil
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Callable
 
@@ -16,12 +18,13 @@ from meanap.params import (
 from meanap.pipeline.cancellation import CancelCheck, check_cancel
 from meanap.pipeline.io import (
     RAW_EXTENSIONS,
-    load_raw_recording,
+    open_raw_recording,
     save_spike_times_npz,
 )
 from meanap.pipeline.step2 import _run_step2_neuronal_activity
 from meanap.pipeline.step3 import _run_step3_functional_connectivity
 from meanap.pipeline.step4 import _run_step4_network_metrics
+from meanap.pipeline.parallel import suggest_stage_depth
 from meanap.pipeline.output_folders import (
     create_output_folders, next_free_output_name, output_name_taken,
 )
@@ -615,86 +618,140 @@ def _run_step1_spike_detection(
 
     # Recordings arrive with the next one already being fetched when the source
     # is remote, and each is released once its spike times are written — so a
-    # batch's peak local storage is one or two recordings, not the dataset.
+    # batch's peak local storage is a few recordings, not the dataset.
     source = _build_raw_source(params, log)
     # Set rather than passed, so a caller that substitutes its own source
     # factory — the remote tests do — doesn't have to know about progress.
     source.progress = progress
 
-    for rec, raw_path in source.stream(recordings, depth=params.prefetch_depth,
-                                       kind="ephys"):
-        check_cancel(should_cancel)
-        # Continuing an interrupted run: this recording's spike times are
-        # already on disk, so the expensive part is done. Checked here rather
-        # than before the stream so the source still releases whatever it
-        # fetched for it.
-        done_path = spike_dir / f"{rec.filename}_spikes.npz"
-        if already_done(params, output_root, done_path, log):
-            log(f"  [{rec.filename}] already detected — skipping")
-            source.unpin(rec.filename)
-            source.release(rec.filename)
-            progress.item_done(rec.filename)
-            continue
-        if isinstance(raw_path, BaseException):
-            log(f"  ! raw file not found, skipping: {rec.filename}"
-                f" (looked for {', '.join(RAW_EXTENSIONS)})")
-            continue
+    # Step 1 is a pipeline: while recording N is detected, the next batch of
+    # its channels is read ahead (detect_spikes_recording), and the spike
+    # times, check summary and figures of the recordings before it are written
+    # by a background writer — so the cores no longer idle through every
+    # decode and PNG save. The writer holds as many finished recordings as
+    # free RAM allows — one at most from a remote source, where each also
+    # holds its raw file in the cache. The source and progress are only
+    # touched here, once a recording's write has completed.
+    max_writes = 1 if getattr(source, "remote", False) else 2
+    writer = ThreadPoolExecutor(max_workers=1)
+    pending: deque = deque()
+
+    def finish_oldest() -> None:
+        rec, future = pending.popleft()
+        future.result()
+        # Spike times and the checks are on disk, and the raw file is closed.
+        # An Axion plate shared with other wells is kept until the last of
+        # them is done.
+        source.unpin(rec.filename)
+        source.release(rec.filename)
+        progress.item_done(rec.filename)
 
-        log(f"  [{rec.filename}] loading raw data…")
-        dat, channels, fs = load_raw_recording(raw_path)
-
-        detect_params = SpikeDetectionParams(
-            fs=fs,
-            thresholds=params.thresholds,
-            wname_list=params.wname_list,
-            cost_list=cost_list,
-            filter_low_pass=params.filter_low_pass,
-            filter_high_pass=params.filter_high_pass,
-            ref_period_ms=params.ref_period,
-            min_peak_thr_mult=params.min_peak_thr_multiplier,
-            max_peak_thr_mult=params.max_peak_thr_multiplier,
-            pos_peak_thr_mult=params.pos_peak_thr_multiplier,
-            remove_artifacts=params.remove_artifacts,
-        )
+    try:
+        for rec, raw_path in source.stream(recordings, depth=params.prefetch_depth,
+                                           kind="ephys"):
+            check_cancel(should_cancel)
+            # Continuing an interrupted run: this recording's spike times are
+            # already on disk, so the expensive part is done. Checked here
+            # rather than before the stream so the source still releases
+            # whatever it fetched for it.
+            done_path = spike_dir / f"{rec.filename}_spikes.npz"
+            if already_done(params, output_root, done_path, log):
+                log(f"  [{rec.filename}] already detected — skipping")
+                source.unpin(rec.filename)
+                source.release(rec.filename)
+                progress.item_done(rec.filename)
+                continue
+            if isinstance(raw_path, BaseException):
+                log(f"  ! raw file not found, skipping: {rec.filename}"
+                    f" (looked for {', '.join(RAW_EXTENSIONS)})")
+                continue
+
+            # Opened, not loaded: detection and the check summary read a few
+            # channels at a time, so the recording is never in memory whole.
+            # The writer closes it once the check summary has read it.
+            log(f"  [{rec.filename}] opening raw data…")
+            recording = open_raw_recording(raw_path)
+            try:
+                channels, fs = recording.channels, recording.fs
+
+                detect_params = SpikeDetectionParams(
+                    fs=fs,
+                    thresholds=params.thresholds,
+                    wname_list=params.wname_list,
+                    cost_list=cost_list,
+                    filter_low_pass=params.filter_low_pass,
+                    filter_high_pass=params.filter_high_pass,
+                    ref_period_ms=params.ref_period,
+                    min_peak_thr_mult=params.min_peak_thr_multiplier,
+                    max_peak_thr_mult=params.max_peak_thr_multiplier,
+                    pos_peak_thr_mult=params.pos_peak_thr_multiplier,
+                    remove_artifacts=params.remove_artifacts,
+                    chunk_s=params.spike_detection_chunk_s,
+                    precision=params.spike_detection_precision,
+                )
 
-        log(f"  [{rec.filename}] detecting spikes ({len(channels)} channels)…")
-        result = detect_spikes_recording(
-            dat, channels, fs, detect_params,
-            max_workers=params.spike_detection_channel_workers,
-        )
+                log(f"  [{rec.filename}] detecting spikes ({len(channels)} channels)…")
+                result = detect_spikes_recording(
+                    recording, channels, fs, detect_params,
+                    max_workers=params.spike_detection_channel_workers,
+                )
+            except BaseException:
+                recording.close()
+                raise
+
+            pending.append((rec, writer.submit(
+                _write_step1_outputs, params, rec, recording, result, output_root, log)))
+            depth = suggest_stage_depth(_result_gb(result), max_depth=max_writes)
+            while len(pending) > depth:
+                finish_oldest()
+
+        while pending:
+            finish_oldest()
+    finally:
+        # A cancelled or failed run still lets the writes already started
+        # finish, so the overlap never leaves a recording half-written.
+        writer.shutdown(wait=True)
+
+    progress.phase_done()
 
+
+def _result_gb(result) -> float:
+    """What a detected recording holds in memory until it is written — its
+    spike times and, mostly, its waveforms."""
+    return sum(a.nbytes for per_channel in (result.spike_times, result.spike_waveforms)
+               for methods in per_channel.values() for a in methods.values()) / 1e9
+
+
+def _write_step1_outputs(params: Params, rec: RecordingInfo, recording, result,
+                         output_root: Path, log: Callable[[str], None]) -> None:
+    """Step 1's outputs for one recording — spike times, the check summary and,
+    outside express mode, the check figures. Closes ``recording``."""
+    from meanap.pipeline.plotting import (
+        CHECKS_SUFFIX, compute_spike_check_data, draw_spike_check_figures,
+        save_spike_check_data,
+    )
+
+    spike_dir = output_root / "1_SpikeDetection" / "1A_SpikeDetectedData"
+    with recording:
         out_path = spike_dir / f"{rec.filename}_spikes.npz"
         save_spike_times_npz(
-            out_path, result.spike_times, channels, fs,
-            duration_s=dat.shape[0] / fs,
+            out_path, result.spike_times, recording.channels, recording.fs,
+            duration_s=recording.n_samples / recording.fs,
         )
         log(f"  [{rec.filename}] saved → {out_path.relative_to(output_root)}")
 
-        # Mirrors MEApipeline.m creating a per-recording checks folder here.
-        check_dir = output_root / "1_SpikeDetection" / "1B_SpikeDetectionChecks" / rec.group / rec.filename
-        check_dir.mkdir(parents=True, exist_ok=True)
-
-        from meanap.pipeline.plotting import (
-            CHECKS_SUFFIX, compute_spike_check_data, draw_spike_check_figures,
-            save_spike_check_data,
-        )
         # The payload is written whatever the mode: it is what lets a bundle
         # carry these figures at all, and at ~40 KB against ~840 KB of PNG it
         # is cheaper than the pictures it replaces. Drawing is what express
         # mode skips, exactly as it skips every other rebuildable figure.
         log(f"  [{rec.filename}] summarising spike detection checks…")
-        checks = compute_spike_check_data(dat, result, params, rec.filename)
-        save_spike_check_data(spike_dir / f"{rec.filename}{CHECKS_SUFFIX}", checks)
-        if not params.express_mode:
-            log(f"  [{rec.filename}] generating spike detection check plots…")
-            draw_spike_check_figures(checks, check_dir)
-
-        # Spike times and the checks are on disk; the raw voltage is no longer
-        # needed. An Axion plate shared with other wells is kept until the last
-        # of them is done.
-        del dat
-        source.unpin(rec.filename)
-        source.release(rec.filename)
-        progress.item_done(rec.filename)
-
-    progress.phase_done()
+        checks = compute_spike_check_data(recording, result, params, rec.filename)
+
+    save_spike_check_data(spike_dir / f"{rec.filename}{CHECKS_SUFFIX}", checks)
+    # Mirrors MEApipeline.m creating a per-recording checks folder here.
+    check_dir = (output_root / "1_SpikeDetection" / "1B_SpikeDetectionChecks"
+                 / rec.group / rec.filename)
+    check_dir.mkdir(parents=True, exist_ok=True)
+    if not params.express_mode:
+        log(f"  [{rec.filename}] generating spike detection check plots…")
+        draw_spike_check_figures(checks, check_dir)
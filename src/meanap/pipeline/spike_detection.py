@@ -4,7 +4,9 @@ Implements threshold-based and wavelet CWT-based detection, matching the
 behaviour of the MATLAB ``detectSpikesCWT`` / ``detectSpikesThreshold`` /
 ``detectSpikesWavelet`` functions in ``Functions/WATERS-master/``.
 
-Both the threshold and the wavelet CWT paths are exact ports.
+Both the threshold and the wavelet CWT paths are exact ports. An opt-in
+float32 engine (``SpikeDetectionParams.precision``) runs everything after the
+filter in single precision, trading bit-for-bit parity for memory and speed.
 
 ``_cwt_bior15`` reproduces MATLAB's legacy ``cwt(x, scales, 'bior1.5')``
 algorithm literally (integrated wavelet, convolve, differentiate) rather than
@@ -17,6 +19,7 @@ filters are identical and ``wavefun`` agrees to 1.6e-15 — see
 from __future__ import annotations
 
 import threading
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from typing import NamedTuple
@@ -25,16 +28,21 @@ import numpy as np
 import pywt
 from scipy.signal import butter, filtfilt, find_peaks, oaconvolve
 
-from meanap.pipeline.parallel import suggest_thread_count
+from meanap.pipeline.io import RawRecording, as_raw_recording
+from meanap.pipeline.parallel import suggest_stage_depth, suggest_thread_count
 
 
 # ── Bandpass filter ───────────────────────────────────────────────────────────
 
-def bandpass_filter(trace: np.ndarray, fs: float, low: float = 600.0, high: float = 8000.0) -> np.ndarray:
-    """3rd-order Butterworth bandpass filter, matching MATLAB's filtfilt."""
+def _butter_bandpass(fs: float, low: float, high: float) -> tuple[np.ndarray, np.ndarray]:
     wn = np.array([low, high]) / (fs / 2.0)
     wn = np.clip(wn, 1e-6, 1 - 1e-6)
-    b, a = butter(3, wn, btype="bandpass")
+    return butter(3, wn, btype="bandpass")
+
+
+def bandpass_filter(trace: np.ndarray, fs: float, low: float = 600.0, high: float = 8000.0) -> np.ndarray:
+    """3rd-order Butterworth bandpass filter, matching MATLAB's filtfilt."""
+    b, a = _butter_bandpass(fs, low, high)
     return filtfilt(b, a, trace.astype(float))
 
 
@@ -175,30 +183,31 @@ def _cwt_bior15(signal: np.ndarray, scales: np.ndarray) -> np.ndarray:
     -------
     c : (n_scales, n_samples) array of CWT coefficients
     """
-    int_psi, x = _get_bior15_intwave()
-    step = x[1] - x[0]
-    x_span = x[-1] - x[0]
-    n = len(signal)
     sig = np.asarray(signal, dtype=float)
-
-    coeffs = np.zeros((len(scales), n), dtype=float)
+    coeffs = np.zeros((len(scales), len(sig)), dtype=float)
     for i, scale in enumerate(scales):
-        a = float(scale)
-        # MATLAB `0:a*(xmax-xmin)` -> 0,1,...,floor(a*span); the +1/-1 offsets
-        # between the two index expressions are MATLAB's 1-based indexing.
-        k = np.arange(0, np.floor(a * x_span) + 1)
-        j = np.floor(k / (a * step)).astype(np.intp)
-        if j.size == 1:
-            j = np.zeros(2, dtype=np.intp)
-        f = int_psi[j][::-1]
-        # oaconvolve == MATLAB's conv(x, f, 'full') to float rounding, but is
-        # O(n log m) rather than O(n*m) for these long traces / short filters.
-        conv_full = oaconvolve(sig, f, mode="full")
-        coeffs[i, :] = -np.sqrt(a) * _wkeep1_centre(np.diff(conv_full), n)
-
+        coeffs[i, :] = _cwt_bior15_scale(sig, float(scale))
     return coeffs
 
 
+def _cwt_bior15_scale(sig: np.ndarray, a: float) -> np.ndarray:
+    """One row of :func:`_cwt_bior15`, in ``sig``'s dtype (float64 or float32)."""
+    int_psi, x = _get_bior15_intwave()
+    step = x[1] - x[0]
+    x_span = x[-1] - x[0]
+    # MATLAB `0:a*(xmax-xmin)` -> 0,1,...,floor(a*span); the +1/-1 offsets
+    # between the two index expressions are MATLAB's 1-based indexing.
+    k = np.arange(0, np.floor(a * x_span) + 1)
+    j = np.floor(k / (a * step)).astype(np.intp)
+    if j.size == 1:
+        j = np.zeros(2, dtype=np.intp)
+    f = int_psi[j][::-1].astype(sig.dtype, copy=False)
+    # oaconvolve == MATLAB's conv(x, f, 'full') to float rounding, but is
+    # O(n log m) rather than O(n*m) for these long traces / short filters.
+    conv_full = oaconvolve(sig, f, mode="full")
+    return sig.dtype.type(-np.sqrt(a)) * _wkeep1_centre(np.diff(conv_full), len(sig))
+
+
 def _fit_widths_to_table(
     width_target: np.ndarray,
     width_table: np.ndarray,
@@ -370,19 +379,44 @@ def _parse_spike_index(index: np.ndarray, fs_hz: float, wid_ms: tuple[float, flo
     for i in range(n_sp):
         tE.append(int(np.ceil(np.mean([lead_t[i], lag_t[i]]))))
 
-    tE = list(tE)
-    i = 0
-    while i < len(tE) - 1:
-        diff = tE[i + 1] - tE[i]
-        if Refract < diff <= Merge:
-            del tE[i + 1]  # discard too-close spike
-        elif diff <= Merge:
-            tE[i] = int(np.ceil(np.mean([tE[i], tE[i + 1]])))
-            del tE[i + 1]
+    merger = _EventMerger(Refract, Merge)
+    for t in tE:
+        merger.add(t)
+    return merger.finish()
+
+
+class _EventMerger:
+    """``parse()``'s merge loop, fed one event time at a time.
+
+    MATLAB walks the event list comparing each kept event with the next:
+    within ``refract`` frames the two are merged at their midpoint, further
+    apart but within ``merge`` the later one is dropped, and otherwise the walk
+    moves on. Only the event under comparison can still change, so the same
+    loop runs over a stream — which is how windowed detection uses it.
+    """
+
+    def __init__(self, refract: int, merge: int):
+        self.refract = refract
+        self.merge = merge
+        self._current: int | None = None
+        self._kept: list[int] = []
+
+    def add(self, t: int) -> None:
+        if self._current is None:
+            self._current = t
+            return
+        diff = t - self._current
+        if self.refract < diff <= self.merge:
+            return  # discard too-close spike
+        if diff <= self.merge:
+            self._current = int(np.ceil(np.mean([self._current, t])))
         else:
-            i += 1
+            self._kept.append(self._current)
+            self._current = t
 
-    return np.array(tE, dtype=int)
+    def finish(self) -> np.ndarray:
+        kept = self._kept + ([] if self._current is None else [self._current])
+        return np.array(kept, dtype=int)
 
 
 def detect_spikes_wavelet(
@@ -393,6 +427,7 @@ def detect_spikes_wavelet(
     option: str = "l",
     L: float = -0.12,
     wname: str = "bior1.5",
+    dtype=np.float64,
 ) -> np.ndarray:
     """Wavelet CWT spike detection.
 
@@ -408,67 +443,97 @@ def detect_spikes_wavelet(
     option : 'l' (liberal) or 'c' (conservative)
     L : Bayesian cost factor (typically -0.12)
     wname : wavelet name ('bior1.5' supported)
+    dtype : float64, or float32 to compute the CWT in single precision —
+        half the memory and faster, at the cost of exact parity (see
+        ``SpikeDetectionParams.precision``)
 
     Returns
     -------
     spike_frames : 1-D int array of spike frame indices (0-based)
     """
-    signal = signal - signal.mean()
     Nt = len(signal)
+    # One scale at a time, each folded into Io before the next is computed,
+    # so only one row of coefficients exists at once.
+    sig = _scratch("cwt_signal", Nt, dtype)
+    np.subtract(signal, signal.mean(), out=sig)
 
     W = _determine_scales(wname, wid_ms, fs_hz, ns)
 
-    c = _cwt_bior15(signal, W.astype(float))
-
     Lmax = 36.7368
     L_scaled = L * Lmax
 
-    Io = np.zeros(Nt, dtype=bool)
-    ct = np.zeros((ns, Nt), dtype=float)
+    Io = _scratch("cwt_io", Nt, np.bool_)
+    Io[:] = False
 
     for i in range(ns):
-        w_i = W[i]
+        c = _cwt_bior15_scale(sig, float(W[i]))
         # Take independent samples for MAD (W(i) apart).
         # MATLAB: median(abs(c(i,1:round(W(i)):end) - mean(c(i,:))))/0.6745 —
         # the subsampled coefficients are centred on the mean of the FULL row,
         # not on their own mean.
-        stride = max(1, int(round(w_i)))
-        c_sub = c[i, ::stride]
-        Sigmaj = np.median(np.abs(c_sub - c[i, :].mean())) / 0.6745
+        stride = max(1, int(round(W[i])))
+        Sigmaj = np.median(np.abs(c[::stride] - c.mean())) / 0.6745
         if Sigmaj == 0:
             continue
         Thj = Sigmaj * np.sqrt(2 * np.log(Nt))     # hard threshold
 
-        index = np.where(np.abs(c[i, :]) > Thj)[0]
+        index = np.flatnonzero(np.abs(c) > Thj)
 
         if len(index) == 0:
             if option == "c":
-                pass  # do nothing
-            else:  # "l"
-                Mj = Thj
-                PS = 1.0 / Nt
-                PN = 1.0 - PS
-                DTh = Mj / 2 + Sigmaj**2 / Mj * (L_scaled + np.log(PN / PS))
-                DTh = abs(DTh) * (DTh >= 0)
-                ind = np.where(np.abs(c[i, :]) > DTh)[0]
-                if len(ind) > 0:
-                    ct[i, ind] = c[i, ind]
+                continue
+            # "l": no coefficient over the hard threshold — assume one.
+            Mj = Thj
+            PS = 1.0 / Nt
         else:
-            Mj = np.mean(np.abs(c[i, index]))
+            Mj = np.mean(np.abs(c[index]))
             PS = len(index) / Nt
-            PN = 1.0 - PS
-            DTh = Mj / 2 + Sigmaj**2 / Mj * (L_scaled + np.log(PN / PS))
-            DTh = abs(DTh) * (DTh >= 0)
-            ind = np.where(np.abs(c[i, :]) > DTh)[0]
-            if len(ind) > 0:
-                ct[i, ind] = c[i, ind]
+        PN = 1.0 - PS
+        DTh = Mj / 2 + Sigmaj**2 / Mj * (L_scaled + np.log(PN / PS))
+        DTh = abs(DTh) * (DTh >= 0)
+        # MATLAB keeps c where |c| > DTh, then deletes the negative ones
+        # (ct(ct<0)=0): what is left is exactly c > DTh, as DTh >= 0.
+        Io |= c > DTh
 
-        # Delete negative coefficients (MATLAB: ct(ct<0)=0)
-        ct[i, ct[i, :] < 0] = 0
-        Index_i = ct[i, :] != 0
-        Io = Io | Index_i
+    return _parse_spike_index(Io.view(np.int8), fs_hz, wid_ms)
 
-    return _parse_spike_index(Io.astype(int), fs_hz, wid_ms)
+
+_SCRATCH = threading.local()
+
+
+def _read_ahead(recording: RawRecording, batches: list[list[int]]):
+    """Yield ``(batch, traces)`` for each batch of channels, reading the next
+    batch on a background thread while the current one is being detected.
+
+    Reads are channel-major, so each channel's samples are contiguous. How far
+    ahead is bounded by free RAM; with no room it reads in step.
+    """
+    batch_gb = recording.n_samples * max(map(len, batches), default=0) * 4 / 1e9
+    depth = suggest_stage_depth(batch_gb, max_depth=1)
+    if depth == 0:
+        for wanted in batches:
+            yield wanted, recording.read(wanted, order="F")
+        return
+    with ThreadPoolExecutor(max_workers=1) as reader:
+        pending: deque = deque()
+        for wanted in batches:
+            pending.append((wanted, reader.submit(recording.read, wanted, order="F")))
+            if len(pending) > depth:
+                done, future = pending.popleft()
+                yield done, future.result()
+        while pending:
+            done, future = pending.popleft()
+            yield done, future.result()
+
+
+def _scratch(name: str, n: int, dtype) -> np.ndarray:
+    """A length-``n`` buffer private to this thread, reused from channel to
+    channel rather than reallocated for each."""
+    buffers = _SCRATCH.__dict__.setdefault("buffers", {})
+    buf = buffers.get(name)
+    if buf is None or len(buf) != n or buf.dtype != dtype:
+        buf = buffers[name] = np.empty(n, dtype=dtype)
+    return buf
 
 
 # ── Peak alignment ────────────────────────────────────────────────────────────
@@ -482,6 +547,7 @@ def align_peaks(
     pos_peak_thr_mult: float = 15.0,
     remove_artifacts: bool = False,
     waveform_width: int = 25,
+    noise: float | None = None,
 ) -> tuple[np.ndarray, np.ndarray]:
     """Align spike frames to the negative peak within ±win frames.
 
@@ -509,6 +575,9 @@ def align_peaks(
     ``2*win+1`` window. Waveforms are used only for the ``3_Waveforms`` check
     plot, so this doesn't touch spike times/counts (and hence parity).
 
+    ``noise`` is the trace's ``MAD / 0.6745``, which the artifact thresholds
+    scale; pass it when ``trace`` is only a window of the recording.
+
     Returns
     -------
     aligned_frames : 1-D int array
@@ -522,7 +591,7 @@ def align_peaks(
     aligned = []
     waves = []
 
-    s = np.median(np.abs(trace - np.mean(trace))) / 0.6745
+    s = np.median(np.abs(trace - np.mean(trace))) / 0.6745 if noise is None else noise
     thr_min = min_peak_thr_mult * s
     thr_max = max_peak_thr_mult * s
     thr_pos = pos_peak_thr_mult * s
@@ -562,6 +631,10 @@ def align_peaks(
     return np.array(aligned, dtype=int), np.vstack(waves)
 
 
+#: Peak-search half-width, in samples, that detection aligns spikes with.
+_ALIGN_WIN = 10
+
+
 # ── High-level detector ───────────────────────────────────────────────────────
 
 @dataclass
@@ -584,6 +657,16 @@ class SpikeDetectionParams:
     remove_artifacts: bool = False
     unit: str = "s"   # 's', 'ms', or 'frames'
     grd: list[int] = field(default_factory=list)  # grounded channels (0-based)
+    # Detect in windows of this many seconds rather than over whole channels,
+    # so memory is constant in recording length; 0 = whole channels. See
+    # windowed_detection.py.
+    chunk_s: float = 0.0
+    # "float32" runs everything after the bandpass filter — the CWT, the
+    # thresholds, alignment — in single precision: about half the memory and
+    # faster, with thresholds agreeing with the float64 port to ~1e-7 rather
+    # than bit for bit (python/test_spike_precision.py). Whole-channel
+    # detection only; windowed detection is always float64.
+    precision: str = "float64"
 
 
 class SpikeDetectionResult(NamedTuple):
@@ -596,7 +679,7 @@ class SpikeDetectionResult(NamedTuple):
 
 
 def detect_spikes_recording(
-    dat: np.ndarray,
+    dat: np.ndarray | RawRecording,
     channels: np.ndarray,
     fs: float,
     params: SpikeDetectionParams | None = None,
@@ -606,7 +689,8 @@ def detect_spikes_recording(
 
     Parameters
     ----------
-    dat : (n_samples, n_channels) array
+    dat : (n_samples, n_channels) array, or a :class:`RawRecording` to read
+        a batch of channels at a time
     channels : (n_channels,) channel ID array
     fs : sampling frequency in Hz
     params : detection parameters (defaults match the example data MATLAB run)
@@ -637,20 +721,25 @@ def detect_spikes_recording(
         _get_bior15_intwave()
 
     # Per-channel work is independent and dominated by GIL-releasing
-    # scipy.filtfilt + numpy.fft, so it threads cleanly over the (single,
-    # shared) ~3.8 GB `dat` array without duplicating it — the RAM-safe way
-    # to parallelize Step 1 (see pipeline/parallel.py). Column slices of a
-    # NumPy array are read-only-shared across threads; each channel writes
+    # scipy.filtfilt + numpy.fft, so it threads cleanly over channels — the
+    # RAM-safe way to parallelize Step 1 (see pipeline/parallel.py). Channels
+    # are read a batch at a time, about one per thread, so a recording opened
+    # with open_raw_recording is never in memory whole — the next batch while
+    # this one is detected, decoding overlapping compute. Each channel writes
     # only its own result dict entry, so no locking is needed.
-    def _process_channel(ch_idx: int):
-        if ch_idx in params.grd:
-            return None
+    recording = as_raw_recording(dat, channels, fs)
 
-        raw_trace = dat[:, ch_idx].astype(float)
-        filtered = bandpass_filter(raw_trace, fs, params.filter_low_pass, params.filter_high_pass)
+    # The filter always runs in float64: with a band edge clipped to Nyquist
+    # its poles sit on the unit circle to rounding, and a float32 filtfilt
+    # diverges. The float32 engine starts from its output.
+    single = params.precision == "float32"
 
-        spike_struct: dict[str, np.ndarray] = {}
-        wave_struct: dict[str, np.ndarray] = {}
+    def _process_channel(ch_idx: int, trace: np.ndarray):
+        filtered = bandpass_filter(trace, fs, params.filter_low_pass, params.filter_high_pass)
+        if single:
+            filtered = filtered.astype(np.float32)
+
+        aligned: dict[str, tuple[np.ndarray, np.ndarray]] = {}
         thr_struct: dict[str, float] = {}
 
         for wname in all_methods:
@@ -664,7 +753,7 @@ def detect_spikes_recording(
                     filtered, mult, params.ref_period_ms, fs,
                     filter_flag=False,
                 )
-                thr_struct[valid_name] = thr
+                thr_struct[valid_name] = float(thr)
 
             else:
                 # Wavelet method
@@ -676,44 +765,63 @@ def detect_spikes_recording(
                     option="l",
                     L=params.cost_list[0],
                     wname=actual_wname,
+                    dtype=filtered.dtype,
                 )
                 thr_struct[valid_name] = float("nan")
 
-            aligned_frames, waveforms = align_peaks(
-                frames, filtered, win=10,
+            aligned[valid_name] = align_peaks(
+                frames, filtered, win=_ALIGN_WIN,
                 min_peak_thr_mult=params.min_peak_thr_mult,
                 max_peak_thr_mult=params.max_peak_thr_mult,
                 pos_peak_thr_mult=params.pos_peak_thr_mult,
                 remove_artifacts=params.remove_artifacts,
             )
 
-            # Convert frames to the requested unit
-            if params.unit == "s":
-                times = aligned_frames / fs
-            elif params.unit == "ms":
-                times = aligned_frames / (fs / 1000.0)
-            else:
-                times = aligned_frames.astype(float)
-
-            spike_struct[valid_name] = times
-            wave_struct[valid_name] = waveforms
+        return ch_idx, aligned, thr_struct
 
-        return ch_idx, spike_struct, wave_struct, thr_struct
+    # Windowed detection (see windowed_detection.py) only when a channel is
+    # longer than one window; below that it is the same work, done worse.
+    window = int(round(params.chunk_s * fs)) if params.chunk_s else 0
+    windowed = 0 < window < recording.n_samples
+    if windowed:
+        from meanap.pipeline.windowed_detection import detect_channels_windowed
 
     n_threads = suggest_thread_count(n_channels, max_workers=max_workers)
-    if n_threads <= 1:
-        results = (_process_channel(ch) for ch in range(n_channels))
-    else:
-        with ThreadPoolExecutor(max_workers=n_threads) as pool:
-            results = pool.map(_process_channel, range(n_channels))
-
-    for res in results:
-        if res is None:
-            continue
-        ch_idx, spike_struct, wave_struct, thr_struct = res
-        spike_times[ch_idx] = spike_struct
-        spike_waveforms[ch_idx] = wave_struct
-        thresholds_out[ch_idx] = thr_struct
+    pool = ThreadPoolExecutor(max_workers=n_threads) if n_threads > 1 else None
+    batches = [wanted for wanted in ([int(ch) for ch in batch if ch not in params.grd]
+                                     for batch in recording.batches(n_threads)) if wanted]
+    # Windowed detection reads its own windows as it goes.
+    reads = (((wanted, None) for wanted in batches) if windowed
+             else _read_ahead(recording, batches))
+    try:
+        for wanted, traces in reads:
+            if windowed:
+                results = detect_channels_windowed(
+                    recording, wanted, params, all_methods, window, pool)
+            else:
+                columns = [traces[:, j] for j in range(len(wanted))]
+                if pool is None:
+                    results = list(map(_process_channel, wanted, columns))
+                else:
+                    results = list(pool.map(_process_channel, wanted, columns))
+                del traces, columns
+            for ch_idx, aligned, thr_struct in results:
+                # Convert frames to the requested unit
+                spike_struct: dict[str, np.ndarray] = {}
+                for name, (aligned_frames, waveforms) in aligned.items():
+                    if params.unit == "s":
+                        spike_struct[name] = aligned_frames / fs
+                    elif params.unit == "ms":
+                        spike_struct[name] = aligned_frames / (fs / 1000.0)
+                    else:
+                        spike_struct[name] = aligned_frames.astype(float)
+                spike_times[ch_idx] = spike_struct
+                spike_waveforms[ch_idx] = {name: w for name, (_, w) in aligned.items()}
+                thresholds_out[ch_idx] = thr_struct
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        _SCRATCH.__dict__.pop("buffers", None)
 
     return SpikeDetectionResult(
         spike_times=spike_times,
@@ -10,7 +10,8 @@ from meanap.pipeline.cancellation import CancelCheck, check_cancel
 from meanap.pipeline.progress import RunProgress
 from meanap.pipeline.resume import build_input_locator
 from meanap.pipeline.spreadsheet import RecordingInfo, ground_spike_times_dict, parse_ground_electrodes
-from meanap.pipeline.io import find_raw_file, load_spike_times_npz, resolve_duration_s
+from meanap.pipeline.io import find_raw_file, load_spike_trains, resolve_duration_s
+from meanap.pipeline.parallel import map_recordings
 from meanap.pipeline.firing_rates import firing_rates_bursts
 from meanap.pipeline.plotting_step2 import plot_neuronal_activity_checks
 
@@ -90,6 +91,128 @@ def convert_numpy(obj):
     return obj
 
 
+# Peak per-worker RAM for Step 2: one recording's spike times for the chosen
+# method (a few MB even for long recordings), the burst-detection arrays built
+# from them, and a matplotlib figure at a time in the plot phase.
+_STEP2_MEM_PER_TASK_GB = 0.4
+
+# Per-channel metrics whose batch-wide maximum sets the shared colour scale.
+_BATCH_MAX_METRICS = (
+    "FR", "channelBurstRate", "channelBurstDur",
+    "channelFracSpikesInBursts", "channelISIwithinBurst", "channeISIoutsideBurst",
+)
+
+
+def _load_spike_times_dict(
+    npz_file: Path, method: str, rec: RecordingInfo, channels: np.ndarray,
+) -> dict[int, np.ndarray]:
+    """The chosen method's spike times, grounded electrodes emptied. Only that
+    method is read; a channel without spikes is empty."""
+    spike_times_dict = load_spike_trains(npz_file, method).as_dict()
+    ground_electrodes = parse_ground_electrodes(rec.ground)
+    if ground_electrodes:
+        spike_times_dict = ground_spike_times_dict(spike_times_dict, channels, ground_electrodes)
+    return spike_times_dict
+
+
+def _step2_compute_one(
+    task: tuple[Params, RecordingInfo, str],
+) -> tuple[str, dict | None, list[str]]:
+    """Map-phase worker: firing rates and burst detection for one recording.
+    Module-level/picklable for ``spawn``. Returns what the plot phase and the
+    outputs need (``None`` if skipped) and the log lines it produced.
+
+    The spike times are not returned — the plot worker re-reads the one method
+    it needs from the spike file rather than having them pickled twice."""
+    params, rec, output_root_str = task
+    locator = build_input_locator(params, Path(output_root_str))
+    logs: list[str] = []
+
+    npz_file = locator.spike_file(rec.filename)
+    if npz_file is None:
+        logs.append(f"  [{rec.filename}] SKIP: spike data not found ({rec.filename}_spikes.npz)")
+        return rec.filename, None, logs
+
+    logs.append(f"  [{rec.filename}] loading spike data...")
+    try:
+        data = np.load(npz_file)
+        fs = data["fs"][0]
+        channels = data["channels"]
+        n_channels = len(channels)
+    except Exception as e:
+        logs.append(f"  [{rec.filename}] ERROR loading npz: {e}")
+        return rec.filename, None, logs
+
+    duration_s, duration_src = resolve_duration_s(
+        data, find_raw_file(params.raw_data, rec.filename), fs, n_channels,
+    )
+    if duration_s is None:
+        # Every firing rate here is spikes/duration, so a guessed duration
+        # would be silently wrong rather than obviously missing.
+        logs.append(f"  [{rec.filename}] SKIP: recording duration unavailable "
+                    f"(no duration in the spike file and the raw recording could not be read)")
+        return rec.filename, None, logs
+    if duration_src == "raw file":
+        logs.append(f"  [{rec.filename}] duration read from the raw recording "
+                    f"({duration_s:.1f}s) — spike file predates duration storage")
+
+    method = params.spikes_method
+    spike_times_dict = _load_spike_times_dict(npz_file, method, rec, channels)
+
+    logs.append(f"  [{rec.filename}] calculating firing rates and bursts (method={method})...")
+    ephys = firing_rates_bursts(spike_times_dict, n_channels, fs, duration_s, params)
+    return rec.filename, {
+        "npz_file": str(npz_file),
+        "n_channels": n_channels,
+        "chs": channels,
+        "fs": fs,
+        "duration_s": duration_s,
+        "ephys": ephys,
+    }, logs
+
+
+def _step2_plot_one(
+    task: tuple[Params, RecordingInfo, dict, str, dict],
+) -> tuple[str, list[str]]:
+    """Plot-phase worker: draw one recording's neuronal activity figures now
+    that the batch-wide maxima are known. Module-level/picklable for ``spawn``;
+    writes its own PNGs and returns its log lines."""
+    params, rec, ctx, out_dir_str, batch_max = task
+    spike_times_dict = _load_spike_times_dict(
+        Path(ctx["npz_file"]), params.spikes_method, rec, ctx["chs"])
+    plot_neuronal_activity_checks(
+        rec=rec,
+        params=params,
+        spike_times_dict=spike_times_dict,
+        n_channels=ctx["n_channels"],
+        chs=ctx["chs"],
+        fs=ctx["fs"],
+        duration_s=ctx["duration_s"],
+        ephys=ctx["ephys"],
+        output_root=Path(out_dir_str) / "2A_IndividualNeuronalAnalysis",
+        spike_freq_max=batch_max.get("FR"),
+        batch_max=batch_max,
+    )
+    return rec.filename, [f"  [{rec.filename}] generating neuronal activity plots..."]
+
+
+def _batch_max(contexts: list[dict]) -> dict[str, float | None]:
+    """Batch-wide max of each per-channel metric (MATLAB's maxValStruct /
+    valsTogetMax): the shared color-scale ceiling for every recording's
+    "scaled to entire dataset" heatmap panel (and, for FR, the raster's
+    "scaled to entire data batch" panel)."""
+    batch_max = {}
+    for metric in _BATCH_MAX_METRICS:
+        maxes = [
+            float(np.nanmax(ctx["ephys"][metric]))
+            for ctx in contexts
+            if ctx["ephys"].get(metric) is not None and np.size(ctx["ephys"][metric]) > 0
+            and np.any(np.isfinite(ctx["ephys"][metric]))
+        ]
+        batch_max[metric] = max(maxes) if maxes else None
+    return batch_max
+
+
 def _run_step2_neuronal_activity(
     params: Params,
     recordings: list[RecordingInfo],
@@ -104,117 +227,69 @@ def _run_step2_neuronal_activity(
     progress = progress or RunProgress()
     progress.begin("step2", items=len(recordings))
 
-    locator = build_input_locator(params, output_root)
     out_dir = output_root / "2_NeuronalActivity"
     out_dir.mkdir(parents=True, exist_ok=True)
 
+    _cancel = (lambda: bool(should_cancel())) if should_cancel else None
+
     # We will save all Ephys results into a single dictionary mapping rec.filename -> ephys
     all_ephys = {}
     rec_channels: dict[str, np.ndarray] = {}
-    # Per-recording plotting context, collected in this compute pass and drawn
-    # in a second pass once the batch-wide max firing rate is known (needed for
-    # the raster's "scaled to entire data batch" panel).
-    plot_contexts: list[dict] = []
+    # Per-recording plotting context, collected in the compute phase and drawn
+    # in the plot phase once the batch-wide max firing rate is known (needed
+    # for the raster's "scaled to entire data batch" panel).
+    contexts: dict[str, dict] = {}
 
-    for rec in recordings:
-        check_cancel(should_cancel)
-        npz_file = locator.spike_file(rec.filename)
-        if npz_file is None:
-            log(f"  [{rec.filename}] SKIP: spike data not found ({rec.filename}_spikes.npz)")
-            continue
+    def _emit_computed(result) -> None:
+        """Compute phase's callback, in the parent in completion order — the
+        only place the shared dicts are touched."""
+        filename, ctx, logs = result
+        for line in logs:
+            log(line)
+        if ctx is not None:
+            contexts[filename] = ctx
+            all_ephys[filename] = ctx["ephys"]
+            rec_channels[filename] = ctx["chs"]
+            progress.item_done(filename)
 
-        log(f"  [{rec.filename}] loading spike data...")
-        try:
-            data = np.load(npz_file)
-            fs = data["fs"][0]
-            n_channels = len(data["channels"])
-        except Exception as e:
-            log(f"  [{rec.filename}] ERROR loading npz: {e}")
-            continue
+    def _emit_plotted(result) -> None:
+        for line in result[-1]:
+            log(line)
 
-        duration_s, duration_src = resolve_duration_s(
-            data, find_raw_file(params.raw_data, rec.filename), fs, n_channels,
-        )
-        if duration_s is None:
-            # Every firing rate here is spikes/duration, so a guessed duration
-            # would be silently wrong rather than obviously missing.
-            log(f"  [{rec.filename}] SKIP: recording duration unavailable "
-                f"(no duration in the spike file and the raw recording could not be read)")
-            continue
-        if duration_src == "raw file":
-            log(f"  [{rec.filename}] duration read from the raw recording "
-                f"({duration_s:.1f}s) — spike file predates duration storage")
-
-        spike_times_full = load_spike_times_npz(npz_file)
-
-        # Filter down to the chosen method
-        method = params.spikes_method
-        spike_times_dict = {}
-        for ch in range(n_channels):
-            # Keys in spike_times_full might be string or int
-            # Our loading code casts to int, so ch should match
-            if ch in spike_times_full and method in spike_times_full[ch]:
-                spike_times_dict[ch] = spike_times_full[ch][method]
-            else:
-                spike_times_dict[ch] = np.array([])
-
-        ground_electrodes = parse_ground_electrodes(rec.ground)
-        if ground_electrodes:
-            spike_times_dict = ground_spike_times_dict(spike_times_dict, data["channels"], ground_electrodes)
-
-        log(f"  [{rec.filename}] calculating firing rates and bursts (method={method})...")
-        ephys = firing_rates_bursts(spike_times_dict, n_channels, fs, duration_s, params)
-        
-        all_ephys[rec.filename] = ephys
-        rec_channels[rec.filename] = data["channels"]
-        plot_contexts.append({
-            "rec": rec,
-            "spike_times_dict": spike_times_dict,
-            "n_channels": n_channels,
-            "chs": data["channels"],
-            "fs": fs,
-            "duration_s": duration_s,
-            "ephys": ephys,
-        })
-        progress.item_done(rec.filename)
-
-    # Batch-wide max of each per-channel metric (MATLAB's maxValStruct /
-    # valsTogetMax): the shared color-scale ceiling for every recording's
-    # "scaled to entire dataset" heatmap panel (and, for FR, the raster's
-    # "scaled to entire data batch" panel).
-    batch_max = {}
-    for metric in (
-        "FR", "channelBurstRate", "channelBurstDur",
-        "channelFracSpikesInBursts", "channelISIwithinBurst", "channeISIoutsideBurst",
-    ):
-        maxes = [
-            float(np.nanmax(ctx["ephys"][metric]))
-            for ctx in plot_contexts
-            if ctx["ephys"].get(metric) is not None and np.size(ctx["ephys"][metric]) > 0
-            and np.any(np.isfinite(ctx["ephys"][metric]))
-        ]
-        batch_max[metric] = max(maxes) if maxes else None
-    spike_freq_max = batch_max.get("FR")
+    # ── Compute phase: parallel over recordings (map) ────────────────────────
+    check_cancel(should_cancel)
+    map_recordings(
+        _step2_compute_one,
+        [(params, rec, str(output_root)) for rec in recordings],
+        mem_per_task_gb=_STEP2_MEM_PER_TASK_GB,
+        max_workers=params.recording_workers,
+        on_result=_emit_computed,
+        cancel_check=_cancel,
+    )
+    check_cancel(should_cancel)
+
+    # ── Reduce (serial) ──────────────────────────────────────────────────────
+    # Completion order varies with the pool; results are kept in spreadsheet
+    # order so the JSON and every output below are the same however it ran.
+    all_ephys = {rec.filename: all_ephys[rec.filename]
+                 for rec in recordings if rec.filename in all_ephys}
+    batch_max = _batch_max(list(contexts.values()))
 
+    # ── Plot phase: parallel over recordings (map) ───────────────────────────
     # Express mode keeps every number and drops every picture here: the step-2
     # figures are all functions of `ephys`, which is written to JSON and CSV
     # just below, so a viewer can redraw them from the bundle.
-    for ctx in [] if params.express_mode else plot_contexts:
-        check_cancel(should_cancel)
-        log(f"  [{ctx['rec'].filename}] generating neuronal activity plots...")
-        plot_neuronal_activity_checks(
-            rec=ctx["rec"],
-            params=params,
-            spike_times_dict=ctx["spike_times_dict"],
-            n_channels=ctx["n_channels"],
-            chs=ctx["chs"],
-            fs=ctx["fs"],
-            duration_s=ctx["duration_s"],
-            ephys=ctx["ephys"],
-            output_root=out_dir / "2A_IndividualNeuronalAnalysis",
-            spike_freq_max=spike_freq_max,
-            batch_max=batch_max,
+    if not params.express_mode:
+        map_recordings(
+            _step2_plot_one,
+            [(params, rec, contexts[rec.filename], str(out_dir), batch_max)
+             for rec in recordings if rec.filename in contexts],
+            mem_per_task_gb=_STEP2_MEM_PER_TASK_GB,
+            max_workers=params.recording_workers,
+            on_result=_emit_plotted,
+            cancel_check=_cancel,
         )
+        check_cancel(should_cancel)
 
     if not params.express_mode:
         log("  Generating group comparison plots...")
@@ -2,15 +2,37 @@
 ``generateAdjMs.m`` / ``adjM_thr_parallel.m`` portion of ``MEApipeline.m``.
 
 Recordings are independent (each reads its own Step 1 spike ``.npz`` and writes
-its own ``_adjM.npz``), so this step is a pure parallel map over recordings —
-no cross-recording reduce. The per-recording work is CPU-bound and low-RAM
-(spike times + 64x64 matrices), and its hot path (``adjm_thr``'s circular-shift
-surrogates) is pure Python, so it runs in separate *processes* (see
-``pipeline/parallel.py`` for why threads wouldn't help here).
+its own ``_adjM.npz``), and so is the work *inside* a recording: every block of
+circular-shift surrogates only has to be counted against the same real STTC.
+Parallelising over recordings alone left a batch of two big recordings on a
+32-core node using two cores for hours, so this step runs as two levels sized
+together (``parallel.plan_two_level``):
+
+* the parent loads each recording's spikes once, computes its raw STTC at
+  every lag, and publishes both through shared memory — lazily, as the pool
+  draws the recording's first sub-task, so only the recordings in flight are
+  resident;
+* sub-tasks — runs of a recording's surrogate blocks, cut as finely as the pool
+  needs — run in separate *processes* (the surrogate loop is a Python loop
+  around compiled kernels, so threads wouldn't help; see
+  ``pipeline/parallel.py``) and return per-edge exceedance counts, which simply
+  add up;
+* the parent thresholds, writes ``_adjM.npz`` and frees the buffer once a
+  recording's last sub-task is back.
+
+All lags are evaluated together: the raw matrices and each surrogate's come
+from one pass over the trains per repetition (``sttc.sttc_stack``), so every
+lag is tested against the same surrogates. Each surrogate block draws from
+``make_rng(seed, "step3", rec, block)`` and the block size is fixed
+(``SURROGATE_BLOCK_REPS``), so a seeded run gives the same matrices however the
+work was split and whichever worker ran it.
 """
 
 from __future__ import annotations
 
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from multiprocessing.shared_memory import SharedMemory
 from pathlib import Path
 from typing import Callable
 
@@ -18,49 +40,155 @@ import numpy as np
 
 from meanap.params import Params
 from meanap.pipeline.cancellation import CancelCheck, check_cancel
-from meanap.pipeline.io import find_raw_file, load_spike_times_npz, resolve_duration_s
-from meanap.pipeline.parallel import map_recordings
+from meanap.pipeline.io import SpikeTrains, find_raw_file, load_spike_trains, resolve_duration_s
+from meanap.pipeline.parallel import (
+    SharedArrayRef, attach_array, limit_numba_threads, map_recordings, plan_two_level,
+    share_array,
+)
 from meanap.pipeline.progress import RunProgress
-from meanap.pipeline.probabilistic_threshold import adjm_thr
+from meanap.pipeline.probabilistic_threshold import (
+    SurrogateTrains, apply_threshold, count_exceedances, merge_snapshot_tops, removal_count,
+    snapshot_checkpoints, snapshot_tops, surrogate_blocks,
+)
 from meanap.pipeline.resume import already_done, build_input_locator
 from meanap.pipeline.rng import make_rng
 from meanap.pipeline.spreadsheet import RecordingInfo, ground_spike_times_dict, parse_ground_electrodes
+from meanap.pipeline.sttc import get_sttc_stack
 from meanap.pipeline.atomic import atomic_savez
 
-# Peak per-worker RAM for Step 3: spike times (sparse) + a few 64x64xrep_num
-# surrogate stacks (~6 MB at rep_num=200). Tiny — worker count is CPU-limited.
+# Peak per-worker RAM for Step 3: the shared spike buffer and raw STTC stack
+# (mapped, not copied), one sorted copy of the spikes, and per-lag, per-edge
+# exceedance counts — plus, only when the stability check is drawn, the
+# sub-task's own lags x n x n x reps surrogate stack. That stack is reduced to
+# each checkpoint's top few values per edge before it leaves the worker, so
+# neither it nor the recording's whole stack is ever sent to the parent.
+# Tiny — worker count is CPU-limited.
 _STEP3_MEM_PER_TASK_GB = 0.3
 
 
-def _step3_one_recording(task: tuple[Params, RecordingInfo, str]) -> tuple[str, list[str]]:
-    """Compute + save one recording's adjacency matrices. Module-level and
-    picklable so it can run in a ``spawn``ed worker process. Returns the
-    recording name and the log lines it produced (streamed back and printed
-    in the parent, in completion order)."""
-    params, rec, output_root_str = task
-    output_root = Path(output_root_str)
-    locator = build_input_locator(params, output_root)
-    mat_files_dir = output_root / "ExperimentMatFiles"
+@dataclass
+class _BlockPart:
+    """One sub-task's result: its surrogate blocks, at every lag."""
+
+    blocks: list[int]
+    exceed: np.ndarray                 # (n_lags, n_edges), upper triangle
+    #: Per checkpoint, this part's top values per edge, ``(n_lags, n, n, k)`` —
+    #: stability check only; see ``snapshot_tops``.
+    snapshot_tops: list | None
+    stats: dict
+
+
+@dataclass
+class _PendingRecording:
+    """A recording whose sub-tasks are in flight, held by the parent."""
+
+    rec: RecordingInfo
+    channels: np.ndarray
+    adj_m: np.ndarray | None           # (n_lags, n, n) raw STTC
+    shared: list[SharedMemory]
+    remaining: int
+    parts: list[_BlockPart] = field(default_factory=list)
+
+    def release(self) -> None:
+        for shm in self.shared:
+            shm.close()
+            shm.unlink()
+        self.shared = []
+
+
+def _split_units(n_blocks: int, splits: int, sequential: bool) -> list[list[int]]:
+    """Cut a recording's surrogate blocks into at most ``splits`` contiguous
+    sub-tasks. The sequential test settles edges across the blocks in order,
+    so then they stay together."""
+    if sequential or n_blocks == 0:
+        return [list(range(n_blocks))]
+    return [g.tolist() for g in np.array_split(np.arange(n_blocks), min(splits, n_blocks))]
+
 
-    method = params.spikes_method
-    lag_values = params.func_con_lag_val
+def _step3_units(
+    params: Params, rec_name: str, times: np.ndarray, offsets: np.ndarray,
+    adj_m: np.ndarray, fs: float, duration_s: float, blocks: list[int],
+) -> _BlockPart:
+    """Count exceedances of the raw STTC ``adj_m`` (``(n_lags, n, n)``) over
+    some of a recording's surrogate blocks."""
+    lags = list(params.func_con_lag_val)
+    dts = np.asarray(lags, dtype=np.float64) / 1000.0
     rep_num = params.prob_thresh_rep_num
-    tail = params.prob_thresh_tail
+    k = removal_count(params.prob_thresh_tail, rep_num)
     plot_checks = bool(getattr(params, "prob_thresh_plot_checks", False))
+    sequential = bool(getattr(params, "prob_thresh_sequential", False)) and not plot_checks
+    sizes = surrogate_blocks(rep_num)
+
+    trains = SurrogateTrains.from_packed(times, offsets, fs, duration_s)
+    n = trains.n_channels
+    iu = np.triu_indices(n, k=1)
+    block_rngs = [(sizes[b], make_rng(params.random_seed, "step3", rec_name, b))
+                  for b in blocks]
+    surrogate = (np.empty((len(lags), n, n, sum(sizes[b] for b in blocks)))
+                 if plot_checks else None)
+    stats: dict = {}
+    exceed = count_exceedances(
+        trains, adj_m[:, iu[0], iu[1]], iu, dts, block_rngs,
+        stop_at=k if sequential else None, surrogate=surrogate, stats=stats,
+    )
+    tops = None
+    if surrogate is not None:
+        start = sum(sizes[:blocks[0]]) if blocks else 0
+        tops = snapshot_tops(surrogate, start,
+                             snapshot_checkpoints(params.prob_thresh_tail, rep_num))
+    return _BlockPart(blocks, exceed, tops, stats)
+
+
+def _step3_subtask(
+    task: tuple[Params, str, tuple[SharedArrayRef, ...], float, float, list[int]],
+) -> tuple[str, _BlockPart]:
+    """Count surrogate exceedances for some of one recording's surrogate blocks.
+    Module-level and picklable so it can run in a ``spawn``ed worker process;
+    reads the recording's spikes and raw STTC from the parent's shared
+    buffers."""
+    params, rec_name, refs, fs, duration_s, blocks = task
+    attached = [attach_array(ref) for ref in refs]
+    try:
+        times, offsets, adj_m = (arr for _shm, arr in attached)
+        part = _step3_units(params, rec_name, times, offsets, adj_m, fs, duration_s, blocks)
+    finally:
+        # The arrays are views of the blocks; drop them before unmapping.
+        times = offsets = adj_m = None
+        for shm, _arr in attached:
+            shm.close()
+        attached = None
+    return rec_name, part
+
+
+def _spike_file_to_do(
+    params: Params, rec: RecordingInfo, output_root: Path, log: Callable[[str], None],
+) -> Path | None:
+    """The spike file Step 3 reads for this recording, or None (logged) when
+    it is already done or has none. Only checks files, so the batch can be
+    sized before anything is loaded."""
+    locator = build_input_locator(params, output_root)
+    mat_files_dir = output_root / "ExperimentMatFiles"
 
-    logs: list[str] = []
     # Continuing an interrupted run: adjacency for this recording is already
     # written, and it is the expensive part of this step.
     done_path = mat_files_dir / f"{rec.filename}_adjM.npz"
-    if already_done(params, output_root, done_path, logs.append):
-        logs.append(f"  [{rec.filename}] adjacency already computed — skipping")
-        return rec.filename, logs
+    if already_done(params, output_root, done_path, log):
+        log(f"  [{rec.filename}] adjacency already computed — skipping")
+        return None
 
     npz_file = locator.spike_file(rec.filename)
     if npz_file is None:
-        logs.append(f"  [{rec.filename}] SKIP: spike data not found ({rec.filename}_spikes.npz)")
-        return rec.filename, logs
+        log(f"  [{rec.filename}] SKIP: spike data not found ({rec.filename}_spikes.npz)")
+        return None
+    return npz_file
 
+
+def _prepare_recording(
+    params: Params, rec: RecordingInfo, npz_file: Path, log: Callable[[str], None],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, float, float] | None:
+    """Load one recording's spikes for Step 3: ``(channels, times, offsets, fs,
+    duration_s)`` with the packed buffer the sub-tasks share, or None (logged)
+    when its duration cannot be recovered."""
     data = np.load(npz_file)
     fs = float(data["fs"][0])
     n_channels = len(data["channels"])
@@ -69,18 +197,34 @@ def _step3_one_recording(task: tuple[Params, RecordingInfo, str]) -> tuple[str,
         data, find_raw_file(params.raw_data, rec.filename), fs, n_channels,
     )
     if duration_s is None:
-        logs.append(f"  [{rec.filename}] SKIP: recording duration unavailable "
-                    f"(not in the spike file, and the raw recording could not be read)")
-        return rec.filename, logs
-
-    spike_times_full = load_spike_times_npz(npz_file)
-    spike_times_dict = {
-        ch: spike_times_full.get(ch, {}).get(method, np.array([]))
-        for ch in range(n_channels)
-    }
+        log(f"  [{rec.filename}] SKIP: recording duration unavailable "
+            f"(not in the spike file, and the raw recording could not be read)")
+        return None
+
+    # The spike file stores each method already packed, so the buffer the
+    # sub-tasks share is mapped straight from it — nothing is held in memory
+    # between here and publishing it — unless grounding changes it.
+    trains = load_spike_trains(npz_file, params.spikes_method, mmap_mode="r")
     ground_electrodes = parse_ground_electrodes(rec.ground)
     if ground_electrodes:
-        spike_times_dict = ground_spike_times_dict(spike_times_dict, data["channels"], ground_electrodes)
+        trains = SpikeTrains.from_dict(ground_spike_times_dict(
+            trains.as_dict(), data["channels"], ground_electrodes), n_channels)
+
+    return data["channels"], trains.times, trains.offsets, fs, duration_s
+
+
+def _finish_recording(
+    params: Params, pending: _PendingRecording, output_root: Path,
+    log: Callable[[str], None],
+) -> None:
+    """Threshold and save one recording once all its sub-tasks are back."""
+    rec = pending.rec
+    mat_files_dir = output_root / "ExperimentMatFiles"
+    check_dir = output_root / "3_EdgeThresholdingCheck"
+    rep_num = params.prob_thresh_rep_num
+    tail = params.prob_thresh_tail
+    k = removal_count(tail, rep_num)
+    sequential = bool(getattr(params, "prob_thresh_sequential", False))
 
     out_arrays: dict[str, np.ndarray] = {}
     # Per-lag check payloads, written together once every lag is done. The
@@ -88,24 +232,28 @@ def _step3_one_recording(task: tuple[Params, RecordingInfo, str]) -> tuple[str,
     # function, so reducing them here is the only chance to keep the figure
     # rebuildable — see plotting_step3.
     edge_checks: dict[int, object] = {}
-    # Derived from the recording name, not from a shared stream, so results
-    # don't depend on how many workers the pool decided to use or what order
-    # recordings completed in.
-    rng = make_rng(params.random_seed, "step3", rec.filename)
-    check_dir = output_root / "3_EdgeThresholdingCheck"
-    for lag_ms in lag_values:
-        logs.append(f"  [{rec.filename}] computing adjacency matrix (lag={lag_ms}ms, "
-                    f"{rep_num} shuffles)...")
-        if plot_checks:
-            adj_m, adj_m_ci, rep_val, dist1 = adjm_thr(
-                spike_times_dict, n_channels, lag_ms, tail, fs, duration_s, rep_num,
-                rng=rng, collect_check_snapshots=True,
-            )
+    parts = sorted(pending.parts, key=lambda part: part.blocks[0] if part.blocks else 0)
+    snapshots = None
+    if parts:
+        exceed = np.sum([part.exceed for part in parts], axis=0)
+        if parts[0].snapshot_tops is not None:
+            checkpoints = snapshot_checkpoints(tail, rep_num)
+            rep_val = np.array([i for i, _ in checkpoints])
+            snapshots = merge_snapshot_tops([part.snapshot_tops for part in parts], checkpoints)
+    for i, lag_ms in enumerate(params.func_con_lag_val):
+        adj_m = pending.adj_m[i]
+        adj_m_ci = apply_threshold(adj_m, exceed[i], k)
+
+        if snapshots is not None:
+            dist1 = [snapshot[i] for snapshot in snapshots]
             # Deferred import: plotting pulls in matplotlib, only needed when checks are on
             from meanap.pipeline.plotting_step3 import (
                 compute_edge_threshold_check, draw_edge_threshold_check,
             )
-            check = compute_edge_threshold_check(dist1, rep_val, adj_m, rng=rng)
+            check = compute_edge_threshold_check(
+                dist1, rep_val, adj_m,
+                rng=make_rng(params.random_seed, "step3", rec.filename, lag_ms, "check"),
+            )
             if check is not None:
                 edge_checks[lag_ms] = check
                 # Express mode skips the picture and keeps the payload, as it
@@ -116,23 +264,25 @@ def _step3_one_recording(task: tuple[Params, RecordingInfo, str]) -> tuple[str,
                         check,
                         check_dir / f"{rec.filename}{lag_ms}msLagProbThreshCheck.png",
                     )
-        else:
-            adj_m, adj_m_ci = adjm_thr(
-                spike_times_dict, n_channels, lag_ms, tail, fs, duration_s, rep_num, rng=rng,
-            )
         out_arrays[f"adjM{lag_ms}mslag"] = adj_m_ci
         out_arrays[f"adjM{lag_ms}mslag_raw"] = adj_m
 
+    if sequential and parts and parts[0].snapshot_tops is None:
+        done = sum(part.stats["pair_evaluations"] for part in parts)
+        full = sum(part.stats["pair_evaluations_full"] for part in parts)
+        if full:
+            log(f"  [{rec.filename}] sequential test settled edges early — "
+                f"{1 - done / full:.0%} of surrogate STTC evaluations skipped")
+
     out_path = mat_files_dir / f"{rec.filename}_adjM.npz"
-    atomic_savez(out_path, channels=data["channels"], **out_arrays)
+    atomic_savez(out_path, channels=pending.channels, **out_arrays)
     if edge_checks:
         from meanap.pipeline.plotting_step3 import (
             EDGE_CHECK_SUFFIX, save_edge_threshold_check,
         )
         save_edge_threshold_check(
             mat_files_dir / f"{rec.filename}{EDGE_CHECK_SUFFIX}", edge_checks)
-    logs.append(f"  [{rec.filename}] saved → {out_path.relative_to(output_root)}")
-    return rec.filename, logs
+    log(f"  [{rec.filename}] saved → {out_path.relative_to(output_root)}")
 
 
 def _run_step3_functional_connectivity(
@@ -143,7 +293,7 @@ def _run_step3_functional_connectivity(
     should_cancel: CancelCheck = None,
     progress: "RunProgress | None" = None,
 ) -> None:
-    """Run Step 3 over all recordings as a RAM/CPU-aware parallel map.
+    """Run Step 3 over all recordings as a RAM/CPU-aware two-level parallel map.
 
     Saves one ``<recording>_adjM.npz`` per recording under
     ``ExperimentMatFiles/``, with ``adjM{lag}mslag`` (probabilistically
@@ -158,23 +308,91 @@ def _run_step3_functional_connectivity(
 
     (output_root / "ExperimentMatFiles").mkdir(parents=True, exist_ok=True)
 
-    tasks = [(params, rec, str(output_root)) for rec in recordings]
+    lags = list(params.func_con_lag_val)
+    n_blocks = len(surrogate_blocks(params.prob_thresh_rep_num))
+    sequential = (bool(getattr(params, "prob_thresh_sequential", False))
+                  and not bool(getattr(params, "prob_thresh_plot_checks", False)))
 
-    def _emit(result: tuple[str, list[str]]) -> None:
-        for line in result[1]:
-            log(line)
-        # Called in the parent as each recording finishes, in completion order —
-        # which is what makes a bar possible across a process pool at all.
-        progress.item_done(result[0])
+    todo: list[tuple[RecordingInfo, Path]] = []
+    for rec in recordings:
+        check_cancel(should_cancel)
+        npz_file = _spike_file_to_do(params, rec, output_root, log)
+        if npz_file is None:
+            progress.item_done(rec.filename)
+        else:
+            todo.append((rec, npz_file))
 
-    map_recordings(
-        _step3_one_recording,
-        tasks,
-        mem_per_task_gb=_STEP3_MEM_PER_TASK_GB,
+    max_splits = 1 if sequential else n_blocks
+    workers, splits = plan_two_level(
+        len(todo), max_splits, _STEP3_MEM_PER_TASK_GB,
         max_workers=params.recording_workers,
-        on_result=_emit,
-        cancel_check=(lambda: bool(should_cancel())) if should_cancel else None,
     )
+    units = _split_units(n_blocks, splits, sequential)
+    pending: dict[str, _PendingRecording] = {}
+
+    def _tasks():
+        """Each recording's sub-tasks, loaded and published only when the pool
+        draws the first of them — so shared memory holds the recordings in
+        flight, not the batch."""
+        for rec, npz_file in todo:
+            loaded = _prepare_recording(params, rec, npz_file, log)
+            if loaded is None:
+                progress.item_done(rec.filename)
+                continue
+            channels, times, offsets, fs, duration_s = loaded
+            if not lags:
+                _finish_recording(params, _PendingRecording(rec, channels, None, [], 0),
+                                  output_root, log)
+                progress.item_done(rec.filename)
+                continue
+            # The real STTC every surrogate block is counted against: once
+            # here, rather than once per sub-task — on one thread when a pool
+            # is running, whose workers already hold every core.
+            with limit_numba_threads(1) if workers > 1 else nullcontext():
+                adj_m = get_sttc_stack(times, offsets, lags, duration_s)
+            published = [share_array(arr) for arr in (times, offsets, adj_m)]
+            refs = tuple(ref for _shm, ref in published)
+            pending[rec.filename] = _PendingRecording(
+                rec, channels, adj_m, [shm for shm, _ref in published], len(units))
+            log(f"  [{rec.filename}] computing adjacency matrices (lags "
+                f"{'/'.join(str(lag) for lag in lags)} ms, {params.prob_thresh_rep_num} "
+                f"shuffles, {len(units)} sub-task{'s' if len(units) != 1 else ''})...")
+            for blocks in units:
+                yield params, rec.filename, refs, fs, duration_s, blocks
+
+    def _emit(result: tuple[str, _BlockPart]) -> None:
+        rec_name, part = result
+        rec_state = pending[rec_name]
+        rec_state.parts.append(part)
+        rec_state.remaining -= 1
+        if rec_state.remaining == 0:
+            rec_state.release()
+            _finish_recording(params, rec_state, output_root, log)
+            del pending[rec_name]
+            # Called in the parent as each recording finishes, in completion
+            # order — which is what makes a bar possible across a process
+            # pool at all.
+            progress.item_done(rec_name)
+
+    tasks = _tasks()
+    try:
+        map_recordings(
+            _step3_subtask,
+            tasks,
+            n_tasks=len(todo) * len(units),
+            mem_per_task_gb=_STEP3_MEM_PER_TASK_GB,
+            max_workers=workers,
+            on_result=_emit,
+            cancel_check=(lambda: bool(should_cancel())) if should_cancel else None,
+            collect=False,
+        )
+    finally:
+        tasks.close()
+        # Anything still pending was cancelled mid-recording; its buffers
+        # must not outlive the run.
+        for rec_state in pending.values():
+            rec_state.release()
+    check_cancel(should_cancel)
 
     progress.phase_done()
     log("  Step 3 complete.")
@@ -6,6 +6,8 @@ and which are deterministic vs. dependent on a stochastic null model).
 from __future__ import annotations
 
 import json
+from dataclasses import astuple
+from functools import partial
 from pathlib import Path
 from typing import TYPE_CHECKING, Callable
 
@@ -14,16 +16,18 @@ if TYPE_CHECKING:
 
 import numpy as np
 import pandas as pd
-from scipy.spatial.distance import pdist, squareform
 
 from meanap.timescale import timescale_folder, timescale_kind
 from meanap.params import Params
 from meanap.pipeline import network_metrics as nm
 from meanap.pipeline.cancellation import CancelCheck, check_cancel
-from meanap.pipeline.io import find_raw_file, load_spike_times_npz, resolve_duration_s
+from meanap.pipeline.io import find_raw_file, load_spike_trains, resolve_duration_s
+from meanap.pipeline.metric_reuse import FINGERPRINTS_FILENAME, MetricReuse, metrics_digest
 from meanap.pipeline.modularity import mod_consensus_cluster_iterate
 from meanap.pipeline.nmf import cal_nmf
-from meanap.pipeline.null_models import latmio_und_v2, randmio_und_v2
+from meanap.pipeline.null_ensemble import (
+    ENSEMBLE_VERSION, NullEnsemble, NullEnsembleStore, NullSpec, build_null_ensemble,
+)
 from meanap.pipeline.parallel import map_recordings
 from meanap.pipeline.progress import RunProgress
 from meanap.pipeline.plotting_step4 import (
@@ -32,7 +36,7 @@ from meanap.pipeline.plotting_step4 import (
     plot_network_beside_field, plot_node_cartography, plot_spatial_network,
     plot_spatial_network_combined,
 )
-from meanap.pipeline.resume import ADJM_SUFFIX, build_input_locator
+from meanap.pipeline.resume import ADJM_SUBDIR, ADJM_SUFFIX, NULLS_SUFFIX, build_input_locator
 from meanap.pipeline.rng import make_rng
 from meanap.pipeline.spreadsheet import RecordingInfo, ground_spike_times_dict, parse_ground_electrodes
 
@@ -49,6 +53,20 @@ def _convert_numpy(obj):
     return obj
 
 
+# The stochastic blocks a later run can reuse (see metric_reuse.py), by the
+# metrics each one produces. Everything derived from them is recomputed.
+_SMALL_WORLD_KEYS = ("SW", "SWw", "CC", "PL")
+_MODULARITY_KEYS = ("Ci", "Q", "PC", "PC_raw", "PC_residual")
+_NMF_KEYS = ("num_nnmf_components", "nComponentsRelNS", "randResidualPerComponent",
+             "nnmf_residuals", "nnmf_var_explained")
+_NMF_COMPONENT_KEYS = ("downSampleSpikeMatrix", "nmfFactors", "nmfWeights",
+                       "nmfFactorsVarThreshold", "nmfWeightsVarThreshold")
+
+# mod_consensus_cluster_iterate.m's arguments at ExtractNetMet.m's call site.
+_CONSENSUS_THRESHOLD = 0.4
+_CONSENSUS_REPEATS = 50
+
+
 def compute_network_metrics(
     adj_m: np.ndarray,
     spike_counts: np.ndarray,
@@ -58,11 +76,22 @@ def compute_network_metrics(
     exclude_edges_below_threshold: bool = True,
     params: Params | None = None,
     rng: np.random.Generator | None = None,
+    nulls: Callable[[np.ndarray, NullSpec], NullEnsemble] | None = None,
+    reuse: MetricReuse | None = None,
 ) -> dict:
     """Compute deterministic network metrics for one (recording, lag) adjacency matrix.
 
     Mirrors the active-node subsetting + metric calls in ``ExtractNetMet.m``
     (weighted adjM path).
+
+    ``nulls`` supplies the null-model ensemble for the active subnetwork —
+    Step 4 passes a :class:`NullEnsembleStore`'s, so a re-run reuses them.
+    Without it the ensemble is built here, seeded from ``rng``.
+
+    ``reuse`` supplies what an earlier run computed for this (recording, lag):
+    the small-worldness and modularity blocks are taken from it when their
+    fingerprints are unchanged, and their fingerprints recorded in it either
+    way. Step 4 passes one alongside ``nulls``.
     """
     adj_m = adj_m.copy()
     adj_m[adj_m < 0] = 0.0
@@ -116,23 +145,45 @@ def compute_network_metrics(
     pl_raw, _ = nm.charpath(dist)
     result["PL_raw"] = pl_raw
 
-    result["Eglob"] = nm.efficiency_wei_global(sub)
+    result["Eglob"] = nm.efficiency_wei_global(sub, dist=dist)
 
-    # ── Small-worldness (SW/SWw + the saved, null-model-normalized CC/PL) ──
-    # MATLAB's own gate here is strictly "> minNumberOfNodesToCalNetMet"
+    # Every null model below comes from one ensemble, built (or loaded) once.
+    # MATLAB's own gate for small-worldness is strictly "> minNumberOfNodesToCalNetMet"
     # (ExtractNetMet.m), unlike every other block's "aN >= ..." — faithfully
     # replicated, not a typo.
-    if a_n > min_nodes:
-        if rng is None:
-            rng = np.random.default_rng()
-        dist_profile = squareform(pdist(sub))
-        lattice_net = latmio_und_v2(sub, 10000, dist_profile, rng=rng)
-        random_net = randmio_und_v2(sub, 5000, rng=rng)
-        sw, sww, cc, pl = nm.small_worldness_rl_wu(sub, random_net, lattice_net)
-        result["SW"] = sw
-        result["SWw"] = sww
-        result["CC"] = cc
-        result["PL"] = pl
+    want_small_world = a_n > min_nodes
+    want_pc = params is not None and a_n > 1
+    if rng is None:
+        rng = np.random.default_rng()
+    if reuse is None:
+        reuse = MetricReuse(None)
+    null_inputs = (ENSEMBLE_VERSION, astuple(NullSpec()))
+    small_world = modularity = None
+    if want_small_world:
+        small_world = reuse.take("small_world", _SMALL_WORLD_KEYS, sub, *null_inputs)
+    if want_pc:
+        modularity = reuse.take("modularity", _MODULARITY_KEYS, sub, *null_inputs,
+                                _CONSENSUS_THRESHOLD, _CONSENSUS_REPEATS)
+    ensemble = None
+    if (want_small_world and small_world is None) or (want_pc and modularity is None):
+        # Always the full spec, even if one block is being reused, so the cached
+        # ensemble still matches.
+        spec = NullSpec(n_signed=NullSpec.n_signed if want_pc else 0,
+                        small_world=want_small_world)
+        if nulls is not None:
+            ensemble = nulls(sub, spec)
+        else:
+            # Nothing keeps these, so the signed networks are drawn as used.
+            ensemble = build_null_ensemble(sub, spec, int(rng.integers(0, 2**63 - 1)), "nulls",
+                                           keep_signed=False)
+
+    # ── Small-worldness (SW/SWw + the saved, null-model-normalized CC/PL) ──
+    if want_small_world:
+        if small_world is None:
+            sw, sww, cc, pl = nm.small_worldness_rl_wu(
+                sub, ensemble.random, ensemble.lattice, dist=dist)
+            small_world = {"SW": sw, "SWw": sww, "CC": cc, "PL": pl}
+        result.update(small_world)
 
     sub_nrm = nm.weight_conversion_normalize(sub)
     eloc = nm.efficiency_wei_local(sub_nrm)
@@ -149,23 +200,29 @@ def compute_network_metrics(
         result["NE"] = 1.0 / mean_dist
 
     # ── Modularity-dependent metrics (stochastic Ci — see modularity.py) ──
-    if params is not None and a_n > 1:
-        ci, q, _num_repeats = mod_consensus_cluster_iterate(sub, threshold=0.4, rep_num=50, rng=rng)
+    if want_pc:
+        if modularity is None:
+            ci, q, _num_repeats = mod_consensus_cluster_iterate(
+                sub, threshold=_CONSENSUS_THRESHOLD, rep_num=_CONSENSUS_REPEATS, rng=rng)
+            # PC = normalized participation coefficient — matches what MATLAB
+            # actually saves as NetMet.PC (participation_coef_norm.m's 1st
+            # output) and feeds into node cartography / hub classification /
+            # the "4_MEA_NetworkPlotNodedegreeParticipationcoefficient.png"
+            # plot. PC_raw is the deterministic (given Ci) 3rd output, kept
+            # separately since it's independently testable/useful.
+            pc_norm, pc_residual, pc_raw, _between_mod_k = nm.participation_coef_norm(
+                sub, ci, rng=rng, nulls=ensemble.signed())
+            modularity = {"Ci": ci, "Q": q, "PC": pc_norm, "PC_raw": pc_raw,
+                          "PC_residual": pc_residual}
+        ci, pc_norm = modularity["Ci"], modularity["PC"]
         result["Ci"] = ci
-        result["Q"] = q
+        result["Q"] = modularity["Q"]
         result["nMod"] = int(ci.max())
 
-        # PC = normalized participation coefficient — matches what MATLAB
-        # actually saves as NetMet.PC (participation_coef_norm.m's 1st
-        # output) and feeds into node cartography / hub classification /
-        # the "4_MEA_NetworkPlotNodedegreeParticipationcoefficient.png"
-        # plot. PC_raw is the deterministic (given Ci) 3rd output, kept
-        # separately since it's independently testable/useful.
-        pc_norm, pc_residual, pc_raw, _between_mod_k = nm.participation_coef_norm(sub, ci, n_iter=100, rng=rng)
         z = nm.module_degree_zscore(sub, ci)
         result["PC"] = pc_norm
-        result["PC_raw"] = pc_raw
-        result["PC_residual"] = pc_residual
+        result["PC_raw"] = modularity["PC_raw"]
+        result["PC_residual"] = modularity["PC_residual"]
         result["Z"] = z
 
         result["PCmean"] = float(np.mean(pc_norm))
@@ -529,20 +586,30 @@ def _plot_recording_lag(
     return [p for p in written if p.exists()]
 
 
-# Peak per-worker RAM for Step 4: NMF's downsampled spike matrix + sklearn NMF
+# Peak per-worker RAM for Step 4: NMF's downsampled spike matrix + the NMF
 # working set + (in the plot phase) a matplotlib figure or two. All modest;
-# ~0.6 GB is a safe cap so a 16 GB box still gets several workers.
+# ~0.6 GB is a safe cap so a 16 GB box still gets several workers. The effective
+# rank used to be the exception — it built the spike matrix at the full sampling
+# rate, 3.8 GB for 10 minutes of 64 channels at 12.5 kHz, which this cap never
+# covered — but now resamples the spikes directly (network_metrics.
+# _resample_spikes), a few MB at the 10 Hz default.
 _STEP4_MEM_PER_TASK_GB = 0.6
 
 
 def _step4_compute_one(
-    task: tuple[Params, RecordingInfo, str],
-) -> tuple[str, dict | None, np.ndarray | None, list[str]]:
+    task: tuple[Params, RecordingInfo, str, tuple[dict, dict] | None],
+) -> tuple[str, dict | None, np.ndarray | None, dict | None, list[str]]:
     """Phase A worker: compute one recording's network metrics (effRank, NMF,
     per-lag metrics). Module-level/picklable for ``spawn``. Returns the metrics
     keyed by lag (or ``None`` if skipped), the channel array (needed by the
-    plot phase), and the log lines it produced."""
-    params, rec, output_root_str = task
+    plot phase), the fingerprints to store beside them, and the log lines it
+    produced.
+
+    The task's last element is an earlier run's metrics and fingerprints for
+    this recording, from :func:`_load_previous_metrics`: blocks whose inputs
+    are unchanged are taken from it rather than computed."""
+    params, rec, output_root_str, previous = task
+    prev_results, prev_fingerprints = previous or ({}, {})
     output_root = Path(output_root_str)
     locator = build_input_locator(params, output_root)
 
@@ -556,15 +623,10 @@ def _step4_compute_one(
     if adj_path is None:
         logs.append(f"  [{rec.filename}] SKIP: adjacency matrices not found "
                     f"({rec.filename}_adjM.npz)")
-        return rec.filename, None, None, logs
+        return rec.filename, None, None, None, logs
     if spike_path is None:
         logs.append(f"  [{rec.filename}] SKIP: spike data not found ({rec.filename}_spikes.npz)")
-        return rec.filename, None, None, logs
-
-    # Derived from the recording name, not from a shared stream, so the
-    # stochastic metrics (Ci/Q/PC-norm/SW/NMF) don't depend on how many
-    # workers the pool used or what order recordings completed in.
-    rng = make_rng(params.random_seed, "step4", rec.filename)
+        return rec.filename, None, None, None, logs
 
     logs.append(f"  [{rec.filename}] loading adjacency matrices...")
     adj_data = np.load(adj_path)
@@ -579,13 +641,9 @@ def _step4_compute_one(
     if duration_s is None:
         logs.append(f"  [{rec.filename}] SKIP: recording duration unavailable "
                     f"(not in the spike file, and the raw recording could not be read)")
-        return rec.filename, None, None, logs
+        return rec.filename, None, None, None, logs
 
-    spike_times_full = load_spike_times_npz(spike_path)
-    spike_times_dict = {
-        ch: spike_times_full.get(ch, {}).get(method, np.array([]))
-        for ch in range(n_channels)
-    }
+    spike_times_dict = load_spike_trains(spike_path, method).as_dict()
     ground_electrodes = parse_ground_electrodes(rec.ground)
     if ground_electrodes:
         spike_times_dict = ground_spike_times_dict(spike_times_dict, channels_arr, ground_electrodes)
@@ -602,34 +660,84 @@ def _step4_compute_one(
         logs.append(f"  [{rec.filename}] WARNING: could not compute effective rank: {e}")
         eff_rank = float('nan')
 
-    try:
-        logs.append(f"  [{rec.filename}] computing NMF components...")
-        nmf_result = cal_nmf(
-            spike_times_list, spike_counts, duration_s,
-            params.nmf_downsample_freq, fs,
-            include_nmf_components=params.include_nmf_components, rng=rng,
-        )
-    except Exception as e:
-        logs.append(f"  [{rec.filename}] WARNING: could not compute NMF components: {e}")
-        nmf_result = {}
+    # Each stochastic block has its own generator, derived from the recording
+    # name (and lag) rather than a shared stream, so the metrics don't depend
+    # on how many workers the pool used, what order recordings completed in —
+    # or on which blocks an earlier run's results let this one skip.
+    nmf_labels = ("step4", rec.filename, "nmf")
+    nmf_lag = next((lag for lag, fps in prev_fingerprints.items() if "nmf" in fps), None)
+    nmf_reuse = MetricReuse(
+        params.random_seed, nmf_labels,
+        previous=prev_results.get(nmf_lag, {}),
+        previous_fingerprints=prev_fingerprints.get(nmf_lag, {}),
+    )
+    nmf_keys = _NMF_KEYS + (_NMF_COMPONENT_KEYS if params.include_nmf_components else ())
+    nmf_result = nmf_reuse.take(
+        "nmf", nmf_keys, spike_times_list, spike_counts, duration_s, fs,
+        params.nmf_downsample_freq, params.include_nmf_components,
+    )
+    if nmf_result is None:
+        try:
+            logs.append(f"  [{rec.filename}] computing NMF components...")
+            nmf_result = cal_nmf(
+                spike_times_list, spike_counts, duration_s,
+                params.nmf_downsample_freq, fs,
+                include_nmf_components=params.include_nmf_components,
+                rng=make_rng(params.random_seed, *nmf_labels),
+            )
+        except Exception as e:
+            logs.append(f"  [{rec.filename}] WARNING: could not compute NMF components: {e}")
+            nmf_result = {}
+
+    # Null models depend only on the active subnetwork and the seed, so they
+    # are kept beside the adjacency file and reused by the next run over it.
+    null_store = NullEnsembleStore(
+        output_root / ADJM_SUBDIR / f"{rec.filename}{NULLS_SUFFIX}",
+        params.random_seed, ("step4-nulls", rec.filename),
+        source=locator.nulls_file(rec.filename),
+    )
 
     rec_results: dict = {}
+    fingerprints: dict = {}
+    reused: list[str] = [*nmf_reuse.reused]
     for lag_ms in lag_values:
         key = f"adjM{lag_ms}mslag"
         if key not in adj_data:
             continue
+        lag_key = f"{lag_ms}mslag"
+        lag_labels = ("step4", rec.filename, lag_ms)
+        reuse = MetricReuse(
+            params.random_seed, lag_labels,
+            previous=prev_results.get(lag_key, {}),
+            previous_fingerprints=prev_fingerprints.get(lag_key, {}),
+        )
         logs.append(f"  [{rec.filename}] computing network metrics (lag={lag_ms}ms)...")
         metrics = compute_network_metrics(
             adj_data[key], spike_counts, duration_s,
             params.min_activity_level, min_nodes,
             exclude_edges_below_threshold=params.exclude_edges_below_threshold,
-            params=params, rng=rng,
+            params=params, rng=make_rng(params.random_seed, *lag_labels),
+            nulls=partial(null_store.get, f"lag{lag_ms}"),
+            reuse=reuse,
         )
         metrics["effRank"] = eff_rank
         metrics.update(nmf_result)
-        rec_results[f"{lag_ms}mslag"] = metrics
+        rec_results[lag_key] = metrics
+        fingerprints[lag_key] = {**nmf_reuse.fingerprints, **reuse.fingerprints}
+        reused += [f"{lag_key} {block}" for block in reuse.reused]
+
+    if reused:
+        logs.append(f"  [{rec.filename}] reused unchanged metrics from an earlier run "
+                    f"({', '.join(reused)})")
+    if null_store.reused:
+        logs.append(f"  [{rec.filename}] reused cached null models "
+                    f"({', '.join(null_store.reused)})")
+    try:
+        null_store.save()
+    except OSError as e:
+        logs.append(f"  [{rec.filename}] WARNING: could not cache null models: {e}")
 
-    return rec.filename, rec_results, channels_arr, logs
+    return rec.filename, rec_results, channels_arr, fingerprints, logs
 
 
 def _step4_plot_one(
@@ -781,12 +889,46 @@ def _netmet_json(all_results: dict) -> dict:
     }
 
 
-def _write_netmet(out_dir: Path, all_results: dict) -> None:
-    """Checkpoint phase A's results so far. Atomic; safe to call repeatedly."""
+def _write_netmet(out_dir: Path, all_results: dict, fingerprints: dict | None = None) -> None:
+    """Checkpoint phase A's results so far. Atomic; safe to call repeatedly.
+
+    ``fingerprints`` (``{recording: {lag: {block: fingerprint}}}``) are written
+    beside them, each (recording, lag) tagged with the digest of the metrics
+    just written — after the metrics, so a failed write leaves fingerprints
+    whose digests no longer match, which :func:`_read_fingerprints` ignores.
+    """
     from meanap.pipeline.atomic import atomic_write_json
 
-    atomic_write_json(out_dir / NETMET_FILENAME,
-                      _convert_numpy(_netmet_json(all_results)), indent=2)
+    stored = _convert_numpy(_netmet_json(all_results))
+    atomic_write_json(out_dir / NETMET_FILENAME, stored, indent=2)
+    if fingerprints is None:
+        return
+    tagged = {
+        rec_name: {
+            lag: {"metrics": metrics_digest(stored[rec_name][lag]), "blocks": blocks}
+            for lag, blocks in rec_fps.items() if lag in stored.get(rec_name, {})
+        }
+        for rec_name, rec_fps in fingerprints.items() if rec_fps
+    }
+    atomic_write_json(out_dir / FINGERPRINTS_FILENAME, tagged, indent=2)
+
+
+def _read_fingerprints(net_dir: Path, stored: dict) -> dict:
+    """The fingerprints in ``net_dir`` that still describe ``stored``, its
+    ``netmet_results.json`` as loaded: ``{recording: {lag: {block: fingerprint}}}``."""
+    try:
+        with open(net_dir / FINGERPRINTS_FILENAME) as fh:
+            tagged = json.load(fh)
+    except (OSError, ValueError):
+        return {}
+    valid: dict = {}
+    for rec_name, rec_fps in tagged.items():
+        for lag, entry in rec_fps.items():
+            metrics = stored.get(rec_name, {}).get(lag)
+            if (metrics is not None and isinstance(entry, dict)
+                    and entry.get("metrics") == metrics_digest(metrics)):
+                valid.setdefault(rec_name, {})[lag] = entry.get("blocks", {})
+    return valid
 
 
 def _restore_adjm_sub(output_root: Path, recording: str, rec_results: dict) -> bool:
@@ -822,29 +964,34 @@ def _restore_adjm_sub(output_root: Path, recording: str, rec_results: dict) -> b
 
 def _load_netmet_checkpoint(
     params: Params, output_root: Path, recordings, log,
-) -> tuple[dict, dict]:
-    """Recordings already finished by an interrupted run: metrics and channels.
-
-    Returns ``({name: results}, {name: channels})``, both empty unless the run
-    was asked to continue. A recording is only accepted when its adjacency is
-    also present, so what is skipped is genuinely complete.
+) -> tuple[dict, dict, dict]:
+    """Recordings already finished by an interrupted run: metrics, channels and
+    fingerprints.
+
+    Returns ``({name: results}, {name: channels}, {name: fingerprints})``, all
+    empty unless the run was asked to continue. A recording is only accepted
+    when its adjacency is also present, so what is skipped is genuinely
+    complete.
     """
     if not params.continue_interrupted:
-        return {}, {}
+        return {}, {}, {}
 
-    path = output_root / "4_NetworkActivity" / NETMET_FILENAME
+    net_dir = output_root / "4_NetworkActivity"
+    path = net_dir / NETMET_FILENAME
     if not path.is_file():
-        return {}, {}
+        return {}, {}, {}
     try:
         with open(path) as fh:
             stored = json.load(fh)
     except (OSError, ValueError) as e:
         log(f"  Ignoring an unreadable {NETMET_FILENAME} ({e}) — recomputing.")
-        return {}, {}
+        return {}, {}, {}
 
+    stored_fingerprints = _read_fingerprints(net_dir, stored)
     wanted = {rec.filename for rec in recordings}
     results: dict = {}
     channels: dict = {}
+    fingerprints: dict = {}
     for name, rec_results in stored.items():
         if name not in wanted or not rec_results:
             continue
@@ -858,10 +1005,47 @@ def _load_netmet_checkpoint(
         except Exception:                                # noqa: BLE001
             continue
         results[name] = restored
+        fingerprints[name] = stored_fingerprints.get(name, {})
     if results:
         log(f"  Continuing: {len(results)} recording(s) already have network "
             f"metrics — skipping them.")
-    return results, channels
+    return results, channels, fingerprints
+
+
+def _load_previous_metrics(
+    params: Params, output_root: Path, recordings, log,
+) -> dict[str, tuple[dict, dict]]:
+    """What earlier runs computed for ``recordings``, for phase A to reuse.
+
+    Searched in :class:`~meanap.pipeline.resume.InputLocator`'s order — this
+    run's folder, then each prior analysis — and the first with fingerprints
+    for a recording wins. Returns ``{name: (results, fingerprints)}``; empty
+    without ``Params.random_seed``, since nothing would match.
+    """
+    if params.random_seed is None or not recordings:
+        return {}
+    locator = build_input_locator(params, output_root)
+    wanted = {rec.filename for rec in recordings}
+    found: dict = {}
+    for root in (locator.output_root, *locator.prior_roots):
+        net_dir = root / "4_NetworkActivity"
+        if not (net_dir / FINGERPRINTS_FILENAME).is_file():
+            continue
+        try:
+            with open(net_dir / NETMET_FILENAME) as fh:
+                stored = json.load(fh)
+        except (OSError, ValueError):
+            continue
+        stored_fingerprints = _read_fingerprints(net_dir, stored)
+        for name in sorted(wanted - found.keys()):
+            rec_fps = stored_fingerprints.get(name)
+            if rec_fps:
+                found[name] = (_to_arrays({lag: stored[name][lag] for lag in rec_fps}),
+                               rec_fps)
+    if found:
+        log(f"  {len(found)} recording(s) have network metrics from an earlier run — "
+            f"reusing whatever their inputs leave unchanged.")
+    return found
 
 
 def _to_arrays(obj):
@@ -896,9 +1080,10 @@ def _run_step4_network_metrics(
     # only skipping — matters for phase B: the cartography boundaries are pooled
     # across the whole batch, so a continued run that saw half of it would place
     # them somewhere the original never would.
-    all_results, channels_by_rec = _load_netmet_checkpoint(
+    all_results, channels_by_rec, all_fingerprints = _load_netmet_checkpoint(
         params, output_root, recordings, log)
     todo = [rec for rec in recordings if rec.filename not in all_results]
+    previous = _load_previous_metrics(params, output_root, todo, log)
     for rec in recordings:
         if rec.filename in all_results:
             progress.item_done(rec.filename)
@@ -916,16 +1101,17 @@ def _run_step4_network_metrics(
     def _emit_computed(result) -> None:
         """Phase A's callback. Runs in the parent, in completion order, which is
         the only place it is safe to touch the shared dicts or the checkpoint."""
-        filename, rec_results, channels_arr, logs = result
+        filename, rec_results, channels_arr, fingerprints, logs = result
         for line in logs:
             log(line)
         if rec_results:
             all_results[filename] = rec_results
             channels_by_rec[filename] = channels_arr
+            all_fingerprints[filename] = fingerprints
             # Written after every recording so an interrupt costs the one in
             # flight, not the batch. Atomic, so a reader never sees it partial.
             try:
-                _write_netmet(out_dir, all_results)
+                _write_netmet(out_dir, all_results, all_fingerprints)
             except OSError as e:
                 log(f"  Warning: could not checkpoint {NETMET_FILENAME}: {e}")
         progress.item_done(filename)
@@ -934,7 +1120,7 @@ def _run_step4_network_metrics(
     check_cancel(should_cancel)
     map_recordings(
         _step4_compute_one,
-        [(params, rec, str(output_root)) for rec in todo],
+        [(params, rec, str(output_root), previous.get(rec.filename)) for rec in todo],
         mem_per_task_gb=_STEP4_MEM_PER_TASK_GB,
         max_workers=params.recording_workers,
         on_result=_emit_computed,
@@ -982,7 +1168,7 @@ def _run_step4_network_metrics(
     try:
         # Already checkpointed after each recording; written once more so a run
         # that skipped every recording still leaves the file in a known state.
-        _write_netmet(out_dir, all_results)
+        _write_netmet(out_dir, all_results, all_fingerprints)
 
         # Export CSVs like MATLAB's saveNetMet.m
         rec_rows = []
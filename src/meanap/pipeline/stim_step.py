@@ -25,7 +25,7 @@ from meanap.pipeline.io import (
     RAW_EXTENSIONS,
     find_raw_file,
     load_raw_recording,
-    load_spike_times_npz,
+    load_spike_trains,
 )
 from meanap.pipeline.channel_layout import get_coords_from_layout
 from meanap.pipeline.progress import RunProgress
@@ -111,8 +111,8 @@ def run_stim_analysis(
             continue
 
         # Python step-1 spikes for this recording, filtered to the analysis method
-        spikes_full = load_spike_times_npz(npz_path)
-        spikes = {c: {method: m[method]} for c, m in spikes_full.items() if method in m}
+        trains = load_spike_trains(npz_path, method)
+        spikes = {c: {method: times} for c, times in trains.as_dict().items()}
         spikes = clean_spikes_from_stim(spikes, stim_info, sp_params)
 
         info = {"FileName": rec.filename, "Grp": rec.group, "DIV": rec.div,
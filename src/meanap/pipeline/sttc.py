@@ -17,11 +17,12 @@ import numpy as np
 # with numba when available (same optional pattern as ``null_models.py``); the
 # pure-Python fallback is identical, just slower.
 try:
-    from numba import njit
+    from numba import njit, prange
 
     _HAVE_NUMBA = True
 except Exception:  # pragma: no cover - numba optional / version-gated
     _HAVE_NUMBA = False
+    prange = range
 
 
 def _run_p_impl(t1: np.ndarray, t2: np.ndarray, dt: float) -> int:
@@ -112,6 +113,196 @@ def sttc_pair(spike_times_1: np.ndarray, spike_times_2: np.ndarray, dt: float,
     return 0.5 * (pa - tb) / (1 - tb * pa) + 0.5 * (pb - ta) / (1 - ta * pb)
 
 
+# ── All-pairs engine ─────────────────────────────────────────────────────────
+#
+# ``get_sttc`` used to call ``sttc_pair`` once per channel pair: two ``_run_t``
+# and two ``_run_p`` calls each, i.e. ~2000 Python round trips for a 64-channel
+# MEA and ~500k for a 1000-ROI CAT-NAP recording. The tiling term ``T`` only
+# depends on one train, so it is computed once per channel, and the upper
+# triangle is then filled in one compiled pass over a flat (CSR-style) spike
+# buffer. The arithmetic is the same as ``sttc_pair``'s, in the same order, so
+# the two paths agree bit for bit — ``sttc_pair`` stays as the reference.
+#
+# Several lags are computed in the same pass. For sorted trains ``run_P``'s
+# pointer counts a spike exactly when its nearest neighbour in the other train
+# is within ``dt`` (the skipped spikes are all more than ``dt`` behind it, and
+# the spike it stops at is the first one not behind it), so one merge that
+# finds each spike's nearest-neighbour distance gives the count at every lag.
+# Pairs with an unsorted train — possible on the CAT-NAP path — keep the
+# literal per-lag ``run_P``.
+
+
+def pack_spike_times(
+    spike_times_dict: dict[int, np.ndarray], n_channels: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Flatten per-channel spike trains into one ``(times, offsets)`` buffer.
+
+    Channel ``ch``'s train is ``times[offsets[ch]:offsets[ch + 1]]``, in the
+    order it was given — *not* re-sorted, since ``run_P`` is order-dependent
+    (see :func:`_run_p_impl`). Missing channels are empty.
+    """
+    trains = [np.asarray(spike_times_dict.get(ch, np.array([])), dtype=np.float64).ravel()
+              for ch in range(n_channels)]
+    offsets = np.zeros(n_channels + 1, dtype=np.int64)
+    if trains:
+        np.cumsum([len(t) for t in trains], out=offsets[1:])
+        times = np.concatenate(trains) if offsets[-1] else np.empty(0, dtype=np.float64)
+    else:
+        times = np.empty(0, dtype=np.float64)
+    return times, offsets
+
+
+def tiling_fractions(
+    times: np.ndarray, offsets: np.ndarray, dt: float, t_start: float, t_end: float,
+) -> np.ndarray:
+    """Per-channel tiling fraction ``T_A`` (``run_T / (t_end - t_start)``) of a
+    packed buffer; 0 for empty channels (whose pairs are NaN regardless)."""
+    t = t_end - t_start
+    n = len(offsets) - 1
+    out = np.zeros(n)
+    for ch in range(n):
+        s, e = offsets[ch], offsets[ch + 1]
+        if e > s:
+            out[ch] = _run_t(dt, t_start, t_end, times[s:e]) / t
+    return out
+
+
+def _sorted_channels(times: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """Per channel of a packed buffer, whether its train is in ascending order."""
+    ok = np.ones(len(offsets) - 1, dtype=np.bool_)
+    if len(times) > 1:
+        drops = np.flatnonzero(np.diff(times) < 0) + 1
+        ch = np.searchsorted(offsets, drops, side="right") - 1
+        # A drop onto a channel's first spike is just the next channel starting.
+        ok[ch[drops != offsets[ch]]] = False
+    return ok
+
+
+def _nearest_counts_impl(t1, t2, dts, counts):
+    """``counts[l] +=`` how many spikes of ``t1`` have a spike of ``t2`` within
+    ``dts[l]`` — ``run_P`` at every lag in one merge. Both trains sorted."""
+    n2 = t2.shape[0]
+    j = 0
+    for i in range(t1.shape[0]):
+        x = t1[i]
+        while j < n2 and t2[j] < x:
+            j += 1
+        d = np.inf
+        if j > 0:
+            d = abs(x - t2[j - 1])
+        if j < n2:
+            d = min(d, abs(x - t2[j]))
+        for lag in range(dts.shape[0]):
+            if d <= dts[lag]:
+                counts[lag] += 1
+
+
+_nearest_counts = njit(cache=True)(_nearest_counts_impl) if _HAVE_NUMBA else _nearest_counts_impl
+
+
+def _sttc_stack_impl(times, offsets, is_sorted, tiling, dts, rows, cols, out):
+    """STTC of the listed pairs ``(rows[p], cols[p])`` at every lag into
+    ``out[:, p]``; pairs with an empty train are left untouched. Pairs run in
+    parallel when compiled, each writing only its own column."""
+    n_lags = dts.shape[0]
+    for p in prange(rows.shape[0]):
+        i = rows[p]
+        j = cols[p]
+        s1 = offsets[i]
+        n1 = offsets[i + 1] - s1
+        s2 = offsets[j]
+        n2 = offsets[j + 1] - s2
+        if n1 == 0 or n2 == 0:
+            continue
+        t1 = times[s1:s1 + n1]
+        t2 = times[s2:s2 + n2]
+        counts = np.zeros((2, n_lags), dtype=np.int64)
+        if is_sorted[i] and is_sorted[j]:
+            _nearest_counts(t1, t2, dts, counts[0])
+            _nearest_counts(t2, t1, dts, counts[1])
+        else:
+            for lag in range(n_lags):
+                counts[0, lag] = _run_p_jit(t1, t2, dts[lag])
+                counts[1, lag] = _run_p_jit(t2, t1, dts[lag])
+        for lag in range(n_lags):
+            ta = tiling[lag, i]
+            tb = tiling[lag, j]
+            pa = counts[0, lag] / n1
+            pb = counts[1, lag] / n2
+            out[lag, p] = 0.5 * (pa - tb) / (1 - tb * pa) + 0.5 * (pb - ta) / (1 - ta * pb)
+
+
+# ``error_model="numpy"``: a degenerate pair (a train tiling the whole
+# recording) divides by zero, which must give inf/NaN as in ``sttc_pair``
+# rather than raise.
+_sttc_stack = (
+    njit(cache=True, parallel=True, error_model="numpy")(_sttc_stack_impl)
+    if _HAVE_NUMBA else _sttc_stack_impl
+)
+
+
+def sttc_pairs_stack(
+    times: np.ndarray, offsets: np.ndarray, dts, t_start: float, t_end: float,
+    rows: np.ndarray, cols: np.ndarray, tiling: np.ndarray | None = None,
+) -> np.ndarray:
+    """Raw STTC of selected channel pairs of a packed buffer (see
+    :func:`pack_spike_times`) at each lag in ``dts``: ``(n_lags, n_pairs)``, NaN
+    where a train is empty. Pass ``tiling`` (``(n_lags, n_channels)``) to reuse
+    precomputed :func:`tiling_fractions`."""
+    dts = np.atleast_1d(np.asarray(dts, dtype=np.float64))
+    if tiling is None:
+        tiling = np.array([tiling_fractions(times, offsets, dt, t_start, t_end) for dt in dts])
+    times = np.ascontiguousarray(times, dtype=np.float64)
+    offsets = np.ascontiguousarray(offsets, dtype=np.int64)
+    out = np.full((len(dts), len(rows)), np.nan)
+    _sttc_stack(times, offsets, _sorted_channels(times, offsets),
+                np.ascontiguousarray(tiling, dtype=np.float64).reshape(len(dts), -1), dts,
+                np.ascontiguousarray(rows, dtype=np.int64),
+                np.ascontiguousarray(cols, dtype=np.int64), out)
+    return out
+
+
+def sttc_stack(
+    times: np.ndarray, offsets: np.ndarray, dts, t_start: float, t_end: float,
+    tiling: np.ndarray | None = None,
+) -> np.ndarray:
+    """Raw pairwise STTC of a packed buffer at each lag in ``dts``, as an
+    ``(n_lags, n, n)`` stack from one pass over the trains.
+
+    Unlike :func:`get_sttc` the result is *not* cleaned: the diagonal and any
+    pair with an empty train are NaN, and negative values are kept.
+    """
+    n = len(offsets) - 1
+    n_lags = len(np.atleast_1d(dts))
+    rows, cols = np.triu_indices(n, k=1)
+    out = np.full((n_lags, n, n), np.nan)
+    vals = sttc_pairs_stack(times, offsets, dts, t_start, t_end, rows, cols, tiling=tiling)
+    out[:, rows, cols] = vals
+    out[:, cols, rows] = vals
+    return out
+
+
+def sttc_matrix(
+    times: np.ndarray, offsets: np.ndarray, dt: float, t_start: float, t_end: float,
+    tiling: np.ndarray | None = None,
+) -> np.ndarray:
+    """:func:`sttc_stack` at the single lag ``dt``: an ``(n, n)`` matrix;
+    ``tiling`` is that lag's :func:`tiling_fractions`."""
+    return sttc_stack(times, offsets, [dt], t_start, t_end,
+                      tiling=None if tiling is None else np.asarray(tiling)[None])[0]
+
+
+def sttc_pairs(
+    times: np.ndarray, offsets: np.ndarray, dt: float, t_start: float, t_end: float,
+    rows: np.ndarray, cols: np.ndarray, tiling: np.ndarray | None = None,
+) -> np.ndarray:
+    """Raw STTC of selected channel pairs of a packed buffer — the same values
+    :func:`sttc_matrix` gives at ``[rows, cols]``, for when only some pairs are
+    still needed. NaN where a train is empty."""
+    return sttc_pairs_stack(times, offsets, [dt], t_start, t_end, rows, cols,
+                            tiling=None if tiling is None else np.asarray(tiling)[None])[0]
+
+
 def get_sttc(
     spike_times_dict: dict[int, np.ndarray],
     n_channels: int,
@@ -123,18 +314,29 @@ def get_sttc(
     Negative values and NaNs (including the diagonal, which is never
     computed) are zeroed, matching MATLAB's
     ``adjM(adjM<0)=0; adjM(isnan(adjM))=0;``.
+
+    Computed by the batched engine (:func:`sttc_stack`); identical to calling
+    :func:`sttc_pair` on every pair.
     """
-    dt = lag_ms / 1000.0
-    adj_m = np.full((n_channels, n_channels), np.nan)
+    times, offsets = pack_spike_times(spike_times_dict, n_channels)
+    return get_sttc_packed(times, offsets, lag_ms, duration_s)
 
-    times = [np.asarray(spike_times_dict.get(ch, np.array([]))) for ch in range(n_channels)]
 
-    for i in range(n_channels):
-        for j in range(i + 1, n_channels):
-            coef = sttc_pair(times[i], times[j], dt, 0.0, duration_s)
-            adj_m[i, j] = coef
-            adj_m[j, i] = coef
+def get_sttc_stack(
+    times: np.ndarray, offsets: np.ndarray, lags_ms, duration_s: float,
+) -> np.ndarray:
+    """:func:`get_sttc` at every lag in ``lags_ms`` on a packed buffer (see
+    :func:`pack_spike_times`): an ``(n_lags, n, n)`` stack, from one pass."""
+    adj_m = sttc_stack(times, offsets, np.asarray(lags_ms, dtype=np.float64) / 1000.0,
+                       0.0, duration_s)
 
     adj_m[adj_m < 0] = 0.0
     adj_m[np.isnan(adj_m)] = 0.0
     return adj_m
+
+
+def get_sttc_packed(
+    times: np.ndarray, offsets: np.ndarray, lag_ms: float, duration_s: float,
+) -> np.ndarray:
+    """:func:`get_sttc` on an already packed buffer (see :func:`pack_spike_times`)."""
+    return get_sttc_stack(times, offsets, [lag_ms], duration_s)[0]
@@ -0,0 +1,561 @@
+"""Spike detection over a recording in time windows.
+
+:func:`~meanap.pipeline.spike_detection.detect_spikes_recording` filters each
+channel and takes its wavelet transform over the whole recording at once, so
+a thread holds several full-length float64 copies of its channel — the raw
+cast, the filtered trace, one CWT row per scale. With
+``SpikeDetectionParams.chunk_s`` set it comes here instead, and each channel
+is processed in windows of that length, read with a margin either side for
+the wavelet's support and peak alignment. Memory is then constant in
+recording length: a batch of channels times one window.
+
+Nothing in either detector is local, though. The bandpass filter runs forward
+and back over the whole trace (:class:`_ExactFilter` carries its state across
+window boundaries, so a filtered window is bit for bit the whole-trace one),
+and the thresholds are statistics of the whole channel — the filtered trace's
+median and MAD, and per CWT scale its mean, MAD and mean supra-threshold
+coefficient. Each is gathered over sweeps through the recording: sums as they
+go, medians exactly, by narrowing a histogram until the middle values are few
+enough to collect (:class:`_ExactMedian`). Once every threshold is known, a
+sweep finds the spikes — a run of detections straddling a window edge is
+carried across it, and ``parse()``'s merge loop runs over the stream — and a
+last one aligns them. That is about ten passes over the data against the
+whole-channel path's one: time traded for memory, for recordings too long to
+detect otherwise.
+
+Only the sums are not the whole-channel path's to the bit — NumPy sums a whole
+array pairwise, this adds up per-window sums — so a threshold can differ in its
+last bits, and only a sample within that of it could be judged differently.
+``python/test_windowed_detection.py`` checks spike times and waveforms are
+identical to the whole-channel result.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy.signal import lfilter, lfilter_zi
+
+from meanap.pipeline.io import RawRecording
+from meanap.pipeline.spike_detection import (
+    _ALIGN_WIN,
+    SpikeDetectionParams,
+    _butter_bandpass,
+    _cwt_bior15,
+    _determine_scales,
+    _EventMerger,
+    _get_bior15_intwave,
+    align_peaks,
+)
+
+# align_peaks' waveform half-width.
+_WAVEFORM_WIDTH = 25
+
+#: Bins per histogram when narrowing in on a median, and how few values a
+#: bin must hold before they are collected instead.
+_MEDIAN_BINS = 1 << 16
+_MEDIAN_COLLECT = 1 << 16
+
+# detect_spikes_wavelet's Lmax.
+_LMAX = 36.7368
+
+
+class _ExactFilter:
+    """``bandpass_filter`` — scipy's ``filtfilt`` — of one channel, any stretch at a time.
+
+    filtfilt runs the filter forward over the oddly extended trace, then
+    backward from its far end, so a sample of the output depends on the whole
+    recording; and a band edge at or above Nyquist (clipped, as 8 kHz is at
+    12.5 kHz) leaves the filter a pole all but on the unit circle, whose
+    influence never decays within a recording. So rather than discard a margin
+    of transient, two sweeps record both passes' state at every window
+    boundary — forward, then backward through the windows in reverse — and
+    any stretch is then filtered from the nearest boundaries out: ``lfilter``
+    with a carried state is the same recurrence, so the output is bit for bit
+    the whole-trace one.
+    """
+
+    def __init__(self, b: np.ndarray, a: np.ndarray, n: int, window: int,
+                 head: np.ndarray, tail: np.ndarray):
+        self.b, self.a, self.n, self.window = b, a, n, window
+        zi = lfilter_zi(b, a)
+        pad = _padlen(b, a)
+        # filtfilt's odd extension at each end, and its forward pass's state.
+        left = 2 * head[0] - head[pad:0:-1]
+        _, state = lfilter(b, a, left, zi=zi * left[0])
+        self._forward: dict[int, np.ndarray] = {0: state}
+        self._backward: dict[int, np.ndarray] = {}
+        self._tail = 2 * tail[-1] - tail[-2:-(pad + 2):-1]
+        self._zi = zi
+
+    def forward(self, x: np.ndarray, start: int) -> None:
+        """Forward sweep, windows in order."""
+        stop = start + len(x)
+        _, self._forward[stop] = lfilter(self.b, self.a, x, zi=self._forward[start])
+
+    def backward(self, x: np.ndarray, start: int) -> None:
+        """Backward sweep, windows in reverse order after the forward one."""
+        stop = start + len(x)
+        if stop == self.n:
+            right, _ = lfilter(self.b, self.a, self._tail, zi=self._forward[stop])
+            _, self._backward[stop] = lfilter(self.b, self.a, right[::-1],
+                                              zi=self._zi * right[-1])
+        y, _ = lfilter(self.b, self.a, x, zi=self._forward[start])
+        _, self._backward[start] = lfilter(self.b, self.a, y[::-1],
+                                           zi=self._backward[stop])
+
+    def span(self, lo: int, hi: int) -> tuple[int, int]:
+        """The boundaries to read from to filter ``[lo, hi)``."""
+        return lo // self.window * self.window, min(self.n, -(-hi // self.window) * self.window)
+
+    def filter(self, x: np.ndarray, first: int, lo: int, hi: int) -> np.ndarray:
+        """The filtered trace over ``[lo, hi)``, from ``x`` read over :meth:`span`."""
+        y, _ = lfilter(self.b, self.a, x, zi=self._forward[first])
+        y, _ = lfilter(self.b, self.a, y[::-1], zi=self._backward[first + len(x)])
+        return y[::-1][lo - first:hi - first]
+
+
+def _padlen(b: np.ndarray, a: np.ndarray) -> int:
+    # filtfilt's default padding.
+    return 3 * max(len(a), len(b))
+
+
+class _ExactMedian:
+    """``np.median`` of values that arrive a window at a time, over repeated passes.
+
+    A first pass counts the values and finds their range; each later pass
+    histograms the part of the range still holding the middle value(s) and
+    keeps only the bin they fall in, until that bin holds few enough values to
+    collect. Every bin test is a comparison against the same edges, so each
+    value lands in exactly one bin however the windows split the data.
+    """
+
+    def __init__(self):
+        self.value: float | None = None
+        self._n = 0
+        self._lo = np.inf
+        self._hi = -np.inf
+        self._ranks: list[_Rank] | None = None
+
+    @property
+    def done(self) -> bool:
+        return self.value is not None
+
+    def feed(self, x: np.ndarray) -> None:
+        if self._ranks is None:
+            if x.size:
+                self._n += x.size
+                self._lo = min(self._lo, float(x.min()))
+                self._hi = max(self._hi, float(x.max()))
+            return
+        for rank in self._ranks:
+            rank.feed(x)
+
+    def end_pass(self) -> None:
+        if self._ranks is None:
+            if self._n == 0:
+                self.value = float("nan")
+                return
+            # One middle rank for an odd count, two for an even one — which
+            # np.median averages.
+            wanted = sorted({(self._n - 1) // 2, self._n // 2})
+            self._ranks = [_Rank(k, self._lo, self._hi) for k in wanted]
+        else:
+            for rank in self._ranks:
+                rank.end_pass()
+        if all(rank.value is not None for rank in self._ranks):
+            values = [rank.value for rank in self._ranks]
+            self.value = float(values[0] if len(values) == 1 else np.mean(values))
+
+
+class _Rank:
+    """The ``k``-th smallest (0-based) of a stream of values within ``[lo, hi]``."""
+
+    def __init__(self, k: int, lo: float, hi: float):
+        self.k = k
+        self.value: float | None = None
+        # Half-open from here on, so every bin test is lo <= v < hi.
+        self._lo, self._hi = lo, float(np.nextafter(hi, np.inf))
+        self._collect = False
+        self._start_pass()
+
+    def _start_pass(self) -> None:
+        if np.nextafter(self._lo, np.inf) >= self._hi:
+            self.value = self._lo  # a single representable value left
+            return
+        self._below = 0
+        if self._collect:
+            self._values = np.zeros(0)
+            self._counts = np.zeros(0, dtype=np.int64)
+        else:
+            self._edges = np.linspace(self._lo, self._hi, _MEDIAN_BINS + 1)
+            self._counts = np.zeros(_MEDIAN_BINS, dtype=np.int64)
+
+    def feed(self, x: np.ndarray) -> None:
+        if self.value is not None:
+            return
+        self._below += int(np.count_nonzero(x < self._lo))
+        inside = x[(x >= self._lo) & (x < self._hi)]
+        if self._collect:
+            values, counts = np.unique(inside, return_counts=True)
+            self._values, where = np.unique(np.concatenate([self._values, values]),
+                                            return_inverse=True)
+            self._counts = np.bincount(where, np.concatenate([self._counts, counts]),
+                                       minlength=len(self._values)).astype(np.int64)
+        else:
+            bins = np.searchsorted(self._edges, inside, side="right") - 1
+            self._counts += np.bincount(bins, minlength=_MEDIAN_BINS)
+
+    def end_pass(self) -> None:
+        if self.value is not None:
+            return
+        r = self.k - self._below
+        b = int(np.searchsorted(np.cumsum(self._counts), r, side="right"))
+        if self._collect:
+            self.value = float(self._values[b])
+            return
+        lo, hi = float(self._edges[b]), float(self._edges[b + 1])
+        # A bin no narrower than the interval means a range too small to split
+        # further — a handful of representable values — so collect those too.
+        self._collect = (int(self._counts[b]) <= _MEDIAN_COLLECT
+                         or (lo, hi) == (self._lo, self._hi))
+        self._lo, self._hi = lo, hi
+        self._start_pass()
+
+
+class _Window:
+    """One window of a channel: filtered over ``[lo, hi)``, valid over ``[start, stop)``."""
+
+    def __init__(self, start: int, stop: int, lo: int, filtered: np.ndarray):
+        self.start, self.stop, self.lo = start, stop, lo
+        self.filtered = filtered
+        self._cwt: dict[str, np.ndarray] = {}
+
+    @property
+    def core(self) -> np.ndarray:
+        return self.filtered[self.start - self.lo:self.stop - self.lo]
+
+    def cwt(self, wname: str, scales: np.ndarray, mean: float) -> np.ndarray:
+        """The channel's CWT over ``[start, stop)``, of the mean-subtracted trace
+        as detect_spikes_wavelet takes it."""
+        if wname not in self._cwt:
+            c = _cwt_bior15(self.filtered - mean, scales.astype(float))
+            self._cwt[wname] = c[:, self.start - self.lo:self.stop - self.lo]
+        return self._cwt[wname]
+
+
+class _WaveletStats:
+    """detect_spikes_wavelet's per-scale thresholds for one channel, a pass at a time."""
+
+    def __init__(self, wname: str, params: SpikeDetectionParams, fs: float, n: int):
+        self.wname = wname
+        self.scales = _determine_scales(wname, params.wid_ms, fs, params.n_scales)
+        self.n = n
+        self.cost = params.cost_list[0] * _LMAX
+        ns = len(self.scales)
+        self._sums: np.ndarray | None = None
+        self._row_mean: np.ndarray | None = None
+        self._sigma = [_ExactMedian() for _ in range(ns)]
+        self._count = np.zeros(ns, dtype=np.int64)
+        self._abs_sum = np.zeros(ns)
+        #: Per scale, the coefficient a detection must exceed; None for a scale
+        #: that contributes nothing (MAD of zero).
+        self.dth: list[float | None] | None = None
+
+    @property
+    def done(self) -> bool:
+        return self.dth is not None
+
+    def feed(self, w: _Window, mean: float) -> None:
+        c = w.cwt(self.wname, self.scales, mean)
+        if self._row_mean is None:
+            sums = c.sum(axis=1)
+            self._sums = sums if self._sums is None else self._sums + sums
+            return
+        if not all(m.done for m in self._sigma):
+            for i, median in enumerate(self._sigma):
+                if not median.done:
+                    # MATLAB: median(abs(c(i,1:round(W(i)):end) - mean(c(i,:))))
+                    stride = max(1, int(round(self.scales[i])))
+                    first = (-w.start) % stride
+                    median.feed(np.abs(c[i, first::stride] - self._row_mean[i]))
+            return
+        for i, thj in enumerate(self._thj):
+            if thj is not None:
+                above = np.abs(c[i]) > thj
+                self._count[i] += int(np.count_nonzero(above))
+                self._abs_sum[i] += float(np.abs(c[i][above]).sum())
+
+    def end_pass(self) -> None:
+        if self._row_mean is None:
+            self._row_mean = self._sums / self.n
+            return
+        if not all(m.done for m in self._sigma):
+            for median in self._sigma:
+                if not median.done:
+                    median.end_pass()
+            if all(m.done for m in self._sigma):
+                self._sigma_j = [m.value / 0.6745 for m in self._sigma]
+                self._thj = [None if s == 0 else s * np.sqrt(2 * np.log(self.n))
+                             for s in self._sigma_j]
+            return
+        # As detect_spikes_wavelet: liberal option, Mj from the coefficients
+        # over the hard threshold, or the threshold itself when there are none.
+        dth: list[float | None] = []
+        for i, thj in enumerate(self._thj):
+            if thj is None:
+                dth.append(None)
+                continue
+            sigma = self._sigma_j[i]
+            if self._count[i] == 0:
+                mj, ps = thj, 1.0 / self.n
+            else:
+                mj = self._abs_sum[i] / self._count[i]
+                ps = self._count[i] / self.n
+            pn = 1.0 - ps
+            d = mj / 2 + sigma**2 / mj * (self.cost + np.log(pn / ps))
+            dth.append(abs(d) * (d >= 0))
+        self.dth = dth
+
+
+class _WaveletEvents:
+    """detect_spikes_wavelet's detection and ``parse()``, a window at a time."""
+
+    def __init__(self, stats: _WaveletStats, mean: float, fs: float,
+                 wid_ms: tuple[float, float]):
+        self.stats = stats
+        self.mean = mean
+        self.merger = _EventMerger(max(1, round(0.1 * fs / 1000.0)),
+                                   max(1, round(np.mean(wid_ms) * fs / 1000.0)))
+        self._previous = 0
+        self._lead: int | None = None
+
+    def feed(self, w: _Window) -> None:
+        c = w.cwt(self.stats.wname, self.stats.scales, self.mean)
+        # ct(ct<0)=0 after keeping |c| > DTh leaves exactly c > DTh, DTh >= 0.
+        io = np.zeros(w.stop - w.start, dtype=np.int8)
+        for i, dth in enumerate(self.stats.dth):
+            if dth is not None:
+                io |= c[i] > dth
+        if w.start == 0:
+            io[0] = 0
+        if w.stop == self.stats.n:
+            io[-1] = 0
+        # parse(): runs of ones, as (last zero before, last one) pairs, with a
+        # run left open at the window's end carried into the next.
+        steps = np.diff(np.concatenate(([self._previous], io)))
+        leads = (np.flatnonzero(steps == 1) + w.start - 1).tolist()
+        lags = (np.flatnonzero(steps == -1) + w.start - 1).tolist()
+        if self._lead is not None:
+            leads.insert(0, self._lead)
+        self._lead = leads.pop() if len(leads) > len(lags) else None
+        for lead, lag in zip(leads, lags):
+            self.merger.add(int(np.ceil(np.mean([lead, lag]))))
+        self._previous = int(io[-1])
+
+    def frames(self) -> np.ndarray:
+        return self.merger.finish()
+
+
+class _ThresholdEvents:
+    """detect_spikes_threshold's crossings and refractory period, a window at a time."""
+
+    def __init__(self, threshold: float, ref_frames: int):
+        self.threshold = threshold
+        self.ref_frames = ref_frames
+        self._kept: list[int] = []
+
+    def feed(self, w: _Window) -> None:
+        for f in (np.flatnonzero(w.core < self.threshold) + w.start).tolist():
+            if not self._kept or f > self._kept[-1] + self.ref_frames:
+                self._kept.append(f)
+
+    def frames(self) -> np.ndarray:
+        return np.array(self._kept, dtype=int)
+
+
+class _ChannelScan:
+    """Everything one channel's windowed detection has learnt so far.
+
+    Statistics are fed on every pass until all are known (``stage`` ``"stats"``),
+    then one pass detects spikes (``"detect"``) and one aligns them
+    (``"align"``), after which the channel is ``"done"``.
+    """
+
+    def __init__(self, ch_idx: int, n: int, fs: float, params: SpikeDetectionParams,
+                 methods: list[str]):
+        self.ch_idx, self.n, self.fs, self.params = ch_idx, n, fs, params
+        self.methods = methods
+        self.multipliers = {m: float(m[3:].replace("p", ".")) for m in methods
+                            if m.startswith("thr")}
+        self.wavelets = {m: _WaveletStats(m.replace("p", "."), params, fs, n)
+                         for m in methods if not m.startswith("thr")}
+        self.stage = "stats"
+        self._sum = 0.0
+        self.mean: float | None = None
+        # median(trace) for the thresholds; median(|trace - mean|) for them and
+        # for align_peaks' artifact limits.
+        self.median = _ExactMedian() if self.multipliers else None
+        self.mad = _ExactMedian()
+        self._events: dict = {}
+        self._frames: dict[str, np.ndarray] = {}
+        self._aligned: dict[str, tuple[list, list]] = {m: ([], []) for m in methods}
+
+    @property
+    def noise(self) -> float:
+        return self.mad.value / 0.6745
+
+    def feed(self, w: _Window) -> None:
+        if self.stage == "detect":
+            for events in self._events.values():
+                events.feed(w)
+        elif self.stage == "align":
+            self._align(w)
+        elif self.mean is None:
+            self._sum += float(w.core.sum())
+        else:
+            if not self.mad.done:
+                self.mad.feed(np.abs(w.core - self.mean))
+            for stats in self.wavelets.values():
+                if not stats.done:
+                    stats.feed(w, self.mean)
+        if self.stage == "stats" and self.median is not None and not self.median.done:
+            self.median.feed(w.core)
+
+    def end_pass(self) -> None:
+        if self.stage == "detect":
+            self._frames = {m: e.frames() for m, e in self._events.items()}
+            self.stage = "align"
+            return
+        if self.stage == "align":
+            self.stage = "done"
+            return
+        if self.mean is None:
+            self.mean = self._sum / self.n
+        else:
+            if not self.mad.done:
+                self.mad.end_pass()
+            for stats in self.wavelets.values():
+                if not stats.done:
+                    stats.end_pass()
+        if self.median is not None and not self.median.done:
+            self.median.end_pass()
+        if (self.mad.done and (self.median is None or self.median.done)
+                and all(stats.done for stats in self.wavelets.values())):
+            ref = int(round(self.params.ref_period_ms * 1e-3 * self.fs))
+            self._events = {
+                m: (_WaveletEvents(self.wavelets[m], self.mean, self.fs,
+                                   self.params.wid_ms)
+                    if m in self.wavelets else _ThresholdEvents(self.threshold(m), ref))
+                for m in self.methods}
+            self.stage = "detect"
+
+    def threshold(self, m: str) -> float:
+        return self.median.value - self.multipliers[m] * self.noise
+
+    def _align(self, w: _Window) -> None:
+        for m, frames in self._frames.items():
+            i, j = np.searchsorted(frames, [w.start, w.stop])
+            if i == j:
+                continue
+            aligned, waves = align_peaks(
+                frames[i:j] - w.lo, w.filtered, win=_ALIGN_WIN,
+                min_peak_thr_mult=self.params.min_peak_thr_mult,
+                max_peak_thr_mult=self.params.max_peak_thr_mult,
+                pos_peak_thr_mult=self.params.pos_peak_thr_mult,
+                remove_artifacts=self.params.remove_artifacts,
+                waveform_width=_WAVEFORM_WIDTH,
+                noise=self.noise,
+            )
+            self._aligned[m][0].append(aligned + w.lo)
+            self._aligned[m][1].append(waves)
+
+    def result(self) -> tuple[int, dict[str, tuple[np.ndarray, np.ndarray]], dict[str, float]]:
+        aligned: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        thr_struct: dict[str, float] = {}
+        for m in self.methods:
+            valid_name = m.replace(".", "p")
+            frames, waves = self._aligned[m]
+            if frames:
+                aligned[valid_name] = (np.concatenate(frames), np.vstack(waves))
+            else:
+                aligned[valid_name] = align_peaks(np.array([], dtype=int), np.zeros(0),
+                                                  waveform_width=_WAVEFORM_WIDTH)
+            thr_struct[valid_name] = (self.threshold(m) if m in self.multipliers
+                                      else float("nan"))
+        return self.ch_idx, aligned, thr_struct
+
+
+def detect_channels_windowed(
+    recording: RawRecording,
+    channels: list[int],
+    params: SpikeDetectionParams,
+    methods: list[str],
+    window: int,
+    pool: ThreadPoolExecutor | None = None,
+) -> list[tuple[int, dict[str, tuple[np.ndarray, np.ndarray]], dict[str, float]]]:
+    """Detect spikes on ``channels`` of ``recording``, ``window`` samples at a time.
+
+    Returns, per channel, what detect_spikes_recording's whole-channel path
+    does: ``(ch_idx, {method: (aligned_frames, waveforms)}, {method: threshold})``.
+    The channels are read together a window at a time, so a file whose chunks
+    span channels is decompressed once per pass, not once per channel.
+    """
+    fs, n = recording.fs, recording.n_samples
+    b, a = _butter_bandpass(fs, params.filter_low_pass, params.filter_high_pass)
+    pad = _padlen(b, a)
+    if n <= pad:
+        raise ValueError(f"recording of {n} samples is too short to filter")
+    scans = [_ChannelScan(ch, n, fs, params, methods) for ch in channels]
+    head = recording.read(channels, 0, pad + 1).astype(float)
+    tail = recording.read(channels, n - pad - 1, n).astype(float)
+    filters = [_ExactFilter(b, a, n, window, head[:, j], tail[:, j])
+               for j in range(len(channels))]
+
+    # Wide enough for every CWT coefficient and aligned waveform in a window
+    # to see only samples that are in it.
+    support = 0
+    if scans and scans[0].wavelets:
+        _, x = _get_bior15_intwave()
+        support = max(int(np.floor(stats.scales.max() * (x[-1] - x[0]))) + 3
+                      for stats in scans[0].wavelets.values())
+    margin = support + _ALIGN_WIN + _WAVEFORM_WIDTH + 2
+
+    def each(fn, *args) -> None:
+        list(map(fn, *args) if pool is None else pool.map(fn, *args))
+
+    def columns(start: int, stop: int) -> list[np.ndarray]:
+        traces = recording.read(channels, start, stop).astype(float)
+        return [traces[:, j] for j in range(len(channels))]
+
+    starts = list(range(0, n, window))
+    k = len(channels)
+    for start in starts:
+        each(_ExactFilter.forward, filters, columns(start, min(start + window, n)), [start] * k)
+    for start in reversed(starts):
+        each(_ExactFilter.backward, filters, columns(start, min(start + window, n)), [start] * k)
+
+    def run(scan: _ChannelScan, f: _ExactFilter, x: np.ndarray, first: int,
+            start: int, stop: int, lo: int, hi: int) -> None:
+        scan.feed(_Window(start, stop, lo, f.filter(x, first, lo, hi)))
+
+    pairs = list(zip(scans, filters))
+    while True:
+        active = [(scan, f) for scan, f in pairs if scan.stage != "done"]
+        if not active:
+            break
+        idx = [scan.ch_idx for scan, _ in active]
+        for start in starts:
+            stop = min(start + window, n)
+            lo, hi = max(0, start - margin), min(n, stop + margin)
+            first, last = filters[0].span(lo, hi)
+            traces = recording.read(idx, first, last).astype(float)
+            k = len(active)
+            each(run, *zip(*active), [traces[:, j] for j in range(k)],
+                 [first] * k, [start] * k, [stop] * k, [lo] * k, [hi] * k)
+            del traces
+        for scan, _ in active:
+            scan.end_pass()
+
+    return [scan.result() for scan in scans]
@@ -132,6 +132,26 @@ class RecordingSource:
             self._fetch(entry.path, detail=recording)
         return self.cache.path_for(self.store, rel)
 
+    def resident_limit(self, recordings: Iterable, depth: int = 1) -> int | None:
+        """How many CAT-NAP recordings may be held at once besides the *depth*
+        fetched ahead of them, within the cache budget.
+
+        ``None`` for a local source, which holds nothing. Otherwise the budget
+        over the largest recording's fetch, less the lookahead — at least 1,
+        since one at a time is what pre-flight checked the budget against.
+        Lists folders only; nothing is transferred.
+        """
+        if not self.remote or self.cache is None:
+            return None
+        largest = 0
+        for rec in recordings:
+            rel = f"{self.folder(rec.filename)}/{SUITE2P_SUBDIR}"
+            largest = max(largest, sum(e.size or 0 for e in self.store.list(rel)
+                                       if not e.is_dir and e.name in WANTED))
+        if not largest:
+            return None
+        return max(1, self.cache.budget_bytes // largest - depth)
+
     def raw_file(self, recording: str):
         """A local electrophysiology recording, fetching it if remote.
 
@@ -215,10 +235,13 @@ class RecordingSource:
 
         if not self.remote:
             for rec in recordings:
+                # Fetched outside the yield, so a consumer that stops early
+                # closes the generator instead of having it caught here.
                 try:
-                    yield rec, get(rec.filename)
+                    data = get(rec.filename)
                 except BaseException as exc:  # noqa: BLE001
-                    yield rec, exc
+                    data = exc
+                yield rec, data
             return
 
         def pin(rec) -> None:
@@ -56,6 +56,7 @@ from meanap.pipeline.render import (
     render_activity_figure,
     available_trace_figures, trace_figure_path,
 )
+from meanap.pipeline.parallel import physical_cores, suggest_thread_count
 from meanap.pipeline.render_cache import RenderCache
 from meanap.viewer.controls import (
     comparison_control_schema, control_schema, parse_comparison_overrides,
@@ -78,12 +79,21 @@ class ViewerService:
     ``QWebEngineView`` without going through HTTP at all.
     """
 
-    def __init__(self, source: Path | str):
+    def __init__(self, source: Path | str, *, fast_identity: bool = False,
+                 cache: RenderCache | None = None):
         source = Path(source)
         self._bundle = open_bundle(source) if is_bundle(source) else None
         root = self._bundle.root if self._bundle is not None else source
-        self.ctx = load_context(self._bundle if self._bundle is not None else root)
-        self.cache = RenderCache.in_temp()
+        # The bundle's identity is taken once, here; every cached request
+        # after that reuses it (see RenderContext.identity).
+        self.ctx = load_context(self._bundle if self._bundle is not None else root,
+                                fast_identity=fast_identity)
+        # The per-user cache, not a temporary one: a restart, or anyone else on
+        # this machine opening the same bundle, finds its figures already drawn.
+        # Renders are capped below the core count so a burst of cold thumbnail
+        # requests leaves a core free to keep answering the cheap ones.
+        self.cache = cache if cache is not None else RenderCache.persistent(
+            max_concurrent_renders=suggest_thread_count(physical_cores()))
         self.source = source
 
     def close(self) -> None:
@@ -266,9 +276,9 @@ class ViewerService:
     def activity_figure(self, recording: str, name: str, *,
                         fmt: str, overrides: dict) -> Path:
         """One step-2 activity figure. Cached like the network ones."""
-        from meanap.pipeline.render_cache import bundle_identity, cache_key
+        from meanap.pipeline.render_cache import cache_key
 
-        key = cache_key(bundle_identity(self.ctx.root), f"act:{recording}:{name}",
+        key = cache_key(self.ctx.identity(), f"act:{recording}:{name}",
                         fmt=fmt, dpi=None, overrides=overrides)
         files, _ = self.cache.get_or_render(
             key,
@@ -281,9 +291,9 @@ class ViewerService:
     def spike_check_figure(self, recording: str, name: str, *,
                            fmt: str) -> Path:
         """One step-1 check figure. No overrides — see render_spike_check_figure."""
-        from meanap.pipeline.render_cache import bundle_identity, cache_key
+        from meanap.pipeline.render_cache import cache_key
 
-        key = cache_key(bundle_identity(self.ctx.root), f"chk:{recording}:{name}",
+        key = cache_key(self.ctx.identity(), f"chk:{recording}:{name}",
                         fmt=fmt, dpi=None, overrides={})
         files, _ = self.cache.get_or_render(
             key,
@@ -306,9 +316,9 @@ class ViewerService:
 
     def edge_check_figure(self, recording: str, lag: int, *, fmt: str) -> Path:
         """One step-3 thresholding check. No overrides, like the step-1 ones."""
-        from meanap.pipeline.render_cache import bundle_identity, cache_key
+        from meanap.pipeline.render_cache import cache_key
 
-        key = cache_key(bundle_identity(self.ctx.root),
+        key = cache_key(self.ctx.identity(),
                         f"edge:{recording}:{lag}", fmt=fmt, dpi=None, overrides={})
         files, _ = self.cache.get_or_render(
             key,
@@ -320,9 +330,9 @@ class ViewerService:
     def subnetwork_figure(self, recording: str, lag: int, name: str, *,
                           fmt: str) -> Path:
         """One per-recording cell-type subnetwork figure."""
-        from meanap.pipeline.render_cache import bundle_identity, cache_key
+        from meanap.pipeline.render_cache import cache_key
 
-        key = cache_key(bundle_identity(self.ctx.root),
+        key = cache_key(self.ctx.identity(),
                         f"subnet:{recording}:{lag}:{name}",
                         fmt=fmt, dpi=None, overrides={})
         files, _ = self.cache.get_or_render(